@@ -0,0 +1,166 @@
+# benchmarks/benchmark_barrido_conectividad.py
+"""
+Benchmark del barrido de conectividad masiva de MikroTiks.
+
+Mide el tiempo total de MikroTikService.verificar_conectividad_masiva según el
+tamaño de la flota, contra un "respondedor falso" local (UDP en 127.0.0.1) que
+contesta por los equipos encendidos y calla por los apagados, igual que un ping.
+Solo se sustituye el socket ICMP: el Sondeador arma los ecos, mantiene la
+ventana de sondas en vuelo y expira los timeouts con su código real.
+
+Ejecutar desde la raíz del proyecto:
+    python benchmarks/benchmark_barrido_conectividad.py
+"""
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import create_engine
+
+from infrastructure.database.config import Base, SessionLocal
+from domain.models.mikrotik import MikroTik
+from application.services.mikrotik_service import MikroTikService
+from infrastructure.network.sondeador import ICMP_ECHO_REPLY, Sondeador
+
+# Parámetros del escenario
+TAMANOS_FLOTA = [30, 150, 600, 1500]
+FRACCION_CAIDOS = 1 / 3      # Un tercio de los equipos no responde
+RTT_SIMULADO = 0.005         # Segundos que tarda en responder un equipo encendido
+TIMEOUT_PING = 0.5           # Timeout del ping en el benchmark (en producción son 3 s)
+CONCURRENCIA = 1024
+
+
+class RespondedorFalso:
+    """Servidor UDP que simula la respuesta de ping de una flota de equipos."""
+    
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.ips_encendidas = set()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.direccion = self.sock.getsockname()
+        threading.Thread(target=self._atender, daemon=True).start()
+    
+    def _atender(self):
+        """Contesta cada eco después del RTT simulado, solo si el equipo está encendido."""
+        while True:
+            datos, origen = self.sock.recvfrom(2048)
+            ip, _, eco = datos.partition(b"|")
+            if ip.decode() in self.ips_encendidas:
+                respuesta = ip + b"|" + self._construir_respuesta(eco)
+                threading.Timer(self.rtt, self.sock.sendto, (respuesta, origen)).start()
+    
+    @staticmethod
+    def _construir_respuesta(eco: bytes) -> bytes:
+        """Convierte un echo request en el echo reply que devolvería el equipo."""
+        _, codigo, _, identificador, seq = struct.unpack("!BBHHH", eco[:8])
+        cabecera = struct.pack("!BBHHH", ICMP_ECHO_REPLY, codigo, 0, identificador, seq)
+        checksum = Sondeador._checksum(cabecera + eco[8:])
+        return struct.pack("!BBHHH", ICMP_ECHO_REPLY, codigo, checksum, identificador, seq) + eco[8:]
+
+
+class SocketIcmpFalso:
+    """
+    Socket ICMP datagrama cuyos ecos viajan por UDP hasta el respondedor falso.
+    Solo se sustituye el transporte: el Sondeador arma los paquetes, lleva la
+    ventana de sondas en vuelo y lee las respuestas con su código de producción.
+    """
+    
+    def __init__(self, respondedor: RespondedorFalso):
+        self.respondedor = respondedor
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+    
+    def fileno(self) -> int:
+        return self.sock.fileno()
+    
+    def sendto(self, paquete: bytes, destino) -> int:
+        self.sock.sendto(destino[0].encode() + b"|" + paquete, self.respondedor.direccion)
+        return len(paquete)
+    
+    def recvfrom(self, tamano: int):
+        datos, _ = self.sock.recvfrom(tamano)
+        ip, _, respuesta = datos.partition(b"|")
+        return respuesta, (ip.decode(), 0)
+    
+    def close(self):
+        self.sock.close()
+
+
+class SondeadorFalso(Sondeador):
+    """Sondeador de producción que envía sus ecos por el socket falso."""
+    
+    def __init__(self, respondedor: RespondedorFalso, timeout: float):
+        super().__init__(timeout=timeout)
+        self.respondedor = respondedor
+    
+    def _abrir_socket_icmp(self):
+        return SocketIcmpFalso(self.respondedor), False
+
+
+class MikroTikServiceBenchmark(MikroTikService):
+    """Servicio cuyas sondas van al respondedor falso en lugar de a la red."""
+    
+    def __init__(self, respondedor: RespondedorFalso):
+        super().__init__()
+        self.respondedor = respondedor
+        self.timeout_ping = TIMEOUT_PING
+    
+    def _crear_sondeador(self) -> Sondeador:
+        return SondeadorFalso(self.respondedor, self.timeout_ping)
+
+
+def preparar_flota(engine, tamano: int, respondedor: RespondedorFalso):
+    """Crea una base de datos limpia con 'tamano' MikroTiks activos."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    respondedor.ips_encendidas.clear()
+    
+    with SessionLocal() as db:
+        for i in range(tamano):
+            ip = f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}"
+            db.add(MikroTik(nombre=f"MTK-BENCH-{i:05d}", ip_mikrotik=ip, estado="activo"))
+            if i % round(1 / FRACCION_CAIDOS) != 0:
+                respondedor.ips_encendidas.add(ip)
+        db.commit()
+
+
+def medir(service: MikroTikService, engine, respondedor, tamano: int, concurrencia: int) -> float:
+    """Devuelve el tiempo de pared de un barrido completo."""
+    preparar_flota(engine, tamano, respondedor)
+    inicio = time.perf_counter()
+    resultados = service.verificar_conectividad_masiva(max_concurrencia=concurrencia, detalles=False)
+    duracion = time.perf_counter() - inicio
+    assert resultados["total_verificados"] == tamano
+    return duracion
+
+
+def main():
+    directorio = tempfile.mkdtemp(prefix="bench_barrido_")
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}",
+                           connect_args={"check_same_thread": False})
+    SessionLocal.configure(bind=engine)
+    
+    respondedor = RespondedorFalso(RTT_SIMULADO)
+    service = MikroTikServiceBenchmark(respondedor)
+    
+    print(f"🏁 Barrido de conectividad (timeout {TIMEOUT_PING}s, {FRACCION_CAIDOS:.0%} caídos)")
+    print(f"{'equipos':>8} | {'secuencial (s)':>14} | {f'concurrente x{CONCURRENCIA} (s)':>22}")
+    print("-" * 52)
+    for tamano in TAMANOS_FLOTA:
+        # Con una sola sonda en vuelo el barrido es secuencial: crece linealmente con los timeouts
+        secuencial = medir(service, engine, respondedor, tamano, 1) if tamano <= 150 else None
+        concurrente = medir(service, engine, respondedor, tamano, CONCURRENCIA)
+        texto_secuencial = f"{secuencial:14.2f}" if secuencial is not None else f"{'-':>14}"
+        print(f"{tamano:>8} | {texto_secuencial} | {concurrente:22.2f}")
+
+
+if __name__ == "__main__":
+    main()
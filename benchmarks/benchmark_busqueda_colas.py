@@ -0,0 +1,96 @@
+# benchmarks/benchmark_busqueda_colas.py
+"""
+Benchmark de la búsqueda de colas al modificar el ancho de banda.
+
+Levanta un RouterOS simulado en loopback con 100, 1.000 y 10.000 colas simples
+y compara, por cambio, los bytes intercambiados con el equipo y la latencia de:
+- escaneo: descargar todas las colas ('.id', 'name') y buscar en Python (método anterior)
+- filtro: MikroTikService.modificar_cola con la cola aún fuera de la caché (?name= en el equipo)
+- caché: MikroTikService.modificar_cola sobre colas cuyo .id ya está en la caché
+
+Ejecutar desde la raíz del proyecto:
+    python benchmarks/benchmark_busqueda_colas.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from librouteros import connect
+from sqlalchemy import create_engine
+
+from infrastructure.database.config import Base, SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.network.simulador_routeros import SimuladorRouterOS
+from application.services.mikrotik_service import MikroTikService
+
+# Parámetros del escenario
+TAMANOS = [100, 1_000, 10_000]
+CAMBIOS = 20
+
+
+def modificar_con_escaneo(conexion, nombre_cola: str, limite: str) -> bool:
+    """Método anterior: lista todas las colas y busca la indicada en Python."""
+    colas = list(conexion.path('/queue/simple').select('.id', 'name'))
+    cola = next((cola for cola in colas if cola.get('name') == nombre_cola), None)
+    if cola is None:
+        return False
+    conexion.path('/queue/simple').update(**{'.id': cola['.id'], 'max-limit': limite})
+    return True
+
+
+def medir(simulador, cambiar, nombres) -> tuple:
+    """Devuelve (bytes por cambio, ms por cambio) de aplicar un cambio a cada cola."""
+    simulador.reiniciar_contadores()
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        assert cambiar(nombre)
+    duracion = (time.perf_counter() - inicio) / len(nombres) * 1000
+    bytes_totales = simulador.bytes_enviados + simulador.bytes_recibidos
+    return bytes_totales / len(nombres), duracion
+
+
+def main():
+    directorio = tempfile.mkdtemp(prefix="bench_colas_")
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    
+    with SessionLocal() as db:
+        mikrotik = MikroTik(nombre="CCR-CORE", ip_mikrotik="127.0.0.1",
+                            usuario_acceso="admin", contrasena_acceso="x")
+        db.add(mikrotik)
+        db.commit()
+        mikrotik_id = mikrotik.id
+    
+    rng = random.Random(42)
+    print(f"{'colas':>7} | {'método':>8} | {'bytes/cambio':>12} | {'ms/cambio':>9}")
+    print("-" * 46)
+    for tamano in TAMANOS:
+        with SimuladorRouterOS(colas=tamano) as simulador:
+            nombres = [f"cliente-{numero:05d}" for numero in rng.sample(range(1, tamano + 1), CAMBIOS)]
+            
+            conexion = connect(host=simulador.host, port=simulador.puerto, username="admin", password="x")
+            escaneo = medir(simulador, lambda nombre: modificar_con_escaneo(conexion, nombre, "20480k/20480k"),
+                            nombres)
+            conexion.close()
+            
+            service = MikroTikService()
+            service.puerto_api = simulador.puerto
+            service.probar_conexion(mikrotik_id)  # Sesión ya abierta, como en el uso normal
+            cambiar = lambda nombre: service.modificar_cola(mikrotik_id, nombre, 30)[0]
+            filtro = medir(simulador, cambiar, nombres)
+            cache = medir(simulador, cambiar, nombres)
+            service.pool_api.cerrar_todo()
+        
+        for metodo, (bytes_cambio, ms_cambio) in [("escaneo", escaneo), ("filtro", filtro), ("caché", cache)]:
+            print(f"{tamano:>7} | {metodo:>8} | {bytes_cambio:12,.0f} | {ms_cambio:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
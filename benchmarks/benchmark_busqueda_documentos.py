@@ -0,0 +1,129 @@
+# benchmarks/benchmark_busqueda_documentos.py
+"""
+Benchmark de la búsqueda de documentos con el índice FTS5 (documentos_fts).
+
+Inserta 100.000 documentos (los triggers los indexan a medida que entran) con
+un contenido_json parecido al real: correo, observaciones y, en parte de ellos,
+una imagen en base64. Mide la latencia de búsquedas típicas contra:
+- ILIKE: '%texto%' sobre las siete columnas de texto (lo que hacía search_by_text)
+  y, aparte, también sobre contenido_json
+- FTS5: DocumentoService.buscar (prefijos, ordenado por relevancia, límite 200)
+
+Ejecutar desde la raíz del proyecto:
+    python benchmarks/benchmark_busqueda_documentos.py
+"""
+import base64
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import create_engine, event, insert, or_
+
+from infrastructure.database.config import Base, SessionLocal
+from domain.models.documento import Documento
+from application.services.documento_service import DocumentoService
+
+# Parámetros del escenario
+DOCUMENTOS = 100_000
+LOTE = 5_000
+REPETICIONES = 10
+NOMBRES = ["Juan", "María", "Pedro", "Ana", "Luis", "Carla", "Diego", "Rosa", "Jorge", "Elena"]
+APELLIDOS = ["Pérez", "López", "Gómez", "Díaz", "Núñez", "Ruiz", "Vera", "Paz", "Soto", "Rojas"]
+EMPRESAS = ["Telecomunicaciones", "Agrícola", "Transportes", "Farmacia", "Constructora", "Hotel"]
+BUSQUEDAS = [
+    "CLI-054321",  # Un cliente puntual
+    "Núñez",  # Un apellido frecuente (se corta en el límite)
+    "farmac",  # Prefijo de una palabra
+    "vlan 3017",  # Texto que solo está en contenido_json
+]
+
+
+def documento(numero: int, azar: random.Random) -> dict:
+    """Arma los valores de un documento con datos variados."""
+    cliente = f"{azar.choice(EMPRESAS)} {azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}"
+    contenido = {
+        "correo": f"Estimado cliente {cliente}: se realizó el upgrade de su enlace a "
+                  f"{azar.choice([50, 100, 200])} Mbps.",
+        "detalle": {"observaciones": f"vlan {azar.randrange(100, 4000)} hacia nodo {azar.randrange(1, 500)}"},
+    }
+    if numero % 10 == 0:
+        contenido["topologia_imagen"] = base64.b64encode(azar.randbytes(3_000)).decode()
+    return {
+        "titulo": f"Upgrade {cliente}",
+        "cliente_id": f"CLI-{numero:06d}",
+        "cliente_nombre": cliente,
+        "cliente_direccion": f"Calle {azar.randrange(1, 300)} #{azar.randrange(1, 2000)}",
+        "ancho_banda": "100 Mbps",
+        "tipo_transaccion": azar.choice(["UPGRADE", "DOWNGRADE"]),
+        "tipo_topologia": azar.choice(["IPRAN+MIKROTIK", "IPRAN+RADWIN", "GPON"]),
+        "ingeniero": f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}",
+        "fecha_creacion": datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=numero),
+        "contenido_json": json.dumps(contenido),
+    }
+
+
+def buscar_con_ilike(texto: str, con_contenido: bool) -> int:
+    """Método anterior: '%texto%' en cada columna (no puede usar índices)."""
+    patron = f"%{texto}%"
+    columnas = [Documento.titulo, Documento.cliente_id, Documento.cliente_nombre, Documento.cliente_direccion,
+                Documento.ingeniero, Documento.tipo_transaccion, Documento.tipo_topologia]
+    if con_contenido:
+        columnas.append(Documento.contenido_json)
+    with SessionLocal() as db:
+        return db.query(Documento.id).filter(or_(*[columna.ilike(patron) for columna in columnas])).count()
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Devuelve el tiempo medio en ms de la función."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    directorio = tempfile.mkdtemp(prefix="bench_docs_")
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}",
+                           connect_args={"check_same_thread": False})
+    # El benchmark no necesita durabilidad: solo se mide la consulta
+    event.listen(engine, "connect", lambda conexion, _: conexion.execute("PRAGMA synchronous=OFF"))
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    azar = random.Random(42)
+    
+    print(f"📄 Insertando e indexando {DOCUMENTOS:,} documentos...")
+    inicio = time.perf_counter()
+    with engine.begin() as conexion:
+        for desde in range(0, DOCUMENTOS, LOTE):
+            conexion.execute(insert(Documento), [documento(numero, azar)
+                                                 for numero in range(desde, min(desde + LOTE, DOCUMENTOS))])
+    duracion = time.perf_counter() - inicio
+    print(f"   {duracion:.1f} s ({duracion / DOCUMENTOS * 1e6:.0f} µs por documento, incluida la indexación)")
+    print(f"   Base: {os.path.getsize(os.path.join(directorio, 'bench.db')) / 1e6:.0f} MB")
+    
+    service = DocumentoService()
+    print(f"\n{'Búsqueda':<14}{'Resultados':>12}{'ILIKE (ms)':>12}{'ILIKE+JSON (ms)':>17}{'FTS5 (ms)':>11}")
+    for texto in BUSQUEDAS:
+        ms_ilike = medir(lambda: buscar_con_ilike(texto, False), 1)
+        ms_ilike_json = medir(lambda: buscar_con_ilike(texto, True), 1)
+        ms_fts = medir(lambda: service.buscar(texto), REPETICIONES)
+        resultados = service.buscar(texto)
+        print(f"{texto:<14}{len(resultados):>12}{ms_ilike:>12.0f}{ms_ilike_json:>17.0f}{ms_fts:>11.1f}")
+        assert resultados, f"'{texto}' no encontró documentos"
+    
+    # Editar un documento lo reindexa con el trigger de actualización
+    inicio = time.perf_counter()
+    service.actualizar(1, cliente_nombre="Cliente Renombrado Zeta")
+    print(f"\n🔄 Actualizar y reindexar un documento: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    assert [fila.id for fila in service.buscar("renombrado zeta")] == [1]
+
+
+if __name__ == "__main__":
+    main()
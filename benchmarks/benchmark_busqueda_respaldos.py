@@ -0,0 +1,115 @@
+# benchmarks/benchmark_busqueda_respaldos.py
+"""
+Benchmark de la búsqueda de texto en los respaldos de la flota.
+
+Guarda 10.000 exports de CPEs (~60 líneas cada uno, con listas de direcciones,
+reglas de firewall, VLANs y colas) con RespaldoConfiguracionService, que los
+indexa a medida que llegan, y mide la latencia de búsquedas típicas contra:
+- escaneo: descomprimir cada export y buscar línea por línea en Python (lo que
+  equivale a abrir los exports uno por uno)
+- FTS5: RespaldoConfiguracionService.buscar
+
+Ejecutar desde la raíz del proyecto:
+    python benchmarks/benchmark_busqueda_respaldos.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import create_engine, event
+
+from infrastructure.database.config import Base, SessionLocal
+from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
+
+# Parámetros del escenario
+EQUIPOS = 10_000
+REPETICIONES = 20
+BUSQUEDAS = [
+    "10.66.12.34",  # Una IP puntual, que puede no estar bloqueada en ningún equipo
+    "vlan-id=3017",  # Una VLAN concreta
+    "list=bloqueados",  # Presente en la mayoría de los equipos (se corta en el límite)
+    "comment=\"acceso gestion\"",  # Una regla de firewall concreta
+]
+
+
+def export_cpe(numero: int, azar: random.Random) -> str:
+    """Arma un export de CPE con datos variados por equipo."""
+    lineas = ["# software id = ABCD-1234", "# model = RB951Ui-2HnD", "/interface vlan"]
+    lineas += [f"add interface=ether1 name=vlan{vlan} vlan-id={vlan}"
+               for vlan in azar.sample(range(100, 4000), 3)]
+    lineas.append("/ip address")
+    lineas.append(f"add address=10.{numero // 256 % 256}.{numero % 256}.1/24 interface=bridge")
+    lineas.append("/ip firewall address-list")
+    lineas += [f"add address=10.66.{azar.randrange(256)}.{azar.randrange(256)} list=bloqueados"
+               for _ in range(azar.randrange(0, 15))]
+    lineas.append("/ip firewall filter")
+    lineas += [
+        "add action=accept chain=input comment=\"acceso gestion\" src-address=10.0.0.0/8"
+        if azar.random() < 0.01 else "add action=accept chain=input src-address=10.0.0.0/8",
+        "add action=drop chain=forward src-address-list=bloqueados",
+        "add action=drop chain=input in-interface=ether1",
+    ]
+    lineas.append("/queue simple")
+    lineas += [f"add max-limit={azar.choice(['5M/5M', '10M/10M', '20M/20M'])} name=cliente-{numero}-{i} "
+               f"target=192.168.{i}.0/24" for i in range(azar.randrange(10, 30))]
+    lineas += ["/system identity", f"set name=CPE-{numero:05d}"]
+    return "\n".join(lineas)
+
+
+def buscar_con_escaneo(service, texto):
+    """Método anterior: recorrer el export de cada equipo."""
+    resultados = []
+    for mikrotik_id in range(1, EQUIPOS + 1):
+        export = service.obtener_export(mikrotik_id) or ""
+        resultados += [(mikrotik_id, linea) for linea in export.split("\n") if texto in linea]
+    return resultados
+
+
+def main():
+    directorio = tempfile.mkdtemp(prefix="bench_busqueda_")
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}",
+                           connect_args={"check_same_thread": False})
+    # El benchmark no necesita durabilidad: solo se mide la consulta
+    event.listen(engine, "connect", lambda conexion, _: conexion.execute("PRAGMA synchronous=OFF"))
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    
+    service = RespaldoConfiguracionService()
+    azar = random.Random(42)
+    
+    print(f"📦 Guardando e indexando {EQUIPOS:,} exports...")
+    inicio = time.perf_counter()
+    for mikrotik_id in range(1, EQUIPOS + 1):
+        service.guardar_export(mikrotik_id, export_cpe(mikrotik_id, azar), fecha=1000)
+    duracion = time.perf_counter() - inicio
+    print(f"   {duracion:.1f} s ({duracion / EQUIPOS * 1000:.2f} ms por export, incluida la indexación)")
+    
+    print(f"\n{'Búsqueda':<28}{'Coincidencias':>14}{'Escaneo (ms)':>14}{'FTS5 (ms)':>12}")
+    for texto in BUSQUEDAS:
+        inicio = time.perf_counter()
+        escaneo = buscar_con_escaneo(service, texto)
+        ms_escaneo = (time.perf_counter() - inicio) * 1000
+        
+        inicio = time.perf_counter()
+        for _ in range(REPETICIONES):
+            resultados = service.buscar(texto)
+        ms_fts = (time.perf_counter() - inicio) / REPETICIONES * 1000
+        
+        print(f"{texto:<28}{len(resultados):>14}{ms_escaneo:>14.0f}{ms_fts:>12.1f}")
+        assert ms_fts < 100, f"La búsqueda de '{texto}' tardó {ms_fts:.1f} ms"
+        assert len(resultados) == min(len(escaneo), 200)
+    
+    # Una versión nueva reemplaza las líneas del equipo en el índice
+    inicio = time.perf_counter()
+    service.guardar_export(1, export_cpe(1, azar) + "\n/ip dns\nset servers=9.9.9.9", fecha=2000)
+    print(f"\n🔄 Reindexar un equipo con cambios: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    assert [r["mikrotik_id"] for r in service.buscar("servers=9.9.9.9")] == [1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/benchmark_historial_disponibilidad.py
+"""
+Benchmark de las consultas del historial de disponibilidad.
+
+Carga el historial que tendría una flota tras barrerla cada 'intervalo' segundos
+durante 'dias' días, tal como queda después de consolidar y purgar con las
+retenciones de HistorialDisponibilidadService: resúmenes de 1 hora de todo el
+periodo, de 5 minutos de los últimos días y sondeos crudos de los más recientes.
+Después mide cuánto tarda obtener_resumen para un equipo en ventanas de
+distinto tamaño. Gracias a la clave primaria (equipo, tiempo) el costo depende
+de las filas del equipo consultado, no del tamaño de la flota.
+
+Ejecutar desde la raíz del proyecto (por defecto 5.000 equipos, barridos cada
+5 minutos durante un año; la carga ocupa varios GiB):
+    python benchmarks/benchmark_historial_disponibilidad.py
+    python benchmarks/benchmark_historial_disponibilidad.py --equipos 500 --dias 30
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Agregar src y la raíz del proyecto (config/app_config.py) al path
+sys.path.insert(0, "src")
+sys.path.insert(0, ".")
+
+from sqlalchemy import create_engine
+
+from infrastructure.database.config import Base, SessionLocal, aplicar_perfil_sqlite
+from domain.models.historial_disponibilidad import (
+    ResumenDisponibilidad, RESOLUCION_5_MIN, RESOLUCION_1_HORA
+)
+from application.services.historial_disponibilidad_service import HistorialDisponibilidadService
+
+# Parámetros del escenario (valores por defecto)
+EQUIPOS = 5_000
+DIAS = 365
+INTERVALO_BARRIDO = RESOLUCION_5_MIN
+REPETICIONES = 20
+PLANTILLAS = 4_096  # Resúmenes aleatorios distintos que se reparten entre las filas
+
+
+def resumen_aleatorio(rng, muestras):
+    """Genera las columnas de un resumen con RTTs y pérdidas plausibles."""
+    exitosas = muestras - (rng.random() < 0.05)
+    rtts = [rng.lognormvariate(1.5, 0.6) for _ in range(min(exitosas, 12))]
+    histograma = {}
+    for rtt in rtts:
+        intervalo = ResumenDisponibilidad.intervalo_histograma(rtt)
+        histograma[intervalo] = histograma.get(intervalo, 0) + 1
+    return {
+        "muestras": muestras,
+        "exitosas": exitosas,
+        "perdida_suma": float(muestras - exitosas),
+        "rtt_min": min(rtts) if rtts else None,
+        "rtt_max": max(rtts) if rtts else None,
+        "histograma": ResumenDisponibilidad.codificar_histograma(histograma)
+    }
+
+
+def cargar_historial(service, ahora, equipos, dias, intervalo):
+    """
+    Carga el historial de la flota directamente en las tablas de resúmenes y sondeos.
+    
+    Returns:
+        Dict[str, int]: Filas cargadas en cada nivel
+    """
+    rng = random.Random(42)
+    inicio = ahora - dias * 86400
+    fin_1hora = ahora - ahora % RESOLUCION_1_HORA
+    fin_5min = ahora - ahora % RESOLUCION_5_MIN
+    inicio_5min = max(inicio, fin_5min - service.retencion_5min)
+    inicio_crudo = max(inicio, ahora - service.retencion_crudo)
+    
+    # Generar los resúmenes aleatorios una vez: la carga la domina la base, no random
+    plantillas_1hora = [resumen_aleatorio(rng, RESOLUCION_1_HORA // intervalo) for _ in range(PLANTILLAS)]
+    plantillas_5min = [resumen_aleatorio(rng, max(1, RESOLUCION_5_MIN // intervalo)) for _ in range(PLANTILLAS)]
+    rtts = [rng.lognormvariate(1.5, 0.6) for _ in range(PLANTILLAS)]
+    
+    marcas_1hora = range(inicio - inicio % RESOLUCION_1_HORA, fin_1hora, RESOLUCION_1_HORA)
+    marcas_5min = range(inicio_5min - inicio_5min % RESOLUCION_5_MIN, fin_5min, RESOLUCION_5_MIN)
+    marcas_crudo = range(inicio_crudo - inicio_crudo % intervalo, ahora, intervalo)
+    
+    for mikrotik_id in range(1, equipos + 1):
+        desplazamiento = rng.randrange(PLANTILLAS)
+        service.repository.guardar_resumenes([
+            dict(plantillas_1hora[(desplazamiento + i) % PLANTILLAS],
+                 resolucion=RESOLUCION_1_HORA, mikrotik_id=mikrotik_id, ts=ts)
+            for i, ts in enumerate(marcas_1hora)
+        ])
+        service.repository.guardar_resumenes([
+            dict(plantillas_5min[(desplazamiento + i) % PLANTILLAS],
+                 resolucion=RESOLUCION_5_MIN, mikrotik_id=mikrotik_id, ts=ts)
+            for i, ts in enumerate(marcas_5min)
+        ])
+        service.repository.registrar_sondeos([
+            {"mikrotik_id": mikrotik_id, "ts": ts,
+             "rtt_ms": rtts[(desplazamiento + i) % PLANTILLAS], "perdida": 0.0}
+            for i, ts in enumerate(marcas_crudo)
+        ])
+    
+    return {
+        "1 hora": equipos * len(marcas_1hora),
+        "5 min": equipos * len(marcas_5min),
+        "crudo": equipos * len(marcas_crudo)
+    }
+
+
+def medir(service, mikrotik_id, desde, hasta) -> float:
+    """Devuelve el tiempo medio (ms) de obtener_resumen para una ventana."""
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        resumen = service.obtener_resumen(mikrotik_id, desde, hasta)
+    duracion = (time.perf_counter() - inicio) / REPETICIONES * 1000
+    assert resumen["muestras"] > 0
+    return duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--equipos", type=int, default=EQUIPOS, help="Tamaño de la flota")
+    parser.add_argument("--dias", type=int, default=DIAS, help="Días de historial")
+    parser.add_argument("--intervalo", type=int, default=INTERVALO_BARRIDO,
+                        help="Segundos entre barridos (divisor de 300)")
+    args = parser.parse_args()
+    if RESOLUCION_5_MIN % args.intervalo:
+        parser.error("El intervalo debe dividir a 300 segundos")
+    
+    directorio = tempfile.mkdtemp(prefix="bench_historial_")
+    ruta = os.path.join(directorio, "bench.db")
+    engine = aplicar_perfil_sqlite(create_engine(f"sqlite:///{ruta}"))
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    
+    service = HistorialDisponibilidadService()
+    ahora = int(time.time())
+    
+    inicio = time.perf_counter()
+    filas = cargar_historial(service, ahora, args.equipos, args.dias, args.intervalo)
+    tamano = sum(os.path.getsize(f"{ruta}{sufijo}") for sufijo in ("", "-wal") if os.path.exists(f"{ruta}{sufijo}"))
+    print(f"📦 {args.dias} días de historial de {args.equipos} equipos (barrido cada {args.intervalo}s) "
+          f"cargados en {time.perf_counter() - inicio:.0f}s ({tamano / 2**30:.1f} GiB)")
+    print("   Filas: " + ", ".join(f"{nivel} {cantidad:,}" for nivel, cantidad in filas.items()))
+    
+    print(f"{'ventana':>10} | {'resumen (ms)':>12}")
+    print("-" * 26)
+    ventanas = {"1 hora": 3600, "1 día": 86400, "7 días": 7 * 86400, "30 días": 30 * 86400}
+    ventanas = {nombre: segundos for nombre, segundos in ventanas.items() if segundos < args.dias * 86400}
+    ventanas[f"{args.dias} días"] = args.dias * 86400
+    for nombre, segundos in ventanas.items():
+        duracion = medir(service, args.equipos // 2, ahora - segundos, ahora)
+        print(f"{nombre:>10} | {duracion:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
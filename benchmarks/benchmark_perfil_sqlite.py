@@ -0,0 +1,114 @@
+# benchmarks/benchmark_perfil_sqlite.py
+"""
+Benchmark del perfil de PRAGMAs de SQLite (DATABASE_CONFIG["sqlite_pragmas"]).
+
+Compara una base sin perfil (journal de rollback, synchronous=FULL) con el perfil
+por defecto (WAL, synchronous=NORMAL, mmap, caché, busy_timeout...) en:
+- commits/s: inserciones de una fila con un commit cada una (como el estado de
+  un equipo tras un ping o un cambio desde la interfaz)
+- lectura concurrente: latencia de una consulta de la interfaz mientras otro
+  hilo hace commits sin parar (como un barrido en segundo plano)
+
+Ejecutar desde la raíz del proyecto:
+    python benchmarks/benchmark_perfil_sqlite.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Agregar src y la raíz del proyecto (config/app_config.py) al path
+sys.path.insert(0, "src")
+sys.path.insert(0, ".")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database.config import Base, PRAGMAS_SQLITE, aplicar_perfil_sqlite
+from domain.models.mikrotik import MikroTik
+
+# Parámetros del escenario
+COMMITS = 1_000
+EQUIPOS_BASE = 5_000
+DURACION_CONCURRENCIA = 3.0  # Segundos de lecturas con escrituras en paralelo
+
+
+def crear_base(pragmas):
+    """Crea una base temporal con EQUIPOS_BASE MikroTiks y el perfil indicado."""
+    directorio = tempfile.mkdtemp(prefix="bench_sqlite_")
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}",
+                           connect_args={"check_same_thread": False})
+    if pragmas:
+        aplicar_perfil_sqlite(engine, pragmas)
+    Base.metadata.create_all(bind=engine)
+    Sesion = sessionmaker(bind=engine)
+    with Sesion() as db:
+        db.add_all(MikroTik(nombre=f"MTK-{i:05d}", ip_mikrotik=f"10.{i // 65536}.{i // 256 % 256}.{i % 256}")
+                   for i in range(EQUIPOS_BASE))
+        db.commit()
+    return engine, Sesion
+
+
+def medir_commits(Sesion) -> float:
+    """Devuelve los commits por segundo de inserciones de una fila."""
+    inicio = time.perf_counter()
+    for i in range(COMMITS):
+        with Sesion() as db:
+            db.add(MikroTik(nombre=f"NUEVO-{i}", ip_mikrotik=f"172.16.{i // 256}.{i % 256}"))
+            db.commit()
+    return COMMITS / (time.perf_counter() - inicio)
+
+
+def medir_lecturas_concurrentes(Sesion) -> dict:
+    """Lee sin parar mientras otro hilo hace commits; devuelve latencias de lectura y escrituras hechas."""
+    detener = threading.Event()
+    escrituras = [0]
+    
+    def escritor():
+        i = 0
+        while not detener.is_set():
+            with Sesion() as db:
+                equipo = db.get(MikroTik, i % EQUIPOS_BASE + 1)
+                equipo.disponible = not equipo.disponible
+                db.commit()
+            i += 1
+        escrituras[0] = i
+    
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    latencias = []
+    fin = time.perf_counter() + DURACION_CONCURRENCIA
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        with Sesion() as db:
+            db.query(MikroTik).filter(MikroTik.disponible == True).count()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    detener.set()
+    hilo.join()
+    
+    latencias.sort()
+    return {
+        "lecturas": len(latencias),
+        "escrituras": escrituras[0],
+        "p50": statistics.median(latencias),
+        "p99": latencias[int(len(latencias) * 0.99) - 1],
+        "max": latencias[-1]
+    }
+
+
+def main():
+    print(f"{'Perfil':<14}{'commits/s':>11}{'lecturas':>10}{'escrituras':>12}"
+          f"{'p50 (ms)':>10}{'p99 (ms)':>10}{'máx (ms)':>10}")
+    for nombre, pragmas in [("sin perfil", None), ("WAL + NORMAL", PRAGMAS_SQLITE)]:
+        engine, Sesion = crear_base(pragmas)
+        commits = medir_commits(Sesion)
+        concurrencia = medir_lecturas_concurrentes(Sesion)
+        engine.dispose()
+        print(f"{nombre:<14}{commits:>11.0f}{concurrencia['lecturas']:>10}{concurrencia['escrituras']:>12}"
+              f"{concurrencia['p50']:>10.2f}{concurrencia['p99']:>10.2f}{concurrencia['max']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,17 @@ Este archivo contiene las configuraciones globales de la aplicación.
 DATABASE_CONFIG = {
     "url": "sqlite:///network_app.db",
     "echo": False,  # True para ver las consultas SQL en consola
-    "pool_pre_ping": True
+    "pool_pre_ping": True,
+    # PRAGMAs que se aplican a cada conexión SQLite al abrirla (None = no tocar)
+    "sqlite_pragmas": {
+        "journal_mode": "WAL",      # Los lectores no bloquean al que escribe ni al revés
+        "synchronous": "NORMAL",    # Con WAL no hace fsync en cada commit (sí en los checkpoints)
+        "mmap_size": 268435456,     # 256 MB de la base leídos por memoria mapeada
+        "cache_size": -65536,       # Caché de páginas por conexión (negativo = KiB: 64 MB)
+        "temp_store": "MEMORY",     # Tablas temporales y ordenamientos en memoria
+        "busy_timeout": 5000,       # Milisegundos de espera si otra conexión tiene el bloqueo
+        "foreign_keys": "ON"        # Hacer cumplir las claves foráneas
+    }
 }
 
 # Configuración de la aplicación
@@ -46,3 +56,18 @@ EXPORT_CONFIG = {
     "company_name": "Tu Empresa",
     "company_logo": "recursos/imagenes/logo.png"
 }
+
+# Configuración del monitoreo en segundo plano (src/monitor.py)
+MONITOREO_CONFIG = {
+    "intervalo_mikrotik": 300,  # Segundos entre barridos de MikroTiks
+    "intervalo_ipran": 300,     # Segundos entre barridos de nodos IPRAN
+    "intervalo_gpon": 300,      # Segundos entre barridos de nodos GPON
+    "intervalo_respaldos": 86400,  # Segundos entre respaldos de configuración
+    "jitter": 0.1,              # Variación aleatoria de los intervalos (10%)
+    "timeout_ping": 3,          # Segundos de espera por sonda
+    "intentos": 1,              # Sondas por equipo en cada barrido
+    "max_concurrencia": 1024,   # Sondas simultáneas por barrido
+    "max_por_subred": 64,       # Sondas simultáneas por subred /24
+    "modo_sondeo": "auto",      # "auto", "icmp" o "tcp"
+    "max_concurrencia_respaldos": 16  # Exports descargados a la vez
+}
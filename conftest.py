@@ -0,0 +1,56 @@
+# conftest.py
+"""
+Fixtures compartidas por las pruebas
+"""
+import os
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from sqlalchemy import create_engine, event
+
+from infrastructure.database.config import Base, SessionLocal
+
+
+@pytest.fixture
+def base_datos(tmp_path):
+    """
+    Apunta las sesiones a una base SQLite temporal dentro de tmp_path.
+    
+    Al terminar la prueba SessionLocal vuelve a la base a la que apuntaba antes,
+    aunque la prueba falle; el directorio lo elimina pytest.
+    
+    Returns:
+        Engine: Engine de la base temporal
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    anterior = SessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    try:
+        yield engine
+    finally:
+        SessionLocal.configure(bind=anterior)
+        engine.dispose()
+
+
+@pytest.fixture
+def sentencias(base_datos):
+    """
+    Registra el SQL que se ejecuta en la base temporal.
+    
+    Returns:
+        List[str]: Sentencias ejecutadas, en orden (clear() las descarta)
+    """
+    ejecutadas = []
+    
+    def registrar(conexion, cursor, sentencia, parametros, contexto, multiples):
+        ejecutadas.append(sentencia)
+    event.listen(base_datos, "before_cursor_execute", registrar)
+    try:
+        yield ejecutadas
+    finally:
+        event.remove(base_datos, "before_cursor_execute", registrar)
@@ -6,13 +6,13 @@ from sqlalchemy import pool
 from alembic import context
 
 import sys
-from os.path import dirname, abspath
-sys.path.insert(0, dirname(dirname(abspath(__file__))))
-
-from src.infrastructure.database.config import SQLALCHEMY_DATABASE_URL
-from src.domain.models.base_model import Base
-
+from os.path import dirname, abspath, join
+# Los módulos de la aplicación se importan desde src (igual que en main.py);
+# importarlos como src.* crearía una segunda Base sin las tablas registradas
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "src"))
 
+from infrastructure.database.config import SQLALCHEMY_DATABASE_URL, Base
+import domain.models  # noqa: F401  (registra todas las tablas en Base.metadata)
 
 
 # this is the Alembic Config object, which provides
@@ -54,6 +54,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
     )
 
     with context.begin_transaction():
@@ -67,6 +68,13 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Quien invoque a Alembic desde Python (p. ej. las pruebas) puede pasar
+    # su propia conexión en config.attributes["connection"]
+    conexion = config.attributes.get("connection")
+    if conexion is not None:
+        ejecutar_con_conexion(conexion)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -74,12 +82,19 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        ejecutar_con_conexion(connection)
 
-        with context.begin_transaction():
-            context.run_migrations()
+
+def ejecutar_con_conexion(connection) -> None:
+    """Corre las migraciones sobre una conexión ya abierta."""
+    # render_as_batch: SQLite no soporta la mayoría de los ALTER TABLE
+    context.configure(
+        connection=connection, target_metadata=target_metadata,
+        render_as_batch=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,54 @@
+"""Índices para los filtros frecuentes de mikrotiks y documentos
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 10:00:00
+
+Las bases creadas con init_db antes de este cambio no tienen índices sobre las
+columnas por las que filtran y agrupan los repositorios (estado, disponible,
+cliente_id, modelo, fecha_creacion, tipo_transaccion, nodo_id), así que esas
+consultas recorrían las tablas completas. Los índices son los mismos que declaran
+los modelos en __table_args__; en una base nueva create_all ya los crea y esta
+migración no hace nada.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla, nombre del índice, columnas)
+INDICES = [
+    ("mikrotiks", "ix_mikrotiks_estado_nombre", ["estado", "nombre"]),
+    ("mikrotiks", "ix_mikrotiks_disponible_nombre", ["disponible", "nombre"]),
+    ("mikrotiks", "ix_mikrotiks_cliente_id_nombre", ["cliente_id", "nombre"]),
+    ("mikrotiks", "ix_mikrotiks_modelo", ["modelo"]),
+    ("documentos", "ix_documentos_fecha_creacion", ["fecha_creacion"]),
+    ("documentos", "ix_documentos_cliente_id_fecha", ["cliente_id", "fecha_creacion"]),
+    ("documentos", "ix_documentos_tipo_transaccion_fecha", ["tipo_transaccion", "fecha_creacion"]),
+    ("documentos", "ix_documentos_nodo_id_fecha", ["nodo_id", "fecha_creacion"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tablas = set(sa.inspect(op.get_bind()).get_table_names())
+    for tabla, nombre, columnas in INDICES:
+        # Si la tabla todavía no existe, create_all la creará con sus índices
+        if tabla in tablas:
+            op.create_index(nombre, tabla, columnas, if_not_exists=True)
+    # Que el planificador de SQLite conozca la selectividad de los índices nuevos
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla, nombre, columnas in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
@@ -0,0 +1,75 @@
+"""Imágenes de los documentos al almacén de blobs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 12:00:00
+
+Las imágenes de los documentos (grafica_consumo, *_imagen...) estaban dentro de
+contenido_json en base64. Esta migración las guarda en el almacén de imágenes
+(archivos por hash bajo recursos/documentos/almacen_imagenes, ver
+DocumentoService) y deja en contenido_json solo la referencia "blob:<hash>".
+Las imágenes repetidas quedan guardadas una sola vez.
+
+Antes se recrean los triggers del índice FTS5 de documentos para que no
+indexen las referencias; los documentos modificados se reindexan al guardarse.
+
+El directorio del almacén se puede cambiar con
+config.attributes["directorio_imagenes"] (pruebas).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from domain.models.documento import SENTENCIAS_BUSQUEDA
+from infrastructure.almacenamiento import AlmacenBlobs, guardar_imagenes_base64, restaurar_imagenes_base64
+from infrastructure.repositories.documento_repository import DocumentoRepository
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS_BUSQUEDA = ("documentos_fts_ai", "documentos_fts_au", "documentos_fts_ad")
+
+
+def almacen_imagenes() -> AlmacenBlobs:
+    """Almacén de imágenes de los documentos (el mismo que usa DocumentoService)."""
+    directorio = op.get_context().config.attributes.get("directorio_imagenes")
+    if directorio is None:
+        from application.services.documento_service import DocumentoService
+        return DocumentoService().almacen_imagenes
+    return AlmacenBlobs(directorio)
+
+
+def recrear_triggers_busqueda() -> None:
+    """Vuelve a crear el índice FTS5 y sus triggers con la definición actual."""
+    for nombre in TRIGGERS_BUSQUEDA:
+        op.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+    for sentencia in SENTENCIAS_BUSQUEDA:
+        op.execute(sentencia)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "documentos" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    recrear_triggers_busqueda()
+    almacen = almacen_imagenes()
+    DocumentoRepository().reescribir_contenidos(
+        lambda contenido: guardar_imagenes_base64(contenido, almacen), conexion=op.get_bind()
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if "documentos" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    # Las imágenes vuelven a contenido_json; el almacén no se borra
+    almacen = almacen_imagenes()
+    DocumentoRepository().reescribir_contenidos(
+        lambda contenido: restaurar_imagenes_base64(contenido, almacen), conexion=op.get_bind()
+    )
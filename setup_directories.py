@@ -93,7 +93,17 @@ Este archivo contiene las configuraciones globales de la aplicación.
 DATABASE_CONFIG = {
     "url": "sqlite:///network_app.db",
     "echo": False,  # True para ver las consultas SQL en consola
-    "pool_pre_ping": True
+    "pool_pre_ping": True,
+    # PRAGMAs que se aplican a cada conexión SQLite al abrirla (None = no tocar)
+    "sqlite_pragmas": {
+        "journal_mode": "WAL",      # Los lectores no bloquean al que escribe ni al revés
+        "synchronous": "NORMAL",    # Con WAL no hace fsync en cada commit (sí en los checkpoints)
+        "mmap_size": 268435456,     # 256 MB de la base leídos por memoria mapeada
+        "cache_size": -65536,       # Caché de páginas por conexión (negativo = KiB: 64 MB)
+        "temp_store": "MEMORY",     # Tablas temporales y ordenamientos en memoria
+        "busy_timeout": 5000,       # Milisegundos de espera si otra conexión tiene el bloqueo
+        "foreign_keys": "ON"        # Hacer cumplir las claves foráneas
+    }
 }
 
 # Configuración de la aplicación
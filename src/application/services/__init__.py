@@ -8,6 +8,9 @@ from application.services.nodo_ipran_service import NodoIPRANService
 from application.services.nodo_gpon_service import NodoGPONService
 from application.services.correo_cliente_service import CorreoClienteService
 from application.services.mikrotik_service import MikroTikService  # ← NUEVO: Agregamos MikroTikService
+from application.services.historial_disponibilidad_service import HistorialDisponibilidadService
+from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
+from application.services.diff_export import comparar_exports, formatear_diferencias
 from application.services.security import verificar_contraseña, obtener_hash_contraseña
 
 # Exportamos todos los servicios para facilitar su importación desde otros módulos
@@ -17,6 +20,10 @@ __all__ = [
     'NodoGPONService', 
     'CorreoClienteService',
     'MikroTikService',  # ← NUEVO: Agregamos a la lista
+    'HistorialDisponibilidadService',
+    'RespaldoConfiguracionService',
+    'comparar_exports',
+    'formatear_diferencias',
     'verificar_contraseña',
     'obtener_hash_contraseña'
 ]
\ No newline at end of file
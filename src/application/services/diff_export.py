@@ -0,0 +1,200 @@
+# src/application/services/diff_export.py
+"""
+Comparación de exports de RouterOS.
+Divide un export en secciones (los bloques que empiezan con una ruta como
+"/queue simple" o "/ip firewall filter"), compara línea por línea dentro de cada
+sección y genera deltas compactos para guardar una versión a partir de otra.
+"""
+import difflib
+import json
+from typing import Dict, List, Tuple, Any
+
+# Sección para las líneas anteriores a la primera ruta (comentarios de cabecera)
+SECCION_CABECERA = "#"
+
+
+def unir_continuaciones(lineas: List[str]) -> List[str]:
+    """
+    Une las líneas que RouterOS parte con una barra invertida al final
+    ("add chain=forward \\" + "    comment=...") en una sola línea lógica.
+    
+    Args:
+        lineas: Líneas del export
+    
+    Returns:
+        List[str]: Líneas lógicas
+    """
+    resultado: List[str] = []
+    pendiente = None
+    for linea in lineas:
+        if pendiente is not None:
+            linea = pendiente + linea.lstrip()
+            pendiente = None
+        if linea.endswith("\\"):
+            pendiente = linea[:-1]
+            continue
+        resultado.append(linea)
+    if pendiente is not None:
+        resultado.append(pendiente)
+    return resultado
+
+
+def enumerar_lineas(export: str) -> List[Tuple[int, str, str]]:
+    """
+    Recorre las líneas lógicas no vacías de un export indicando la sección de cada una.
+    
+    Args:
+        export: Texto del export
+    
+    Returns:
+        List[Tuple[int, str, str]]: (número de línea lógica, ruta de la sección, línea)
+    """
+    resultado = []
+    actual = SECCION_CABECERA
+    for numero, linea in enumerate(unir_continuaciones(export.split("\n")), start=1):
+        if linea.startswith("/"):
+            actual = linea.strip()
+        elif linea.strip():
+            resultado.append((numero, actual, linea.rstrip()))
+    return resultado
+
+
+def dividir_secciones(export: str) -> Dict[str, List[str]]:
+    """
+    Divide un export en secciones por ruta. Si una ruta aparece más de una vez,
+    sus líneas se juntan en la misma sección (en el orden del export).
+    
+    Args:
+        export: Texto del export
+    
+    Returns:
+        Dict[str, List[str]]: {ruta: líneas no vacías de la sección}, en orden de aparición
+    """
+    secciones: Dict[str, List[str]] = {}
+    actual = SECCION_CABECERA
+    for linea in unir_continuaciones(export.split("\n")):
+        if linea.startswith("/"):
+            actual = linea.strip()
+            secciones.setdefault(actual, [])
+        elif linea.strip():
+            secciones.setdefault(actual, []).append(linea.rstrip())
+    return secciones
+
+
+def comparar_exports(anterior: str, nuevo: str) -> List[Dict[str, Any]]:
+    """
+    Compara dos exports sección por sección.
+    
+    Args:
+        anterior: Export anterior
+        nuevo: Export nuevo
+    
+    Returns:
+        List[Dict[str, Any]]: Una entrada por sección con cambios, con seccion,
+        agregadas (líneas nuevas) y eliminadas (líneas que ya no están)
+    """
+    secciones_anteriores = dividir_secciones(anterior)
+    secciones_nuevas = dividir_secciones(nuevo)
+    
+    # Primero las secciones en el orden del export nuevo y luego las que desaparecieron
+    rutas = list(secciones_nuevas) + [ruta for ruta in secciones_anteriores if ruta not in secciones_nuevas]
+    
+    diferencias = []
+    for ruta in rutas:
+        lineas_a = secciones_anteriores.get(ruta, [])
+        lineas_b = secciones_nuevas.get(ruta, [])
+        if lineas_a == lineas_b:
+            continue
+        
+        agregadas: List[str] = []
+        eliminadas: List[str] = []
+        comparador = difflib.SequenceMatcher(None, lineas_a, lineas_b, autojunk=False)
+        for operacion, a1, a2, b1, b2 in comparador.get_opcodes():
+            if operacion in ("replace", "delete"):
+                eliminadas.extend(lineas_a[a1:a2])
+            if operacion in ("replace", "insert"):
+                agregadas.extend(lineas_b[b1:b2])
+        
+        diferencias.append({"seccion": ruta, "agregadas": agregadas, "eliminadas": eliminadas})
+    return diferencias
+
+
+def formatear_diferencias(diferencias: List[Dict[str, Any]]) -> str:
+    """
+    Formatea el resultado de comparar_exports como texto legible.
+    
+    Args:
+        diferencias: Resultado de comparar_exports
+    
+    Returns:
+        str: Una cabecera por sección y sus líneas con "-" (eliminadas) y "+" (agregadas)
+    """
+    bloques = []
+    for diferencia in diferencias:
+        lineas = [diferencia["seccion"]]
+        lineas += [f"- {linea}" for linea in diferencia["eliminadas"]]
+        lineas += [f"+ {linea}" for linea in diferencia["agregadas"]]
+        bloques.append("\n".join(lineas))
+    return "\n\n".join(bloques)
+
+
+# === DELTAS PARA ALMACENAMIENTO ===
+
+def crear_delta(base: str, nuevo: str) -> str:
+    """
+    Genera un delta que reconstruye 'nuevo' a partir de 'base', línea por línea.
+    Operaciones: ["=", n] copia n líneas de la base, ["-", n] salta n líneas de
+    la base y ["+", [líneas]] agrega líneas nuevas.
+    
+    Args:
+        base: Texto de referencia
+        nuevo: Texto a reconstruir
+    
+    Returns:
+        str: Delta serializado (JSON)
+    """
+    lineas_base = base.split("\n")
+    lineas_nuevas = nuevo.split("\n")
+    operaciones: List[Tuple[str, Any]] = []
+    comparador = difflib.SequenceMatcher(None, lineas_base, lineas_nuevas, autojunk=False)
+    for operacion, a1, a2, b1, b2 in comparador.get_opcodes():
+        if operacion == "equal":
+            operaciones.append(("=", a2 - a1))
+            continue
+        if a2 > a1:
+            operaciones.append(("-", a2 - a1))
+        if b2 > b1:
+            operaciones.append(("+", lineas_nuevas[b1:b2]))
+    return json.dumps(operaciones, ensure_ascii=False, separators=(",", ":"))
+
+
+def aplicar_delta(base: str, delta: str) -> str:
+    """
+    Reconstruye un texto a partir de su base y un delta de crear_delta.
+    
+    Args:
+        base: Texto de referencia
+        delta: Delta serializado
+    
+    Returns:
+        str: Texto reconstruido
+    
+    Raises:
+        ValueError: Si el delta no corresponde a la base
+    """
+    lineas_base = base.split("\n")
+    resultado: List[str] = []
+    posicion = 0
+    for operacion, valor in json.loads(delta):
+        if operacion == "=":
+            resultado.extend(lineas_base[posicion:posicion + valor])
+            posicion += valor
+        elif operacion == "-":
+            posicion += valor
+        elif operacion == "+":
+            resultado.extend(valor)
+        else:
+            raise ValueError(f"Operación de delta desconocida: '{operacion}'")
+    if posicion != len(lineas_base):
+        raise ValueError("El delta no corresponde a la base")
+    return "\n".join(resultado)
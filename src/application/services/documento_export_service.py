@@ -5,17 +5,157 @@ Servicio para la exportación de documentos a Word.
 import os
 import json
 import datetime
-from typing import Dict, Any, Optional, List, BinaryIO
+import hashlib
+import itertools
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, BinaryIO, Callable, Iterator, Tuple
 from docx import Document as DocxDocument
-from docx.shared import Pt, Inches
+from docx.shared import Pt, Inches, RGBColor
 from io import BytesIO
-from PIL import Image
+from sqlalchemy import create_engine
 
 from domain.models.documento import Documento
 from domain.models.nodo_ipran import NodoIPRAN
+from infrastructure.almacenamiento import AlmacenBlobs, CacheArchivos
+from infrastructure.database.config import SessionLocal, aplicar_perfil_sqlite
 from application.services.documento_service import DocumentoService
+from application.services.imagen_documento_service import ImagenDocumentoService
 from application.services.nodo_ipran_service import NodoIPRANService
 
+# Nombre del manifiesto de las exportaciones en lote
+NOMBRE_MANIFIESTO = "manifiesto.json"
+
+# Versión de cómo se arma el Word: subirla al cambiar cualquier _generar_* o
+# estilo, para que no se sigan devolviendo exportaciones en caché con el formato anterior
+VERSION_PLANTILLA_WORD = 1
+
+
+@dataclass
+class ResultadoLote:
+    """Resultado de una exportación en lote."""
+    ruta: str  # ZIP o directorio generado
+    total: int  # Documentos que cumplían el filtro
+    documentos: List[Dict[str, Any]] = field(default_factory=list)  # Entradas del manifiesto
+    
+    @property
+    def exportados(self) -> int:
+        """Documentos exportados correctamente."""
+        return sum(1 for entrada in self.documentos if "error" not in entrada)
+    
+    @property
+    def errores(self) -> List[Dict[str, Any]]:
+        """Entradas de los documentos que no se pudieron exportar."""
+        return [entrada for entrada in self.documentos if "error" in entrada]
+
+
+class _SalidaLote:
+    """Destino de una exportación en lote: un ZIP (escrito a un temporal y renombrado al final) o un directorio."""
+    
+    def __init__(self, destino: str, como_zip: bool):
+        """
+        Constructor de la salida.
+        
+        Args:
+            destino: Ruta del ZIP o del directorio
+            como_zip: Si es True, los archivos van a un ZIP
+        """
+        self.destino = destino
+        self.como_zip = como_zip
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._temporal: Optional[str] = None
+    
+    def __enter__(self) -> "_SalidaLote":
+        if self.como_zip:
+            directorio = os.path.dirname(os.path.abspath(self.destino))
+            os.makedirs(directorio, exist_ok=True)
+            descriptor, self._temporal = tempfile.mkstemp(dir=directorio, prefix=".tmp_", suffix=".zip")
+            os.close(descriptor)
+            self._zip = zipfile.ZipFile(self._temporal, "w")
+        else:
+            os.makedirs(self.destino, exist_ok=True)
+        return self
+    
+    def escribir(self, nombre: str, datos: bytes) -> None:
+        """
+        Agrega un archivo a la salida.
+        
+        Args:
+            nombre: Nombre del archivo
+            datos: Contenido
+        """
+        if self._zip is not None:
+            # Un .docx ya es un ZIP comprimido: se guarda sin volver a comprimirlo
+            compresion = zipfile.ZIP_STORED if nombre.endswith(".docx") else zipfile.ZIP_DEFLATED
+            self._zip.writestr(nombre, datos, compress_type=compresion)
+        else:
+            with open(os.path.join(self.destino, nombre), "wb") as archivo:
+                archivo.write(datos)
+    
+    def __exit__(self, tipo, valor, traza) -> None:
+        if self._zip is None:
+            return
+        self._zip.close()
+        if tipo is None:
+            os.replace(self._temporal, self.destino)
+        else:
+            os.remove(self._temporal)
+
+
+def _generar_para_lote(servicio: "DocumentoExportService",
+                       documento_id: int) -> Tuple[int, Optional[str], Optional[bytes], Optional[str]]:
+    """
+    Genera el Word de un documento de un lote sin dejar escapar sus errores.
+    
+    Returns:
+        Tuple: (id, nombre, bytes, None) o (id, None, None, error)
+    """
+    try:
+        nombre, datos = servicio.generar_word(documento_id)
+        return documento_id, nombre, datos, None
+    except Exception as e:
+        return documento_id, None, None, f"{type(e).__name__}: {e}"
+
+
+# Servicio de cada proceso del pool de exportación en lote
+_servicio_proceso: Optional["DocumentoExportService"] = None
+
+
+def _iniciar_proceso_exportacion(url_base_datos: str, directorio_imagenes: str,
+                                 directorio_cache: str, tamano_cache: int) -> None:
+    """
+    Prepara un proceso del pool de exportación: abre su propio engine sobre la
+    base del proceso principal y usa su mismo almacén de imágenes y su misma
+    caché de exportaciones.
+    
+    Args:
+        url_base_datos: URL de la base de datos
+        directorio_imagenes: Directorio del almacén de imágenes de los documentos
+        directorio_cache: Directorio de la caché de exportaciones
+        tamano_cache: Tamaño máximo de la caché de exportaciones
+    """
+    global _servicio_proceso
+    engine = create_engine(url_base_datos, connect_args={"check_same_thread": False})
+    if engine.dialect.name == "sqlite":
+        aplicar_perfil_sqlite(engine)
+    SessionLocal.configure(bind=engine)
+    
+    _servicio_proceso = DocumentoExportService()
+    almacen = AlmacenBlobs(directorio_imagenes)
+    _servicio_proceso.documento_service.almacen_imagenes = almacen
+    _servicio_proceso.documento_service.imagenes = ImagenDocumentoService(almacen)
+    _servicio_proceso.documento_service.cache_exportaciones = CacheArchivos(directorio_cache, tamano_cache,
+                                                                            extension=".docx")
+
+
+def _generar_en_proceso(documento_id: int) -> Tuple[int, Optional[str], Optional[bytes], Optional[str]]:
+    """Genera el Word de un documento en un proceso del pool."""
+    return _generar_para_lote(_servicio_proceso, documento_id)
+
+
 class DocumentoExportService:
     """Servicio para exportar documentos a formato Word."""
     
@@ -30,6 +170,10 @@ class DocumentoExportService:
         # Crear directorios si no existen
         os.makedirs(self.plantillas_dir, exist_ok=True)
         os.makedirs(self.docs_dir, exist_ok=True)
+        
+        # Configuraciones por defecto
+        self.procesos_exportacion = max(1, min(4, os.cpu_count() or 1))  # Procesos de la exportación en lote
+        self.documentos_en_vuelo_por_proceso = 2  # Documentos generados en memoria por proceso, como máximo
     
     def exportar_a_word(self, documento_id: int) -> str:
         """
@@ -37,10 +181,48 @@ class DocumentoExportService:
         
         Args:
             documento_id: ID del documento a exportar
-            
+        
         Returns:
             str: Ruta del archivo Word generado
-            
+        
+        Raises:
+            ValueError: Si el documento no existe o si faltan datos necesarios
+        """
+        nombre, datos = self.generar_word(documento_id)
+        ruta_archivo = os.path.join(self.docs_dir, nombre)
+        
+        # Guardar el documento
+        with open(ruta_archivo, "wb") as archivo:
+            archivo.write(datos)
+        
+        return ruta_archivo
+    
+    def nombre_archivo(self, documento: Documento) -> str:
+        """
+        Nombre del archivo Word de un documento.
+        
+        Args:
+            documento: Documento a exportar
+        
+        Returns:
+            str: fecha_TIPO_cliente.docx
+        """
+        fecha_str = documento.fecha_creacion.strftime("%Y%m%d")
+        return f"{fecha_str}_{documento.tipo_transaccion}_{documento.cliente_id}.docx"
+    
+    def generar_word(self, documento_id: int) -> Tuple[str, bytes]:
+        """
+        Genera el Word de un documento en memoria, sin escribirlo en disco.
+        
+        Si el documento no cambió desde su última exportación (misma clave_cache),
+        se devuelve el Word guardado en la caché de exportaciones sin volver a armarlo.
+        
+        Args:
+            documento_id: ID del documento a exportar
+        
+        Returns:
+            Tuple[str, bytes]: Nombre del archivo y contenido del .docx
+        
         Raises:
             ValueError: Si el documento no existe o si faltan datos necesarios
         """
@@ -54,10 +236,54 @@ class DocumentoExportService:
         if documento.nodo_id:
             nodo = self.nodo_service.obtener_por_id(documento.nodo_id)
         
-        # Cargar el contenido JSON
-        contenido = {}
-        if documento.contenido_json:
-            contenido = json.loads(documento.contenido_json)
+        cache = self.documento_service.cache_exportaciones
+        clave = self.clave_cache(documento, nodo)
+        datos = cache.leer(str(documento.id), clave)
+        if datos is None:
+            buffer = BytesIO()
+            self._construir_documento(documento, nodo).save(buffer)
+            datos = buffer.getvalue()
+            cache.guardar(str(documento.id), clave, datos)
+        
+        return self.nombre_archivo(documento), datos
+    
+    def clave_cache(self, documento: Documento, nodo: Optional[NodoIPRAN]) -> str:
+        """
+        Hash de todo lo que determina el Word de un documento: sus columnas (las
+        imágenes entran por su referencia "blob:<hash>" en contenido_json), las del
+        nodo IPRAN y VERSION_PLANTILLA_WORD. Las marcas de tiempo no cuentan.
+        
+        Args:
+            documento: Documento con su contenido cargado
+            nodo: Nodo IPRAN del documento, si tiene
+        
+        Returns:
+            str: SHA-256 (hex)
+        """
+        def columnas(entidad) -> Dict[str, Any]:
+            return {columna.key: getattr(entidad, columna.key) for columna in entidad.__table__.columns
+                    if columna.key not in ("created_at", "updated_at")}
+        
+        datos = {
+            "plantilla": VERSION_PLANTILLA_WORD,
+            "documento": columnas(documento),
+            "nodo": columnas(nodo) if nodo else None
+        }
+        return hashlib.sha256(json.dumps(datos, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    
+    def _construir_documento(self, documento: Documento, nodo: Optional[NodoIPRAN]) -> DocxDocument:
+        """
+        Arma el documento Word de un documento según su topología.
+        
+        Args:
+            documento: Documento con su contenido cargado
+            nodo: Nodo IPRAN del documento, si tiene
+        
+        Returns:
+            DocxDocument: Word sin guardar
+        """
+        # Cargar el contenido JSON (con las imágenes del almacén como bytes)
+        contenido = self.documento_service.obtener_contenido(documento)
         
         # Crear un nuevo documento Word
         doc = DocxDocument()
@@ -73,15 +299,117 @@ class DocumentoExportService:
             # Topología genérica
             self._generar_documento_generico(doc, documento, nodo, contenido)
         
-        # Generar el nombre del archivo
-        fecha_str = documento.fecha_creacion.strftime("%Y%m%d")
-        nombre_archivo = f"{fecha_str}_{documento.tipo_transaccion}_{documento.cliente_id}.docx"
-        ruta_archivo = os.path.join(self.docs_dir, nombre_archivo)
+        return doc
+    
+    def exportar_lote(self, destino: str, fecha_inicio: Optional[datetime.datetime] = None,
+                      fecha_fin: Optional[datetime.datetime] = None, ingeniero: Optional[str] = None,
+                      tipo_transaccion: Optional[str] = None, como_zip: bool = True,
+                      procesos: Optional[int] = None,
+                      progreso: Optional[Callable[[int, int], None]] = None) -> ResultadoLote:
+        """
+        Exporta a Word todos los documentos que cumplen el filtro (p. ej. para una
+        auditoría mensual), generándolos en un pool de procesos.
         
-        # Guardar el documento
-        doc.save(ruta_archivo)
+        Cada .docx se escribe en el ZIP (o el directorio) apenas termina, y nunca
+        hay más de procesos * documentos_en_vuelo_por_proceso documentos generados
+        en memoria. Un documento que falla no detiene el lote: queda registrado con
+        su error en el manifiesto (manifiesto.json, junto a los .docx).
         
-        return ruta_archivo
+        Args:
+            destino: Ruta del ZIP a crear, o del directorio si como_zip es False
+            fecha_inicio: Fecha de creación mínima (incluida)
+            fecha_fin: Fecha de creación máxima (incluida)
+            ingeniero: Nombre del ingeniero (cada palabra como prefijo)
+            tipo_transaccion: UPGRADE, DOWNGRADE...
+            como_zip: Si es False, los archivos se escriben en el directorio destino
+            procesos: Procesos del pool (por defecto procesos_exportacion; 0 genera
+                los documentos en este mismo proceso, uno a uno)
+            progreso: Función llamada con (terminados, total) tras cada documento
+        
+        Returns:
+            ResultadoLote: Ruta generada y resultado de cada documento
+        """
+        procesos = self.procesos_exportacion if procesos is None else procesos
+        filtro = {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "ingeniero": ingeniero,
+                  "tipo_transaccion": tipo_transaccion}
+        ids = self.documento_service.repository.get_ids_filtrados(**filtro)
+        resultado = ResultadoLote(ruta=destino, total=len(ids))
+        
+        with _SalidaLote(destino, como_zip) as salida:
+            for documento_id, nombre, datos, error in self._generar_lote(ids, procesos):
+                if error is None:
+                    # El ID evita choques entre documentos del mismo cliente, día y tipo
+                    nombre = f"{os.path.splitext(nombre)[0]}_{documento_id}.docx"
+                    salida.escribir(nombre, datos)
+                    resultado.documentos.append({"id": documento_id, "archivo": nombre, "bytes": len(datos)})
+                else:
+                    resultado.documentos.append({"id": documento_id, "error": error})
+                if progreso:
+                    progreso(len(resultado.documentos), resultado.total)
+            
+            # El manifiesto sigue el orden del filtro, no el de terminación
+            posiciones = {documento_id: posicion for posicion, documento_id in enumerate(ids)}
+            resultado.documentos.sort(key=lambda entrada: posiciones[entrada["id"]])
+            manifiesto = {
+                "generado": datetime.datetime.now().isoformat(timespec="seconds"),
+                "filtro": {clave: valor.isoformat() if isinstance(valor, datetime.datetime) else valor
+                           for clave, valor in filtro.items()},
+                "total": resultado.total,
+                "exportados": resultado.exportados,
+                "errores": len(resultado.errores),
+                "documentos": resultado.documentos
+            }
+            salida.escribir(NOMBRE_MANIFIESTO, json.dumps(manifiesto, ensure_ascii=False, indent=2).encode("utf-8"))
+        
+        return resultado
+    
+    def _generar_lote(self, ids: List[int],
+                      procesos: int) -> Iterator[Tuple[int, Optional[str], Optional[bytes], Optional[str]]]:
+        """
+        Genera los Word de los documentos, en el orden en que terminan.
+        
+        Args:
+            ids: IDs de los documentos
+            procesos: Procesos del pool (0: en este proceso)
+        
+        Returns:
+            Iterator[Tuple]: (id, nombre, bytes, None) o (id, None, None, error) por documento
+        """
+        if procesos == 0:
+            for documento_id in ids:
+                yield _generar_para_lote(self, documento_id)
+            return
+        
+        # Cada proceso abre su propia conexión a la misma base y usa el mismo almacén de imágenes
+        bind = SessionLocal.kw["bind"]
+        cache = self.documento_service.cache_exportaciones
+        argumentos = (bind.url.render_as_string(hide_password=False),
+                      self.documento_service.almacen_imagenes.directorio, cache.directorio, cache.tamano_maximo)
+        en_vuelo_maximo = procesos * self.documentos_en_vuelo_por_proceso
+        pendientes = iter(ids)
+        en_vuelo: Dict[Future, int] = {}
+        
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso_exportacion,
+                                 initargs=argumentos) as executor:
+            while True:
+                # Mantener el pool ocupado sin acumular más documentos de la cuenta
+                for documento_id in itertools.islice(pendientes, en_vuelo_maximo - len(en_vuelo)):
+                    en_vuelo[executor.submit(_generar_en_proceso, documento_id)] = documento_id
+                if not en_vuelo:
+                    return
+                
+                terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    documento_id = en_vuelo.pop(futuro)
+                    try:
+                        yield futuro.result()
+                    except Exception as e:
+                        # El proceso murió (BrokenProcessPool) o el resultado no se pudo enviar
+                        yield documento_id, None, None, f"{type(e).__name__}: {e}"
+                        if isinstance(e, BrokenProcessPool):
+                            for restante in list(en_vuelo.values()) + list(pendientes):
+                                yield restante, None, None, "Exportación interrumpida: falló un proceso del pool"
+                            return
     
     def _generar_documento_ipran_mikrotik(self, doc: DocxDocument, documento: Documento, 
                                           nodo: Optional[NodoIPRAN], contenido: Dict[str, Any]) -> None:
@@ -239,14 +567,14 @@ class DocumentoExportService:
         font.name = 'Arial'
         font.size = Pt(14)
         font.bold = True
-        font.color.rgb = (255, 0, 0)  # Rojo
+        font.color.rgb = RGBColor(255, 0, 0)  # Rojo
         
         style = doc.styles['Heading 2']
         font = style.font
         font.name = 'Arial'
         font.size = Pt(12)
         font.bold = True
-        font.color.rgb = (255, 0, 0)  # Rojo
+        font.color.rgb = RGBColor(255, 0, 0)  # Rojo
         
         # Configurar estilo para código
         style = doc.styles.add_style('Code', 1)
@@ -330,14 +658,9 @@ class DocumentoExportService:
             doc: Documento Word
             imagen_bytes: Bytes de la imagen
         """
-        # Crear un stream temporal para la imagen
+        # Tamaño desde los metadatos del almacén (la imagen no se vuelve a decodificar)
+        width, height = self.documento_service.imagenes.dimensiones(imagen_bytes)
         stream = BytesIO(imagen_bytes)
-        # Abrir la imagen con PIL para obtener el tamaño
-        with Image.open(stream) as img:
-            width, height = img.size
-        
-        # Reiniciar el stream
-        stream.seek(0)
         
         # Calcular el ancho máximo para la imagen (ajustando a la página)
         max_width = Inches(6)  # Ancho máximo de 6 pulgadas
@@ -350,7 +673,7 @@ class DocumentoExportService:
         
         # Agregar la imagen al documento
         doc.add_picture(stream, width=Pt(width), height=Pt(height))
-        
+    
     def guardar_imagen(self, imagen_bytes: bytes, nombre: str) -> str:
         """
         Guarda una imagen en el sistema de archivos.
@@ -358,7 +681,7 @@ class DocumentoExportService:
         Args:
             imagen_bytes: Bytes de la imagen
             nombre: Nombre base para el archivo
-            
+        
         Returns:
             str: Ruta del archivo guardado
         """
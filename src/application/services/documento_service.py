@@ -8,9 +8,16 @@ import datetime
 import base64  # ← NUEVO: Para convertir bytes a string
 from typing import List, Optional, Dict, Any
 
+from PIL import UnidentifiedImageError
+from sqlalchemy.exc import OperationalError
+
 from domain.models.documento import Documento
-from infrastructure.repositories.documento_repository import DocumentoRepository
+from infrastructure.almacenamiento import (
+    AlmacenBlobs, CacheArchivos, crear_referencia, es_referencia, hash_de_referencia, guardar_imagenes_base64
+)
+from infrastructure.repositories.documento_repository import DocumentoRepository, consulta_por_prefijos
 from application.services.nodo_ipran_service import NodoIPRANService
+from application.services.imagen_documento_service import ImagenDocumentoService
 
 class DocumentoService:
     """Servicio para manejar operaciones relacionadas con documentos."""
@@ -23,6 +30,15 @@ class DocumentoService:
         self.docs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "recursos", "documentos")
         # Crear el directorio si no existe
         os.makedirs(self.docs_dir, exist_ok=True)
+        # Las imágenes se guardan una sola vez en el almacén (por hash) y
+        # contenido_json solo lleva su referencia "blob:<hash>"
+        self.almacen_imagenes = AlmacenBlobs(os.path.join(self.docs_dir, "almacen_imagenes"))
+        # Normaliza las imágenes nuevas y genera sus metadatos y miniaturas
+        self.imagenes = ImagenDocumentoService(self.almacen_imagenes)
+        # Exportaciones a Word ya generadas (DocumentoExportService), por documento;
+        # se invalidan al actualizar o eliminar el documento
+        self.cache_exportaciones = CacheArchivos(os.path.join(self.docs_dir, "cache_exportaciones"),
+                                                 tamano_maximo=256 * 1024 * 1024, extension=".docx")
     
     def obtener_todos(self) -> List[Documento]:
         """
@@ -33,6 +49,40 @@ class DocumentoService:
         """
         return self.repository.get_all()
     
+    def obtener_listado(self) -> List[Any]:
+        """
+        Obtiene los datos que muestra la lista de documentos (id, fecha_creacion,
+        cliente_id, cliente_nombre y tipo_transaccion) sin cargar su contenido.
+        
+        Returns:
+            List[Any]: Filas de solo lectura con esos atributos
+        """
+        return self.repository.get_listado()
+    
+    def buscar(self, texto: str, limite: int = 200, consulta_fts: bool = False) -> List[Any]:
+        """
+        Busca documentos por su texto con el índice FTS5. Por defecto cada palabra
+        se busca como prefijo, sin distinguir mayúsculas ni acentos.
+        
+        Args:
+            texto: Texto a buscar
+            limite: Máximo de documentos a devolver
+            consulta_fts: Si es True, texto se usa tal cual como consulta FTS5 (OR, NOT, "frase", cliente_id:...)
+            
+        Returns:
+            List[Any]: Filas del listado (como obtener_listado), de la más a la menos relevante
+            
+        Raises:
+            ValueError: Si la consulta FTS5 no es válida
+        """
+        consulta = texto if consulta_fts else consulta_por_prefijos(texto)
+        if not consulta.strip():
+            return []
+        try:
+            return self.repository.buscar_texto(consulta, limite)
+        except OperationalError as e:
+            raise ValueError(f"Consulta de búsqueda inválida: {texto}") from e
+    
     def obtener_por_id(self, documento_id: int) -> Optional[Documento]:
         """
         Obtiene un documento por su ID.
@@ -45,6 +95,33 @@ class DocumentoService:
         """
         return self.repository.get_by_id(documento_id)
     
+    def obtener_resumen(self, documento_id: int) -> Optional[Documento]:
+        """
+        Obtiene los datos generales de un documento sin leer su contenido
+        (para mostrarlo; el contenido se pide por secciones con obtener_secciones).
+        
+        Args:
+            documento_id: ID del documento a buscar
+        
+        Returns:
+            Optional[Documento]: El documento (sin contenido_json cargado) o None si no existe
+        """
+        return self.repository.get_resumen(documento_id)
+    
+    def obtener_secciones(self, documento_id: int, *secciones: str) -> Dict[str, Any]:
+        """
+        Lee y decodifica solo algunas secciones del contenido de un documento,
+        con sus imágenes como bytes.
+        
+        Args:
+            documento_id: ID del documento
+            *secciones: Claves de contenido_json (p. ej. "correo", "observaciones")
+        
+        Returns:
+            Dict[str, Any]: Las secciones pedidas que tiene el documento
+        """
+        return self._convertir_contenido_desde_json(self.repository.get_secciones(documento_id, secciones))
+    
     def obtener_por_cliente_id(self, cliente_id: str) -> List[Documento]:
         """
         Obtiene documentos por ID de cliente.
@@ -59,7 +136,11 @@ class DocumentoService:
     
     def _convertir_contenido_para_json(self, contenido_json: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Convierte el contenido para que sea serializable en JSON.
+        Convierte el contenido para que sea serializable en JSON. Las imágenes
+        (bytes, o base64 de documentos anteriores al almacén) se guardan en el
+        almacén de imágenes y se reemplazan por su referencia. Las imágenes en
+        bytes pasan antes por la ingesta (ver ImagenDocumentoService), que no las
+        vuelve a procesar si ya estaban ingeridas.
         
         Args:
             contenido_json: Diccionario con el contenido del documento
@@ -73,11 +154,16 @@ class DocumentoService:
         # Hacer una copia para no modificar el original
         contenido_limpio = contenido_json.copy()
         
-        # Convertir imágenes de bytes a base64 string
+        # Guardar las imágenes en el almacén (si ya estaban, no se escriben de nuevo)
         for key, value in contenido_limpio.items():
             if isinstance(value, bytes):
-                # Si es bytes, convertir a base64 string
-                contenido_limpio[key] = base64.b64encode(value).decode('utf-8')
+                try:
+                    contenido_limpio[key] = self.imagenes.ingerir(value).referencia
+                except UnidentifiedImageError:
+                    # No es una imagen: se guarda tal cual
+                    contenido_limpio[key] = crear_referencia(self.almacen_imagenes.guardar(value))
+            elif isinstance(value, str):
+                contenido_limpio[key], _ = guardar_imagenes_base64(value, self.almacen_imagenes)
             elif isinstance(value, dict):
                 # Si es un diccionario, procesarlo recursivamente
                 contenido_limpio[key] = self._convertir_contenido_para_json(value)
@@ -100,9 +186,15 @@ class DocumentoService:
         # Hacer una copia para no modificar el original
         contenido_restaurado = contenido_json.copy()
         
-        # Restaurar imágenes de base64 string a bytes
+        # Restaurar imágenes del almacén (o de base64, si el documento no se migró) a bytes
         for key, value in contenido_restaurado.items():
-            if isinstance(value, str) and key.endswith(('_imagen', '_grafica', 'grafica_consumo')):
+            if es_referencia(value):
+                imagen = self.almacen_imagenes.leer(hash_de_referencia(value))
+                if imagen is not None:
+                    contenido_restaurado[key] = imagen
+                else:
+                    print(f"⚠️ Imagen {value} no encontrada en el almacén")
+            elif isinstance(value, str) and key.endswith(('_imagen', '_grafica', 'grafica_consumo')):
                 try:
                     # Intentar convertir de base64 a bytes
                     contenido_restaurado[key] = base64.b64decode(value)
@@ -115,6 +207,45 @@ class DocumentoService:
         
         return contenido_restaurado
     
+    def obtener_contenido(self, documento: Documento) -> Dict[str, Any]:
+        """
+        Decodifica el contenido de un documento, con las imágenes como bytes.
+        
+        Args:
+            documento: Documento (con contenido_json cargado)
+            
+        Returns:
+            Dict[str, Any]: Contenido del documento ({} si no tiene)
+        """
+        if not documento.contenido_json:
+            return {}
+        return self._convertir_contenido_desde_json(json.loads(documento.contenido_json))
+    
+    def mover_imagenes_al_almacen(self) -> int:
+        """
+        Pasa al almacén las imágenes en base64 que todavía estén dentro de
+        contenido_json (documentos guardados antes del almacén).
+        
+        Returns:
+            int: Número de documentos modificados
+        """
+        return self.repository.reescribir_contenidos(
+            lambda contenido: guardar_imagenes_base64(contenido, self.almacen_imagenes)
+        )
+    
+    def purgar_imagenes_huerfanas(self, antiguedad_minima: float = 3600) -> int:
+        """
+        Elimina del almacén las imágenes que ya no usa ningún documento (por
+        documentos eliminados o imágenes reemplazadas).
+        
+        Args:
+            antiguedad_minima: Segundos que debe tener una imagen para eliminarla
+            
+        Returns:
+            int: Número de imágenes eliminadas
+        """
+        return self.almacen_imagenes.purgar(self.repository.get_referencias_blob(), antiguedad_minima)
+    
     def crear(self, 
               titulo: str,
               cliente_id: str, 
@@ -235,8 +366,10 @@ class DocumentoService:
                 # Si hay error, mantener el contenido actual
                 pass
         
-        # Guardar los cambios
-        return self.repository.update(documento)
+        # Guardar los cambios y descartar sus exportaciones anteriores
+        actualizado = self.repository.update(documento)
+        self.cache_exportaciones.invalidar(str(documento_id))
+        return actualizado
     
     def eliminar(self, documento_id: int) -> bool:
         """
@@ -248,7 +381,9 @@ class DocumentoService:
         Returns:
             bool: True si se eliminó correctamente, False en caso contrario
         """
-        return self.repository.delete(documento_id)
+        eliminado = self.repository.delete(documento_id)
+        self.cache_exportaciones.invalidar(str(documento_id))
+        return eliminado
     
     def generar_etiqueta_cliente(self, cliente_id: str, cliente_nombre: str, ancho_banda: str) -> str:
         """
@@ -0,0 +1,373 @@
+# src/application/services/historial_disponibilidad_service.py
+"""
+Servicio para el historial de disponibilidad de MikroTiks.
+Registra cada sondeo, lo consolida en intervalos de 5 minutos y 1 hora, aplica la
+retención de cada nivel y responde consultas de disponibilidad y RTT por equipo.
+"""
+import datetime
+import time
+from collections import defaultdict
+from typing import Dict, Any, Optional, Union
+
+from domain.models.historial_disponibilidad import (
+    ResumenDisponibilidad, RESOLUCION_5_MIN, RESOLUCION_1_HORA, percentil_exacto
+)
+from infrastructure.network.sondeador import ResultadoSondeo
+from infrastructure.repositories.historial_disponibilidad_repository import HistorialDisponibilidadRepository
+
+# Un momento puede indicarse como datetime o como epoch en segundos
+Momento = Union[datetime.datetime, int, float]
+
+DIA = 86400
+
+class HistorialDisponibilidadService:
+    """Servicio para registrar y consultar la serie temporal de sondeos."""
+    
+    def __init__(self):
+        """Constructor del servicio."""
+        self.repository = HistorialDisponibilidadRepository()
+        
+        # Retención de cada nivel (segundos). Con 5.000 equipos sondeados cada
+        # 5 minutos: ~2,9 M filas crudas, ~10 M de 5 min y ~48 M de 1 hora.
+        self.retencion_crudo = 2 * DIA
+        self.retencion_5min = 7 * DIA
+        self.retencion_1hora = 400 * DIA
+    
+    # === REGISTRO ===
+    
+    def registrar_barrido(self, resultados: Dict[int, ResultadoSondeo],
+                          momento: Optional[Momento] = None) -> None:
+        """
+        Guarda el resultado de un barrido y consolida los intervalos ya cerrados.
+        
+        Args:
+            resultados: Diccionario {id_mikrotik: ResultadoSondeo}
+            momento: Momento del barrido (por defecto, ahora)
+        """
+        ts = self._a_epoch(momento) if momento is not None else int(time.time())
+        
+        # Un barrido que llega tarde a un intervalo ya consolidado obliga a rehacerlo
+        ultimo_5min = self.repository.ultimo_resumen(RESOLUCION_5_MIN)
+        tardio = ultimo_5min is not None and ts < ultimo_5min + RESOLUCION_5_MIN
+        if tardio:
+            primer_crudo = self.repository.primer_sondeo_desde(0)
+            if primer_crudo is None or ts < primer_crudo - primer_crudo % RESOLUCION_5_MIN:
+                # Los sondeos crudos de ese intervalo ya se purgaron: no se puede rehacer
+                print(f"⚠️ Barrido de {ts} descartado: su intervalo ya se consolidó y purgó")
+                return
+        
+        self.repository.registrar_sondeos([
+            {
+                "mikrotik_id": mikrotik_id,
+                "ts": ts,
+                "rtt_ms": resultado.rtt_ms,
+                "perdida": resultado.perdida
+            }
+            for mikrotik_id, resultado in resultados.items()
+        ])
+        
+        if tardio:
+            self.reconsolidar(ts)
+        self.consolidar(ts)
+    
+    # === CONSOLIDACIÓN Y RETENCIÓN ===
+    
+    def consolidar(self, ahora: Optional[Momento] = None) -> None:
+        """
+        Consolida sondeos crudos en intervalos de 5 minutos y éstos en intervalos de 1 hora.
+        Solo procesa intervalos cerrados que aún no estén consolidados, así que es
+        barato llamarlo después de cada barrido. Al terminar aplica la retención.
+        
+        Args:
+            ahora: Momento actual (por defecto, ahora)
+        """
+        ahora = self._a_epoch(ahora) if ahora is not None else int(time.time())
+        
+        # Crudo → 5 minutos
+        fin_5min = ahora - ahora % RESOLUCION_5_MIN
+        self._consolidar_nivel(
+            RESOLUCION_5_MIN, fin_5min,
+            self.repository.primer_sondeo_desde,
+            self._resumir_sondeos
+        )
+        
+        # 5 minutos → 1 hora (solo horas cubiertas por completo por intervalos de 5 min)
+        ultimo_5min = self.repository.ultimo_resumen(RESOLUCION_5_MIN)
+        if ultimo_5min is not None:
+            cubierto = ultimo_5min + RESOLUCION_5_MIN
+            self._consolidar_nivel(
+                RESOLUCION_1_HORA, cubierto - cubierto % RESOLUCION_1_HORA,
+                lambda ts: self.repository.primer_resumen_desde(RESOLUCION_5_MIN, ts),
+                self._resumir_resumenes
+            )
+        
+        self.purgar(ahora)
+    
+    def reconsolidar(self, desde: Momento) -> None:
+        """
+        Rehace los resúmenes ya consolidados a partir de 'desde', por ejemplo
+        porque llegaron sondeos tarde a intervalos que ya estaban cerrados.
+        Los intervalos de 5 minutos se recalculan desde los sondeos crudos y las
+        horas desde los intervalos de 5 minutos; lo ya purgado no se toca.
+        
+        Args:
+            desde: Momento del primer dato que cambió
+        """
+        desde = self._a_epoch(desde)
+        
+        ultimo_5min = self.repository.ultimo_resumen(RESOLUCION_5_MIN)
+        primer_crudo = self.repository.primer_sondeo_desde(0)
+        if ultimo_5min is None or primer_crudo is None:
+            return
+        # La purga de crudos va por intervalos enteros: los posteriores al primero conservado están completos
+        inicio = max(desde, primer_crudo)
+        self._consolidar_nivel(
+            RESOLUCION_5_MIN, ultimo_5min + RESOLUCION_5_MIN,
+            self.repository.primer_sondeo_desde,
+            self._resumir_sondeos,
+            inicio=inicio - inicio % RESOLUCION_5_MIN
+        )
+        
+        ultimo_1hora = self.repository.ultimo_resumen(RESOLUCION_1_HORA)
+        primer_5min = self.repository.primer_resumen_desde(RESOLUCION_5_MIN, 0)
+        if ultimo_1hora is None or primer_5min is None:
+            return
+        # Ídem con los intervalos de 5 minutos, que se purgan por horas enteras
+        inicio = max(desde, primer_5min)
+        self._consolidar_nivel(
+            RESOLUCION_1_HORA, ultimo_1hora + RESOLUCION_1_HORA,
+            lambda ts: self.repository.primer_resumen_desde(RESOLUCION_5_MIN, ts),
+            self._resumir_resumenes,
+            inicio=inicio - inicio % RESOLUCION_1_HORA
+        )
+    
+    def purgar(self, ahora: Optional[Momento] = None) -> None:
+        """
+        Elimina los datos que superan la retención de cada nivel.
+        Nunca borra datos crudos o de 5 minutos que aún no se hayan consolidado.
+        
+        Args:
+            ahora: Momento actual (por defecto, ahora)
+        """
+        ahora = self._a_epoch(ahora) if ahora is not None else int(time.time())
+        
+        # Cada nivel se purga por intervalos enteros del nivel superior, para que
+        # reconsolidar() nunca recalcule un intervalo al que le falten datos
+        ultimo_5min = self.repository.ultimo_resumen(RESOLUCION_5_MIN)
+        if ultimo_5min is not None:
+            limite = min(ahora - self.retencion_crudo, ultimo_5min + RESOLUCION_5_MIN)
+            self.repository.eliminar_sondeos_anteriores(limite - limite % RESOLUCION_5_MIN)
+        
+        ultimo_1hora = self.repository.ultimo_resumen(RESOLUCION_1_HORA)
+        if ultimo_1hora is not None:
+            limite = min(ahora - self.retencion_5min, ultimo_1hora + RESOLUCION_1_HORA)
+            self.repository.eliminar_resumenes_anteriores(RESOLUCION_5_MIN, limite - limite % RESOLUCION_1_HORA)
+        
+        self.repository.eliminar_resumenes_anteriores(RESOLUCION_1_HORA, ahora - self.retencion_1hora)
+    
+    def _consolidar_nivel(self, resolucion: int, fin: int, primer_dato_desde, resumir,
+                          inicio: Optional[int] = None) -> None:
+        """
+        Consolida en intervalos de 'resolucion' todo lo pendiente hasta 'fin'.
+        
+        Args:
+            resolucion: Resolución de destino en segundos
+            fin: Fin (exclusivo) de la zona que ya está cerrada
+            primer_dato_desde: Función que da el primer dato de origen a partir de un ts
+            resumir: Función que genera los resúmenes de un tramo [desde, hasta)
+            inicio: Desde dónde consolidar (por defecto, tras el último intervalo consolidado)
+        """
+        if inicio is None:
+            ultimo = self.repository.ultimo_resumen(resolucion)
+            inicio = ultimo + resolucion if ultimo is not None else 0
+        
+        # Procesar por tramos acotados para no cargar demasiadas filas a la vez
+        tramo = max(resolucion, 12 * RESOLUCION_5_MIN)
+        while inicio < fin:
+            # Saltar directamente los huecos sin datos
+            primero = primer_dato_desde(inicio)
+            if primero is None or primero >= fin:
+                return
+            inicio = max(inicio, primero - primero % resolucion)
+            
+            hasta = min(fin, inicio + tramo)
+            self.repository.guardar_resumenes(resumir(resolucion, inicio, hasta))
+            inicio = hasta
+    
+    def _resumir_sondeos(self, resolucion: int, desde: int, hasta: int):
+        """Genera resúmenes a partir de los sondeos crudos de un tramo."""
+        acumulados = defaultdict(_Acumulador)
+        for sondeo in self.repository.get_sondeos_rango(desde, hasta):
+            clave = (sondeo.mikrotik_id, sondeo.ts - sondeo.ts % resolucion)
+            acumulados[clave].agregar_sondeo(sondeo.rtt_ms, sondeo.perdida)
+        return [acumulado.como_fila(resolucion, *clave) for clave, acumulado in acumulados.items()]
+    
+    def _resumir_resumenes(self, resolucion: int, desde: int, hasta: int):
+        """Genera resúmenes de mayor resolución combinando resúmenes más finos."""
+        acumulados = defaultdict(_Acumulador)
+        for resumen in self.repository.get_resumenes_rango(RESOLUCION_5_MIN, desde, hasta):
+            clave = (resumen.mikrotik_id, resumen.ts - resumen.ts % resolucion)
+            acumulados[clave].agregar_resumen(resumen)
+        return [acumulado.como_fila(resolucion, *clave) for clave, acumulado in acumulados.items()]
+    
+    # === CONSULTAS ===
+    
+    def obtener_resumen(self, mikrotik_id: int, desde: Momento, hasta: Momento) -> Dict[str, Any]:
+        """
+        Resume la disponibilidad y el RTT de un equipo en una ventana de tiempo.
+        
+        Cada tramo de la ventana se lee del nivel más fino que aún lo conserva
+        (1 hora para lo antiguo, 5 minutos y crudo para lo reciente), con la
+        granularidad del nivel usado. Si toda la ventana está en datos crudos los
+        percentiles son exactos; si no, se estiman con el histograma.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            desde: Inicio de la ventana
+            hasta: Fin de la ventana
+        
+        Returns:
+            Dict[str, Any]: muestras, uptime_pct, perdida_promedio, rtt_min, rtt_max,
+            rtt_p50, rtt_p95 y si los percentiles son exactos
+        """
+        desde, hasta = self._a_epoch(desde), self._a_epoch(hasta)
+        acumulado = _Acumulador(conservar_rtts=True)
+        
+        ultimo_1hora = self.repository.ultimo_resumen(RESOLUCION_1_HORA)
+        ultimo_5min = self.repository.ultimo_resumen(RESOLUCION_5_MIN)
+        fin_1hora = ultimo_1hora + RESOLUCION_1_HORA if ultimo_1hora is not None else desde
+        fin_5min = ultimo_5min + RESOLUCION_5_MIN if ultimo_5min is not None else desde
+        
+        # Tramo antiguo: resúmenes de 1 hora
+        if fin_1hora > desde:
+            for resumen in self.repository.get_resumenes_equipo(
+                    RESOLUCION_1_HORA, mikrotik_id, desde, min(hasta, fin_1hora)):
+                acumulado.agregar_resumen(resumen)
+        
+        # Tramo intermedio: resúmenes de 5 minutos
+        inicio = max(desde, fin_1hora)
+        if fin_5min > inicio:
+            for resumen in self.repository.get_resumenes_equipo(
+                    RESOLUCION_5_MIN, mikrotik_id, inicio, min(hasta, fin_5min)):
+                acumulado.agregar_resumen(resumen)
+        
+        # Tramo reciente: sondeos crudos
+        inicio = max(desde, fin_5min)
+        if hasta > inicio:
+            for sondeo in self.repository.get_sondeos_equipo(mikrotik_id, inicio, hasta):
+                acumulado.agregar_sondeo(sondeo.rtt_ms, sondeo.perdida)
+        
+        return acumulado.como_resumen()
+    
+    def porcentaje_disponibilidad(self, mikrotik_id: int, desde: Momento, hasta: Momento) -> Optional[float]:
+        """
+        Porcentaje de sondeos con respuesta de un equipo en una ventana.
+        
+        Returns:
+            Optional[float]: Porcentaje (0 a 100) o None si no hay sondeos
+        """
+        return self.obtener_resumen(mikrotik_id, desde, hasta)["uptime_pct"]
+    
+    def percentiles_rtt(self, mikrotik_id: int, desde: Momento, hasta: Momento) -> Dict[str, Optional[float]]:
+        """
+        RTT p50 y p95 de un equipo en una ventana.
+        
+        Returns:
+            Dict[str, Optional[float]]: {"p50": ms, "p95": ms}
+        """
+        resumen = self.obtener_resumen(mikrotik_id, desde, hasta)
+        return {"p50": resumen["rtt_p50"], "p95": resumen["rtt_p95"]}
+    
+    def eliminar_historial(self, mikrotik_id: int) -> None:
+        """
+        Elimina el historial de un MikroTik (por ejemplo, al eliminar el equipo).
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        """
+        self.repository.eliminar_por_mikrotik(mikrotik_id)
+    
+    # === MÉTODOS DE UTILIDAD ===
+    
+    @staticmethod
+    def _a_epoch(momento: Momento) -> int:
+        """Convierte un datetime (o epoch) a epoch en segundos."""
+        if isinstance(momento, datetime.datetime):
+            return int(momento.timestamp())
+        return int(momento)
+
+
+class _Acumulador:
+    """Acumula sondeos o resúmenes para producir un resumen combinado."""
+    
+    def __init__(self, conservar_rtts: bool = False):
+        self.muestras = 0
+        self.exitosas = 0
+        self.perdida_suma = 0.0
+        self.rtt_min = None
+        self.rtt_max = None
+        self.histograma = defaultdict(int)
+        # RTTs individuales para percentiles exactos (None cuando se mezclan resúmenes)
+        self.rtts = [] if conservar_rtts else None
+    
+    def agregar_sondeo(self, rtt_ms: Optional[float], perdida: float) -> None:
+        """Agrega un sondeo crudo."""
+        self.muestras += 1
+        self.perdida_suma += perdida
+        if rtt_ms is None:
+            return
+        self.exitosas += 1
+        self._actualizar_extremos(rtt_ms, rtt_ms)
+        self.histograma[ResumenDisponibilidad.intervalo_histograma(rtt_ms)] += 1
+        if self.rtts is not None:
+            self.rtts.append(rtt_ms)
+    
+    def agregar_resumen(self, resumen) -> None:
+        """Agrega un resumen ya consolidado."""
+        self.muestras += resumen.muestras
+        self.exitosas += resumen.exitosas
+        self.perdida_suma += resumen.perdida_suma
+        if resumen.rtt_min is not None:
+            self._actualizar_extremos(resumen.rtt_min, resumen.rtt_max)
+        for intervalo, conteo in ResumenDisponibilidad.decodificar_histograma(resumen.histograma).items():
+            self.histograma[intervalo] += conteo
+        self.rtts = None
+    
+    def _actualizar_extremos(self, minimo: float, maximo: float) -> None:
+        self.rtt_min = minimo if self.rtt_min is None else min(self.rtt_min, minimo)
+        self.rtt_max = maximo if self.rtt_max is None else max(self.rtt_max, maximo)
+    
+    def como_fila(self, resolucion: int, mikrotik_id: int, ts: int) -> Dict[str, Any]:
+        """Devuelve el acumulado como fila de ResumenDisponibilidad."""
+        return {
+            "resolucion": resolucion,
+            "mikrotik_id": mikrotik_id,
+            "ts": ts,
+            "muestras": self.muestras,
+            "exitosas": self.exitosas,
+            "perdida_suma": self.perdida_suma,
+            "rtt_min": self.rtt_min,
+            "rtt_max": self.rtt_max,
+            "histograma": ResumenDisponibilidad.codificar_histograma(self.histograma)
+        }
+    
+    def como_resumen(self) -> Dict[str, Any]:
+        """Devuelve el acumulado como resumen para consultas."""
+        exactos = self.rtts is not None
+        if exactos:
+            p50 = percentil_exacto(self.rtts, 50)
+            p95 = percentil_exacto(self.rtts, 95)
+        else:
+            p50 = ResumenDisponibilidad.percentil_histograma(self.histograma, 50)
+            p95 = ResumenDisponibilidad.percentil_histograma(self.histograma, 95)
+        
+        return {
+            "muestras": self.muestras,
+            "uptime_pct": round(self.exitosas / self.muestras * 100, 3) if self.muestras else None,
+            "perdida_promedio": round(self.perdida_suma / self.muestras, 4) if self.muestras else None,
+            "rtt_min": self.rtt_min,
+            "rtt_max": self.rtt_max,
+            "rtt_p50": p50,
+            "rtt_p95": p95,
+            "percentiles_exactos": exactos
+        }
@@ -0,0 +1,246 @@
+# src/application/services/imagen_documento_service.py
+"""
+Servicio de ingesta de las imágenes de los documentos.
+
+Cada imagen pegada en un documento se procesa una sola vez al ingresar:
+se limita su resolución a la necesaria para imprimirla al ancho máximo de la
+página, se recomprime (PNG optimizado sin pérdida, o JPEG si es una foto y pesa
+mucho menos) y se guarda en el almacén de blobs junto con sus metadatos
+(dimensiones, formato) y una miniatura para la vista previa. La interfaz y la
+exportación a Word usan esos adjuntos en lugar de volver a abrir la imagen.
+"""
+import hashlib
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from typing import Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+from infrastructure.almacenamiento import AlmacenBlobs, crear_referencia, hash_de_referencia
+
+# Sufijos de los adjuntos que se guardan junto a cada imagen en el almacén
+ADJUNTO_METADATOS = "json"  # Solo lo escribe la ingesta: marca la imagen como ingerida
+ADJUNTO_METADATOS_SIN_INGERIR = "sin_ingerir.json"  # Metadatos calculados de una imagen anterior a la ingesta
+ADJUNTO_MINIATURA = "miniatura.png"
+
+
+@dataclass
+class ImagenIngerida:
+    """Metadatos de una imagen guardada en el almacén."""
+    hash: str
+    ancho: int
+    alto: int
+    formato: str
+    tamano: int  # Bytes del archivo guardado
+    
+    @property
+    def referencia(self) -> str:
+        """Referencia "blob:<hash>" a guardar en contenido_json."""
+        return crear_referencia(self.hash)
+
+
+class ImagenDocumentoService:
+    """Servicio que normaliza las imágenes de los documentos y genera sus miniaturas."""
+    
+    def __init__(self, almacen: AlmacenBlobs):
+        """
+        Constructor del servicio.
+        
+        Args:
+            almacen: Almacén donde se guardan las imágenes y sus adjuntos
+        """
+        self.almacen = almacen
+        
+        # Configuraciones por defecto
+        self.ancho_maximo_pulgadas = 6  # Ancho máximo de las imágenes en el documento Word
+        self.dpi_impresion = 300  # Resolución suficiente para imprimir a ese ancho
+        self.calidad_jpeg = 85
+        self.proporcion_jpeg = 0.5  # Solo se usa JPEG si pesa menos de esta fracción del PNG
+        self.tamano_miniatura = (400, 300)  # Tamaño máximo de la vista previa
+        
+        # Un solo hilo: las imágenes se procesan de a una, sin bloquear la interfaz
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingesta_imagenes")
+    
+    def ingerir(self, imagen: Union[bytes, Image.Image]) -> ImagenIngerida:
+        """
+        Normaliza una imagen y la guarda en el almacén con sus metadatos y su miniatura.
+        
+        Si los bytes recibidos ya son una imagen ingerida (p. ej. al volver a guardar
+        un documento), se devuelven sus metadatos sin procesarla de nuevo.
+        
+        Args:
+            imagen: Bytes de la imagen o imagen de PIL
+        
+        Returns:
+            ImagenIngerida: Metadatos de la imagen guardada
+        
+        Raises:
+            PIL.UnidentifiedImageError: Si los bytes no son una imagen
+        """
+        if isinstance(imagen, (bytes, bytearray)):
+            hash_imagen = hashlib.sha256(imagen).hexdigest()
+            guardados = self.almacen.leer_adjunto(hash_imagen, ADJUNTO_METADATOS)
+            if guardados is not None:
+                self.obtener_miniatura(crear_referencia(hash_imagen))  # Por si falta
+                return ImagenIngerida(**json.loads(guardados))
+            imagen = Image.open(BytesIO(imagen))
+        
+        imagen = self._normalizar(imagen)
+        datos, formato = self._codificar(imagen)
+        hash_imagen = self.almacen.guardar(datos)
+        
+        ingerida = ImagenIngerida(hash=hash_imagen, ancho=imagen.width, alto=imagen.height,
+                                  formato=formato, tamano=len(datos))
+        self.almacen.guardar_adjunto(hash_imagen, ADJUNTO_MINIATURA, self._generar_miniatura(imagen))
+        # Los metadatos se escriben al final: marcan la imagen como ingerida
+        self.almacen.guardar_adjunto(hash_imagen, ADJUNTO_METADATOS, json.dumps(asdict(ingerida)).encode())
+        return ingerida
+    
+    def ingerir_en_segundo_plano(self, imagen: Union[bytes, Image.Image]) -> "Future[ImagenIngerida]":
+        """
+        Igual que ingerir, pero en el hilo del servicio.
+        
+        Args:
+            imagen: Bytes de la imagen o imagen de PIL
+        
+        Returns:
+            Future[ImagenIngerida]: Resultado de la ingesta
+        """
+        return self._executor.submit(self.ingerir, imagen)
+    
+    def obtener_metadatos(self, referencia: str) -> Optional[ImagenIngerida]:
+        """
+        Obtiene los metadatos de una imagen del almacén. Para las imágenes guardadas
+        antes de la ingesta se calculan (sin recomprimirlas) y se guardan aparte,
+        para que ingerir() las siga normalizando cuando se vuelvan a guardar.
+        
+        Args:
+            referencia: Referencia "blob:<hash>" de la imagen
+        
+        Returns:
+            Optional[ImagenIngerida]: Metadatos, o None si la imagen no está en el almacén
+        """
+        hash_imagen = hash_de_referencia(referencia)
+        for adjunto in (ADJUNTO_METADATOS, ADJUNTO_METADATOS_SIN_INGERIR):
+            guardados = self.almacen.leer_adjunto(hash_imagen, adjunto)
+            if guardados is not None:
+                return ImagenIngerida(**json.loads(guardados))
+        
+        datos = self.almacen.leer(hash_imagen)
+        if datos is None:
+            return None
+        with Image.open(BytesIO(datos)) as imagen:
+            metadatos = ImagenIngerida(hash=hash_imagen, ancho=imagen.width, alto=imagen.height,
+                                       formato=imagen.format, tamano=len(datos))
+        self.almacen.guardar_adjunto(hash_imagen, ADJUNTO_METADATOS_SIN_INGERIR,
+                                     json.dumps(asdict(metadatos)).encode())
+        return metadatos
+    
+    def obtener_miniatura(self, referencia: str) -> Optional[bytes]:
+        """
+        Obtiene la miniatura (PNG) de una imagen del almacén, generándola si falta.
+        
+        Args:
+            referencia: Referencia "blob:<hash>" de la imagen
+        
+        Returns:
+            Optional[bytes]: PNG de la miniatura, o None si la imagen no está en el almacén
+        """
+        hash_imagen = hash_de_referencia(referencia)
+        miniatura = self.almacen.leer_adjunto(hash_imagen, ADJUNTO_MINIATURA)
+        if miniatura is not None:
+            return miniatura
+        
+        datos = self.almacen.leer(hash_imagen)
+        if datos is None:
+            return None
+        with Image.open(BytesIO(datos)) as imagen:
+            miniatura = self._generar_miniatura(imagen)
+        self.almacen.guardar_adjunto(hash_imagen, ADJUNTO_MINIATURA, miniatura)
+        return miniatura
+    
+    def dimensiones(self, datos: bytes) -> Tuple[int, int]:
+        """
+        Ancho y alto en píxeles de una imagen, desde sus metadatos si está en el
+        almacén (sin decodificarla).
+        
+        Args:
+            datos: Bytes de la imagen
+        
+        Returns:
+            Tuple[int, int]: (ancho, alto)
+        """
+        hash_imagen = hashlib.sha256(datos).hexdigest()
+        if self.almacen.existe(hash_imagen):
+            metadatos = self.obtener_metadatos(crear_referencia(hash_imagen))
+            return metadatos.ancho, metadatos.alto
+        with Image.open(BytesIO(datos)) as imagen:
+            return imagen.size
+    
+    def _normalizar(self, imagen: Image.Image) -> Image.Image:
+        """
+        Orienta la imagen según su EXIF, la pasa a un modo que PNG/JPEG guardan
+        sin sorpresas y limita su ancho a la resolución de impresión.
+        
+        Args:
+            imagen: Imagen de PIL
+        
+        Returns:
+            Image.Image: Imagen normalizada (una copia; la original no se modifica)
+        """
+        imagen = ImageOps.exif_transpose(imagen)
+        if imagen.mode not in ("RGB", "RGBA", "L", "P"):
+            tiene_alfa = "A" in imagen.getbands() or "transparency" in imagen.info
+            imagen = imagen.convert("RGBA" if tiene_alfa else "RGB")
+        elif imagen.mode == "P" and "transparency" in imagen.info:
+            imagen = imagen.convert("RGBA")
+        
+        ancho_maximo = int(self.ancho_maximo_pulgadas * self.dpi_impresion)
+        if imagen.width > ancho_maximo:
+            alto = max(1, round(imagen.height * ancho_maximo / imagen.width))
+            imagen = imagen.resize((ancho_maximo, alto), Image.LANCZOS)
+        return imagen
+    
+    def _codificar(self, imagen: Image.Image) -> Tuple[bytes, str]:
+        """
+        Codifica la imagen en PNG optimizado; las fotos (sin transparencia y con
+        muchos colores) pasan a JPEG si así pesan bastante menos.
+        
+        Args:
+            imagen: Imagen normalizada
+        
+        Returns:
+            Tuple[bytes, str]: Bytes codificados y formato ("PNG" o "JPEG")
+        """
+        buffer = BytesIO()
+        imagen.save(buffer, format="PNG", optimize=True)
+        png = buffer.getvalue()
+        
+        # Capturas de pantalla y gráficas: pocos colores, PNG es más liviano y nítido
+        if imagen.mode not in ("RGB", "L") or imagen.getcolors(256) is not None:
+            return png, "PNG"
+        
+        buffer = BytesIO()
+        imagen.save(buffer, format="JPEG", quality=self.calidad_jpeg, optimize=True)
+        jpeg = buffer.getvalue()
+        if len(jpeg) < len(png) * self.proporcion_jpeg:
+            return jpeg, "JPEG"
+        return png, "PNG"
+    
+    def _generar_miniatura(self, imagen: Image.Image) -> bytes:
+        """
+        Genera la miniatura de la vista previa.
+        
+        Args:
+            imagen: Imagen de PIL
+        
+        Returns:
+            bytes: PNG de la miniatura
+        """
+        miniatura = imagen.copy()
+        miniatura.thumbnail(self.tamano_miniatura, Image.LANCZOS)
+        buffer = BytesIO()
+        miniatura.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
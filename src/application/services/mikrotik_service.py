@@ -3,23 +3,36 @@
 Servicio para la gestión de equipos MikroTik.
 Este servicio maneja toda la lógica de negocio relacionada con MikroTiks.
 """
-import subprocess
-import platform
+import copy
+import hashlib
 import re
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Callable
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Importar librería para conectar con MikroTik
 try:
     import librouteros
     from librouteros import connect
+    from librouteros.exceptions import ConnectionClosed, FatalError, TrapError
+    from librouteros.query import Key
     LIBROUTEROS_AVAILABLE = True
+    # Errores que dejan la conexión inutilizable (los !trap no: son errores del comando)
+    ERRORES_CONEXION_API = (OSError, ConnectionClosed, FatalError)
 except ImportError:
     LIBROUTEROS_AVAILABLE = False
+    ERRORES_CONEXION_API = (OSError,)
     print("⚠️ librouteros no está instalado. Instálalo con: pip install librouteros")
 
 from domain.models.mikrotik import MikroTik
 from infrastructure.repositories.mikrotik_repository import MikroTikRepository
+from infrastructure.repositories.sqlalchemy_repository import Pagina
+from infrastructure.network.sondeador import Sondeador, ResultadoSondeo, ERROR_DESCONOCIDO
+from infrastructure.network.pool_routeros import PoolConexionesRouterOS
+from infrastructure.database.unidad_trabajo import unidad_de_trabajo
+from application.services.historial_disponibilidad_service import HistorialDisponibilidadService
+from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
 
 class MikroTikService:
     """Servicio para manejar operaciones relacionadas con equipos MikroTik."""
@@ -27,10 +40,36 @@ class MikroTikService:
     def __init__(self):
         """Constructor del servicio."""
         self.repository = MikroTikRepository()
+        self.historial = HistorialDisponibilidadService()
+        self.respaldos = RespaldoConfiguracionService()
         
         # Configuraciones por defecto
         self.timeout_ping = 3  # Segundos para timeout de ping
+        self.intentos_ping = 1  # Sondas por equipo en verificaciones masivas
         self.timeout_api = 10  # Segundos para timeout de conexión API
+        self.puerto_api = 8728  # Puerto de la API de RouterOS
+        self.max_concurrencia_ping = 1024  # Sondas en vuelo simultáneas en verificaciones masivas
+        self.modo_sondeo = "auto"  # "auto" (ICMP y, sin permisos, TCP a la API), "icmp" o "tcp"
+        self.max_por_subred = None  # Sondas simultáneas por subred /24 (None = sin límite)
+        self.lote_barrido = 5000  # Equipos leídos de la base y sondeados por lote en los barridos
+        
+        self.max_concurrencia_api = 8  # Equipos atendidos a la vez en cambios masivos de colas
+        self.colas_por_consulta = 50  # Colas pedidas al equipo en cada consulta filtrada de los cambios masivos
+        self.max_concurrencia_respaldos = 16  # Exports descargados a la vez al respaldar la flota
+        self.ttl_estadisticas = 5.0  # Segundos que se reutilizan las estadísticas (0 = sin caché)
+        
+        # Conexiones a la API ya autenticadas, reutilizadas entre operaciones
+        self.pool_api = PoolConexionesRouterOS(
+            verificar=lambda conexion: list(conexion.path('/system/identity')),
+            errores_conexion=ERRORES_CONEXION_API
+        )
+        
+        # Caché nombre de cola -> .id por equipo; vale mientras dure la sesión con el equipo
+        self._ids_colas: Dict[int, Dict[str, str]] = {}
+        self._candado_colas = threading.Lock()
+        
+        # Última consulta de estadísticas: (instante monotónico, estadísticas)
+        self._cache_estadisticas: Optional[Tuple[float, Dict[str, Any]]] = None
     
     # === OPERACIONES CRUD CON VALIDACIONES ===
     
@@ -43,6 +82,34 @@ class MikroTikService:
         """
         return self.repository.get_all()
     
+    def obtener_listado(self) -> List[Any]:
+        """
+        Obtiene los datos que muestran las listas de MikroTiks (id, nombre, ip_mikrotik,
+        estado, disponible, modelo y ubicacion) sin cargar los equipos completos.
+        
+        Returns:
+            List[Any]: Filas de solo lectura con esos atributos
+        """
+        return self.repository.get_listado()
+    
+    def obtener_listado_pagina(self, cursor: Optional[tuple] = None, limite: int = 200,
+                               texto: Optional[str] = None, hacia_atras: bool = False,
+                               contar_total: bool = False) -> Pagina:
+        """
+        Obtiene una página del listado de MikroTiks, opcionalmente filtrada por texto.
+        
+        Args:
+            cursor: cursor_siguiente o cursor_anterior de la página previa (None = primera página)
+            limite: Tamaño de página
+            texto: Texto a buscar en nombre, IP, estado, modelo o ubicación
+            hacia_atras: Obtener la página anterior al cursor
+            contar_total: Calcular también el total de equipos que cumplen el filtro
+            
+        Returns:
+            Pagina: Filas del listado y cursores para seguir
+        """
+        return self.repository.get_listado_pagina(cursor, limite, texto, hacia_atras, contar_total)
+    
     def obtener_por_id(self, mikrotik_id: int) -> Optional[MikroTik]:
         """
         Obtiene un MikroTik por su ID.
@@ -144,6 +211,7 @@ class MikroTikService:
         
         # Guardar en base de datos
         mikrotik_creado = self.repository.create(nuevo_mikrotik)
+        self.invalidar_estadisticas()
         
         # ARREGLO: Verificar conectividad sin actualizar inmediatamente
         # Esto evita problemas de sesión de SQLAlchemy
@@ -241,8 +309,11 @@ class MikroTikService:
         if notas is not None:
             mikrotik.notas = notas.strip() if notas else None
         
-        # Guardar cambios
-        return self.repository.update(mikrotik)
+        # Guardar cambios (la IP o las credenciales pueden haber cambiado: olvidar los .id de sus colas)
+        self.olvidar_colas(mikrotik_id)
+        mikrotik_actualizado = self.repository.update(mikrotik)
+        self.invalidar_estadisticas()
+        return mikrotik_actualizado
     
     def eliminar(self, mikrotik_id: int) -> bool:
         """
@@ -254,7 +325,16 @@ class MikroTikService:
         Returns:
             bool: True si se eliminó correctamente, False en caso contrario
         """
-        return self.repository.delete(mikrotik_id)
+        # El equipo, su historial y sus respaldos se borran en una sola transacción
+        with unidad_de_trabajo():
+            eliminado = self.repository.delete(mikrotik_id)
+            if eliminado:
+                self.historial.eliminar_historial(mikrotik_id)
+                self.respaldos.eliminar_respaldos(mikrotik_id)
+        if eliminado:
+            self.olvidar_colas(mikrotik_id)
+            self.invalidar_estadisticas()
+        return eliminado
     
     # === OPERACIONES DE CONECTIVIDAD ===
     
@@ -269,29 +349,24 @@ class MikroTikService:
             bool: True si responde, False si no responde
         """
         try:
-            # Determinar comando según sistema operativo
-            if platform.system().lower() == "windows":
-                comando = ["ping", "-n", "1", "-w", str(self.timeout_ping * 1000), ip]
-            else:  # Linux/Mac
-                comando = ["ping", "-c", "1", "-W", str(self.timeout_ping), ip]
-            
-            # Ejecutar comando
-            resultado = subprocess.run(
-                comando,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout_ping + 2  # Timeout extra para el proceso
-            )
-            
-            # Verificar resultado
-            return resultado.returncode == 0
-            
-        except subprocess.TimeoutExpired:
-            return False
+            return self.sondear(ip).disponible
         except Exception as e:
             print(f"Error al hacer ping a {ip}: {str(e)}")
             return False
     
+    def sondear(self, ip: str, intentos: int = 1) -> ResultadoSondeo:
+        """
+        Sondea una IP y devuelve el detalle de la respuesta.
+        
+        Args:
+            ip: Dirección IP a sondear
+            intentos: Número de sondas a enviar
+            
+        Returns:
+            ResultadoSondeo: RTT, pérdida y clase de error
+        """
+        return self._crear_sondeador().sondear(ip, intentos)
+    
     def verificar_conectividad(self, mikrotik_id: int) -> bool:
         """
         Verifica la conectividad de un MikroTik y actualiza su estado.
@@ -308,93 +383,144 @@ class MikroTikService:
             return False
         
         # Hacer ping
-        disponible = self.hacer_ping(mikrotik.ip_mikrotik)
+        try:
+            resultado = self.sondear(mikrotik.ip_mikrotik)
+        except Exception as e:
+            print(f"Error al hacer ping a {mikrotik.ip_mikrotik}: {str(e)}")
+            resultado = ResultadoSondeo(ip=mikrotik.ip_mikrotik, enviados=1, error=ERROR_DESCONOCIDO)
+        disponible = resultado.disponible
         
-        # ARREGLO SIMPLE: Actualizar solo lo necesario usando parámetros específicos
+        # Guardar disponibilidad, transición de estado e historial en una sola transacción
         try:
-            # Preparar actualizaciones
-            updates = {}
-            
-            # Actualizar estado basado en disponibilidad
-            if not disponible and mikrotik.estado == "activo":
-                updates["estado"] = "error"
-            elif disponible and mikrotik.estado == "error":
-                updates["estado"] = "activo"
-            
-            # Usar el método actualizar si hay cambios de estado
-            if updates:
-                self.actualizar(mikrotik_id, **updates)
-            
-            # Para la disponibilidad, hacer una actualización directa más simple
-            # Esto evita problemas de sesión de SQLAlchemy
-            from infrastructure.database.config import SessionLocal
-            with SessionLocal() as db:
-                mtk = db.query(MikroTik).filter(MikroTik.id == mikrotik_id).first()
-                if mtk:
-                    mtk.disponible = disponible
-                    db.commit()
-            
+            with unidad_de_trabajo():
+                self.repository.actualizar_disponibilidad_por_id({mikrotik_id: disponible})
+                self.historial.registrar_barrido({mikrotik_id: resultado})
+            self.invalidar_estadisticas()
         except Exception as e:
             print(f"⚠️ Error al actualizar disponibilidad del MikroTik {mikrotik_id}: {str(e)}")
             # Si falla la actualización, al menos retornamos el resultado del ping
-            pass
         
         return disponible
     
-    def verificar_conectividad_masiva(self) -> Dict[str, Any]:
+    def verificar_conectividad_masiva(self, max_concurrencia: Optional[int] = None,
+                                      detalles: bool = True) -> Dict[str, Any]:
         """
-        Verifica la conectividad de todos los MikroTiks activos.
+        Verifica la conectividad de todos los MikroTiks activos o en error
+        (los que están en error vuelven a "activo" en cuanto responden).
+        
+        Los equipos se leen de la base de a lote_barrido (solo id, nombre e IP),
+        se sondean a la vez (hasta max_concurrencia en vuelo) y el resultado de
+        cada lote se guarda antes de leer el siguiente. Así el barrido tarda
+        aproximadamente lo que el lote más lento y no la suma de todos los
+        timeouts y ninguna lectura queda abierta mientras se sondea. Con
+        detalles=False solo se acumulan los contadores, para flotas grandes.
+        
+        Args:
+            max_concurrencia: Sondas simultáneas (por defecto self.max_concurrencia_ping)
+            detalles: Incluir en el resultado la disponibilidad de cada equipo
         
         Returns:
-            Dict[str, Any]: Estadísticas de conectividad
+            Dict[str, Any]: Estadísticas de conectividad (y "detalles", salvo que se omitan)
         """
-        mikrotiks_activos = self.repository.get_by_estado("activo")
-        
         resultados = {
-            "total_verificados": len(mikrotiks_activos),
+            "total_verificados": 0,
             "disponibles": 0,
-            "no_disponibles": 0,
-            "detalles": []
+            "no_disponibles": 0
         }
+        if detalles:
+            resultados["detalles"] = []
         
-        for mikrotik in mikrotiks_activos:
-            disponible = self.hacer_ping(mikrotik.ip_mikrotik)
+        ultimo_id = 0
+        while True:
+            lote = self.repository.get_lote_barrido(ultimo_id, self.lote_barrido)
+            if not lote:
+                break
+            ultimo_id = lote[-1].id
+            sondeos = self.sondear_masivo([mikrotik.ip_mikrotik for mikrotik in lote], max_concurrencia)
             
-            # ARREGLO: Actualizar de forma segura usando métodos del servicio
-            try:
-                # Solo actualizar estado si cambió
-                if not disponible and mikrotik.estado == "activo":
-                    self.actualizar(mikrotik.id, estado="error")
+            disponibilidad: Dict[int, bool] = {}
+            sondeos_por_id: Dict[int, ResultadoSondeo] = {}
+            for mikrotik in lote:
+                sondeo = sondeos.get(mikrotik.ip_mikrotik)
+                disponible = sondeo.disponible if sondeo else False
+                disponibilidad[mikrotik.id] = disponible
+                if sondeo:
+                    sondeos_por_id[mikrotik.id] = sondeo
                 
-                # Actualizar disponibilidad
-                mikrotik_fresh = self.repository.get_by_id(mikrotik.id)
-                if mikrotik_fresh:
-                    mikrotik_fresh.disponible = disponible
-                    self.repository.update(mikrotik_fresh)
+                # Actualizar estadísticas
+                resultados["total_verificados"] += 1
+                if disponible:
+                    resultados["disponibles"] += 1
+                else:
+                    resultados["no_disponibles"] += 1
                 
+                if detalles:
+                    resultados["detalles"].append({
+                        "id": mikrotik.id,
+                        "nombre": mikrotik.nombre,
+                        "ip": mikrotik.ip_mikrotik,
+                        "disponible": disponible
+                    })
+            
+            # Guardar el lote (estados e historial de RTT y pérdida) en una sola transacción
+            try:
+                with unidad_de_trabajo():
+                    self.repository.actualizar_disponibilidad_por_id(disponibilidad)
+                    self.historial.registrar_barrido(sondeos_por_id)
             except Exception as e:
-                print(f"⚠️ Error al actualizar MikroTik {mikrotik.id}: {str(e)}")
+                print(f"⚠️ Error al guardar el resultado del barrido: {str(e)}")
+        
+        self.invalidar_estadisticas()
+        return resultados
+    
+    def hacer_ping_masivo(self, ips: Iterable[str], 
+                          max_concurrencia: Optional[int] = None) -> Dict[str, bool]:
+        """
+        Hace ping a varias IPs a la vez.
+        
+        Args:
+            ips: Direcciones IP a verificar (las repetidas se pingean una sola vez)
+            max_concurrencia: Sondas en vuelo simultáneas (por defecto self.max_concurrencia_ping)
             
-            # Actualizar estadísticas
-            if disponible:
-                resultados["disponibles"] += 1
-            else:
-                resultados["no_disponibles"] += 1
+        Returns:
+            Dict[str, bool]: Disponibilidad por IP
+        """
+        resultados = self.sondear_masivo(ips, max_concurrencia)
+        return {ip: resultado.disponible for ip, resultado in resultados.items()}
+    
+    def sondear_masivo(self, ips: Iterable[str], 
+                       max_concurrencia: Optional[int] = None) -> Dict[str, ResultadoSondeo]:
+        """
+        Sondea varias IPs multiplexando todas las sondas en un solo socket.
+        
+        Args:
+            ips: Direcciones IP a sondear
+            max_concurrencia: Sondas en vuelo simultáneas (por defecto self.max_concurrencia_ping)
             
-            resultados["detalles"].append({
-                "id": mikrotik.id,
-                "nombre": mikrotik.nombre,
-                "ip": mikrotik.ip_mikrotik,
-                "disponible": disponible
-            })
+        Returns:
+            Dict[str, ResultadoSondeo]: Resultado detallado por IP
+        """
+        limite = max_concurrencia or self.max_concurrencia_ping
+        return self._crear_sondeador().sondear_multiples(ips, intentos=self.intentos_ping, max_pendientes=limite)
+    
+    def _crear_sondeador(self) -> Sondeador:
+        """
+        Crea un sondeador con la configuración actual del servicio.
         
-        return resultados
+        Returns:
+            Sondeador: Sondeador listo para usar
+        """
+        return Sondeador(timeout=self.timeout_ping, modo=self.modo_sondeo,
+                         max_por_subred=self.max_por_subred, puerto_tcp=self.puerto_api)
     
     # === CONEXIÓN A LA API DE MIKROTIK ===
     
     def conectar_mikrotik(self, mikrotik_id: int) -> Tuple[bool, str, Any]:
         """
-        Conecta a un MikroTik mediante la API.
+        Abre una conexión nueva (fuera del pool) a un MikroTik mediante la API.
+        Quien la recibe es responsable de cerrarla; para operaciones puntuales
+        es preferible probar_conexion o los métodos de colas y export, que
+        reutilizan las conexiones del pool.
         
         Args:
             mikrotik_id: ID del MikroTik al que conectar
@@ -402,32 +528,120 @@ class MikroTikService:
         Returns:
             Tuple[bool, str, Any]: (éxito, mensaje, conexión)
         """
+        exito, mensaje, mikrotik = self._preparar_conexion(mikrotik_id)
+        if not exito:
+            return False, mensaje, None
+        
+        try:
+            return True, "Conexión exitosa", self._crear_conexion(mikrotik)
+        except Exception as e:
+            error_msg = f"Error al conectar: {str(e)}"
+            return False, error_msg, None
+    
+    def probar_conexion(self, mikrotik_id: int) -> Tuple[bool, str]:
+        """
+        Verifica que se pueda conectar y autenticar en el MikroTik.
+        La conexión queda en el pool, lista para las siguientes operaciones.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje)
+        """
+        try:
+            exito, mensaje, _ = self._ejecutar_api(mikrotik_id, lambda conexion: None)
+        except Exception as e:
+            return False, f"Error al conectar: {str(e)}"
+        return exito, "Conexión exitosa" if exito else mensaje
+    
+    def obtener_estadisticas_pool(self) -> Dict[str, Any]:
+        """
+        Obtiene los contadores del pool de conexiones a la API (aciertos, fallos, reconexiones...).
+        
+        Returns:
+            Dict[str, Any]: Estadísticas del pool
+        """
+        return self.pool_api.estadisticas()
+    
+    def _preparar_conexion(self, mikrotik_id: int) -> Tuple[bool, str, Any]:
+        """
+        Obtiene las credenciales del MikroTik y verifica que se le pueda conectar.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            
+        Returns:
+            Tuple[bool, str, Any]: (éxito, mensaje, fila de get_credenciales)
+        """
         if not LIBROUTEROS_AVAILABLE:
             return False, "librouteros no está instalado", None
         
-        # Obtener el MikroTik
-        mikrotik = self.repository.get_by_id(mikrotik_id)
+        # Obtener solo las credenciales (no hace falta el MikroTik completo)
+        mikrotik = self.repository.get_credenciales(mikrotik_id)
         if not mikrotik:
             return False, "MikroTik no encontrado", None
         
         # Verificar que tenga credenciales
-        if not mikrotik.tiene_credenciales():
+        if not (mikrotik.usuario_acceso and mikrotik.contrasena_acceso):
             return False, "MikroTik no tiene credenciales configuradas", None
         
-        try:
-            # Conectar a la API
-            conexion = connect(
-                username=mikrotik.usuario_acceso,
-                password=mikrotik.contrasena_acceso,
-                host=mikrotik.ip_mikrotik,
-                timeout=self.timeout_api
-            )
+        return True, "", mikrotik
+    
+    def _crear_conexion(self, mikrotik: Any) -> Any:
+        """
+        Abre y autentica una conexión nueva a la API.
+        
+        Args:
+            mikrotik: Credenciales del MikroTik al que conectar (get_credenciales)
             
-            return True, "Conexión exitosa", conexion
+        Returns:
+            Any: Conexión de librouteros
+        """
+        return connect(
+            username=mikrotik.usuario_acceso,
+            password=mikrotik.contrasena_acceso,
+            host=mikrotik.ip_mikrotik,
+            port=self.puerto_api,
+            timeout=self.timeout_api
+        )
+    
+    def _ejecutar_api(self, mikrotik_id: int, operacion) -> Tuple[bool, str, Any]:
+        """
+        Ejecuta una operación sobre la API usando una conexión del pool.
+        Las excepciones de la operación se propagan a quien llama.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            operacion: Función que recibe la conexión y devuelve un resultado
             
-        except Exception as e:
-            error_msg = f"Error al conectar: {str(e)}"
-            return False, error_msg, None
+        Returns:
+            Tuple[bool, str, Any]: (éxito, mensaje, resultado de la operación)
+        """
+        exito, mensaje, mikrotik = self._preparar_conexion(mikrotik_id)
+        if not exito:
+            return False, mensaje, None
+        
+        # La clave incluye las credenciales: si cambian, no se reutiliza la sesión anterior.
+        # De la contraseña solo se guarda su hash, para no retenerla en claro en el pool
+        clave = (mikrotik.ip_mikrotik, mikrotik.usuario_acceso,
+                 hashlib.sha256(mikrotik.contrasena_acceso.encode()).hexdigest())
+        resultado = self.pool_api.ejecutar(clave, lambda: self._abrir_sesion(mikrotik), operacion)
+        return True, "", resultado
+    
+    def _abrir_sesion(self, mikrotik: Any) -> Any:
+        """
+        Crea una conexión para el pool y olvida los .id de colas guardados del equipo:
+        si hubo que reconectar, el equipo pudo reiniciarse y renumerar sus colas.
+        
+        Args:
+            mikrotik: Credenciales del MikroTik al que conectar (get_credenciales)
+            
+        Returns:
+            Any: Conexión de librouteros
+        """
+        self.olvidar_colas(mikrotik.id)
+        return self._crear_conexion(mikrotik)
     
     # === GESTIÓN DE COLAS (UPGRADE/DOWNGRADE) ===
     
@@ -441,17 +655,17 @@ class MikroTikService:
         Returns:
             Tuple[bool, str, List[Dict]]: (éxito, mensaje, lista de colas)
         """
-        # Conectar al MikroTik
-        exito, mensaje, conexion = self.conectar_mikrotik(mikrotik_id)
-        if not exito:
-            return False, mensaje, []
-        
         try:
             # Obtener colas simples
-            colas = list(conexion.path('/queue/simple').select('.id', 'name', 'target', 'max-limit'))
+            exito, mensaje, colas = self._ejecutar_api(
+                mikrotik_id,
+                lambda conexion: list(conexion.path('/queue/simple').select('.id', 'name', 'target', 'max-limit'))
+            )
+            if not exito:
+                return False, mensaje, []
             
-            # Cerrar conexión
-            conexion.close()
+            # Ya que se descargó la lista completa, aprovecharla para la caché de .id
+            self._recordar_colas(mikrotik_id, colas)
             
             # Formatear resultados
             colas_formateadas = []
@@ -466,10 +680,6 @@ class MikroTikService:
             return True, "Colas obtenidas exitosamente", colas_formateadas
             
         except Exception as e:
-            try:
-                conexion.close()
-            except:
-                pass
             return False, f"Error al obtener colas: {str(e)}", []
     
     def modificar_cola(self, mikrotik_id: int, nombre_cola: str, 
@@ -486,58 +696,304 @@ class MikroTikService:
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
-        # Usar mismo valor para upload si no se especifica
-        if mbps_upload is None:
-            mbps_upload = mbps_download
+        nuevo_limite = self._formatear_limite(mbps_download, mbps_upload)
         
-        # Convertir Mbps a Kbps usando la fórmula: Mbps * 1024
-        kbps_download = int(mbps_download * 1024)
-        kbps_upload = int(mbps_upload * 1024)
-        
-        # Formatear límite para MikroTik: "upload/download" en Kbps
-        nuevo_limite = f"{kbps_upload}k/{kbps_download}k"
-        
-        # Conectar al MikroTik
-        exito, mensaje, conexion = self.conectar_mikrotik(mikrotik_id)
-        if not exito:
-            return False, mensaje
+        def modificar(conexion) -> bool:
+            id_cola, de_cache = self._resolver_cola(conexion, mikrotik_id, nombre_cola)
+            if id_cola is None:
+                return False
+            
+            try:
+                conexion.path('/queue/simple').update(**{'.id': id_cola, 'max-limit': nuevo_limite})
+            except TrapError:
+                if not de_cache:
+                    raise
+                # El .id guardado ya no existe (la cola se borró o se volvió a crear): buscarla de nuevo
+                self.olvidar_colas(mikrotik_id, nombre_cola)
+                id_cola, _ = self._resolver_cola(conexion, mikrotik_id, nombre_cola)
+                if id_cola is None:
+                    return False
+                conexion.path('/queue/simple').update(**{'.id': id_cola, 'max-limit': nuevo_limite})
+            return True
         
         try:
-            # Buscar la cola por nombre
-            colas = list(conexion.path('/queue/simple').select('.id', 'name'))
-            
-            cola_encontrada = None
-            for cola in colas:
-                if cola.get('name') == nombre_cola:
-                    cola_encontrada = cola
-                    break
+            exito, mensaje, encontrada = self._ejecutar_api(mikrotik_id, modificar)
+            if not exito:
+                return False, mensaje
             
-            if not cola_encontrada:
-                conexion.close()
+            if not encontrada:
                 return False, f"No se encontró la cola '{nombre_cola}'"
             
-            # Modificar la cola
-            conexion.path('/queue/simple').update(
-                **{'.id': cola_encontrada['.id'], 'max-limit': nuevo_limite}
-            )
+            return True, f"Cola '{nombre_cola}' actualizada a {mbps_download} Mbps ({nuevo_limite})"
             
-            # Cerrar conexión
-            conexion.close()
+        except Exception as e:
+            return False, f"Error al modificar cola: {str(e)}"
+    
+    def olvidar_colas(self, mikrotik_id: int, nombre_cola: Optional[str] = None) -> None:
+        """
+        Invalida la caché de .id de colas de un equipo (o solo la de una cola).
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            nombre_cola: Cola a olvidar (si no se especifica, todas las del equipo)
+        """
+        with self._candado_colas:
+            if nombre_cola is None:
+                self._ids_colas.pop(mikrotik_id, None)
+            else:
+                self._ids_colas.get(mikrotik_id, {}).pop(nombre_cola, None)
+    
+    def _resolver_cola(self, conexion, mikrotik_id: int, nombre_cola: str) -> Tuple[Optional[str], bool]:
+        """
+        Obtiene el .id de una cola por nombre: de la caché o, si no está, pidiéndole
+        al equipo solo esa cola (filtro ?name= en el propio RouterOS) en lugar de
+        descargar todas las colas y buscarla en Python.
+        
+        Args:
+            conexion: Conexión de librouteros
+            mikrotik_id: ID del MikroTik
+            nombre_cola: Nombre de la cola
             
-            return True, f"Cola '{nombre_cola}' actualizada a {mbps_download} Mbps ({nuevo_limite})"
+        Returns:
+            Tuple[Optional[str], bool]: (.id o None si no existe, si salió de la caché)
+        """
+        with self._candado_colas:
+            id_cola = self._ids_colas.get(mikrotik_id, {}).get(nombre_cola)
+        if id_cola is not None:
+            return id_cola, True
+        
+        encontradas = list(conexion.path('/queue/simple').select('.id').where(Key('name') == nombre_cola))
+        if not encontradas:
+            return None, False
+        
+        id_cola = encontradas[0]['.id']
+        with self._candado_colas:
+            self._ids_colas.setdefault(mikrotik_id, {})[nombre_cola] = id_cola
+        return id_cola, False
+    
+    def _recordar_colas(self, mikrotik_id: int, colas: Iterable[Dict[str, Any]]) -> None:
+        """
+        Reemplaza la caché de .id de un equipo con una lista completa de sus colas.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            colas: Colas leídas del equipo (con '.id' y 'name')
+        """
+        ids = {cola['name']: cola['.id'] for cola in colas if cola.get('name') and cola.get('.id')}
+        with self._candado_colas:
+            self._ids_colas[mikrotik_id] = ids
+    
+    def aplicar_cambios_masivos(self, cambios: Iterable[Tuple], max_concurrencia: Optional[int] = None,
+                                progreso: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+                                ) -> List[Dict[str, Any]]:
+        """
+        Aplica cambios de ancho de banda a muchas colas de muchos MikroTiks.
+        
+        Los cambios se agrupan por equipo: cada equipo se atiende con una sola
+        sesión del pool (leer solo las colas a cambiar, aplicar los cambios y
+        volver a leerlas por .id para verificar) y se atienden hasta
+        'max_concurrencia' equipos a la vez.
+        
+        Args:
+            cambios: Filas (mikrotik_id, nombre_cola, mbps_download[, mbps_upload])
+            max_concurrencia: Equipos simultáneos (por defecto self.max_concurrencia_api)
+            progreso: Función llamada por cada fila terminada con (terminadas, total, resultado).
+                      Se llama desde hilos de trabajo: la interfaz debe pasar el aviso a su hilo.
+        
+        Returns:
+            List[Dict[str, Any]]: Un resultado por fila, en el mismo orden, con mikrotik_id,
+            cola, limite_anterior, limite_nuevo, exito, verificado y mensaje
+        """
+        filas = [tuple(cambio) for cambio in cambios]
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(filas)
+        
+        # Agrupar por equipo conservando la posición de cada fila
+        por_equipo: Dict[int, List[Tuple[int, Tuple]]] = {}
+        for indice, fila in enumerate(filas):
+            por_equipo.setdefault(fila[0], []).append((indice, fila))
+        
+        terminadas = 0
+        candado = threading.Lock()
+        
+        def atender_equipo(mikrotik_id: int, filas_equipo: List[Tuple[int, Tuple]]) -> None:
+            nonlocal terminadas
+            for indice, resultado in self._aplicar_cambios_equipo(mikrotik_id, filas_equipo):
+                resultados[indice] = resultado
+                with candado:
+                    terminadas += 1
+                    avance = terminadas
+                if progreso:
+                    progreso(avance, len(filas), resultado)
+        
+        if por_equipo:
+            limite = max_concurrencia or self.max_concurrencia_api
+            with ThreadPoolExecutor(max_workers=min(limite, len(por_equipo)),
+                                    thread_name_prefix="cambios-colas") as executor:
+                for futuro in [executor.submit(atender_equipo, mikrotik_id, filas_equipo)
+                               for mikrotik_id, filas_equipo in por_equipo.items()]:
+                    futuro.result()
+        
+        return resultados
+    
+    def _aplicar_cambios_equipo(self, mikrotik_id: int,
+                                filas: List[Tuple[int, Tuple]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Aplica y verifica los cambios de un equipo en una sola sesión de la API.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            filas: Lista de (posición, fila) con las filas del equipo
+        
+        Returns:
+            List[Tuple[int, Dict]]: (posición, resultado) por cada fila
+        """
+        resultados = {}
+        for indice, fila in filas:
+            nombre_cola, mbps_download = fila[1], fila[2]
+            mbps_upload = fila[3] if len(fila) > 3 else None
+            resultados[indice] = {
+                "mikrotik_id": mikrotik_id,
+                "cola": nombre_cola,
+                "limite_anterior": None,
+                "limite_nuevo": self._formatear_limite(mbps_download, mbps_upload),
+                "exito": False,
+                "verificado": False,
+                "mensaje": ""
+            }
+        
+        def aplicar(conexion) -> None:
+            colas = conexion.path('/queue/simple')
+            nombres = [resultado["cola"] for resultado in resultados.values()]
+            actuales = self._leer_colas(colas, 'name', nombres)
+            with self._candado_colas:
+                ids = self._ids_colas.setdefault(mikrotik_id, {})
+                for nombre in nombres:
+                    if nombre in actuales:
+                        ids[nombre] = actuales[nombre]['.id']
+                    else:
+                        ids.pop(nombre, None)
+            
+            for resultado in resultados.values():
+                # Si el pool reintenta tras una reconexión, se parte de cero (sin perder el límite original)
+                resultado["exito"] = resultado["verificado"] = False
+                resultado["mensaje"] = ""
+                cola = actuales.get(resultado["cola"])
+                if cola is None:
+                    resultado["mensaje"] = f"No se encontró la cola '{resultado['cola']}'"
+                    continue
+                if resultado["limite_anterior"] is None:
+                    resultado["limite_anterior"] = cola.get('max-limit')
+                try:
+                    colas.update(**{'.id': cola['.id'], 'max-limit': resultado["limite_nuevo"]})
+                    resultado["exito"] = True
+                except Exception as e:
+                    if isinstance(e, ERRORES_CONEXION_API):
+                        raise
+                    resultado["mensaje"] = f"Error al modificar cola: {str(e)}"
             
+            # Verificar leyendo de nuevo (por .id) solo las colas modificadas
+            modificadas = [actuales[resultado["cola"]]['.id'] for resultado in resultados.values()
+                           if resultado["exito"]]
+            leidas = self._leer_colas(colas, '.id', modificadas)
+            for resultado in resultados.values():
+                if not resultado["exito"]:
+                    continue
+                leido = leidas.get(actuales[resultado["cola"]]['.id'], {}).get('max-limit')
+                resultado["verificado"] = (self._limite_a_bps(leido) ==
+                                           self._limite_a_bps(resultado["limite_nuevo"]))
+                resultado["mensaje"] = ("Cambio aplicado y verificado" if resultado["verificado"] else
+                                        f"El equipo reporta max-limit '{leido}' tras el cambio")
+        
+        try:
+            exito, mensaje, _ = self._ejecutar_api(mikrotik_id, aplicar)
         except Exception as e:
+            exito, mensaje = False, f"Error de conexión: {str(e)}"
+        
+        if not exito:
+            for resultado in resultados.values():
+                if not resultado["mensaje"]:
+                    resultado["exito"] = resultado["verificado"] = False
+                    resultado["mensaje"] = mensaje
+        
+        return list(resultados.items())
+    
+    def _leer_colas(self, colas, campo: str, valores: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Lee del equipo solo las colas cuyo 'campo' está entre 'valores', con el
+        filtro en el propio RouterOS (?name=a ?name=b ?#|) y de a
+        colas_por_consulta valores por consulta.
+        
+        Args:
+            colas: conexion.path('/queue/simple')
+            campo: Atributo por el que se filtra ('name' o '.id')
+            valores: Valores buscados
+            
+        Returns:
+            Dict[str, Dict]: Colas encontradas (con .id, name y max-limit) por valor de 'campo'
+        """
+        valores = list(dict.fromkeys(valores))
+        encontradas = {}
+        for inicio in range(0, len(valores), self.colas_por_consulta):
+            tanda = valores[inicio:inicio + self.colas_por_consulta]
+            for cola in colas.select('.id', 'name', 'max-limit').where(Key(campo).In(*tanda)):
+                encontradas[cola.get(campo)] = cola
+        return encontradas
+    
+    @staticmethod
+    def _formatear_limite(mbps_download: float, mbps_upload: float = None) -> str:
+        """
+        Formatea el max-limit de una cola: "upload/download" en Kbps.
+        
+        Args:
+            mbps_download: Mbps de descarga
+            mbps_upload: Mbps de subida (si no se especifica, usa el mismo que download)
+            
+        Returns:
+            str: Límite en formato RouterOS, por ejemplo "10240k/20480k"
+        """
+        # Usar mismo valor para upload si no se especifica
+        if mbps_upload is None:
+            mbps_upload = mbps_download
+        
+        # Convertir Mbps a Kbps usando la fórmula: Mbps * 1024
+        kbps_download = int(mbps_download * 1024)
+        kbps_upload = int(mbps_upload * 1024)
+        
+        return f"{kbps_upload}k/{kbps_download}k"
+    
+    @staticmethod
+    def _limite_a_bps(limite: Optional[str]) -> Optional[Tuple[int, ...]]:
+        """
+        Convierte un max-limit a bits por segundo para comparar valores equivalentes
+        ("10240k/10240k" y "10240000/10240000" son el mismo límite).
+        
+        Args:
+            limite: max-limit en formato RouterOS
+            
+        Returns:
+            Optional[Tuple[int, ...]]: (upload, download) en bps, o None si no es válido
+        """
+        if not limite:
+            return None
+        multiplicadores = {'k': 1000, 'M': 1000 ** 2, 'G': 1000 ** 3}
+        valores = []
+        for parte in limite.split('/'):
+            parte = parte.strip()
             try:
-                conexion.close()
-            except:
-                pass
-            return False, f"Error al modificar cola: {str(e)}"
+                if parte and parte[-1] in multiplicadores:
+                    valores.append(int(float(parte[:-1]) * multiplicadores[parte[-1]]))
+                else:
+                    valores.append(int(parte))
+            except ValueError:
+                return None
+        return tuple(valores)
     
     # === EXPORT DE CONFIGURACIÓN ===
     
     def obtener_export_completo(self, mikrotik_id: int) -> Tuple[bool, str, str]:
         """
-        Obtiene el export completo de la configuración del MikroTik.
+        Obtiene el export completo de la configuración del MikroTik y lo guarda
+        como versión en los respaldos de configuración.
         
         Args:
             mikrotik_id: ID del MikroTik
@@ -545,34 +1001,120 @@ class MikroTikService:
         Returns:
             Tuple[bool, str, str]: (éxito, mensaje, export completo)
         """
-        # Conectar al MikroTik
-        exito, mensaje, conexion = self.conectar_mikrotik(mikrotik_id)
+        exito, mensaje, export_completo = self._descargar_export(mikrotik_id)
         if not exito:
             return False, mensaje, ""
         
         try:
-            # Ejecutar comando export
-            resultado = list(conexion.path('/export'))
-            
-            # Cerrar conexión
-            conexion.close()
+            self.respaldos.guardar_export(mikrotik_id, export_completo)
+        except Exception as e:
+            print(f"⚠️ Error al guardar el respaldo del MikroTik {mikrotik_id}: {str(e)}")
+        
+        return True, "Export obtenido exitosamente", export_completo
+    
+    def respaldar_configuraciones(self, mikrotik_ids: Optional[Iterable[int]] = None,
+                                  max_concurrencia: Optional[int] = None,
+                                  progreso: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+                                  ) -> Dict[str, Any]:
+        """
+        Respalda la configuración de muchos MikroTiks.
+        
+        Los exports se descargan en paralelo (hasta 'max_concurrencia' equipos a la
+        vez, usando el pool de la API) y se guardan a medida que llegan desde el
+        hilo que llama, así la base de datos no recibe escrituras concurrentes.
+        
+        Args:
+            mikrotik_ids: Equipos a respaldar (por defecto, los activos con credenciales)
+            max_concurrencia: Descargas simultáneas (por defecto self.max_concurrencia_respaldos)
+            progreso: Función llamada por cada equipo terminado con (terminados, total, detalle)
+        
+        Returns:
+            Dict[str, Any]: total, respaldados, versiones_nuevas, sin_cambios, fallidos,
+            bytes_descargados, bytes_almacenados, duracion y detalles por equipo
+        """
+        if mikrotik_ids is None:
+            mikrotik_ids = [mikrotik.id for mikrotik in self.repository.get_con_credenciales()
+                            if mikrotik.esta_activo()]
+        ids = list(dict.fromkeys(mikrotik_ids))
+        
+        resumen = {
+            "total": len(ids),
+            "respaldados": 0,
+            "versiones_nuevas": 0,
+            "sin_cambios": 0,
+            "fallidos": 0,
+            "bytes_descargados": 0,
+            "bytes_almacenados": 0,
+            "duracion": 0.0,
+            "detalles": []
+        }
+        if not ids:
+            return resumen
+        
+        inicio = time.perf_counter()
+        limite = max_concurrencia or self.max_concurrencia_respaldos
+        with ThreadPoolExecutor(max_workers=min(limite, len(ids)),
+                                thread_name_prefix="respaldos") as executor:
+            futuros = {executor.submit(self._descargar_export, mikrotik_id): mikrotik_id
+                       for mikrotik_id in ids}
+            for futuro in as_completed(futuros):
+                mikrotik_id = futuros[futuro]
+                exito, mensaje, export = futuro.result()
+                detalle = {"mikrotik_id": mikrotik_id, "exito": exito, "nueva_version": False,
+                           "mensaje": mensaje}
+                
+                if exito:
+                    try:
+                        guardado = self.respaldos.guardar_export(mikrotik_id, export)
+                        detalle["nueva_version"] = guardado["nueva_version"]
+                        detalle["mensaje"] = ("Nueva versión guardada" if guardado["nueva_version"]
+                                              else "Sin cambios desde el último respaldo")
+                        resumen["bytes_descargados"] += len(export.encode("utf-8"))
+                        resumen["bytes_almacenados"] += guardado["tamano_comprimido"]
+                    except Exception as e:
+                        detalle["exito"] = False
+                        detalle["mensaje"] = f"Error al guardar el respaldo: {str(e)}"
+                
+                if not detalle["exito"]:
+                    resumen["fallidos"] += 1
+                else:
+                    resumen["respaldados"] += 1
+                    resumen["versiones_nuevas" if detalle["nueva_version"] else "sin_cambios"] += 1
+                resumen["detalles"].append(detalle)
+                
+                if progreso:
+                    progreso(len(resumen["detalles"]), len(ids), detalle)
+        
+        resumen["duracion"] = round(time.perf_counter() - inicio, 3)
+        return resumen
+    
+    def _descargar_export(self, mikrotik_id: int) -> Tuple[bool, str, str]:
+        """
+        Descarga el export de la configuración sin guardarlo.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
             
-            # El export viene como una lista de líneas
-            export_completo = '\n'.join(resultado) if resultado else "No se pudo obtener el export"
+        Returns:
+            Tuple[bool, str, str]: (éxito, mensaje, export completo)
+        """
+        try:
+            # /export es un comando de consola: por la API se ejecuta como script y
+            # se pide su salida como texto (=ret= de la respuesta)
+            exito, mensaje, resultado = self._ejecutar_api(
+                mikrotik_id,
+                lambda conexion: tuple(conexion('/execute', script='/export', **{'as-string': ''}))
+            )
+            if not exito:
+                return False, mensaje, ""
             
-            # Guardar el export en el MikroTik para respaldo
-            mikrotik = self.repository.get_by_id(mikrotik_id)
-            if mikrotik:
-                mikrotik.ultimo_export = export_completo
-                self.repository.update(mikrotik)
+            export_completo = str(resultado[0].get('ret', '')) if resultado else ""
+            if not export_completo:
+                return False, "No se pudo obtener el export", ""
             
             return True, "Export obtenido exitosamente", export_completo
             
         except Exception as e:
-            try:
-                conexion.close()
-            except:
-                pass
             return False, f"Error al obtener export: {str(e)}", ""
     
     # === MÉTODOS DE UTILIDAD ===
@@ -594,14 +1136,21 @@ class MikroTikService:
         """
         Obtiene estadísticas generales de MikroTiks.
         
+        Se calculan con una sola consulta agregada y se reutilizan durante
+        ttl_estadisticas segundos, salvo que este servicio modifique algún equipo.
+        
         Returns:
             Dict[str, Any]: Estadísticas completas
         """
-        return {
-            "total": len(self.repository.get_all()),
-            "por_estado": self.repository.count_by_estado(),
-            "por_modelo": self.repository.count_by_modelo(),
-            "disponibilidad": self.repository.get_disponibilidad_stats(),
-            "con_credenciales": len(self.repository.get_con_credenciales()),
-            "sin_credenciales": len(self.repository.get_sin_credenciales())
-        }
\ No newline at end of file
+        cache = self._cache_estadisticas
+        if cache is not None and time.monotonic() - cache[0] < self.ttl_estadisticas:
+            return copy.deepcopy(cache[1])
+        
+        estadisticas = self.repository.get_estadisticas()
+        if self.ttl_estadisticas > 0:
+            self._cache_estadisticas = (time.monotonic(), estadisticas)
+        return copy.deepcopy(estadisticas)
+    
+    def invalidar_estadisticas(self) -> None:
+        """Descarta las estadísticas en caché para que la próxima consulta sea fresca."""
+        self._cache_estadisticas = None
\ No newline at end of file
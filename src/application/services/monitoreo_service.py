@@ -0,0 +1,310 @@
+# src/application/services/monitoreo_service.py
+"""
+Servicio de monitoreo periódico de conectividad.
+Barre en segundo plano los MikroTiks, los nodos IPRAN y los nodos GPON cada uno
+con su propio intervalo y guarda los resultados en la base de datos, de modo que
+la interfaz gráfica solo tiene que leer el último estado. También respalda
+periódicamente la configuración de los MikroTiks.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+from domain.models.estado_sondeo import EstadoSondeo, TIPO_IPRAN, TIPO_GPON
+from domain.models.nodo_ipran import NodoIPRAN
+from domain.models.nodo_gpon import NodoGPON
+from infrastructure.network.sondeador import Sondeador
+from infrastructure.repositories.nodo_ipran_repository import NodoIPRANRepository
+from infrastructure.repositories.nodo_gpon_repository import NodoGPONRepository
+from infrastructure.repositories.estado_sondeo_repository import EstadoSondeoRepository
+from application.services.mikrotik_service import MikroTikService
+
+# Nombres de las tareas de monitoreo
+TAREA_MIKROTIK = "mikrotik"
+TAREA_IPRAN = TIPO_IPRAN
+TAREA_GPON = TIPO_GPON
+TAREA_RESPALDOS = "respaldos"
+
+
+class TareaMonitoreo:
+    """Una tarea periódica del monitoreo y sus estadísticas."""
+    
+    def __init__(self, nombre: str, intervalo: float, funcion: Callable[[], Dict[str, Any]]):
+        """
+        Constructor de la tarea.
+        
+        Args:
+            nombre: Nombre de la tarea
+            intervalo: Segundos entre ejecuciones
+            funcion: Función que realiza el barrido y devuelve sus estadísticas
+        """
+        self.nombre = nombre
+        self.intervalo = intervalo
+        self.funcion = funcion
+        self.proxima = 0.0  # Momento (time.monotonic) de la próxima ejecución
+        
+        # Impide que un barrido empiece mientras el anterior sigue en curso
+        self.candado = threading.Lock()
+        
+        # Estadísticas
+        self.ejecuciones = 0
+        self.omitidas = 0
+        self.ultima_duracion: Optional[float] = None
+        self.ultimo_resultado: Optional[Dict[str, Any]] = None
+        self.ultimo_error: Optional[str] = None
+
+
+class MonitoreoService:
+    """Servicio que programa y ejecuta los barridos de conectividad periódicos."""
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Constructor del servicio.
+        
+        Args:
+            config: Configuración (ver MONITOREO_CONFIG en config/app_config.py);
+                    las claves que falten toman el valor por defecto
+        """
+        self.mikrotik_service = MikroTikService()
+        self.ipran_repository = NodoIPRANRepository()
+        self.gpon_repository = NodoGPONRepository()
+        self.estado_repository = EstadoSondeoRepository()
+        
+        # Configuraciones por defecto
+        self.intervalo_mikrotik = 300  # Segundos entre barridos de MikroTiks
+        self.intervalo_ipran = 300  # Segundos entre barridos de nodos IPRAN
+        self.intervalo_gpon = 300  # Segundos entre barridos de nodos GPON
+        self.intervalo_respaldos = 86400  # Segundos entre respaldos de configuración de la flota
+        self.jitter = 0.1  # Variación aleatoria del intervalo (fracción) para no sincronizar barridos
+        self.timeout_ping = 3  # Segundos para timeout de cada sonda
+        self.intentos = 1  # Sondas por equipo en cada barrido
+        self.max_concurrencia = 1024  # Sondas en vuelo simultáneas por barrido
+        self.max_por_subred = 64  # Sondas simultáneas por subred /24 (None = sin límite)
+        self.modo_sondeo = "auto"  # "auto", "icmp" o "tcp"
+        self.max_concurrencia_respaldos = 16  # Exports descargados a la vez
+        
+        for clave, valor in (config or {}).items():
+            if not hasattr(self, clave):
+                raise ValueError(f"Opción de monitoreo desconocida: '{clave}'")
+            setattr(self, clave, valor)
+        
+        self.tareas: Dict[str, TareaMonitoreo] = {
+            TAREA_MIKROTIK: TareaMonitoreo(TAREA_MIKROTIK, self.intervalo_mikrotik, self.barrer_mikrotiks),
+            TAREA_IPRAN: TareaMonitoreo(TAREA_IPRAN, self.intervalo_ipran, self.barrer_nodos_ipran),
+            TAREA_GPON: TareaMonitoreo(TAREA_GPON, self.intervalo_gpon, self.barrer_nodos_gpon),
+            TAREA_RESPALDOS: TareaMonitoreo(TAREA_RESPALDOS, self.intervalo_respaldos,
+                                            self.respaldar_configuraciones),
+        }
+        
+        self._detener = threading.Event()
+    
+    # === BARRIDOS ===
+    
+    def barrer_mikrotiks(self) -> Dict[str, Any]:
+        """
+        Barre los MikroTiks activos o en error (actualiza su estado y el historial
+        de disponibilidad; los que estaban en error vuelven a activo al responder).
+        
+        Returns:
+            Dict[str, Any]: Estadísticas del barrido
+        """
+        servicio = self.mikrotik_service
+        servicio.timeout_ping = self.timeout_ping
+        servicio.intentos_ping = self.intentos
+        servicio.modo_sondeo = self.modo_sondeo
+        servicio.max_por_subred = self.max_por_subred
+        resultados = servicio.verificar_conectividad_masiva(self.max_concurrencia, detalles=False)
+        return {
+            "total_verificados": resultados["total_verificados"],
+            "disponibles": resultados["disponibles"],
+            "no_disponibles": resultados["no_disponibles"]
+        }
+    
+    def barrer_nodos_ipran(self) -> Dict[str, Any]:
+        """
+        Barre todos los nodos IPRAN.
+        
+        Returns:
+            Dict[str, Any]: Estadísticas del barrido
+        """
+        nodos = self.ipran_repository.iter_all(columnas=[NodoIPRAN.id, NodoIPRAN.ip_nodo])
+        return self._barrer_nodos(TIPO_IPRAN, [(nodo.id, nodo.ip_nodo) for nodo in nodos])
+    
+    def barrer_nodos_gpon(self) -> Dict[str, Any]:
+        """
+        Barre todos los nodos GPON (OLT).
+        
+        Returns:
+            Dict[str, Any]: Estadísticas del barrido
+        """
+        nodos = self.gpon_repository.iter_all(columnas=[NodoGPON.id, NodoGPON.ip_olt])
+        return self._barrer_nodos(TIPO_GPON, [(nodo.id, nodo.ip_olt) for nodo in nodos])
+    
+    def respaldar_configuraciones(self) -> Dict[str, Any]:
+        """
+        Respalda la configuración de los MikroTiks activos con credenciales.
+        
+        Returns:
+            Dict[str, Any]: Estadísticas del respaldo
+        """
+        resumen = self.mikrotik_service.respaldar_configuraciones(
+            max_concurrencia=self.max_concurrencia_respaldos
+        )
+        return {clave: valor for clave, valor in resumen.items() if clave != "detalles"}
+    
+    def _barrer_nodos(self, tipo: str, equipos: List[Tuple[int, str]]) -> Dict[str, Any]:
+        """
+        Sondea una lista de equipos y guarda su último estado en una sola transacción.
+        
+        Args:
+            tipo: Tipo de equipo
+            equipos: Lista de tuplas (id, ip)
+        
+        Returns:
+            Dict[str, Any]: Estadísticas del barrido
+        """
+        sondeos = self._crear_sondeador().sondear_multiples(
+            [ip for _, ip in equipos], intentos=self.intentos
+        )
+        resultados = {equipo_id: sondeos[ip] for equipo_id, ip in equipos}
+        self.estado_repository.guardar_resultados(tipo, resultados)
+        
+        disponibles = sum(1 for resultado in resultados.values() if resultado.disponible)
+        return {
+            "total_verificados": len(resultados),
+            "disponibles": disponibles,
+            "no_disponibles": len(resultados) - disponibles
+        }
+    
+    def _crear_sondeador(self) -> Sondeador:
+        """
+        Crea un sondeador con la configuración actual del servicio.
+        
+        Returns:
+            Sondeador: Sondeador listo para usar
+        """
+        return Sondeador(timeout=self.timeout_ping, modo=self.modo_sondeo,
+                         max_pendientes=self.max_concurrencia, max_por_subred=self.max_por_subred)
+    
+    # === PLANIFICACIÓN ===
+    
+    def ejecutar_tarea(self, nombre: str) -> bool:
+        """
+        Ejecuta una tarea ahora, salvo que la ejecución anterior siga en curso.
+        
+        Args:
+            nombre: Nombre de la tarea
+        
+        Returns:
+            bool: True si se ejecutó, False si se omitió por solapamiento
+        """
+        tarea = self.tareas[nombre]
+        if not tarea.candado.acquire(blocking=False):
+            tarea.omitidas += 1
+            print(f"⚠️ Barrido '{nombre}' omitido: el anterior sigue en curso")
+            return False
+        
+        self._ejecutar_con_candado(tarea)
+        return True
+    
+    def _ejecutar_con_candado(self, tarea: TareaMonitoreo) -> None:
+        """Ejecuta una tarea cuyo candado ya se tomó y lo libera al terminar."""
+        inicio = time.monotonic()
+        try:
+            tarea.ultimo_resultado = tarea.funcion()
+            tarea.ultimo_error = None
+            print(f"📡 Barrido '{tarea.nombre}': {tarea.ultimo_resultado}")
+        except Exception as e:
+            tarea.ultimo_error = str(e)
+            print(f"❌ Error en el barrido '{tarea.nombre}': {str(e)}")
+        finally:
+            tarea.ejecuciones += 1
+            tarea.ultima_duracion = time.monotonic() - inicio
+            tarea.candado.release()
+    
+    def _siguiente_intervalo(self, tarea: TareaMonitoreo) -> float:
+        """Devuelve el intervalo de la tarea con la variación aleatoria aplicada."""
+        return tarea.intervalo * (1 + random.uniform(-self.jitter, self.jitter))
+    
+    def ejecutar(self, duracion: Optional[float] = None) -> None:
+        """
+        Bucle principal: lanza cada tarea cuando le toca, cada una en su propio hilo,
+        hasta que se llame a detener() (o pase 'duracion' segundos).
+        
+        Args:
+            duracion: Segundos que corre el bucle (None = hasta detener())
+        """
+        self._detener.clear()
+        inicio = time.monotonic()
+        fin = inicio + duracion if duracion is not None else None
+        
+        # Repartir el primer barrido de cada tarea dentro de su margen de variación
+        for tarea in self.tareas.values():
+            tarea.proxima = inicio + random.uniform(0, tarea.intervalo * self.jitter)
+        
+        with ThreadPoolExecutor(max_workers=len(self.tareas),
+                                thread_name_prefix="monitoreo") as executor:
+            while not self._detener.is_set():
+                ahora = time.monotonic()
+                if fin is not None and ahora >= fin:
+                    break
+                
+                for tarea in self.tareas.values():
+                    if tarea.proxima > ahora:
+                        continue
+                    
+                    # Programar la siguiente desde la prevista, sin acumular atraso
+                    tarea.proxima = max(tarea.proxima + self._siguiente_intervalo(tarea), ahora)
+                    if tarea.candado.acquire(blocking=False):
+                        executor.submit(self._ejecutar_con_candado, tarea)
+                    else:
+                        tarea.omitidas += 1
+                        print(f"⚠️ Barrido '{tarea.nombre}' omitido: el anterior sigue en curso")
+                
+                espera = min(tarea.proxima for tarea in self.tareas.values()) - time.monotonic()
+                if fin is not None:
+                    espera = min(espera, fin - time.monotonic())
+                self._detener.wait(max(0.0, espera))
+            
+            # Los barridos en curso terminan antes de salir (el executor los espera)
+            self._detener.set()
+    
+    def detener(self) -> None:
+        """Pide al bucle principal que termine (los barridos en curso se completan)."""
+        self._detener.set()
+    
+    # === CONSULTAS ===
+    
+    def obtener_estados(self, tipo: str) -> Dict[int, EstadoSondeo]:
+        """
+        Obtiene el último estado de sondeo de los nodos de un tipo.
+        
+        Args:
+            tipo: "ipran" o "gpon"
+        
+        Returns:
+            Dict[int, EstadoSondeo]: Diccionario {id_nodo: estado}
+        """
+        return self.estado_repository.get_por_tipo(tipo)
+    
+    def obtener_estadisticas(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene las estadísticas de cada tarea de monitoreo.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Estadísticas por tarea
+        """
+        return {
+            nombre: {
+                "intervalo": tarea.intervalo,
+                "ejecuciones": tarea.ejecuciones,
+                "omitidas": tarea.omitidas,
+                "en_curso": tarea.candado.locked(),
+                "ultima_duracion": tarea.ultima_duracion,
+                "ultimo_resultado": tarea.ultimo_resultado,
+                "ultimo_error": tarea.ultimo_error
+            }
+            for nombre, tarea in self.tareas.items()
+        }
@@ -2,10 +2,12 @@
 """
 Servicio para la gestión de nodos IPRAN.
 """
-from typing import List, Optional
+from typing import List, Optional, Dict
 
 from domain.models.nodo_ipran import NodoIPRAN
 from infrastructure.repositories.nodo_ipran_repository import NodoIPRANRepository
+from infrastructure.repositories.estado_sondeo_repository import EstadoSondeoRepository
+from domain.models.estado_sondeo import EstadoSondeo, TIPO_IPRAN
 
 class NodoIPRANService:
     """Servicio para manejar operaciones relacionadas con nodos IPRAN."""
@@ -13,6 +15,7 @@ class NodoIPRANService:
     def __init__(self):
         """Constructor del servicio."""
         self.repository = NodoIPRANRepository()
+        self.estado_repository = EstadoSondeoRepository()
     
     def obtener_todos(self) -> List[NodoIPRAN]:
         """
@@ -127,7 +130,19 @@ class NodoIPRANService:
         Returns:
             bool: True si se eliminó correctamente, False en caso contrario
         """
-        return self.repository.delete(nodo_id)
+        eliminado = self.repository.delete(nodo_id)
+        if eliminado:
+            self.estado_repository.eliminar_equipo(TIPO_IPRAN, nodo_id)
+        return eliminado
+    
+    def obtener_estados_conectividad(self) -> Dict[int, EstadoSondeo]:
+        """
+        Obtiene el último estado de conectividad de los nodos, según el monitoreo.
+        
+        Returns:
+            Dict[int, EstadoSondeo]: Diccionario {id_nodo: estado} (solo nodos ya sondeados)
+        """
+        return self.estado_repository.get_por_tipo(TIPO_IPRAN)
     
     def buscar_por_nombre(self, nombre: str) -> List[NodoIPRAN]:
         """
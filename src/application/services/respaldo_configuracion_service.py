@@ -0,0 +1,408 @@
+# src/application/services/respaldo_configuracion_service.py
+"""
+Servicio para los respaldos de configuración de MikroTiks.
+Guarda cada export comprimido y deduplicado por hash (como delta contra la
+versión anterior cuando conviene), conserva las últimas N versiones de cada
+equipo, permite recuperar y comparar cualquiera de ellas, reporta qué equipos
+cambiaron su configuración y busca texto en los exports de toda la flota.
+"""
+import datetime
+import hashlib
+import re
+import time
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from domain.models.respaldo_configuracion import ContenidoRespaldo, COMPRESION_ZLIB, COMPRESION_ZSTD, ZSTD_DISPONIBLE
+from application.services.diff_export import comparar_exports, crear_delta, aplicar_delta, enumerar_lineas
+from infrastructure.repositories.respaldo_configuracion_repository import RespaldoConfiguracionRepository
+from infrastructure.repositories.mikrotik_repository import MikroTikRepository
+from infrastructure.database.unidad_trabajo import unidad_de_trabajo
+
+# Primera línea del export: "# jan/02/2024 10:11:12 by RouterOS 6.49" o "# 2024-01-02 10:11:12 by RouterOS 7.15"
+PATRON_CABECERA_FECHA = re.compile(r"^# .*\d{2}:\d{2}:\d{2} by RouterOS.*$")
+
+
+def normalizar_export(export: str) -> str:
+    """
+    Normaliza un export para que dos exports de la misma configuración sean idénticos:
+    quita la línea con la fecha de generación (la fecha queda en la versión),
+    unifica los saltos de línea y elimina los espacios al final de cada línea.
+    
+    Args:
+        export: Export tal como lo devuelve el equipo
+    
+    Returns:
+        str: Export normalizado
+    """
+    lineas = [linea.rstrip() for linea in export.replace("\r\n", "\n").split("\n")]
+    if lineas and PATRON_CABECERA_FECHA.match(lineas[0]):
+        lineas = lineas[1:]
+    return "\n".join(lineas).strip("\n")
+
+
+class RespaldoConfiguracionService:
+    """Servicio para guardar y consultar versiones de la configuración de los MikroTiks."""
+    
+    def __init__(self):
+        """Constructor del servicio."""
+        self.repository = RespaldoConfiguracionRepository()
+        self.mikrotik_repository = MikroTikRepository()
+        
+        # Configuraciones por defecto
+        self.versiones_por_equipo = 10  # Versiones distintas que se conservan por equipo
+        self.compresion = COMPRESION_ZSTD if ZSTD_DISPONIBLE else COMPRESION_ZLIB
+        self.nivel_compresion = 9
+        self.umbral_delta = 0.5  # Se guarda un delta solo si ocupa menos que esta fracción del export comprimido
+        self.dias_cambios = 7  # Ventana por defecto de equipos_con_cambios
+        self.indexar_busqueda = True  # Indexar la última versión de cada equipo para buscar()
+    
+    # === REGISTRO ===
+    
+    def guardar_export(self, mikrotik_id: int, export: str,
+                       fecha: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Guarda un export como versión de un equipo.
+        Si el contenido ya existe (el mismo equipo sin cambios, u otro equipo con
+        la misma configuración) no se vuelve a almacenar; si además es igual a la
+        última versión del equipo, solo se actualiza su fecha de verificación.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            export: Export completo
+            fecha: Momento del respaldo (epoch; por defecto, ahora)
+        
+        Returns:
+            Dict[str, Any]: hash, nueva_version, nuevo_contenido, tamano y tamano_comprimido
+        """
+        fecha = int(fecha if fecha is not None else time.time())
+        texto = normalizar_export(export)
+        hash_contenido = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+        
+        # El resumen de cambios se calcula una sola vez, al guardar la versión
+        ultima = self.repository.get_version(mikrotik_id)
+        texto_anterior = None
+        cambios = None
+        if ultima is not None and ultima.hash != hash_contenido:
+            texto_anterior = self.obtener_export_por_hash(ultima.hash)
+            diferencias = comparar_exports(texto_anterior, texto)
+            cambios = {
+                "lineas_agregadas": sum(len(d["agregadas"]) for d in diferencias),
+                "lineas_eliminadas": sum(len(d["eliminadas"]) for d in diferencias),
+                "secciones": "\n".join(d["seccion"] for d in diferencias)
+            }
+        
+        contenido = None
+        if not self.repository.existe_contenido(hash_contenido):
+            contenido = self._preparar_contenido(texto, hash_contenido,
+                                                 ultima.hash if ultima is not None else None, texto_anterior)
+        
+        # Versión, índice de búsqueda y retención se confirman en un solo commit
+        with unidad_de_trabajo():
+            fecha_version = self.repository.registrar_version(mikrotik_id, hash_contenido, fecha, contenido, cambios)
+            nueva_version = fecha_version is not None
+            if nueva_version:
+                if self.indexar_busqueda:
+                    self.repository.indexar_version(mikrotik_id, fecha_version, hash_contenido,
+                                                    enumerar_lineas(texto))
+                self.podar(mikrotik_id)
+        
+        return {
+            "hash": hash_contenido,
+            "nueva_version": nueva_version,
+            "nuevo_contenido": contenido is not None,
+            "delta": contenido is not None and contenido["base_hash"] is not None,
+            "tamano": len(texto.encode("utf-8")),
+            "tamano_comprimido": contenido["tamano_comprimido"] if contenido else 0
+        }
+    
+    def _preparar_contenido(self, texto: str, hash_contenido: str, hash_anterior: Optional[str],
+                            texto_anterior: Optional[str]) -> Dict[str, Any]:
+        """
+        Comprime un contenido nuevo. Si el equipo tiene una versión anterior, prueba
+        guardarlo como delta contra el contenido completo de esa versión (o contra
+        su base, si esa versión ya es un delta) y se queda con el delta si es
+        bastante más chico. Las bases siempre son contenidos completos, así que
+        reconstruir una versión nunca requiere más de un delta.
+        
+        Args:
+            texto: Export normalizado
+            hash_contenido: Hash del export
+            hash_anterior: Hash de la última versión del equipo, si tiene
+            texto_anterior: Export de esa versión (ya descomprimido)
+        
+        Returns:
+            Dict[str, Any]: Columnas de ContenidoRespaldo
+        """
+        compresion, datos = ContenidoRespaldo.comprimir(texto, self.compresion, self.nivel_compresion)
+        contenido = {
+            "hash": hash_contenido,
+            "compresion": compresion,
+            "datos": datos,
+            "tamano": len(texto.encode("utf-8")),
+            "tamano_comprimido": len(datos),
+            "base_hash": None
+        }
+        if hash_anterior is None:
+            return contenido
+        
+        anterior = self.repository.get_contenido(hash_anterior)
+        if anterior is None:
+            return contenido
+        if anterior.base_hash is None:
+            base_hash, base_texto = hash_anterior, texto_anterior
+        else:
+            base_hash, base_texto = anterior.base_hash, self.obtener_export_por_hash(anterior.base_hash)
+        
+        compresion_delta, delta = ContenidoRespaldo.comprimir(crear_delta(base_texto, texto),
+                                                              self.compresion, self.nivel_compresion)
+        if len(delta) < len(datos) * self.umbral_delta:
+            contenido.update({
+                "compresion": compresion_delta,
+                "datos": delta,
+                "tamano_comprimido": len(delta),
+                "base_hash": base_hash
+            })
+        return contenido
+    
+    def podar(self, mikrotik_id: int) -> int:
+        """
+        Aplica la retención: conserva las últimas versiones_por_equipo versiones
+        del equipo y borra los contenidos que quedaron sin uso.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        
+        Returns:
+            int: Número de versiones eliminadas
+        """
+        eliminadas = self.repository.podar_versiones(mikrotik_id, self.versiones_por_equipo)
+        if eliminadas:
+            self.repository.eliminar_contenidos_huerfanos()
+        return eliminadas
+    
+    def eliminar_respaldos(self, mikrotik_id: int) -> None:
+        """
+        Elimina todas las versiones de un equipo (por ejemplo, al eliminar el MikroTik).
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        """
+        with unidad_de_trabajo():
+            self.repository.eliminar_por_mikrotik(mikrotik_id)
+            self.repository.quitar_del_indice(mikrotik_id)
+            self.repository.eliminar_contenidos_huerfanos()
+    
+    def indexar_pendientes(self) -> int:
+        """
+        Indexa para la búsqueda la última versión de los equipos que no la tienen
+        indexada (respaldos anteriores al índice, o guardados con indexar_busqueda
+        desactivado). Se puede llamar varias veces.
+        
+        Returns:
+            int: Número de equipos indexados
+        """
+        pendientes = self.repository.get_versiones_sin_indexar()
+        for mikrotik_id, fecha, hash_contenido in pendientes:
+            texto = self.obtener_export_por_hash(hash_contenido)
+            self.repository.indexar_version(mikrotik_id, fecha, hash_contenido, enumerar_lineas(texto))
+        return len(pendientes)
+    
+    def importar_exports_antiguos(self) -> int:
+        """
+        Mueve los exports guardados en MikroTik.ultimo_export (formato anterior) a los
+        respaldos versionados y vacía esa columna. Se puede llamar varias veces.
+        
+        Returns:
+            int: Número de exports migrados
+        """
+        migrados = []
+        for mikrotik_id, export, actualizado in self.mikrotik_repository.get_exports_antiguos():
+            # updated_at lo pone SQLite con CURRENT_TIMESTAMP, que está en UTC
+            fecha = (int(actualizado.replace(tzinfo=datetime.timezone.utc).timestamp())
+                     if isinstance(actualizado, datetime.datetime) else None)
+            self.guardar_export(mikrotik_id, export, fecha)
+            migrados.append(mikrotik_id)
+        self.mikrotik_repository.limpiar_exports_antiguos(migrados)
+        return len(migrados)
+    
+    # === CONSULTAS ===
+    
+    def obtener_export(self, mikrotik_id: int, fecha: Optional[int] = None) -> Optional[str]:
+        """
+        Obtiene el export de una versión: la de esa fecha o, si no se indica, la última.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            fecha: Fecha de la versión (epoch, como la devuelve listar_versiones)
+        
+        Returns:
+            Optional[str]: Export o None si no hay respaldo
+        """
+        version = self.repository.get_version(mikrotik_id, fecha)
+        if version is None:
+            return None
+        return self.obtener_export_por_hash(version.hash)
+    
+    def obtener_export_por_hash(self, hash_contenido: str) -> Optional[str]:
+        """
+        Obtiene un export por el hash de su contenido.
+        
+        Args:
+            hash_contenido: Hash del export
+        
+        Returns:
+            Optional[str]: Export o None si no existe
+        """
+        contenido = self.repository.get_contenido(hash_contenido)
+        if contenido is None:
+            return None
+        texto = ContenidoRespaldo.descomprimir(contenido.compresion, contenido.datos)
+        if contenido.base_hash is None:
+            return texto
+        
+        base = self.obtener_export_por_hash(contenido.base_hash)
+        if base is None:
+            raise ValueError(f"Falta la base del respaldo {hash_contenido[:12]}")
+        texto = aplicar_delta(base, texto)
+        if hashlib.sha256(texto.encode("utf-8")).hexdigest() != hash_contenido:
+            raise ValueError(f"El respaldo {hash_contenido[:12]} no se pudo reconstruir")
+        return texto
+    
+    def comparar_versiones(self, mikrotik_id: int, fecha_anterior: Optional[int] = None,
+                           fecha_nueva: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Compara dos versiones de un equipo sección por sección.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            fecha_anterior: Fecha de la versión anterior (por defecto, la que precede a la nueva)
+            fecha_nueva: Fecha de la versión nueva (por defecto, la última)
+        
+        Returns:
+            Optional[List[Dict[str, Any]]]: Resultado de comparar_exports (seccion,
+            agregadas, eliminadas), o None si alguna versión no existe
+        """
+        nueva = self.repository.get_version(mikrotik_id, fecha_nueva)
+        if nueva is None:
+            return None
+        
+        if fecha_anterior is not None:
+            anterior = self.repository.get_version(mikrotik_id, fecha_anterior)
+            if anterior is None:
+                return None
+            hash_anterior = anterior.hash
+        else:
+            hash_anterior = nueva.hash_anterior
+        
+        texto_anterior = self.obtener_export_por_hash(hash_anterior) if hash_anterior else ""
+        if texto_anterior is None:  # La versión anterior ya se podó
+            return None
+        return comparar_exports(texto_anterior, self.obtener_export_por_hash(nueva.hash))
+    
+    def equipos_con_cambios(self, desde: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Lista los equipos cuya configuración cambió desde una fecha, sin comparar
+        exports: usa el resumen guardado en cada versión.
+        
+        Args:
+            desde: Fecha desde la que se buscan cambios (epoch; por defecto, hace dias_cambios días)
+        
+        Returns:
+            List[Dict[str, Any]]: mikrotik_id, cambios (versiones nuevas), primer_cambio,
+            ultimo_cambio, lineas_agregadas, lineas_eliminadas y secciones, del cambio más reciente al más antiguo
+        """
+        if desde is None:
+            desde = int(time.time()) - self.dias_cambios * 86400
+        
+        resultado = []
+        for (mikrotik_id, cambios, primer_cambio, ultimo_cambio,
+             lineas_agregadas, lineas_eliminadas, secciones) in self.repository.get_equipos_con_cambios(desde):
+            resultado.append({
+                "mikrotik_id": mikrotik_id,
+                "cambios": cambios,
+                "primer_cambio": primer_cambio,
+                "ultimo_cambio": ultimo_cambio,
+                "lineas_agregadas": lineas_agregadas or 0,
+                "lineas_eliminadas": lineas_eliminadas or 0,
+                "secciones": list(dict.fromkeys(s for s in (secciones or "").split("\n") if s))
+            })
+        return resultado
+    
+    def listar_versiones(self, mikrotik_id: int) -> List[Dict[str, Any]]:
+        """
+        Lista las versiones guardadas de un equipo, de la más reciente a la más antigua.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        
+        Returns:
+            List[Dict[str, Any]]: fecha, ultima_verificacion, hash, tamano y tamano_comprimido
+        """
+        return [
+            {
+                "fecha": fecha,
+                "ultima_verificacion": ultima_verificacion,
+                "hash": hash_contenido,
+                "tamano": tamano,
+                "tamano_comprimido": tamano_comprimido
+            }
+            for fecha, ultima_verificacion, hash_contenido, tamano, tamano_comprimido
+            in self.repository.get_versiones(mikrotik_id)
+        ]
+    
+    def buscar(self, texto: str, limite: int = 200, seccion: Optional[str] = None,
+               consulta_fts: bool = False) -> List[Dict[str, Any]]:
+        """
+        Busca texto en la última versión del export de todos los equipos.
+        Por defecto el texto se busca como frase: "address-list=bloqueados" o
+        "10.20.30.0/24" encuentran las líneas con esas palabras seguidas.
+        
+        Args:
+            texto: Texto a buscar
+            limite: Máximo de líneas a devolver
+            seccion: Ruta a la que limitar la búsqueda ("/ip firewall address-list")
+            consulta_fts: Si es True, texto se usa tal cual como consulta FTS5 (AND, OR, NEAR, prefijo*)
+        
+        Returns:
+            List[Dict[str, Any]]: mikrotik_id, nombre, fecha y hash de la versión, seccion,
+            numero y linea de cada coincidencia, ordenadas por equipo y línea
+        
+        Raises:
+            ValueError: Si la consulta FTS5 no es válida
+        """
+        if not texto.strip():
+            return []
+        consulta = texto if consulta_fts else '"' + texto.replace('"', '""') + '"'
+        
+        try:
+            filas = self.repository.buscar_lineas(consulta, limite, seccion)
+        except OperationalError as e:
+            raise ValueError(f"Consulta de búsqueda inválida: {texto}") from e
+        
+        return sorted((
+            {
+                "mikrotik_id": mikrotik_id,
+                "nombre": nombre,
+                "fecha": fecha,
+                "hash": hash_contenido,
+                "seccion": seccion_linea,
+                "numero": numero,
+                "linea": linea
+            }
+            for mikrotik_id, nombre, fecha, hash_contenido, seccion_linea, numero, linea in filas
+        ), key=lambda resultado: (resultado["mikrotik_id"], resultado["numero"]))
+    
+    def obtener_estadisticas(self) -> Dict[str, Any]:
+        """
+        Obtiene los totales del almacenamiento de respaldos.
+        
+        Returns:
+            Dict[str, Any]: equipos, versiones, contenidos, bytes originales y almacenados, y la relación de ahorro
+        """
+        estadisticas = self.repository.get_estadisticas()
+        almacenados = estadisticas["bytes_almacenados"]
+        estadisticas["relacion"] = (round(estadisticas["bytes_originales"] / almacenados, 1)
+                                    if almacenados else None)
+        return estadisticas
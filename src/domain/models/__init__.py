@@ -10,6 +10,9 @@ from domain.models.usuario import Usuario
 from domain.models.correo_cliente import CorreoCliente
 from domain.models.documento import Documento
 from domain.models.mikrotik import MikroTik  # ← NUEVO: Agregamos MikroTik
+from domain.models.historial_disponibilidad import SondeoMikroTik, ResumenDisponibilidad
+from domain.models.estado_sondeo import EstadoSondeo
+from domain.models.respaldo_configuracion import ContenidoRespaldo, VersionRespaldo, IndiceRespaldo, LineaRespaldo
 
 # Exportamos todos los modelos para facilitar su importación desde otros módulos
 __all__ = [
@@ -19,5 +22,12 @@ __all__ = [
     'Usuario', 
     'CorreoCliente', 
     'Documento',
-    'MikroTik'  # ← NUEVO: Agregamos MikroTik a la lista de exportación
+    'MikroTik',  # ← NUEVO: Agregamos MikroTik a la lista de exportación
+    'SondeoMikroTik',
+    'ResumenDisponibilidad',
+    'EstadoSondeo',
+    'ContenidoRespaldo',
+    'VersionRespaldo',
+    'IndiceRespaldo',
+    'LineaRespaldo'
 ]
\ No newline at end of file
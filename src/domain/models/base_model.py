@@ -6,6 +6,11 @@ from sqlalchemy import Column, Integer, DateTime
 from sqlalchemy.sql import func
 from infrastructure.database.config import Base
 
+# Grupo de las columnas pesadas (textos largos, JSON con imágenes) que se declaran
+# con deferred(..., group=GRUPO_PESADO): no se cargan al listar entidades, solo
+# al obtener una por ID (SQLAlchemyRepository.get_by_id) o al leerlas con la sesión abierta
+GRUPO_PESADO = "pesado"
+
 class BaseModel(Base):
     """Clase base abstracta para todos los modelos."""
     
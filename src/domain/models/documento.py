@@ -1,16 +1,28 @@
 # src/domain/models/documento.py
 """
 Modelo para documentos de configuración.
+
+Los textos de cada documento (datos del cliente, ingeniero, topología y las partes
+de texto de contenido_json, sin las imágenes) se indexan con FTS5 en la
+tabla virtual documentos_fts, que mantienen al día triggers sobre documentos.
 """
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime
-from sqlalchemy.orm import relationship
-from domain.models.base_model import BaseModel
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, DDL, Index, event
+from sqlalchemy.orm import relationship, deferred
+from domain.models.base_model import BaseModel, GRUPO_PESADO
 import datetime
 
 class Documento(BaseModel):
     """Clase para representar un documento de configuración."""
     
     __tablename__ = "documentos"
+    __table_args__ = (
+        # Filtros frecuentes; todos listan por fecha descendente, así que la fecha
+        # va en el índice (migración 0001_indices_filtros_frecuentes para las bases existentes)
+        Index("ix_documentos_fecha_creacion", "fecha_creacion"),
+        Index("ix_documentos_cliente_id_fecha", "cliente_id", "fecha_creacion"),
+        Index("ix_documentos_tipo_transaccion_fecha", "tipo_transaccion", "fecha_creacion"),
+        Index("ix_documentos_nodo_id_fecha", "nodo_id", "fecha_creacion"),
+    )
     
     # Columnas específicas para documentos
     titulo = Column(String(200), nullable=False)  # Título del documento
@@ -24,11 +36,61 @@ class Documento(BaseModel):
     fecha_creacion = Column(DateTime, default=datetime.datetime.now)  # Fecha de creación
     nodo_id = Column(Integer, ForeignKey("nodos_ipran.id"), nullable=True)  # ID del nodo IPRAN
     mikrotik_ip = Column(String(20), nullable=True)  # IP del Mikrotik (si aplica)
-    contenido_json = Column(Text, nullable=True)  # Contenido del documento en formato JSON
+    contenido_json = deferred(Column(Text, nullable=True), group=GRUPO_PESADO)  # Contenido en JSON (imágenes como referencias "blob:<hash>")
     
     # Relaciones
     nodo = relationship("NodoIPRAN", backref="documentos")  # Relación con el nodo IPRAN
     
     def __repr__(self):
         """Representación en string del objeto."""
-        return f"<Documento(cliente='{self.cliente_nombre}', tipo='{self.tipo_transaccion}')>"
\ No newline at end of file
+        return f"<Documento(cliente='{self.cliente_nombre}', tipo='{self.tipo_transaccion}')>"
+
+
+# Columnas del índice FTS5 de documentos, en orden
+COLUMNAS_BUSQUEDA = ("titulo", "cliente_id", "cliente_nombre", "cliente_direccion", "ingeniero",
+                     "tipo_transaccion", "tipo_topologia", "contenido")
+
+
+def valores_busqueda(fila: str) -> str:
+    """
+    Expresión SQL con el rowid y los valores de COLUMNAS_BUSQUEDA de una fila de documentos.
+    El contenido son los textos de contenido_json (json_tree) salvo las referencias
+    al almacén de imágenes ("blob:<hash>") y los textos largos sin espacios, que son
+    imágenes en base64 de documentos sin migrar; un JSON inválido o nulo aporta texto vacío.
+    
+    Args:
+        fila: Alias de la fila ("new", "old", "d"...)
+        
+    Returns:
+        str: Lista de expresiones separadas por comas
+    """
+    return (
+        f"{fila}.id, {fila}.titulo, {fila}.cliente_id, {fila}.cliente_nombre, {fila}.cliente_direccion, "
+        f"{fila}.ingeniero, {fila}.tipo_transaccion, {fila}.tipo_topologia, "
+        "(SELECT group_concat(value, ' ') FROM json_tree("
+        f"CASE WHEN json_valid({fila}.contenido_json) THEN {fila}.contenido_json ELSE '{{}}' END) "
+        "WHERE type = 'text' AND value NOT GLOB 'blob:*' AND NOT (length(value) > 200 AND instr(value, ' ') = 0))"
+    )
+
+
+_INSERTAR_NUEVO = (
+    f"INSERT INTO documentos_fts(rowid, {', '.join(COLUMNAS_BUSQUEDA)}) VALUES ({valores_busqueda('new')});"
+)
+
+# Índice FTS5 (sin acentos, con índices de prefijo de 2 y 3 letras) y sus triggers.
+# Todas son idempotentes: DocumentoRepository.asegurar_indice_texto las repite en
+# bases creadas antes de que existiera el índice
+SENTENCIAS_BUSQUEDA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS documentos_fts USING fts5({', '.join(COLUMNAS_BUSQUEDA)}, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS documentos_fts_ai AFTER INSERT ON documentos BEGIN {_INSERTAR_NUEVO} END",
+    "CREATE TRIGGER IF NOT EXISTS documentos_fts_au AFTER UPDATE OF titulo, cliente_id, cliente_nombre, "
+    "cliente_direccion, ingeniero, tipo_transaccion, tipo_topologia, contenido_json ON documentos BEGIN "
+    f"DELETE FROM documentos_fts WHERE rowid = old.id; {_INSERTAR_NUEVO} END",
+    "CREATE TRIGGER IF NOT EXISTS documentos_fts_ad AFTER DELETE ON documentos BEGIN "
+    "DELETE FROM documentos_fts WHERE rowid = old.id; END",
+)
+
+for sentencia in SENTENCIAS_BUSQUEDA:
+    event.listen(Documento.__table__, "after_create", DDL(sentencia))
+event.listen(Documento.__table__, "before_drop", DDL("DROP TABLE IF EXISTS documentos_fts"))
@@ -0,0 +1,32 @@
+# src/domain/models/estado_sondeo.py
+"""
+Modelo para el último estado de conectividad de los equipos monitoreados.
+El monitoreo en segundo plano escribe aquí el resultado del último sondeo de
+cada nodo IPRAN y GPON, y la interfaz solo tiene que leerlo.
+"""
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from infrastructure.database.config import Base
+
+# Tipos de equipo monitoreados (los MikroTik guardan su estado en su propia tabla)
+TIPO_IPRAN = "ipran"
+TIPO_GPON = "gpon"
+
+
+class EstadoSondeo(Base):
+    """Último resultado de sondeo de un equipo (una fila por tipo y equipo)."""
+    
+    __tablename__ = "estado_sondeo"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    tipo = Column(String(10), primary_key=True)  # "ipran" o "gpon"
+    equipo_id = Column(Integer, primary_key=True)  # ID del equipo en su tabla
+    ip = Column(String(15), nullable=False)  # IP sondeada
+    disponible = Column(Boolean, nullable=False, default=False)  # Si respondió
+    rtt_ms = Column(Float, nullable=True)  # RTT promedio, None si no respondió
+    perdida = Column(Float, nullable=False, default=0.0)  # Fracción de sondas perdidas (0 a 1)
+    error = Column(String(20), nullable=True)  # Clase de error si no respondió
+    fecha_sondeo = Column(DateTime, nullable=False)  # Momento del último sondeo
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return f"<EstadoSondeo(tipo='{self.tipo}', equipo_id={self.equipo_id}, disponible={self.disponible})>"
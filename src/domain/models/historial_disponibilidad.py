@@ -0,0 +1,170 @@
+# src/domain/models/historial_disponibilidad.py
+"""
+Modelos para el historial de disponibilidad (serie temporal de sondeos).
+Guarda cada sondeo de un MikroTik y sus consolidaciones por 5 minutos y 1 hora.
+
+Las tablas no heredan de BaseModel: no necesitan id ni fechas de auditoría y se
+declaran WITHOUT ROWID con clave primaria (equipo, tiempo), de modo que las filas
+de un mismo equipo quedan contiguas en disco y leer un rango es un recorrido
+secuencial del índice.
+"""
+import bisect
+import struct
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, Integer, Float, SmallInteger, LargeBinary, Index
+from infrastructure.database.config import Base
+
+# Resoluciones de consolidación (en segundos)
+RESOLUCION_5_MIN = 300
+RESOLUCION_1_HORA = 3600
+
+# Límites (ms) de los intervalos del histograma de RTT: escala logarítmica de
+# 0.1 ms a ~9 s con razón 1.4, lo que da un error relativo máximo de ~20%
+LIMITES_HISTOGRAMA_MS = [round(0.1 * 1.4 ** k, 4) for k in range(35)]
+
+
+class SondeoMikroTik(Base):
+    """Un sondeo individual (muestra cruda) de un MikroTik."""
+    
+    __tablename__ = "sondeos_mikrotik"
+    __table_args__ = (
+        # Consolidación y purga recorren todos los equipos por rango de tiempo
+        Index("ix_sondeos_mikrotik_ts", "ts"),
+        {"sqlite_with_rowid": False},
+    )
+    
+    mikrotik_id = Column(Integer, primary_key=True)  # ID del MikroTik sondeado
+    ts = Column(Integer, primary_key=True)  # Momento del sondeo (epoch en segundos)
+    rtt_ms = Column(Float, nullable=True)  # RTT promedio, None si no respondió
+    perdida = Column(Float, nullable=False, default=0.0)  # Fracción de sondas perdidas (0 a 1)
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return f"<SondeoMikroTik(mikrotik_id={self.mikrotik_id}, ts={self.ts}, rtt={self.rtt_ms})>"
+
+
+class ResumenDisponibilidad(Base):
+    """Consolidación de los sondeos de un MikroTik en un intervalo (5 min o 1 h)."""
+    
+    __tablename__ = "resumen_disponibilidad"
+    __table_args__ = (
+        # Permite obtener rápido el último intervalo consolidado de cada resolución
+        Index("ix_resumen_disponibilidad_resolucion_ts", "resolucion", "ts"),
+        {"sqlite_with_rowid": False},
+    )
+    
+    resolucion = Column(SmallInteger, primary_key=True)  # 300 (5 min) o 3600 (1 h)
+    mikrotik_id = Column(Integer, primary_key=True)  # ID del MikroTik
+    ts = Column(Integer, primary_key=True)  # Inicio del intervalo (epoch en segundos)
+    muestras = Column(Integer, nullable=False)  # Sondeos en el intervalo
+    exitosas = Column(Integer, nullable=False)  # Sondeos con respuesta
+    perdida_suma = Column(Float, nullable=False, default=0.0)  # Suma de pérdidas (para el promedio)
+    rtt_min = Column(Float, nullable=True)  # RTT mínimo del intervalo
+    rtt_max = Column(Float, nullable=True)  # RTT máximo del intervalo
+    histograma = Column(LargeBinary, nullable=True)  # Histograma de RTT (ver codificar_histograma)
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return (f"<ResumenDisponibilidad(resolucion={self.resolucion}, "
+                f"mikrotik_id={self.mikrotik_id}, ts={self.ts}, muestras={self.muestras})>")
+    
+    # === HISTOGRAMA DE RTT ===
+    
+    @staticmethod
+    def intervalo_histograma(rtt_ms: float) -> int:
+        """
+        Obtiene el índice del intervalo del histograma para un RTT.
+        
+        Args:
+            rtt_ms: RTT en milisegundos
+        
+        Returns:
+            int: Índice del intervalo (0 a len(LIMITES_HISTOGRAMA_MS))
+        """
+        return bisect.bisect_left(LIMITES_HISTOGRAMA_MS, rtt_ms)
+    
+    @staticmethod
+    def codificar_histograma(conteos: Dict[int, int]) -> bytes:
+        """
+        Codifica un histograma disperso: 3 bytes (intervalo, conteo) por intervalo no vacío.
+        Un intervalo de 1 h con sondeos cada 5 min suele ocupar entre 3 y 9 bytes.
+        
+        Args:
+            conteos: Diccionario {índice_intervalo: conteo}
+        
+        Returns:
+            bytes: Histograma codificado
+        """
+        return b"".join(
+            struct.pack("!BH", intervalo, min(conteo, 0xFFFF))
+            for intervalo, conteo in sorted(conteos.items()) if conteo
+        )
+    
+    @staticmethod
+    def decodificar_histograma(datos: Optional[bytes]) -> Dict[int, int]:
+        """
+        Decodifica un histograma generado por codificar_histograma.
+        
+        Args:
+            datos: Bytes del histograma
+        
+        Returns:
+            Dict[int, int]: Diccionario {índice_intervalo: conteo}
+        """
+        if not datos:
+            return {}
+        return {intervalo: conteo for intervalo, conteo in struct.iter_unpack("!BH", datos)}
+    
+    @staticmethod
+    def percentil_histograma(conteos: Dict[int, int], percentil: float) -> Optional[float]:
+        """
+        Estima un percentil a partir de un histograma.
+        Devuelve el punto medio geométrico del intervalo donde cae el percentil.
+        
+        Args:
+            conteos: Diccionario {índice_intervalo: conteo}
+            percentil: Percentil a calcular (0 a 100)
+        
+        Returns:
+            Optional[float]: RTT estimado en ms, o None si el histograma está vacío
+        """
+        total = sum(conteos.values())
+        if not total:
+            return None
+        
+        objetivo = percentil / 100 * total
+        acumulado = 0
+        for intervalo in sorted(conteos):
+            acumulado += conteos[intervalo]
+            if acumulado >= objetivo:
+                break
+        
+        limites = LIMITES_HISTOGRAMA_MS
+        if intervalo == 0:
+            return limites[0]
+        if intervalo >= len(limites):
+            return limites[-1]
+        return (limites[intervalo - 1] * limites[intervalo]) ** 0.5
+
+
+def percentil_exacto(valores: Iterable[float], percentil: float) -> Optional[float]:
+    """
+    Calcula un percentil por interpolación lineal (igual que numpy por defecto).
+    
+    Args:
+        valores: Valores de la muestra
+        percentil: Percentil a calcular (0 a 100)
+    
+    Returns:
+        Optional[float]: Valor del percentil, o None si no hay valores
+    """
+    ordenados: List[float] = sorted(valores)
+    if not ordenados:
+        return None
+    
+    posicion = (len(ordenados) - 1) * percentil / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fraccion = posicion - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
@@ -3,14 +3,27 @@
 Modelo para equipos MikroTik.
 Este modelo almacena la información de los equipos MikroTik que podemos gestionar.
 """
-from sqlalchemy import Column, String, Text, Boolean
-from domain.models.base_model import BaseModel
+from sqlalchemy import Column, String, Text, Boolean, Index
+from sqlalchemy.orm import deferred
+from domain.models.base_model import BaseModel, GRUPO_PESADO
+
+# Estados que entran en los barridos de conectividad: también "error", para que
+# un equipo que vuelve a responder pase de nuevo a "activo" (ver calcular_estado)
+ESTADOS_BARRIDO = ("activo", "error")
 
 class MikroTik(BaseModel):
     """Clase para representar un equipo MikroTik en la red."""
     
     # Nombre de la tabla en la base de datos
     __tablename__ = "mikrotiks"
+    __table_args__ = (
+        # Filtros frecuentes de las listas; incluyen el nombre porque se ordena por él
+        # (migración 0001_indices_filtros_frecuentes para las bases existentes)
+        Index("ix_mikrotiks_estado_nombre", "estado", "nombre"),
+        Index("ix_mikrotiks_disponible_nombre", "disponible", "nombre"),
+        Index("ix_mikrotiks_cliente_id_nombre", "cliente_id", "nombre"),
+        Index("ix_mikrotiks_modelo", "modelo"),
+    )
     
     # === CAMPOS BÁSICOS DE IDENTIFICACIÓN ===
     
@@ -51,11 +64,14 @@ class MikroTik(BaseModel):
     
     # === INFORMACIÓN ADICIONAL ===
     
-    # Notas adicionales sobre el equipo
-    notas = Column(Text, nullable=True)
+    # Notas adicionales sobre el equipo (diferida: las listas no la muestran)
+    notas = deferred(Column(Text, nullable=True), group=GRUPO_PESADO)
     
-    # Última configuración exportada (para respaldo)
-    ultimo_export = Column(Text, nullable=True)
+    # Última configuración exportada (formato anterior, ya no se escribe).
+    # Los exports viven en los respaldos versionados (respaldo_configuracion.py);
+    # la columna queda diferida para no cargarla con cada MikroTik y solo se lee
+    # para migrar los exports antiguos.
+    ultimo_export = deferred(Column(Text, nullable=True))
     
     # === INFORMACIÓN DE CLIENTE (OPCIONAL) ===
     
@@ -126,8 +142,24 @@ class MikroTik(BaseModel):
             disponible (bool): True si responde ping, False si no
         """
         self.disponible = disponible
+        self.estado = self.calcular_estado(self.estado, disponible)
+    
+    @staticmethod
+    def calcular_estado(estado_actual: str, disponible: bool) -> str:
+        """
+        Calcula el estado que corresponde tras un ping.
+        Se usa también en las actualizaciones masivas, que no cargan el objeto.
+        
+        Args:
+            estado_actual (str): Estado antes del ping
+            disponible (bool): True si responde ping, False si no
+            
+        Returns:
+            str: Nuevo estado
+        """
         # Si no está disponible, podríamos cambiar el estado
-        if not disponible and self.estado == "activo":
-            self.estado = "error"
-        elif disponible and self.estado == "error":
-            self.estado = "activo"
\ No newline at end of file
+        if not disponible and estado_actual == "activo":
+            return "error"
+        elif disponible and estado_actual == "error":
+            return "activo"
+        return estado_actual
\ No newline at end of file
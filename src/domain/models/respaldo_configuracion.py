@@ -0,0 +1,182 @@
+# src/domain/models/respaldo_configuracion.py
+"""
+Modelos para los respaldos de configuración (exports de RouterOS).
+
+El contenido de cada export se guarda una sola vez, comprimido, en una tabla
+direccionada por su hash SHA-256: si un equipo no cambió su configuración (o dos
+equipos tienen la misma), el export no ocupa espacio nuevo. Las versiones de cada
+equipo son filas pequeñas que apuntan a ese hash.
+
+Un contenido puede guardarse completo o como delta contra otro contenido completo
+(su base): entre dos respaldos de un mismo equipo suelen cambiar pocas líneas.
+Cada versión guarda además un resumen de lo que cambió respecto de la anterior,
+para consultar los cambios de la flota sin descomprimir ni comparar exports.
+
+Las líneas de la última versión de cada equipo se indexan con FTS5 para buscar
+en toda la flota (listas de direcciones, reglas de firewall, VLANs...).
+"""
+import zlib
+from typing import Tuple
+
+from sqlalchemy import Column, Integer, String, LargeBinary, Text, Index, DDL, event
+from infrastructure.database.config import Base
+
+# zstd es opcional: comprime más y más rápido que zlib, pero requiere 'zstandard'
+try:
+    import zstandard
+    ZSTD_DISPONIBLE = True
+except ImportError:
+    ZSTD_DISPONIBLE = False
+
+# Algoritmos de compresión
+COMPRESION_ZLIB = "zlib"
+COMPRESION_ZSTD = "zstd"
+
+
+class ContenidoRespaldo(Base):
+    """Contenido comprimido de un export, identificado por su hash."""
+    
+    # Tabla con rowid a propósito: las filas llevan blobs grandes y en una tabla
+    # WITHOUT ROWID cada blob engordaría las páginas del índice de la clave primaria
+    __tablename__ = "respaldo_contenidos"
+    
+    __table_args__ = (
+        # Para no borrar una base mientras haya deltas que dependan de ella
+        Index("ix_respaldo_contenidos_base_hash", "base_hash"),
+    )
+    
+    hash = Column(String(64), primary_key=True)  # SHA-256 (hex) del export normalizado
+    compresion = Column(String(8), nullable=False)  # "zlib" o "zstd"
+    datos = Column(LargeBinary, nullable=False)  # Export (o delta) comprimido
+    tamano = Column(Integer, nullable=False)  # Bytes del export sin comprimir
+    tamano_comprimido = Column(Integer, nullable=False)  # Bytes almacenados
+    base_hash = Column(String(64), nullable=True)  # Contenido completo contra el que se guardó el delta (None = completo)
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return (f"<ContenidoRespaldo(hash={self.hash[:12]}, compresion={self.compresion}, "
+                f"tamano={self.tamano}, tamano_comprimido={self.tamano_comprimido}, "
+                f"delta={self.base_hash is not None})>")
+    
+    # === COMPRESIÓN ===
+    
+    @staticmethod
+    def comprimir(texto: str, compresion: str = COMPRESION_ZLIB, nivel: int = 9) -> Tuple[str, bytes]:
+        """
+        Comprime un export.
+        
+        Args:
+            texto: Export a comprimir
+            compresion: "zlib" o "zstd" (si zstd no está instalado se usa zlib)
+            nivel: Nivel de compresión
+        
+        Returns:
+            Tuple[str, bytes]: (algoritmo usado, datos comprimidos)
+        """
+        datos = texto.encode("utf-8")
+        if compresion == COMPRESION_ZSTD and ZSTD_DISPONIBLE:
+            return COMPRESION_ZSTD, zstandard.ZstdCompressor(level=nivel).compress(datos)
+        return COMPRESION_ZLIB, zlib.compress(datos, min(nivel, 9))
+    
+    @staticmethod
+    def descomprimir(compresion: str, datos: bytes) -> str:
+        """
+        Descomprime un export guardado con comprimir.
+        
+        Args:
+            compresion: Algoritmo con el que se comprimió
+            datos: Datos comprimidos
+        
+        Returns:
+            str: Export original
+        
+        Raises:
+            ValueError: Si el algoritmo no está disponible
+        """
+        if compresion == COMPRESION_ZLIB:
+            return zlib.decompress(datos).decode("utf-8")
+        if compresion == COMPRESION_ZSTD:
+            if not ZSTD_DISPONIBLE:
+                raise ValueError("El respaldo está comprimido con zstd: instala 'zstandard'")
+            return zstandard.ZstdDecompressor().decompress(datos).decode("utf-8")
+        raise ValueError(f"Compresión desconocida: '{compresion}'")
+
+
+class VersionRespaldo(Base):
+    """Una versión de la configuración de un MikroTik (apunta a su contenido por hash)."""
+    
+    __tablename__ = "respaldo_versiones"
+    __table_args__ = (
+        # Para saber si un contenido sigue en uso antes de borrarlo
+        Index("ix_respaldo_versiones_hash", "hash"),
+        # Para los cambios de toda la flota desde una fecha
+        Index("ix_respaldo_versiones_fecha", "fecha"),
+        {"sqlite_with_rowid": False},
+    )
+    
+    mikrotik_id = Column(Integer, primary_key=True)  # ID del MikroTik respaldado
+    fecha = Column(Integer, primary_key=True)  # Momento en que se obtuvo esta versión (epoch)
+    hash = Column(String(64), nullable=False)  # Contenido (ContenidoRespaldo.hash)
+    ultima_verificacion = Column(Integer, nullable=False)  # Último respaldo que encontró esta misma versión
+    
+    # Resumen de cambios respecto de la versión anterior (None en la primera versión del equipo)
+    hash_anterior = Column(String(64), nullable=True)
+    lineas_agregadas = Column(Integer, nullable=False, default=0)
+    lineas_eliminadas = Column(Integer, nullable=False, default=0)
+    secciones = Column(Text, nullable=True)  # Rutas con cambios, separadas por "\n"
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return f"<VersionRespaldo(mikrotik_id={self.mikrotik_id}, fecha={self.fecha}, hash={self.hash[:12]})>"
+
+
+class IndiceRespaldo(Base):
+    """Versión de cada MikroTik cuyas líneas están en el índice de búsqueda."""
+    
+    __tablename__ = "respaldo_indice"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    mikrotik_id = Column(Integer, primary_key=True)  # ID del MikroTik
+    fecha = Column(Integer, nullable=False)  # Fecha de la versión indexada (VersionRespaldo.fecha)
+    hash = Column(String(64), nullable=False)  # Contenido indexado
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return f"<IndiceRespaldo(mikrotik_id={self.mikrotik_id}, fecha={self.fecha}, hash={self.hash[:12]})>"
+
+
+class LineaRespaldo(Base):
+    """
+    Una línea del export indexado de un MikroTik.
+    El texto se indexa en la tabla virtual FTS5 respaldo_lineas_fts (de contenido
+    externo: el índice apunta a estas filas), que mantienen los triggers de abajo.
+    """
+    
+    __tablename__ = "respaldo_lineas"
+    __table_args__ = (
+        # Para reemplazar las líneas de un equipo cuando llega una versión nueva
+        Index("ix_respaldo_lineas_mikrotik_id", "mikrotik_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)  # rowid: lo usa el índice FTS5
+    mikrotik_id = Column(Integer, nullable=False)  # ID del MikroTik
+    numero = Column(Integer, nullable=False)  # Número de línea en el export
+    seccion = Column(String(100), nullable=False)  # Ruta de la sección ("/ip firewall filter")
+    linea = Column(Text, nullable=False)  # Texto de la línea
+    
+    def __repr__(self):
+        """Representación en string del objeto."""
+        return f"<LineaRespaldo(mikrotik_id={self.mikrotik_id}, numero={self.numero}, seccion='{self.seccion}')>"
+
+
+# El índice FTS5 y sus triggers se crean junto con la tabla (create_all)
+for sentencia in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS respaldo_lineas_fts USING fts5("
+    "linea, content='respaldo_lineas', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS respaldo_lineas_ai AFTER INSERT ON respaldo_lineas BEGIN "
+    "INSERT INTO respaldo_lineas_fts(rowid, linea) VALUES (new.id, new.linea); END",
+    "CREATE TRIGGER IF NOT EXISTS respaldo_lineas_ad AFTER DELETE ON respaldo_lineas BEGIN "
+    "INSERT INTO respaldo_lineas_fts(respaldo_lineas_fts, rowid, linea) VALUES ('delete', old.id, old.linea); END",
+):
+    event.listen(LineaRespaldo.__table__, "after_create", DDL(sentencia))
+event.listen(LineaRespaldo.__table__, "before_drop", DDL("DROP TABLE IF EXISTS respaldo_lineas_fts"))
@@ -0,0 +1,22 @@
+# src/infrastructure/almacenamiento/__init__.py
+"""
+Inicialización del módulo de almacenamiento.
+Este archivo facilita la importación del almacén de blobs y la caché de archivos.
+"""
+from infrastructure.almacenamiento.almacen_blobs import (
+    AlmacenBlobs, es_referencia, crear_referencia, hash_de_referencia, es_imagen,
+    guardar_imagenes_base64, restaurar_imagenes_base64
+)
+from infrastructure.almacenamiento.cache_archivos import CacheArchivos
+
+# Exportamos las clases y funciones para facilitar su importación desde otros módulos
+__all__ = [
+    'AlmacenBlobs',
+    'es_referencia',
+    'crear_referencia',
+    'hash_de_referencia',
+    'es_imagen',
+    'guardar_imagenes_base64',
+    'restaurar_imagenes_base64',
+    'CacheArchivos'
+]
@@ -0,0 +1,261 @@
+# src/infrastructure/almacenamiento/almacen_blobs.py
+"""
+Almacén de blobs direccionado por contenido.
+
+Cada blob (p. ej. una imagen de un documento) se guarda una sola vez como archivo,
+con su hash SHA-256 como nombre, repartido en subdirectorios por los primeros
+caracteres del hash (ab/cd/abcd...) para no juntar miles de archivos en uno solo.
+Guardar dos veces los mismos bytes devuelve el mismo hash sin escribir nada.
+
+En los datos (contenido_json de los documentos) se guarda solo una referencia
+de la forma "blob:<hash>".
+
+Junto a cada blob se pueden guardar adjuntos derivados de él (metadatos,
+miniatura...) en archivos <hash>.<sufijo>; se eliminan al purgar el blob.
+"""
+import base64
+import binascii
+import glob
+import hashlib
+import os
+import tempfile
+import time
+from typing import Any, Iterator, Optional, Tuple
+
+# Prefijo de las referencias a blobs dentro de los datos
+PREFIJO_REFERENCIA = "blob:"
+
+# Firmas de los formatos de imagen que se pegan en los documentos
+FIRMAS_IMAGEN = (
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF87a", b"GIF89a",  # GIF
+    b"BM",  # BMP
+)
+
+
+def es_referencia(valor: Any) -> bool:
+    """True si el valor es una referencia "blob:<hash>"."""
+    return (isinstance(valor, str) and valor.startswith(PREFIJO_REFERENCIA)
+            and len(valor) == len(PREFIJO_REFERENCIA) + 64)
+
+
+def crear_referencia(hash_blob: str) -> str:
+    """Referencia a guardar en los datos para el blob con ese hash."""
+    return f"{PREFIJO_REFERENCIA}{hash_blob}"
+
+
+def hash_de_referencia(referencia: str) -> str:
+    """Hash del blob al que apunta una referencia."""
+    return referencia[len(PREFIJO_REFERENCIA):]
+
+
+def es_imagen(datos: bytes) -> bool:
+    """True si los bytes empiezan con la firma de un formato de imagen conocido."""
+    return datos.startswith(FIRMAS_IMAGEN) or (datos[:4] == b"RIFF" and datos[8:12] == b"WEBP")
+
+
+class AlmacenBlobs:
+    """Blobs en archivos bajo un directorio, nombrados por su SHA-256."""
+    
+    def __init__(self, directorio: str):
+        """
+        Constructor del almacén.
+        
+        Args:
+            directorio: Directorio raíz del almacén (se crea si no existe)
+        """
+        self.directorio = directorio
+        os.makedirs(self.directorio, exist_ok=True)
+    
+    def ruta(self, hash_blob: str) -> str:
+        """
+        Ruta del archivo de un blob.
+        
+        Args:
+            hash_blob: SHA-256 (hex) del blob
+        
+        Returns:
+            str: directorio/ab/cd/abcd...
+        """
+        return os.path.join(self.directorio, hash_blob[:2], hash_blob[2:4], hash_blob)
+    
+    def _escribir(self, ruta: str, datos: bytes) -> None:
+        """Escribe un archivo de forma atómica (archivo temporal y os.replace)."""
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix=".tmp_")
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                archivo.write(datos)
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+    
+    def guardar(self, datos: bytes) -> str:
+        """
+        Guarda un blob si no estaba ya en el almacén.
+        
+        La escritura es atómica (archivo temporal y os.replace): un blob a medio
+        escribir nunca queda con el nombre de su hash.
+        
+        Args:
+            datos: Bytes del blob
+        
+        Returns:
+            str: SHA-256 (hex) del blob
+        """
+        hash_blob = hashlib.sha256(datos).hexdigest()
+        ruta = self.ruta(hash_blob)
+        if os.path.exists(ruta):
+            return hash_blob
+        
+        self._escribir(ruta, datos)
+        return hash_blob
+    
+    def leer(self, hash_blob: str) -> Optional[bytes]:
+        """
+        Lee un blob.
+        
+        Args:
+            hash_blob: SHA-256 (hex) del blob
+        
+        Returns:
+            Optional[bytes]: Bytes del blob, o None si no está en el almacén
+        """
+        try:
+            with open(self.ruta(hash_blob), "rb") as archivo:
+                return archivo.read()
+        except FileNotFoundError:
+            return None
+    
+    def existe(self, hash_blob: str) -> bool:
+        """True si el blob está en el almacén."""
+        return os.path.exists(self.ruta(hash_blob))
+    
+    def ruta_adjunto(self, hash_blob: str, sufijo: str) -> str:
+        """
+        Ruta de un adjunto de un blob.
+        
+        Args:
+            hash_blob: SHA-256 (hex) del blob
+            sufijo: Tipo de adjunto (p. ej. "json" o "miniatura.png")
+        
+        Returns:
+            str: directorio/ab/cd/abcd....sufijo
+        """
+        return f"{self.ruta(hash_blob)}.{sufijo}"
+    
+    def guardar_adjunto(self, hash_blob: str, sufijo: str, datos: bytes) -> None:
+        """
+        Guarda (o reemplaza) un adjunto de un blob, de forma atómica.
+        
+        Args:
+            hash_blob: SHA-256 (hex) del blob
+            sufijo: Tipo de adjunto
+            datos: Bytes del adjunto
+        """
+        self._escribir(self.ruta_adjunto(hash_blob, sufijo), datos)
+    
+    def leer_adjunto(self, hash_blob: str, sufijo: str) -> Optional[bytes]:
+        """
+        Lee un adjunto de un blob.
+        
+        Args:
+            hash_blob: SHA-256 (hex) del blob
+            sufijo: Tipo de adjunto
+        
+        Returns:
+            Optional[bytes]: Bytes del adjunto, o None si no existe
+        """
+        try:
+            with open(self.ruta_adjunto(hash_blob, sufijo), "rb") as archivo:
+                return archivo.read()
+        except FileNotFoundError:
+            return None
+    
+    def hashes(self) -> Iterator[str]:
+        """Recorre los hashes de todos los blobs del almacén."""
+        for _, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                if len(nombre) == 64 and not nombre.startswith("."):
+                    yield nombre
+    
+    def purgar(self, referenciados: set, antiguedad_minima: float = 3600) -> int:
+        """
+        Elimina los blobs que ya no referencia ningún dato, con sus adjuntos.
+        
+        Args:
+            referenciados: Hashes que siguen en uso
+            antiguedad_minima: Segundos desde que se escribió un blob para poder
+                eliminarlo (protege los recién guardados cuyo dato aún no se confirmó)
+        
+        Returns:
+            int: Número de blobs eliminados
+        """
+        limite = time.time() - antiguedad_minima
+        eliminados = 0
+        for hash_blob in list(self.hashes()):
+            ruta = self.ruta(hash_blob)
+            if hash_blob not in referenciados and os.path.getmtime(ruta) <= limite:
+                for adjunto in glob.glob(glob.escape(ruta) + ".*"):
+                    os.remove(adjunto)
+                os.remove(ruta)
+                eliminados += 1
+        return eliminados
+
+
+def guardar_imagenes_base64(valor: Any, almacen: AlmacenBlobs) -> Tuple[Any, int]:
+    """
+    Recorre datos JSON (dicts, listas, textos) y guarda en el almacén las imágenes
+    codificadas en base64, reemplazándolas por su referencia. Los dicts y listas se
+    modifican en el lugar.
+    
+    Args:
+        valor: Datos decodificados de un JSON
+        almacen: Almacén donde guardar las imágenes
+    
+    Returns:
+        Tuple[Any, int]: Datos con las referencias y cantidad de imágenes reemplazadas
+    """
+    if isinstance(valor, (dict, list)):
+        total = 0
+        for clave, elemento in list(valor.items() if isinstance(valor, dict) else enumerate(valor)):
+            valor[clave], cantidad = guardar_imagenes_base64(elemento, almacen)
+            total += cantidad
+        return valor, total
+    # Mismo criterio que el índice de búsqueda: texto largo sin espacios
+    if isinstance(valor, str) and len(valor) > 200 and " " not in valor:
+        try:
+            datos = base64.b64decode(valor, validate=True)
+        except (binascii.Error, ValueError):
+            return valor, 0
+        if es_imagen(datos):
+            return crear_referencia(almacen.guardar(datos)), 1
+    return valor, 0
+
+
+def restaurar_imagenes_base64(valor: Any, almacen: AlmacenBlobs) -> Tuple[Any, int]:
+    """
+    Inversa de guardar_imagenes_base64: reemplaza cada referencia por la imagen en
+    base64 (las referencias a blobs que faltan en el almacén se dejan como están).
+    
+    Args:
+        valor: Datos decodificados de un JSON
+        almacen: Almacén del que leer las imágenes
+    
+    Returns:
+        Tuple[Any, int]: Datos con las imágenes y cantidad de referencias reemplazadas
+    """
+    if isinstance(valor, (dict, list)):
+        total = 0
+        for clave, elemento in list(valor.items() if isinstance(valor, dict) else enumerate(valor)):
+            valor[clave], cantidad = restaurar_imagenes_base64(elemento, almacen)
+            total += cantidad
+        return valor, total
+    if es_referencia(valor):
+        datos = almacen.leer(hash_de_referencia(valor))
+        if datos is not None:
+            return base64.b64encode(datos).decode("ascii"), 1
+    return valor, 0
@@ -0,0 +1,152 @@
+# src/infrastructure/almacenamiento/cache_archivos.py
+"""
+Caché de archivos generados, en disco y con tamaño máximo.
+
+Cada entrada es un archivo <grupo>_<clave><extensión>: la clave identifica el
+contenido (p. ej. un hash de los datos con que se generó) y el grupo permite
+invalidar de una vez todas las entradas de un mismo objeto (p. ej. las
+exportaciones de un documento). Cuando el total supera el tamaño máximo se
+eliminan las entradas usadas hace más tiempo (LRU, según la fecha de
+modificación, que se actualiza en cada acierto).
+
+Varios procesos pueden compartir el directorio: las escrituras son atómicas y
+una entrada que otro proceso eliminó cuenta como un fallo.
+"""
+import glob
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+
+class CacheArchivos:
+    """Caché LRU de archivos en un directorio, con tamaño máximo en bytes."""
+    
+    def __init__(self, directorio: str, tamano_maximo: int, extension: str = ""):
+        """
+        Constructor de la caché.
+        
+        Args:
+            directorio: Directorio de la caché (se crea si no existe)
+            tamano_maximo: Bytes que pueden ocupar todas las entradas juntas
+            extension: Extensión de los archivos (p. ej. ".docx")
+        """
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.extension = extension
+        os.makedirs(self.directorio, exist_ok=True)
+    
+    def ruta(self, grupo: str, clave: str) -> str:
+        """
+        Ruta del archivo de una entrada.
+        
+        Args:
+            grupo: Grupo de la entrada
+            clave: Clave de la entrada
+        
+        Returns:
+            str: directorio/grupo_clave.extension
+        """
+        return os.path.join(self.directorio, f"{grupo}_{clave}{self.extension}")
+    
+    def leer(self, grupo: str, clave: str) -> Optional[bytes]:
+        """
+        Lee una entrada y la marca como recién usada.
+        
+        Args:
+            grupo: Grupo de la entrada
+            clave: Clave de la entrada
+        
+        Returns:
+            Optional[bytes]: Contenido, o None si no está en la caché
+        """
+        ruta = self.ruta(grupo, clave)
+        try:
+            with open(ruta, "rb") as archivo:
+                datos = archivo.read()
+            os.utime(ruta)
+        except FileNotFoundError:
+            return None
+        return datos
+    
+    def guardar(self, grupo: str, clave: str, datos: bytes) -> None:
+        """
+        Guarda una entrada (de forma atómica) y elimina las menos usadas si la
+        caché supera su tamaño máximo. Una entrada más grande que el máximo no se guarda.
+        
+        Args:
+            grupo: Grupo de la entrada
+            clave: Clave de la entrada
+            datos: Contenido
+        """
+        if len(datos) > self.tamano_maximo:
+            return
+        ruta = self.ruta(grupo, clave)
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, prefix=".tmp_")
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                archivo.write(datos)
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        self.recortar()
+    
+    def invalidar(self, grupo: str) -> int:
+        """
+        Elimina todas las entradas de un grupo.
+        
+        Args:
+            grupo: Grupo a invalidar
+        
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        eliminadas = 0
+        for ruta in glob.glob(os.path.join(glob.escape(self.directorio), f"{glob.escape(grupo)}_*{self.extension}")):
+            try:
+                os.remove(ruta)
+                eliminadas += 1
+            except FileNotFoundError:
+                pass
+        return eliminadas
+    
+    def entradas(self) -> List[Tuple[str, int, float]]:
+        """
+        Entradas de la caché.
+        
+        Returns:
+            List[Tuple[str, int, float]]: (ruta, bytes, último uso) de la menos a la más recientemente usada
+        """
+        entradas = []
+        with os.scandir(self.directorio) as archivos:
+            for archivo in archivos:
+                if archivo.name.startswith(".") or not archivo.is_file():
+                    continue
+                try:
+                    estado = archivo.stat()
+                except FileNotFoundError:
+                    continue
+                entradas.append((archivo.path, estado.st_size, estado.st_mtime))
+        return sorted(entradas, key=lambda entrada: entrada[2])
+    
+    def recortar(self) -> int:
+        """
+        Elimina las entradas menos usadas hasta que la caché quepa en su tamaño máximo.
+        
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        entradas = self.entradas()
+        total = sum(tamano for _, tamano, _ in entradas)
+        eliminadas = 0
+        for ruta, tamano, _ in entradas:
+            if total <= self.tamano_maximo:
+                break
+            try:
+                os.remove(ruta)
+                eliminadas += 1
+            except FileNotFoundError:
+                pass
+            total -= tamano
+        return eliminadas
@@ -0,0 +1,226 @@
+# src/infrastructure/database/asesor_indices.py
+"""
+Asesor de índices.
+
+Ejecuta el catálogo de consultas de los repositorios sobre una base SQLite
+en memoria (con el esquema de los modelos), captura el SQL que emite cada una y le
+pide a SQLite su plan con EXPLAIN QUERY PLAN. Señala las consultas que recorren
+una tabla completa (SCAN <tabla> sin índice) y no tienen un motivo para hacerlo.
+
+Para CI, desde la raíz del proyecto:
+    PYTHONPATH=src python -m infrastructure.database.asesor_indices
+Termina con código 1 si encuentra escaneos completos no permitidos.
+"""
+import datetime
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+from infrastructure.database.config import Base, SessionLocal
+import domain.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+
+# "SCAN mikrotiks" o "SCAN TABLE mikrotiks" (SQLite < 3.36), con alias opcional, y
+# también "SCAN mikrotiks USING INDEX ...": recorrer un índice para no ordenar sigue
+# leyendo todas las filas. No cuenta los índices cubrientes (un GROUP BY o COUNT
+# sobre toda la tabla solo lee el índice), las tablas virtuales ni las subconsultas
+PATRON_ESCANEO = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?=$| USING (?!COVERING))")
+
+
+@dataclass
+class ConsultaCatalogo:
+    """Una consulta de un repositorio a revisar."""
+    nombre: str
+    ejecutar: Callable[[], Any]
+    permitir_escaneo: Optional[str] = None  # Motivo por el que recorrer la tabla es aceptable
+
+
+@dataclass
+class ResultadoConsulta:
+    """Plan de las sentencias que emitió una consulta del catálogo."""
+    nombre: str
+    planes: List[List[str]] = field(default_factory=list)
+    escaneos: List[str] = field(default_factory=list)  # Tablas recorridas completas
+    ordenamientos: int = 0  # Pasos "USE TEMP B-TREE" (ordenar o agrupar en memoria)
+    permitir_escaneo: Optional[str] = None
+    
+    @property
+    def problema(self) -> bool:
+        """True si recorre una tabla completa sin estar permitido."""
+        return bool(self.escaneos) and not self.permitir_escaneo
+
+
+def escaneos_completos(detalles: List[str]) -> List[str]:
+    """
+    Extrae de un plan las tablas que se recorren completas.
+    
+    Args:
+        detalles: Columna detail de EXPLAIN QUERY PLAN
+    
+    Returns:
+        List[str]: Tablas (o alias) recorridas completas
+    """
+    return [coincidencia.group(1) for coincidencia in map(PATRON_ESCANEO.match, detalles) if coincidencia]
+
+
+def catalogo_repositorios() -> List[ConsultaCatalogo]:
+    """
+    Consultas de los repositorios que se revisan, con argumentos de ejemplo.
+    
+    Returns:
+        List[ConsultaCatalogo]: Catálogo de consultas
+    """
+    from domain.models.mikrotik import MikroTik
+    from infrastructure.repositories.documento_repository import DocumentoRepository
+    from infrastructure.repositories.mikrotik_repository import MikroTikRepository
+    
+    mikrotiks = MikroTikRepository()
+    documentos = DocumentoRepository()
+    fecha = datetime.datetime(2024, 1, 1)
+    subcadena = "búsqueda por subcadena (ILIKE '%texto%'), no puede usar un índice"
+    
+    return [
+        # MikroTiks
+        ConsultaCatalogo("MikroTik.get_by_id", lambda: mikrotiks.get_by_id(1)),
+        ConsultaCatalogo("MikroTik.get_by_nombre", lambda: mikrotiks.get_by_nombre("MTK-1")),
+        ConsultaCatalogo("MikroTik.get_by_ip", lambda: mikrotiks.get_by_ip("10.0.0.1")),
+        ConsultaCatalogo("MikroTik.get_by_estado", lambda: mikrotiks.get_by_estado("activo")),
+        ConsultaCatalogo("MikroTik.get_disponibles", mikrotiks.get_disponibles),
+        ConsultaCatalogo("MikroTik.get_by_cliente", lambda: mikrotiks.get_by_cliente("CLI-1")),
+        ConsultaCatalogo("MikroTik.count_by_estado", mikrotiks.count_by_estado),
+        ConsultaCatalogo("MikroTik.count_by_modelo", mikrotiks.count_by_modelo),
+        ConsultaCatalogo("MikroTik.get_disponibilidad_stats", mikrotiks.get_disponibilidad_stats),
+        ConsultaCatalogo("MikroTik.existe_nombre", lambda: mikrotiks.existe_nombre("MTK-1", excluir_id=1)),
+        ConsultaCatalogo("MikroTik.iter_filtered(estado)",
+                         lambda: list(mikrotiks.iter_filtered(estado="activo",
+                                                              columnas=[MikroTik.id, MikroTik.ip_mikrotik]))),
+        ConsultaCatalogo("MikroTik.get_lote_barrido", lambda: mikrotiks.get_lote_barrido(10, 5000)),
+        ConsultaCatalogo("MikroTik.get_listado_pagina(cursor)",
+                         lambda: mikrotiks.get_listado_pagina(cursor=(200,))),
+        ConsultaCatalogo("MikroTik.get_listado_pagina", mikrotiks.get_listado_pagina,
+                         "primera página: recorre por id y se detiene en el límite"),
+        ConsultaCatalogo("MikroTik.get_listado_pagina(texto)", lambda: mikrotiks.get_listado_pagina(texto="hex"),
+                         subcadena),
+        ConsultaCatalogo("MikroTik.get_by_modelo", lambda: mikrotiks.get_by_modelo("hex"), subcadena),
+        ConsultaCatalogo("MikroTik.search_by_text", lambda: mikrotiks.search_by_text("hex"), subcadena),
+        ConsultaCatalogo("MikroTik.get_listado", mikrotiks.get_listado, "lista completa"),
+        ConsultaCatalogo("MikroTik.get_estadisticas", mikrotiks.get_estadisticas, "agrega toda la flota"),
+        
+        # Documentos
+        ConsultaCatalogo("Documento.get_by_cliente_id", lambda: documentos.get_by_cliente_id("CLI-1")),
+        ConsultaCatalogo("Documento.get_by_tipo_transaccion", lambda: documentos.get_by_tipo_transaccion("UPGRADE")),
+        ConsultaCatalogo("Documento.get_by_nodo_id", lambda: documentos.get_by_nodo_id(1)),
+        ConsultaCatalogo("Documento.get_by_ingeniero", lambda: documentos.get_by_ingeniero("ana")),
+        ConsultaCatalogo("Documento.get_documents_by_date_range",
+                         lambda: documentos.get_documents_by_date_range(fecha, fecha + datetime.timedelta(days=30))),
+        ConsultaCatalogo("Documento.get_recent_documents", documentos.get_recent_documents,
+                         "recorre por fecha descendente y se detiene en el límite"),
+        ConsultaCatalogo("Documento.get_page(fecha_creacion)",
+                         lambda: documentos.get_page(cursor=(fecha, 10), orden="fecha_creacion", descendente=True)),
+        ConsultaCatalogo("Documento.get_ids_filtrados(fechas, tipo)",
+                         lambda: documentos.get_ids_filtrados(fecha, fecha + datetime.timedelta(days=30),
+                                                              tipo_transaccion="UPGRADE")),
+        ConsultaCatalogo("Documento.get_ids_filtrados(ingeniero)",
+                         lambda: documentos.get_ids_filtrados(ingeniero="ana")),
+        ConsultaCatalogo("Documento.count_by_tipo_transaccion", documentos.count_by_tipo_transaccion),
+        ConsultaCatalogo("Documento.get_all_cliente_ids", documentos.get_all_cliente_ids),
+        ConsultaCatalogo("Documento.search_by_text", lambda: documentos.search_by_text("juan")),
+        ConsultaCatalogo("Documento.buscar_texto", lambda: documentos.buscar_texto('"juan"*')),
+        ConsultaCatalogo("Documento.get_listado", documentos.get_listado, "lista completa"),
+    ]
+
+
+def explicar_consulta(engine: Engine, consulta: ConsultaCatalogo) -> ResultadoConsulta:
+    """
+    Ejecuta una consulta del catálogo y obtiene el plan de cada SELECT que emite.
+    
+    Args:
+        engine: Engine SQLite al que están apuntando las sesiones
+        consulta: Consulta a revisar
+    
+    Returns:
+        ResultadoConsulta: Planes y escaneos encontrados
+    """
+    sentencias = []
+    
+    def capturar(conexion, cursor, sentencia, parametros, contexto, multiples):
+        if sentencia.lstrip().upper().startswith(("SELECT", "WITH")):
+            sentencias.append((sentencia, parametros))
+    
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        consulta.ejecutar()
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    
+    resultado = ResultadoConsulta(nombre=consulta.nombre, permitir_escaneo=consulta.permitir_escaneo)
+    with engine.connect() as conexion:
+        for sentencia, parametros in sentencias:
+            detalles = [fila[-1] for fila in conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sentencia}", parametros)]
+            resultado.planes.append(detalles)
+            resultado.escaneos.extend(escaneos_completos(detalles))
+            resultado.ordenamientos += sum(detalle.startswith("USE TEMP B-TREE") for detalle in detalles)
+    return resultado
+
+
+def analizar(catalogo: Optional[List[ConsultaCatalogo]] = None,
+             engine: Optional[Engine] = None) -> List[ResultadoConsulta]:
+    """
+    Revisa el plan de todas las consultas del catálogo.
+    
+    Args:
+        catalogo: Consultas a revisar (por defecto catalogo_repositorios())
+        engine: Engine SQLite a usar (por defecto una base en memoria creada con los modelos)
+    
+    Returns:
+        List[ResultadoConsulta]: Un resultado por consulta, en el orden del catálogo
+    """
+    temporal = engine is None
+    if temporal:
+        # Base en memoria: una sola conexión compartida (StaticPool) para que todas
+        # las sesiones vean las mismas tablas; desaparece con engine.dispose()
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    
+    anterior = SessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    try:
+        if temporal:
+            Base.metadata.create_all(bind=engine)
+        return [explicar_consulta(engine, consulta) for consulta in catalogo or catalogo_repositorios()]
+    finally:
+        SessionLocal.configure(bind=anterior)
+        if temporal:
+            engine.dispose()
+
+
+def imprimir_informe(resultados: List[ResultadoConsulta]) -> None:
+    """Muestra el plan resumido de cada consulta."""
+    for resultado in resultados:
+        if resultado.problema:
+            print(f"❌ {resultado.nombre}: recorre completa {', '.join(resultado.escaneos)}")
+        elif resultado.escaneos:
+            print(f"⚠️ {resultado.nombre}: recorre completa {', '.join(resultado.escaneos)} "
+                  f"(permitido: {resultado.permitir_escaneo})")
+        else:
+            print(f"✅ {resultado.nombre}")
+        for detalles in resultado.planes:
+            for detalle in detalles:
+                print(f"      {detalle}")
+    
+    problemas = sum(resultado.problema for resultado in resultados)
+    print(f"\n📊 {len(resultados)} consultas revisadas, {problemas} con escaneos completos no permitidos")
+
+
+def main() -> int:
+    """Punto de entrada para CI: 1 si hay escaneos completos no permitidos."""
+    resultados = analizar()
+    imprimir_informe(resultados)
+    return 1 if any(resultado.problema for resultado in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,20 +3,66 @@
 Configuración de la base de datos SQLAlchemy.
 Este módulo establece la conexión con la base de datos y define la clase Base.
 """
-from sqlalchemy import create_engine
+from typing import Dict, Any, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+# La configuración vive en config/app_config.py (raíz del proyecto); si no está
+# en el path (scripts sueltos, pruebas) se usan los valores por defecto
+try:
+    from config.app_config import DATABASE_CONFIG
+except ImportError:
+    DATABASE_CONFIG = {}
+
+# PRAGMAs de cada conexión SQLite: los define DATABASE_CONFIG["sqlite_pragmas"]
+# (sin configuración no se toca ninguno)
+PRAGMAS_SQLITE: Dict[str, Any] = DATABASE_CONFIG.get("sqlite_pragmas", {})
+
+
+def aplicar_perfil_sqlite(engine: Engine, pragmas: Optional[Dict[str, Any]] = None) -> Engine:
+    """
+    Hace que cada conexión nueva del engine ejecute los PRAGMAs indicados.
+    
+    Args:
+        engine: Engine de SQLAlchemy (SQLite)
+        pragmas: {pragma: valor} (None = no tocar ese PRAGMA); por defecto PRAGMAS_SQLITE
+    
+    Returns:
+        Engine: El mismo engine
+    """
+    if pragmas is None:
+        pragmas = PRAGMAS_SQLITE
+    sentencias = [f"PRAGMA {nombre}={valor}" for nombre, valor in pragmas.items() if valor is not None]
+    
+    @event.listens_for(engine, "connect")
+    def configurar_conexion(conexion_dbapi, registro_conexion):
+        cursor = conexion_dbapi.cursor()
+        try:
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+        finally:
+            cursor.close()
+    
+    return engine
+
+
 # Definimos la URL de conexión a la base de datos SQLite
 # El archivo se guardará en la raíz del proyecto con el nombre 'network_app.db'
-SQLALCHEMY_DATABASE_URL = "sqlite:///network_app.db"
+SQLALCHEMY_DATABASE_URL = DATABASE_CONFIG.get("url", "sqlite:///network_app.db")
 
 # Creamos el motor de SQLAlchemy
 # El parámetro connect_args={"check_same_thread": False} es necesario solo para SQLite
 # Permite que SQLite sea utilizado con hilos, lo cual es necesario para aplicaciones web
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False},
+    echo=DATABASE_CONFIG.get("echo", False),
+    pool_pre_ping=DATABASE_CONFIG.get("pool_pre_ping", True)
 )
+if engine.dialect.name == "sqlite":
+    aplicar_perfil_sqlite(engine)
 
 # Creamos la clase SessionLocal que será nuestra fábrica de sesiones de base de datos
 # Cada instancia de esta clase será una sesión de base de datos
@@ -4,7 +4,7 @@ Inicialización de la base de datos.
 Este módulo se encarga de crear las tablas en la base de datos si no existen.
 """
 from infrastructure.database.config import engine
-from domain.models import BaseModel, NodoIPRAN, NodoGPON, Usuario, CorreoCliente, Documento, MikroTik  # ← NUEVO: Agregamos MikroTik
+from domain.models import BaseModel, NodoIPRAN, NodoGPON, Usuario, CorreoCliente, Documento, MikroTik, SondeoMikroTik, ResumenDisponibilidad, EstadoSondeo, ContenidoRespaldo, VersionRespaldo, IndiceRespaldo, LineaRespaldo  # ← NUEVO: Agregamos MikroTik
 
 def init_db():
     """
@@ -15,6 +15,18 @@ def init_db():
     # Esto incluye automáticamente la nueva tabla 'mikrotiks'
     BaseModel.metadata.create_all(bind=engine)
     
+    # Mover los exports guardados en mikrotiks.ultimo_export a los respaldos versionados
+    from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
+    respaldos = RespaldoConfiguracionService()
+    migrados = respaldos.importar_exports_antiguos()
+    
+    # Indexar para la búsqueda los respaldos que todavía no están en el índice
+    indexados = respaldos.indexar_pendientes()
+    
+    # Crear el índice de búsqueda de documentos en bases anteriores a él
+    from infrastructure.repositories.documento_repository import DocumentoRepository
+    documentos_indexados = DocumentoRepository().asegurar_indice_texto()
+    
     # Aquí podríamos añadir datos iniciales si fuera necesario
     # Por ejemplo, algunos MikroTiks de ejemplo
     
@@ -24,8 +36,18 @@ def init_db():
     print("  ✅ nodos_ipran") 
     print("  ✅ nodos_gpon")
     print("  ✅ correo_cliente")
-    print("  ✅ documentos")
+    print("  ✅ documentos (búsqueda FTS5)")
     print("  ✅ mikrotiks")  # ← NUEVO: Confirmamos que se creó la tabla
+    print("  ✅ sondeos_mikrotik y resumen_disponibilidad")
+    print("  ✅ estado_sondeo")
+    print("  ✅ respaldo_contenidos y respaldo_versiones")
+    print("  ✅ respaldo_indice y respaldo_lineas (búsqueda FTS5)")
+    if migrados:
+        print(f"📦 {migrados} exports antiguos movidos a los respaldos versionados")
+    if indexados:
+        print(f"🔎 {indexados} respaldos agregados al índice de búsqueda")
+    if documentos_indexados:
+        print(f"🔎 {documentos_indexados} documentos agregados al índice de búsqueda")
 
 if __name__ == "__main__":
     # Si ejecutamos este archivo directamente, inicializamos la base de datos
@@ -0,0 +1,103 @@
+# src/infrastructure/database/unidad_trabajo.py
+"""
+Unidad de trabajo para agrupar varias operaciones de repositorio en una transacción.
+
+Por defecto cada método de un repositorio abre su propia sesión y hace su propio
+commit. Dentro de un bloque 'with unidad_de_trabajo():' todos los repositorios
+usados desde el mismo hilo comparten una única sesión: sus commit() pasan a ser
+flush() (los cambios se envían a la base pero no se confirman) y al salir del
+bloque se hace un solo commit, o un rollback de todo si hubo una excepción.
+
+Ejemplo:
+    with unidad_de_trabajo():
+        mikrotik_repository.actualizar_disponibilidad_por_id(estados)
+        historial_repository.registrar_sondeos(filas)
+    # Aquí se confirmaron ambas escrituras juntas
+
+Conviene que las unidades sean cortas y sin esperas de red adentro: SQLite
+mantiene bloqueada la escritura desde el primer flush hasta el commit final.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from infrastructure.database.config import SessionLocal
+
+# Sesión de la unidad de trabajo activa en cada hilo
+_local = threading.local()
+
+
+class SesionCompartida:
+    """
+    Envoltorio de la sesión de una unidad de trabajo que entregan los repositorios.
+    Se usa igual que una sesión ('with ... as db'), pero cerrar el bloque no cierra
+    la sesión y commit() solo hace flush: el commit real lo hace la unidad de trabajo.
+    """
+    
+    def __init__(self, session: Session):
+        """
+        Constructor del envoltorio.
+        
+        Args:
+            session: Sesión de la unidad de trabajo
+        """
+        self._session = session
+    
+    def __enter__(self) -> "SesionCompartida":
+        return self
+    
+    def __exit__(self, tipo, valor, traza) -> None:
+        # La sesión sigue abierta hasta que termine la unidad de trabajo
+        return None
+    
+    def __getattr__(self, nombre):
+        return getattr(self._session, nombre)
+    
+    def commit(self) -> None:
+        """Envía los cambios pendientes sin confirmar la transacción."""
+        self._session.flush()
+    
+    def close(self) -> None:
+        """No hace nada: la sesión la cierra la unidad de trabajo."""
+
+
+def sesion_actual() -> Optional[Session]:
+    """
+    Obtiene la sesión de la unidad de trabajo activa en este hilo.
+    
+    Returns:
+        Optional[Session]: La sesión, o None si no hay una unidad de trabajo abierta
+    """
+    return getattr(_local, "session", None)
+
+
+@contextmanager
+def unidad_de_trabajo() -> Iterator[Session]:
+    """
+    Abre una unidad de trabajo en el hilo actual. Si ya hay una abierta, el bloque
+    se suma a ella y el commit lo hace la unidad más externa.
+    
+    Los objetos devueltos por los repositorios no se expiran al confirmar, así que
+    siguen siendo legibles después del bloque, como con una sesión por llamada.
+    
+    Returns:
+        Iterator[Session]: La sesión compartida (para consultas propias del servicio)
+    """
+    externa = sesion_actual()
+    if externa is not None:
+        yield externa
+        return
+    
+    session = SessionLocal(expire_on_commit=False)
+    _local.session = session
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        _local.session = None
+        session.close()
@@ -0,0 +1,16 @@
+# src/infrastructure/network/__init__.py
+"""
+Inicialización del módulo de red.
+Este archivo facilita la importación de las utilidades de red de bajo nivel.
+"""
+from infrastructure.network.sondeador import Sondeador, ResultadoSondeo
+from infrastructure.network.pool_routeros import PoolConexionesRouterOS
+from infrastructure.network.simulador_routeros import SimuladorRouterOS
+
+# Exportamos las clases para facilitar su importación desde otros módulos
+__all__ = [
+    'Sondeador',
+    'ResultadoSondeo',
+    'PoolConexionesRouterOS',
+    'SimuladorRouterOS'
+]
@@ -0,0 +1,292 @@
+# src/infrastructure/network/pool_routeros.py
+"""
+Pool de conexiones a la API de RouterOS.
+Conserva conexiones ya autenticadas por equipo para que operaciones seguidas
+(listar colas, modificar una cola, pedir el export) no repitan cada vez la
+conexión TCP y el login. No depende de librouteros: recibe la función que crea
+las conexiones y la que verifica que sigan vivas.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class PoolConexionesRouterOS:
+    """
+    Pool de conexiones indexado por equipo.
+    
+    - Reutiliza la conexión libre más reciente del equipo (acierto) o crea una nueva (fallo).
+    - Un equipo no tiene más de 'max_por_equipo' conexiones en uso: quien pide otra
+      espera a que se devuelva una, como mucho 'espera_maxima' segundos.
+    - Cierra las conexiones que pasan más de 'tiempo_inactividad' sin usarse (al pedir
+      una conexión y, mientras haya conexiones libres, cada 'intervalo_limpieza' segundos).
+    - Verifica las que llevan más de 'verificar_tras' segundos sin usarse antes de entregarlas.
+    - Si una conexión reutilizada falla por un error de transporte, la descarta y
+      repite la operación una vez con una conexión nueva (reconexión automática).
+    """
+    
+    def __init__(self, max_por_equipo: int = 2, max_total: int = 64, espera_maxima: float = 30.0,
+                 tiempo_inactividad: float = 120.0, verificar_tras: float = 15.0,
+                 intervalo_limpieza: float = 30.0,
+                 verificar: Optional[Callable[[Any], None]] = None,
+                 errores_conexion: Tuple[type, ...] = (OSError,)):
+        """
+        Constructor del pool.
+        
+        Args:
+            max_por_equipo: Conexiones por equipo (en uso o libres)
+            max_total: Conexiones libres que se conservan en total
+            espera_maxima: Segundos que se espera una conexión de un equipo que ya tiene todas en uso
+            tiempo_inactividad: Segundos sin uso tras los que se cierra una conexión
+            verificar_tras: Segundos sin uso tras los que se verifica una conexión antes de reutilizarla
+            intervalo_limpieza: Segundos entre limpiezas de las conexiones inactivas
+            verificar: Función que lanza una excepción si la conexión ya no sirve
+            errores_conexion: Excepciones que indican que la conexión quedó inutilizable
+        """
+        self.max_por_equipo = max_por_equipo
+        self.max_total = max_total
+        self.espera_maxima = espera_maxima
+        self.tiempo_inactividad = tiempo_inactividad
+        self.verificar_tras = verificar_tras
+        self.intervalo_limpieza = intervalo_limpieza
+        self.verificar = verificar
+        self.errores_conexion = errores_conexion
+        
+        self._libres: Dict[Hashable, List[Tuple[Any, float]]] = defaultdict(list)  # clave -> [(conexión, último uso)]
+        self._cupos: Dict[Hashable, threading.BoundedSemaphore] = {}  # clave -> conexiones que aún puede usar
+        self._usuarios: Dict[Hashable, int] = {}  # clave -> operaciones que usan o esperan su cupo
+        self._candado = threading.Lock()
+        self._hilo_limpieza: Optional[threading.Thread] = None
+        
+        # Estadísticas
+        self.aciertos = 0
+        self.fallos = 0
+        self.reconexiones = 0
+        self.descartadas = 0
+        self.esperas_agotadas = 0
+    
+    # === API PÚBLICA ===
+    
+    def ejecutar(self, clave: Hashable, crear: Callable[[], Any], operacion: Callable[[Any], T]) -> T:
+        """
+        Ejecuta una operación con una conexión del pool y la devuelve al terminar.
+        
+        Args:
+            clave: Identifica al equipo (y sus credenciales)
+            crear: Función que abre y autentica una conexión nueva
+            operacion: Función que recibe la conexión y hace el trabajo
+        
+        Returns:
+            T: Lo que devuelva la operación
+        
+        Raises:
+            TimeoutError: Si el equipo tiene todas sus conexiones en uso más de 'espera_maxima' segundos
+        """
+        cupo = self._reservar(clave)
+        try:
+            return self._ejecutar_reservado(clave, crear, operacion)
+        finally:
+            cupo.release()
+            with self._candado:
+                self._dejar_cupo(clave)
+    
+    def cerrar_equipo(self, clave: Hashable) -> None:
+        """
+        Cierra las conexiones libres de un equipo (por ejemplo, al cambiar sus credenciales).
+        
+        Args:
+            clave: Clave del equipo
+        """
+        with self._candado:
+            libres = self._libres.pop(clave, [])
+            self._olvidar_si_inactivo(clave)
+        for conexion, _ in libres:
+            self._cerrar(conexion)
+    
+    def cerrar_todo(self) -> None:
+        """Cierra todas las conexiones libres del pool."""
+        with self._candado:
+            libres = [conexion for lista in self._libres.values() for conexion, _ in lista]
+            self._libres.clear()
+            for clave in list(self._cupos):
+                self._olvidar_si_inactivo(clave)
+        for conexion in libres:
+            self._cerrar(conexion)
+    
+    def limpiar_inactivas(self) -> int:
+        """
+        Cierra las conexiones que superaron el tiempo de inactividad y olvida
+        los equipos que se quedan sin conexiones libres ni en uso.
+        
+        Returns:
+            int: Número de conexiones cerradas
+        """
+        limite = time.monotonic() - self.tiempo_inactividad
+        vencidas = []
+        with self._candado:
+            for clave in list(self._libres):
+                vigentes = []
+                for conexion, ultimo_uso in self._libres[clave]:
+                    (vigentes if ultimo_uso > limite else vencidas).append((conexion, ultimo_uso))
+                if vigentes:
+                    self._libres[clave] = vigentes
+                else:
+                    del self._libres[clave]
+            for clave in list(self._cupos):
+                self._olvidar_si_inactivo(clave)
+            self.descartadas += len(vencidas)
+        for conexion, _ in vencidas:
+            self._cerrar(conexion)
+        return len(vencidas)
+    
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Obtiene los contadores del pool.
+        
+        Returns:
+            Dict[str, Any]: aciertos, fallos, tasa de aciertos, reconexiones, descartadas,
+                            esperas agotadas y libres
+        """
+        with self._candado:
+            total = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 3) if total else None,
+                "reconexiones": self.reconexiones,
+                "descartadas": self.descartadas,
+                "esperas_agotadas": self.esperas_agotadas,
+                "libres": sum(len(lista) for lista in self._libres.values())
+            }
+    
+    # === MÉTODOS INTERNOS ===
+    
+    def _reservar(self, clave: Hashable) -> threading.BoundedSemaphore:
+        """Ocupa un cupo de conexión del equipo; si están todos en uso espera hasta 'espera_maxima' segundos."""
+        with self._candado:
+            cupo = self._cupos.get(clave)
+            if cupo is None:
+                cupo = self._cupos[clave] = threading.BoundedSemaphore(self.max_por_equipo)
+            self._usuarios[clave] = self._usuarios.get(clave, 0) + 1
+        if not cupo.acquire(timeout=self.espera_maxima):
+            with self._candado:
+                self.esperas_agotadas += 1
+                self._dejar_cupo(clave)
+            # Sin la clave en el mensaje: incluye las credenciales
+            raise TimeoutError(f"El equipo tiene sus {self.max_por_equipo} conexiones en uso "
+                               f"desde hace {self.espera_maxima} s")
+        return cupo
+    
+    def _dejar_cupo(self, clave: Hashable) -> None:
+        """Descuenta una operación del equipo (con el candado tomado)."""
+        self._usuarios[clave] -= 1
+        self._olvidar_si_inactivo(clave)
+    
+    def _olvidar_si_inactivo(self, clave: Hashable) -> None:
+        """
+        Quita el cupo de un equipo sin operaciones ni conexiones libres (con el
+        candado tomado), para no acumular uno por cada juego de credenciales usado.
+        """
+        if not self._usuarios.get(clave) and clave not in self._libres:
+            self._cupos.pop(clave, None)
+            self._usuarios.pop(clave, None)
+    
+    def _ejecutar_reservado(self, clave: Hashable, crear: Callable[[], Any], operacion: Callable[[Any], T]) -> T:
+        """Ejecuta la operación (con un cupo del equipo ya reservado), reconectando una vez si hace falta."""
+        conexion, reutilizada = self._obtener(clave, crear)
+        try:
+            resultado = operacion(conexion)
+        except self.errores_conexion:
+            self._cerrar(conexion)
+            if not reutilizada:
+                raise
+            # La conexión guardada estaba rota (equipo reiniciado, NAT expirado...): reintentar
+            with self._candado:
+                self.reconexiones += 1
+            conexion = crear()
+            try:
+                resultado = operacion(conexion)
+            except self.errores_conexion:
+                self._cerrar(conexion)
+                raise
+            except Exception:
+                self._devolver(clave, conexion)
+                raise
+        except Exception:
+            # Error del comando (por ejemplo, un !trap): la conexión sigue siendo válida
+            self._devolver(clave, conexion)
+            raise
+        
+        self._devolver(clave, conexion)
+        return resultado
+    
+    def _obtener(self, clave: Hashable, crear: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Entrega una conexión libre y sana del equipo o crea una nueva."""
+        self.limpiar_inactivas()
+        
+        while True:
+            with self._candado:
+                libres = self._libres.get(clave)
+                if not libres:
+                    self.fallos += 1
+                    break
+                conexion, ultimo_uso = libres.pop()  # La más reciente: la que más probablemente siga viva
+                if not libres:
+                    del self._libres[clave]
+            
+            # Verificar fuera del candado: es un viaje de ida y vuelta al equipo
+            if self.verificar is not None and time.monotonic() - ultimo_uso > self.verificar_tras:
+                try:
+                    self.verificar(conexion)
+                except Exception:
+                    with self._candado:
+                        self.descartadas += 1
+                    self._cerrar(conexion)
+                    continue
+            
+            with self._candado:
+                self.aciertos += 1
+            return conexion, True
+        
+        return crear(), False
+    
+    def _devolver(self, clave: Hashable, conexion: Any) -> None:
+        """Guarda la conexión para reutilizarla, o la cierra si el pool está lleno."""
+        with self._candado:
+            libres = self._libres[clave]
+            total = sum(len(lista) for lista in self._libres.values())
+            if len(libres) < self.max_por_equipo and total < self.max_total:
+                libres.append((conexion, time.monotonic()))
+                if self._hilo_limpieza is None:
+                    self._hilo_limpieza = threading.Thread(target=self._limpiar_periodicamente,
+                                                           name="pool-routeros-limpieza", daemon=True)
+                    self._hilo_limpieza.start()
+                return
+            if not libres:
+                del self._libres[clave]
+        self._cerrar(conexion)
+    
+    def _limpiar_periodicamente(self) -> None:
+        """
+        Cierra las conexiones inactivas cada 'intervalo_limpieza' segundos, también
+        las de equipos a los que ya no se piden conexiones. Termina cuando no
+        quedan conexiones libres; _devolver() lo vuelve a lanzar al guardar otra.
+        """
+        while True:
+            time.sleep(self.intervalo_limpieza)
+            self.limpiar_inactivas()
+            with self._candado:
+                if not self._libres:
+                    self._hilo_limpieza = None
+                    return
+    
+    @staticmethod
+    def _cerrar(conexion: Any) -> None:
+        """Cierra una conexión ignorando errores (puede estar ya rota)."""
+        try:
+            conexion.close()
+        except Exception:
+            pass
@@ -0,0 +1,438 @@
+# src/infrastructure/network/simulador_routeros.py
+"""
+Simulador local de la API de RouterOS.
+Habla el protocolo de la API (palabras con prefijo de longitud, respuestas
+!re/!done/!trap) sobre un socket TCP en loopback, de modo que el servicio de
+MikroTiks y librouteros se puedan probar y medir sin equipos reales. Cuenta
+los bytes y comandos intercambiados para comparar estrategias de consulta, y
+puede simular latencia, pérdida de paquetes (retransmisiones) y reinicios del
+equipo de forma determinista.
+"""
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+# Atributos que RouterOS devuelve por cada cola simple cuando no se pide un .proplist
+ATRIBUTOS_COLA = {
+    "target": "",
+    "parent": "none",
+    "packet-marks": "",
+    "priority": "8/8",
+    "queue": "default-small/default-small",
+    "limit-at": "0/0",
+    "max-limit": "0/0",
+    "burst-limit": "0/0",
+    "burst-threshold": "0/0",
+    "burst-time": "0s/0s",
+    "bucket-size": "0.1/0.1",
+    "invalid": "false",
+    "dynamic": "false",
+    "disabled": "false",
+}
+
+
+class ErrorComando(Exception):
+    """Error de un comando: se responde con !trap y la sesión sigue abierta."""
+
+
+class SimuladorRouterOS:
+    """
+    Equipo RouterOS simulado que escucha en 127.0.0.1.
+    
+    Comandos soportados:
+    - /login (verifica usuario y contraseña si se configuraron; antes del login
+      cualquier otro comando responde "not logged in")
+    - /system/identity/print
+    - /queue/simple/print con =.proplist= y consultas (?name=x, ?=name=x, ?name, ?-name, ?#|&!)
+    - /queue/simple/set, /queue/simple/add y /queue/simple/remove
+    - /export y /execute =script=/export =as-string= (export de la configuración)
+    
+    Se usa como gestor de contexto:
+        with SimuladorRouterOS(colas=1000) as simulador:
+            conexion = connect(host=simulador.host, port=simulador.puerto, ...)
+    """
+    
+    def __init__(self, colas: int = 0, identidad: str = "MikroTik", host: str = "127.0.0.1",
+                 puerto: int = 0, usuario: Optional[str] = None, contrasena: str = "",
+                 latencia: float = 0.0, perdida: float = 0.0, retransmision: float = 0.2,
+                 semilla: Optional[int] = 0):
+        """
+        Constructor del simulador.
+        
+        Args:
+            colas: Número de colas simples con las que arranca ("cliente-00001", ...)
+            identidad: Nombre que devuelve /system/identity
+            host: Dirección en la que escucha (cualquier 127.x.y.z sirve para simular varios equipos)
+            puerto: Puerto en el que escucha (0 = uno libre)
+            usuario: Usuario aceptado por /login (None = acepta cualquier credencial)
+            contrasena: Contraseña aceptada por /login
+            latencia: Segundos que tarda cada respuesta (ida y vuelta al equipo)
+            perdida: Probabilidad (0-1) de que una respuesta se pierda y haya que retransmitirla
+            retransmision: Segundos que suma cada respuesta perdida (el RTO de TCP)
+            semilla: Semilla de las pérdidas, para que las pruebas sean repetibles
+        """
+        self.host = host
+        self.puerto = puerto
+        self.identidad = identidad
+        self.usuario = usuario
+        self.contrasena = contrasena
+        self.latencia = latencia
+        self.perdida = perdida
+        self.retransmision = retransmision
+        self.export_extra = ""  # Líneas que se agregan al final del export
+        
+        self._colas: Dict[str, Dict[str, str]] = {}  # .id -> atributos, en orden de creación
+        self._siguiente_id = 1
+        self._azar = random.Random(semilla)
+        self._candado = threading.Lock()
+        self._servidor: Optional[socketserver.ThreadingTCPServer] = None
+        self._sesiones: Set[socket.socket] = set()
+        
+        # Estadísticas
+        self.bytes_recibidos = 0
+        self.bytes_enviados = 0
+        self.comandos: Counter = Counter()
+        self.conexiones = 0
+        self.logins_fallidos = 0
+        self.retransmisiones = 0
+        self.listados_completos = 0  # /queue/simple/print sin consulta (descargan todas las colas)
+        
+        for numero in range(1, colas + 1):
+            self.agregar_cola(f"cliente-{numero:05d}", target=f"10.{numero // 65536 % 256}."
+                              f"{numero // 256 % 256}.{numero % 256}/32", max_limit="10240k/10240k")
+    
+    # === CICLO DE VIDA ===
+    
+    def iniciar(self) -> Tuple[str, int]:
+        """
+        Empieza a escuchar (en un puerto libre si no se indicó uno).
+        
+        Returns:
+            Tuple[str, int]: (host, puerto)
+        """
+        simulador = self
+        
+        class Manejador(socketserver.BaseRequestHandler):
+            def handle(self):
+                simulador._atender(self.request)
+        
+        self._servidor = socketserver.ThreadingTCPServer((self.host, self.puerto), Manejador)
+        self._servidor.daemon_threads = True
+        self.puerto = self._servidor.server_address[1]
+        threading.Thread(target=self._servidor.serve_forever, name="simulador-routeros",
+                         daemon=True).start()
+        return self.host, self.puerto
+    
+    def detener(self) -> None:
+        """Deja de aceptar conexiones y corta las sesiones abiertas."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+        self.cortar_sesiones()
+    
+    def cortar_sesiones(self) -> int:
+        """
+        Corta todas las sesiones abiertas, como un reinicio del equipo.
+        
+        Returns:
+            int: Número de sesiones cortadas
+        """
+        with self._candado:
+            sesiones = list(self._sesiones)
+            self._sesiones.clear()
+        for sock in sesiones:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        return len(sesiones)
+    
+    def __enter__(self) -> "SimuladorRouterOS":
+        self.iniciar()
+        return self
+    
+    def __exit__(self, *_) -> None:
+        self.detener()
+    
+    # === ESTADO DEL EQUIPO ===
+    
+    def agregar_cola(self, nombre: str, target: str = "", max_limit: str = "0/0") -> str:
+        """
+        Crea una cola simple como lo haría /queue/simple/add.
+        
+        Returns:
+            str: .id asignado (los .id no se reutilizan, como en RouterOS)
+        """
+        with self._candado:
+            return self._agregar_cola({"name": nombre, "target": target, "max-limit": max_limit})
+    
+    def eliminar_cola(self, nombre: str) -> bool:
+        """
+        Elimina una cola simple por nombre.
+        
+        Returns:
+            bool: True si existía
+        """
+        with self._candado:
+            for id_cola, cola in self._colas.items():
+                if cola["name"] == nombre:
+                    del self._colas[id_cola]
+                    return True
+        return False
+    
+    def obtener_cola(self, nombre: str) -> Optional[Dict[str, str]]:
+        """Devuelve una copia de los atributos de una cola, o None si no existe."""
+        with self._candado:
+            for cola in self._colas.values():
+                if cola["name"] == nombre:
+                    return dict(cola)
+        return None
+    
+    def obtener_export(self) -> str:
+        """
+        Genera el export de la configuración actual, con el mismo formato que /export.
+        
+        Returns:
+            str: Export completo
+        """
+        with self._candado:
+            return self._generar_export()
+    
+    def reiniciar_contadores(self) -> None:
+        """Pone a cero los bytes, comandos, conexiones, retransmisiones y listados completos contados."""
+        with self._candado:
+            self.bytes_recibidos = self.bytes_enviados = 0
+            self.conexiones = self.logins_fallidos = self.retransmisiones = 0
+            self.listados_completos = 0
+            self.comandos.clear()
+    
+    # === PROTOCOLO ===
+    
+    def _atender(self, sock: socket.socket) -> None:
+        """Atiende una sesión: lee oraciones y responde hasta que el cliente cierra."""
+        sesion = {"autenticada": False}
+        with self._candado:
+            self._sesiones.add(sock)
+            self.conexiones += 1
+        try:
+            while True:
+                oracion = self._leer_oracion(sock)
+                if not oracion:
+                    continue
+                comando, palabras = oracion[0], oracion[1:]
+                if comando == "/quit":
+                    self._enviar(sock, [["!fatal", "session terminated on request"]])
+                    return
+                try:
+                    respuestas = self._ejecutar(comando, palabras, sesion)
+                except ErrorComando as e:
+                    respuestas = [["!trap", f"=message={e}"], ["!done"]]
+                self._enviar(sock, respuestas)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self._candado:
+                self._sesiones.discard(sock)
+    
+    def _ejecutar(self, comando: str, palabras: List[str], sesion: Dict[str, bool]) -> List[List[str]]:
+        """Ejecuta un comando de una sesión y devuelve las oraciones de respuesta."""
+        atributos = {}
+        consulta = []
+        for palabra in palabras:
+            if palabra.startswith("="):
+                clave, _, valor = palabra[1:].partition("=")
+                atributos[clave] = valor
+            elif palabra.startswith("?"):
+                consulta.append(palabra[1:])
+        
+        with self._candado:
+            self.comandos[comando] += 1
+            
+            if comando == "/login":
+                if self.usuario is not None and (atributos.get("name"), atributos.get("password", "")) != \
+                        (self.usuario, self.contrasena):
+                    self.logins_fallidos += 1
+                    raise ErrorComando("invalid user name or password (6)")
+                sesion["autenticada"] = True
+                return [["!done"]]
+            if not sesion["autenticada"]:
+                raise ErrorComando("not logged in")
+            
+            if comando == "/system/identity/print":
+                return [["!re", f"=name={self.identidad}"], ["!done"]]
+            if comando == "/queue/simple/print":
+                if not consulta:
+                    self.listados_completos += 1
+                return self._imprimir_colas(atributos.get(".proplist"), consulta) + [["!done"]]
+            if comando == "/queue/simple/set":
+                cola = self._buscar_por_id(atributos.pop(".id", None))
+                if "name" in atributos and atributos["name"] != cola["name"]:
+                    self._validar_nombre_libre(atributos["name"])
+                cola.update(atributos)
+                return [["!done"]]
+            if comando == "/queue/simple/add":
+                if "name" not in atributos:
+                    raise ErrorComando("missing value for name")
+                self._validar_nombre_libre(atributos["name"])
+                return [["!done", f"=ret={self._agregar_cola(atributos)}"]]
+            if comando == "/queue/simple/remove":
+                del self._colas[self._buscar_por_id(atributos.get(".id"))[".id"]]
+                return [["!done"]]
+            if comando == "/export" or (comando == "/execute" and atributos.get("script") == "/export"):
+                # Sin as-string, /execute corre el script como tarea y solo devuelve su número
+                if comando == "/execute" and "as-string" not in atributos:
+                    return [["!done", "=ret=*1"]]
+                return [["!done", f"=ret={self._generar_export()}"]]
+        
+        raise ErrorComando("no such command")
+    
+    def _imprimir_colas(self, proplist: Optional[str], consulta: List[str]) -> List[List[str]]:
+        """Arma una oración !re por cada cola que cumple la consulta."""
+        campos = proplist.split(",") if proplist else None
+        respuestas = []
+        for cola in self._colas.values():
+            if consulta and not self._cumple(cola, consulta):
+                continue
+            visibles = campos if campos is not None else list(cola)
+            respuestas.append(["!re"] + [f"={campo}={cola[campo]}" for campo in visibles if campo in cola])
+        return respuestas
+    
+    @staticmethod
+    def _cumple(cola: Dict[str, str], consulta: List[str]) -> bool:
+        """
+        Evalúa una consulta de la API sobre una cola (pila de resultados, como RouterOS).
+        Sin operadores explícitos, todas las condiciones deben cumplirse.
+        """
+        pila: List[bool] = []
+        for palabra in consulta:
+            if palabra.startswith("#"):
+                for operador in palabra[1:]:
+                    if operador == "!":
+                        pila.append(not pila.pop())
+                    elif operador in "|&":
+                        derecha, izquierda = pila.pop(), pila.pop()
+                        pila.append(izquierda or derecha if operador == "|" else izquierda and derecha)
+                continue
+            if palabra.startswith("-"):
+                pila.append(palabra[1:] not in cola)
+                continue
+            operador = palabra[0] if palabra[0] in "=<>" else "="
+            clave, separador, valor = palabra.lstrip("=<>").partition("=")
+            if not separador:
+                pila.append(clave in cola)
+            elif operador == "=":
+                pila.append(cola.get(clave) == valor)
+            elif operador == "<":
+                pila.append(clave in cola and cola[clave] < valor)
+            else:
+                pila.append(clave in cola and cola[clave] > valor)
+        return all(pila)
+    
+    def _agregar_cola(self, atributos: Dict[str, str]) -> str:
+        """Crea la cola con los atributos por defecto de RouterOS (requiere el candado)."""
+        id_cola = f"*{self._siguiente_id:X}"
+        self._siguiente_id += 1
+        self._colas[id_cola] = {".id": id_cola, "name": atributos["name"], **ATRIBUTOS_COLA,
+                                **{clave: valor for clave, valor in atributos.items() if clave != ".id"}}
+        return id_cola
+    
+    def _generar_export(self) -> str:
+        """Arma el export a partir del estado actual (requiere el candado)."""
+        lineas = [
+            f"# {time.strftime('%b/%d/%Y %H:%M:%S').lower()} by RouterOS 7.15.3",
+            "# software id = SIMU-0001",
+            "#",
+            "# model = CCR2004-16G-2S+",
+            "/queue simple",
+        ]
+        for cola in self._colas.values():
+            lineas.append(f"add max-limit={cola['max-limit']} name={cola['name']}"
+                          + (f" target={cola['target']}" if cola["target"] else ""))
+        lineas += ["/system identity", f"set name={self.identidad}"]
+        if self.export_extra:
+            lineas += self.export_extra.strip("\n").split("\n")
+        return "\n".join(lineas)
+    
+    def _buscar_por_id(self, id_cola: Optional[str]) -> Dict[str, str]:
+        """Devuelve la cola con ese .id o lanza el mismo error que RouterOS."""
+        if id_cola is None:
+            raise ErrorComando("missing value for .id")
+        cola = self._colas.get(id_cola)
+        if cola is None:
+            raise ErrorComando("no such item")
+        return cola
+    
+    def _validar_nombre_libre(self, nombre: str) -> None:
+        if any(cola["name"] == nombre for cola in self._colas.values()):
+            raise ErrorComando("failure: queue with such name exists")
+    
+    # === CODIFICACIÓN DE PALABRAS ===
+    
+    def _leer_oracion(self, sock: socket.socket) -> List[str]:
+        """Lee palabras hasta la palabra vacía que cierra la oración."""
+        palabras = []
+        while True:
+            palabra = self._leer_palabra(sock)
+            if palabra == "":
+                return palabras
+            palabras.append(palabra)
+    
+    def _leer_palabra(self, sock: socket.socket) -> str:
+        primero = self._leer_exacto(sock, 1)
+        control = primero[0]
+        if control < 0x80:
+            longitud = control
+        elif control < 0xC0:
+            longitud = int.from_bytes(primero + self._leer_exacto(sock, 1), "big") ^ 0x8000
+        elif control < 0xE0:
+            longitud = int.from_bytes(primero + self._leer_exacto(sock, 2), "big") ^ 0xC00000
+        elif control < 0xF0:
+            longitud = int.from_bytes(primero + self._leer_exacto(sock, 3), "big") ^ 0xE0000000
+        else:
+            raise ConnectionError(f"Byte de control desconocido: {control:#x}")
+        return self._leer_exacto(sock, longitud).decode("utf-8", errors="replace") if longitud else ""
+    
+    def _leer_exacto(self, sock: socket.socket, cantidad: int) -> bytes:
+        datos = b""
+        while len(datos) < cantidad:
+            parte = sock.recv(cantidad - len(datos))
+            if not parte:
+                raise ConnectionError("El cliente cerró la conexión")
+            datos += parte
+        with self._candado:
+            self.bytes_recibidos += len(datos)
+        return datos
+    
+    def _enviar(self, sock: socket.socket, oraciones: List[List[str]]) -> None:
+        """Envía la respuesta aplicando la latencia y, si toca, una retransmisión."""
+        datos = b"".join(b"".join(self._codificar_palabra(palabra) for palabra in oracion) + b"\x00"
+                         for oracion in oraciones)
+        demora = self.latencia
+        with self._candado:
+            self.bytes_enviados += len(datos)
+            if self.perdida and self._azar.random() < self.perdida:
+                self.retransmisiones += 1
+                demora += self.retransmision
+        if demora:
+            time.sleep(demora)
+        sock.sendall(datos)
+    
+    @staticmethod
+    def _codificar_palabra(palabra: str) -> bytes:
+        datos = palabra.encode("utf-8")
+        longitud = len(datos)
+        if longitud < 0x80:
+            prefijo = longitud.to_bytes(1, "big")
+        elif longitud < 0x4000:
+            prefijo = (longitud | 0x8000).to_bytes(2, "big")
+        elif longitud < 0x200000:
+            prefijo = (longitud | 0xC00000).to_bytes(3, "big")
+        else:
+            prefijo = (longitud | 0xE0000000).to_bytes(4, "big")
+        return prefijo + datos
@@ -0,0 +1,497 @@
+# src/infrastructure/network/sondeador.py
+"""
+Sondeador de conectividad en proceso.
+Envía y recibe sondas de eco ICMP desde un único socket (o conexiones TCP a la
+API de RouterOS como respaldo) sin lanzar el binario 'ping' del sistema, y
+multiplexa miles de sondas pendientes a la vez.
+"""
+import errno
+import ipaddress
+import itertools
+import os
+import selectors
+import socket
+import struct
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows no tiene límite de descriptores por proceso consultable
+    resource = None
+
+# Puerto por defecto de la API de RouterOS (el mismo que usa librouteros)
+PUERTO_API_ROUTEROS = 8728
+
+# Conexiones TCP abiertas a la vez como máximo: cada una ocupa un descriptor y
+# DefaultSelector en Windows es select(), limitado a 512 sockets
+MAX_CONEXIONES_TCP = 256
+# Descriptores que se dejan libres para el resto del proceso (base, logs, API)
+MARGEN_DESCRIPTORES = 64
+
+# Tipos de mensaje ICMP que nos interesan
+ICMP_ECHO_REPLY = 0
+ICMP_DESTINO_INALCANZABLE = 3
+ICMP_ECHO_REQUEST = 8
+
+# Clases de error que puede devolver una sonda
+ERROR_TIMEOUT = "timeout"
+ERROR_INALCANZABLE = "inalcanzable"
+ERROR_PERMISO = "permiso"
+ERROR_DIRECCION_INVALIDA = "direccion_invalida"
+ERROR_DESCONOCIDO = "error"
+
+_ERRNO_INALCANZABLE = {errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN, errno.ENETDOWN}
+_ERRNO_PERMISO = {errno.EACCES, errno.EPERM}
+_ERRNO_SIN_DESCRIPTORES = {errno.EMFILE, errno.ENFILE}
+
+# Identificadores ICMP distintos para cada socket raw del proceso
+_contador_identificador = itertools.count(os.getpid() & 0xFFFF)
+
+
+@dataclass
+class ResultadoSondeo:
+    """Resultado estructurado de sondear una IP."""
+    
+    ip: str
+    enviados: int = 0
+    recibidos: int = 0
+    rtts_ms: List[float] = field(default_factory=list)
+    error: Optional[str] = None  # Clase del último error si no hubo respuesta
+    metodo: str = ""  # "icmp" o "tcp"
+    
+    @property
+    def disponible(self) -> bool:
+        """True si respondió al menos una sonda."""
+        return self.recibidos > 0
+    
+    @property
+    def perdida(self) -> float:
+        """Fracción de sondas perdidas (0.0 a 1.0)."""
+        if not self.enviados:
+            return 1.0
+        return 1 - self.recibidos / self.enviados
+    
+    @property
+    def rtt_ms(self) -> Optional[float]:
+        """RTT promedio en milisegundos, o None si no hubo respuesta."""
+        if not self.rtts_ms:
+            return None
+        return sum(self.rtts_ms) / len(self.rtts_ms)
+    
+    def como_dict(self) -> dict:
+        """Devuelve el resultado como diccionario (útil para vistas y logs)."""
+        return {
+            "ip": self.ip,
+            "disponible": self.disponible,
+            "rtt_ms": round(self.rtt_ms, 2) if self.rtt_ms is not None else None,
+            "perdida": round(self.perdida, 3),
+            "enviados": self.enviados,
+            "recibidos": self.recibidos,
+            "error": None if self.disponible else self.error,
+            "metodo": self.metodo
+        }
+
+
+class Sondeador:
+    """
+    Sondea la conectividad de muchas IPs a la vez desde un solo hilo.
+    
+    Modos:
+        "auto": ICMP datagrama sin privilegios, luego ICMP raw y, si ninguno está
+                permitido por el sistema, conexión TCP al puerto de la API.
+        "icmp": Solo ICMP (datagrama o raw).
+        "tcp":  Solo conexión TCP al puerto indicado.
+    """
+    
+    def __init__(self, timeout: float = 3.0, modo: str = "auto",
+                 puerto_tcp: int = PUERTO_API_ROUTEROS, max_pendientes: int = 1024,
+                 max_por_subred: Optional[int] = None):
+        """
+        Constructor del sondeador.
+        
+        Args:
+            timeout: Segundos que se espera la respuesta de cada sonda
+            modo: "auto", "icmp" o "tcp"
+            puerto_tcp: Puerto usado por el modo TCP
+            max_pendientes: Sondas en vuelo simultáneamente
+            max_por_subred: Sondas simultáneas por subred /24 (None = sin límite)
+        """
+        if modo not in ("auto", "icmp", "tcp"):
+            raise ValueError(f"Modo de sondeo inválido: '{modo}'")
+        
+        self.timeout = timeout
+        self.modo = modo
+        self.puerto_tcp = puerto_tcp
+        self.max_pendientes = max_pendientes
+        self.max_por_subred = max_por_subred
+    
+    # === API PÚBLICA ===
+    
+    def sondear(self, ip: str, intentos: int = 1) -> ResultadoSondeo:
+        """
+        Sondea una sola IP.
+        
+        Args:
+            ip: Dirección IP a sondear
+            intentos: Número de sondas a enviar
+            
+        Returns:
+            ResultadoSondeo: RTT, pérdida y clase de error
+        """
+        return self.sondear_multiples([ip], intentos)[ip]
+    
+    def sondear_multiples(self, ips: Iterable[str], intentos: int = 1,
+                          max_pendientes: Optional[int] = None) -> Dict[str, ResultadoSondeo]:
+        """
+        Sondea varias IPs multiplexando todas las sondas sobre un mismo socket.
+        
+        Args:
+            ips: Direcciones IP a sondear (las repetidas se sondean una vez)
+            intentos: Sondas por IP; cada ronda empieza cuando termina la anterior
+            max_pendientes: Sondas en vuelo simultáneamente (por defecto self.max_pendientes)
+            
+        Returns:
+            Dict[str, ResultadoSondeo]: Resultado por IP
+        """
+        resultados = {ip: ResultadoSondeo(ip=ip) for ip in dict.fromkeys(ips)}
+        ventana = max(1, max_pendientes or self.max_pendientes)
+        
+        # Descartar direcciones mal formadas antes de tocar la red
+        validas = []
+        for ip, resultado in resultados.items():
+            if self._es_ipv4(ip):
+                validas.append(ip)
+            else:
+                resultado.error = ERROR_DIRECCION_INVALIDA
+        
+        if not validas:
+            return resultados
+        
+        sock_icmp = self._abrir_socket_icmp() if self.modo != "tcp" else None
+        if sock_icmp is None and self.modo == "icmp":
+            for ip in validas:
+                resultados[ip].error = ERROR_PERMISO
+            return resultados
+        
+        try:
+            for _ in range(max(1, intentos)):
+                respuestas = {}
+                for tanda in self._tandas_por_subred(validas, self.max_por_subred):
+                    if sock_icmp is not None:
+                        respuestas.update(self._ronda_icmp(sock_icmp, tanda, ventana))
+                        metodo = "icmp"
+                    else:
+                        respuestas.update(self._ronda_tcp(tanda, ventana))
+                        metodo = "tcp"
+                
+                for ip, respuesta in respuestas.items():
+                    resultado = resultados[ip]
+                    resultado.metodo = metodo
+                    resultado.enviados += 1
+                    if isinstance(respuesta, float):
+                        resultado.recibidos += 1
+                        resultado.rtts_ms.append(respuesta)
+                    else:
+                        resultado.error = respuesta
+        finally:
+            if sock_icmp is not None:
+                sock_icmp[0].close()
+        
+        return resultados
+    
+    # === ICMP ===
+    
+    def _abrir_socket_icmp(self):
+        """
+        Abre el socket ICMP más barato que permita el sistema.
+        
+        Returns:
+            Tuple[socket, bool] | None: (socket, es_raw) o None si no hay permisos
+        """
+        for tipo, es_raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+            try:
+                sock = socket.socket(socket.AF_INET, tipo, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            sock.setblocking(False)
+            return sock, es_raw
+        return None
+    
+    def _ronda_icmp(self, sock_icmp, ips: List[str], ventana: int) -> Dict[str, Union[float, str]]:
+        """
+        Envía un eco ICMP a cada IP y recoge las respuestas.
+        
+        Returns:
+            Dict[str, float | str]: RTT en ms por IP, o la clase de error
+        """
+        sock, es_raw = sock_icmp
+        # Con sockets datagrama el kernel reescribe el identificador con el puerto local
+        identificador = next(_contador_identificador) & 0xFFFF
+        respuestas: Dict[str, Union[float, str]] = {}
+        pendientes: "OrderedDict[int, tuple]" = OrderedDict()  # seq -> (ip, envío, límite)
+        por_enviar = iter(enumerate(ips))
+        siguiente = next(por_enviar, None)
+        
+        try:
+            selector = selectors.DefaultSelector()
+        except OSError as e:
+            # Sin descriptor libre para el selector no se puede esperar ninguna respuesta
+            return {ip: self._clasificar_errno(e.errno) for ip in ips}
+        selector.register(sock, selectors.EVENT_READ)
+        try:
+            while siguiente is not None or pendientes:
+                # Llenar la ventana de sondas en vuelo
+                bloqueado = False
+                while siguiente is not None and len(pendientes) < ventana:
+                    indice, ip = siguiente
+                    seq = indice & 0xFFFF
+                    if seq in pendientes:
+                        bloqueado = True  # Se agotó el espacio de secuencias: esperar respuestas
+                        break
+                    paquete = self._construir_eco(identificador, seq)
+                    try:
+                        sock.sendto(paquete, (ip, 0))
+                    except BlockingIOError:
+                        bloqueado = True  # Buffer de envío lleno: esperar un poco
+                        break
+                    except OSError as e:
+                        respuestas[ip] = self._clasificar_errno(e.errno)
+                    else:
+                        envio = time.perf_counter()
+                        pendientes[seq] = (ip, envio, envio + self.timeout)
+                    siguiente = next(por_enviar, None)
+                
+                if not pendientes:
+                    if bloqueado:
+                        # Buffer de envío lleno y nada en vuelo: esperar antes de reintentar
+                        time.sleep(0.01)
+                    continue
+                
+                # Esperar hasta la primera expiración (o nada si queda ventana libre)
+                limite_mas_cercano = next(iter(pendientes.values()))[2]
+                espera = max(0.0, limite_mas_cercano - time.perf_counter())
+                if siguiente is not None and len(pendientes) < ventana:
+                    espera = min(espera, 0.01) if bloqueado else 0.0
+                
+                if selector.select(espera):
+                    self._leer_respuestas_icmp(sock, es_raw, identificador, pendientes, respuestas)
+                
+                # Expirar las sondas sin respuesta (están ordenadas por límite)
+                ahora = time.perf_counter()
+                while pendientes:
+                    seq, (ip, _, limite) = next(iter(pendientes.items()))
+                    if limite > ahora:
+                        break
+                    del pendientes[seq]
+                    respuestas[ip] = ERROR_TIMEOUT
+        finally:
+            selector.close()
+        
+        return respuestas
+    
+    def _leer_respuestas_icmp(self, sock, es_raw: bool, identificador: int,
+                              pendientes: "OrderedDict[int, tuple]",
+                              respuestas: Dict[str, Union[float, str]]) -> None:
+        """Lee todos los paquetes disponibles y los asocia a sus sondas."""
+        while True:
+            try:
+                datos, (origen, _) = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # Errores ICMP encolados en sockets datagrama: la sonda expirará sola
+                continue
+            
+            recepcion = time.perf_counter()
+            if es_raw:
+                datos = datos[(datos[0] & 0x0F) * 4:]  # Saltar la cabecera IP
+            if len(datos) < 8:
+                continue
+            
+            tipo, _, _, ident, seq = struct.unpack("!BBHHH", datos[:8])
+            
+            if tipo == ICMP_DESTINO_INALCANZABLE and es_raw and len(datos) >= 36:
+                # El error incluye la cabecera IP y 8 bytes de nuestra sonda original
+                interno = datos[8:]
+                interno = interno[(interno[0] & 0x0F) * 4:]
+                tipo_original, _, _, ident, seq = struct.unpack("!BBHHH", interno[:8])
+                if tipo_original != ICMP_ECHO_REQUEST or ident != identificador:
+                    continue
+                sonda = pendientes.pop(seq, None)
+                if sonda:
+                    respuestas[sonda[0]] = ERROR_INALCANZABLE
+                continue
+            
+            if tipo != ICMP_ECHO_REPLY or (es_raw and ident != identificador):
+                continue
+            
+            sonda = pendientes.get(seq)
+            if sonda and sonda[0] == origen:
+                del pendientes[seq]
+                respuestas[origen] = (recepcion - sonda[1]) * 1000
+    
+    @staticmethod
+    def _construir_eco(identificador: int, seq: int) -> bytes:
+        """Construye un paquete ICMP echo request con su checksum."""
+        carga = struct.pack("!d", time.time()) + b"mikrotik-sondeo!"
+        cabecera = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identificador, seq)
+        checksum = Sondeador._checksum(cabecera + carga)
+        return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identificador, seq) + carga
+    
+    @staticmethod
+    def _checksum(datos: bytes) -> int:
+        """Checksum de Internet (RFC 1071)."""
+        if len(datos) % 2:
+            datos += b"\x00"
+        total = sum(struct.unpack(f"!{len(datos) // 2}H", datos))
+        total = (total >> 16) + (total & 0xFFFF)
+        total += total >> 16
+        return ~total & 0xFFFF
+    
+    # === TCP (RESPALDO) ===
+    
+    def _ronda_tcp(self, ips: List[str], ventana: int) -> Dict[str, Union[float, str]]:
+        """
+        Abre una conexión TCP no bloqueante al puerto de la API por cada IP.
+        Un SYN/ACK o un RST cuentan como respuesta: ambos prueban que el equipo está vivo.
+        
+        Cada conexión pendiente ocupa un descriptor, así que la ventana se limita
+        con _ventana_tcp_maxima() y se achica si aun así se agotan los descriptores.
+        
+        Returns:
+            Dict[str, float | str]: RTT en ms por IP, o la clase de error
+        """
+        respuestas: Dict[str, Union[float, str]] = {}
+        pendientes: "OrderedDict[socket.socket, tuple]" = OrderedDict()  # sock -> (ip, envío, límite)
+        por_enviar = deque(ips)
+        ventana = min(ventana, self._ventana_tcp_maxima())
+        
+        try:
+            selector = selectors.DefaultSelector()
+        except OSError as e:
+            return {ip: self._clasificar_errno(e.errno) for ip in ips}
+        try:
+            while por_enviar or pendientes:
+                while por_enviar and len(pendientes) < ventana:
+                    ip = por_enviar.popleft()
+                    try:
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    except OSError as e:
+                        if e.errno in _ERRNO_SIN_DESCRIPTORES and pendientes:
+                            # Sin descriptores libres: achicar la ventana y reintentar la IP
+                            # cuando se cierre alguna de las conexiones en vuelo
+                            ventana = len(pendientes)
+                            por_enviar.appendleft(ip)
+                            break
+                        respuestas[ip] = self._clasificar_errno(e.errno)
+                        continue
+                    sock.setblocking(False)
+                    envio = time.perf_counter()
+                    try:
+                        codigo = sock.connect_ex((ip, self.puerto_tcp))
+                    except OSError as e:
+                        codigo = e.errno
+                    if codigo in (errno.EINPROGRESS, errno.EWOULDBLOCK, 0, errno.ECONNREFUSED):
+                        if codigo in (0, errno.ECONNREFUSED):
+                            respuestas[ip] = (time.perf_counter() - envio) * 1000
+                            sock.close()
+                            continue
+                        pendientes[sock] = (ip, envio, envio + self.timeout)
+                        selector.register(sock, selectors.EVENT_WRITE)
+                    else:
+                        respuestas[ip] = self._clasificar_errno(codigo)
+                        sock.close()
+                
+                if not pendientes:
+                    continue
+                
+                limite_mas_cercano = next(iter(pendientes.values()))[2]
+                espera = max(0.0, limite_mas_cercano - time.perf_counter())
+                if por_enviar and len(pendientes) < ventana:
+                    espera = 0.0
+                
+                for clave, _ in selector.select(espera):
+                    sock = clave.fileobj
+                    ip, envio, _ = pendientes.pop(sock)
+                    codigo = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if codigo in (0, errno.ECONNREFUSED):
+                        respuestas[ip] = (time.perf_counter() - envio) * 1000
+                    else:
+                        respuestas[ip] = self._clasificar_errno(codigo)
+                    selector.unregister(sock)
+                    sock.close()
+                
+                ahora = time.perf_counter()
+                while pendientes:
+                    sock, (ip, _, limite) = next(iter(pendientes.items()))
+                    if limite > ahora:
+                        break
+                    del pendientes[sock]
+                    selector.unregister(sock)
+                    sock.close()
+                    respuestas[ip] = ERROR_TIMEOUT
+        finally:
+            for sock in pendientes:
+                sock.close()
+            selector.close()
+        
+        return respuestas
+    
+    @staticmethod
+    def _ventana_tcp_maxima() -> int:
+        """
+        Conexiones TCP que se pueden tener en vuelo sin agotar los descriptores
+        del proceso: como mucho MAX_CONEXIONES_TCP, y dejando MARGEN_DESCRIPTORES
+        libres por debajo de RLIMIT_NOFILE donde el sistema lo expone.
+        """
+        maximo = MAX_CONEXIONES_TCP
+        if resource is not None:
+            limite, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if limite != resource.RLIM_INFINITY:
+                maximo = min(maximo, limite - MARGEN_DESCRIPTORES)
+        return max(1, maximo)
+    
+    # === UTILIDADES ===
+    
+    @staticmethod
+    def _tandas_por_subred(ips: List[str], max_por_subred: Optional[int]) -> List[List[str]]:
+        """
+        Reparte las IPs en tandas con como mucho 'max_por_subred' IPs de cada /24.
+        Las tandas se sondean una tras otra, así que ninguna subred recibe más de
+        'max_por_subred' sondas a la vez (por ejemplo, detrás de un enlace lento).
+        """
+        if not max_por_subred:
+            return [ips]
+        
+        tandas: List[List[str]] = []
+        usados: Dict[str, int] = {}
+        for ip in ips:
+            subred = ip.rsplit(".", 1)[0]
+            indice = usados.get(subred, 0) // max_por_subred
+            usados[subred] = usados.get(subred, 0) + 1
+            if indice == len(tandas):
+                tandas.append([])
+            tandas[indice].append(ip)
+        return tandas
+    
+    @staticmethod
+    def _es_ipv4(ip: str) -> bool:
+        """Verifica que la cadena sea una dirección IPv4."""
+        try:
+            return isinstance(ipaddress.ip_address(ip), ipaddress.IPv4Address)
+        except ValueError:
+            return False
+    
+    @staticmethod
+    def _clasificar_errno(codigo: Optional[int]) -> str:
+        """Traduce un código errno a una clase de error de sondeo."""
+        if codigo in _ERRNO_INALCANZABLE:
+            return ERROR_INALCANZABLE
+        if codigo in _ERRNO_PERMISO:
+            return ERROR_PERMISO
+        if codigo in (errno.ETIMEDOUT,):
+            return ERROR_TIMEOUT
+        return ERROR_DESCONOCIDO
@@ -3,12 +3,16 @@
 Inicialización del módulo de repositorios.
 Este archivo facilita la importación y exposición de todos los repositorios.
 """
+from infrastructure.repositories.sqlalchemy_repository import Pagina
 from infrastructure.repositories.nodo_ipran_repository import NodoIPRANRepository
 from infrastructure.repositories.nodo_gpon_repository import NodoGPONRepository
 from infrastructure.repositories.usuario_repository import UsuarioRepository
 from infrastructure.repositories.correo_cliente_repository import CorreoClienteRepository
 from infrastructure.repositories.documento_repository import DocumentoRepository
 from infrastructure.repositories.mikrotik_repository import MikroTikRepository  # ← NUEVO: Agregamos MikroTikRepository
+from infrastructure.repositories.historial_disponibilidad_repository import HistorialDisponibilidadRepository
+from infrastructure.repositories.estado_sondeo_repository import EstadoSondeoRepository
+from infrastructure.repositories.respaldo_configuracion_repository import RespaldoConfiguracionRepository
 
 # Exportamos todos los repositorios para facilitar su importación desde otros módulos
 __all__ = [
@@ -17,5 +21,9 @@ __all__ = [
     'UsuarioRepository', 
     'CorreoClienteRepository', 
     'DocumentoRepository',
-    'MikroTikRepository'  # ← NUEVO: Agregamos a la lista de exportación
+    'MikroTikRepository',  # ← NUEVO: Agregamos a la lista de exportación
+    'HistorialDisponibilidadRepository',
+    'EstadoSondeoRepository',
+    'RespaldoConfiguracionRepository',
+    'Pagina'
 ]
\ No newline at end of file
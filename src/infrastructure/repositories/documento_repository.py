@@ -3,10 +3,51 @@
 Repositorio para el modelo Documento.
 Este repositorio maneja todas las operaciones de base de datos para los documentos.
 """
-from typing import List, Optional
-from domain.models.documento import Documento
+import datetime
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, column, func, literal, select, table, text, update
+from sqlalchemy.engine import Connection, Row
+from domain.models.documento import Documento, COLUMNAS_BUSQUEDA, SENTENCIAS_BUSQUEDA, valores_busqueda
 from infrastructure.repositories.sqlalchemy_repository import SQLAlchemyRepository
 
+# Tabla virtual FTS5 de documentos (se une a documentos por rowid = id)
+documentos_fts = table("documentos_fts", column("rowid"))
+
+# Referencias al almacén de imágenes dentro de contenido_json
+PATRON_REFERENCIA_BLOB = re.compile(r"blob:([0-9a-f]{64})")
+
+# Peso de cada columna de COLUMNAS_BUSQUEDA en el ranking bm25 (coincidir en el
+# ID o el nombre del cliente pesa más que en el contenido del documento)
+PESOS_BUSQUEDA = {
+    "titulo": 4.0,
+    "cliente_id": 10.0,
+    "cliente_nombre": 6.0,
+    "cliente_direccion": 2.0,
+    "ingeniero": 3.0,
+    "tipo_transaccion": 2.0,
+    "tipo_topologia": 2.0,
+    "contenido": 1.0
+}
+ORDEN_RELEVANCIA = text(
+    f"bm25(documentos_fts, {', '.join(str(PESOS_BUSQUEDA[columna]) for columna in COLUMNAS_BUSQUEDA)})"
+)
+
+
+def consulta_por_prefijos(texto: str) -> str:
+    """
+    Convierte lo que escribe el usuario en una consulta FTS5 en la que cada palabra
+    debe aparecer como prefijo ("juan per" encuentra "Juan Pérez").
+    
+    Args:
+        texto: Texto libre
+        
+    Returns:
+        str: Consulta FTS5 (vacía si el texto no tiene palabras)
+    """
+    return " ".join(f'"{palabra}"*' for palabra in re.findall(r"\w+", texto))
+
 class DocumentoRepository(SQLAlchemyRepository[Documento]):
     """Repositorio para manejar operaciones CRUD de documentos."""
     
@@ -15,6 +56,23 @@ class DocumentoRepository(SQLAlchemyRepository[Documento]):
         # Llamamos al constructor padre pasando la clase del modelo
         super().__init__(Documento)
     
+    def get_listado(self) -> List[Row]:
+        """
+        Obtiene solo las columnas que muestra la lista de documentos, sin
+        construir objetos Documento ni leer su contenido JSON.
+        
+        Returns:
+            List[Row]: Filas con id, fecha_creacion, cliente_id, cliente_nombre y tipo_transaccion
+        """
+        with self._get_db() as db:
+            return db.query(
+                Documento.id,
+                Documento.fecha_creacion,
+                Documento.cliente_id,
+                Documento.cliente_nombre,
+                Documento.tipo_transaccion
+            ).order_by(Documento.id).all()
+    
     def get_by_cliente_id(self, cliente_id: str) -> List[Documento]:
         """
         Obtiene todos los documentos de un cliente específico.
@@ -54,18 +112,27 @@ class DocumentoRepository(SQLAlchemyRepository[Documento]):
         """
         Obtiene todos los documentos creados por un ingeniero específico.
         
+        Busca en la columna ingeniero del índice FTS5: cada palabra del nombre
+        cuenta como prefijo, sin distinguir mayúsculas ni acentos ("ana gom"
+        encuentra "Ana Gómez"). Un ILIKE '%texto%' no puede usar índices.
+        
         Args:
             ingeniero: Nombre del ingeniero
             
         Returns:
             List[Documento]: Lista de documentos del ingeniero
         """
+        consulta = consulta_por_prefijos(ingeniero)
+        if not consulta:
+            return []
         with self._get_db() as db:
-            return db.query(Documento).filter(
-                Documento.ingeniero.ilike(f"%{ingeniero}%")  # ilike = búsqueda insensible a mayúsculas
+            return db.query(Documento).join(
+                documentos_fts, documentos_fts.c.rowid == Documento.id
+            ).filter(
+                text("documentos_fts MATCH :consulta")
             ).order_by(
                 Documento.fecha_creacion.desc()
-            ).all()
+            ).params(consulta=f"ingeniero : ({consulta})").all()
     
     def get_by_nodo_id(self, nodo_id: int) -> List[Documento]:
         """
@@ -86,32 +153,218 @@ class DocumentoRepository(SQLAlchemyRepository[Documento]):
     
     def search_by_text(self, search_text: str) -> List[Documento]:
         """
-        Busca documentos que contengan el texto especificado en varios campos.
+        Busca documentos cuyo texto (datos del cliente, ingeniero, topología o
+        contenido) contenga todas las palabras indicadas, como prefijos.
         
         Args:
             search_text: Texto a buscar
             
         Returns:
-            List[Documento]: Lista de documentos que contienen el texto
+            List[Documento]: Documentos encontrados, del más relevante al menos relevante
         """
+        consulta = consulta_por_prefijos(search_text)
+        if not consulta:
+            return []
         with self._get_db() as db:
-            # Convertir el texto de búsqueda a minúsculas para búsqueda insensible a mayúsculas
-            search_pattern = f"%{search_text.lower()}%"
+            return db.query(Documento).join(
+                documentos_fts, documentos_fts.c.rowid == Documento.id
+            ).filter(
+                text("documentos_fts MATCH :consulta")
+            ).order_by(ORDEN_RELEVANCIA).params(consulta=consulta).all()
+    
+    def buscar_texto(self, consulta: str, limite: int = 200) -> List[Row]:
+        """
+        Busca en el índice FTS5 de documentos y devuelve las filas del listado.
+        
+        Args:
+            consulta: Consulta en sintaxis de FTS5 (palabras, "frases", prefijo*, OR, NOT, columna:)
+            limite: Máximo de documentos a devolver
             
-            return db.query(Documento).filter(
-                # Buscar en múltiples campos usando OR
-                db.or_(
-                    Documento.titulo.ilike(search_pattern),          # En el título
-                    Documento.cliente_id.ilike(search_pattern),      # En el ID del cliente
-                    Documento.cliente_nombre.ilike(search_pattern),  # En el nombre del cliente
-                    Documento.cliente_direccion.ilike(search_pattern), # En la dirección
-                    Documento.ingeniero.ilike(search_pattern),       # En el nombre del ingeniero
-                    Documento.tipo_transaccion.ilike(search_pattern), # En el tipo de transacción
-                    Documento.tipo_topologia.ilike(search_pattern)   # En el tipo de topología
-                )
-            ).order_by(
-                Documento.fecha_creacion.desc()
+        Returns:
+            List[Row]: Filas con id, fecha_creacion, cliente_id, cliente_nombre y
+            tipo_transaccion, ordenadas por relevancia (bm25 con PESOS_BUSQUEDA)
+        """
+        with self._get_db() as db:
+            return db.query(
+                Documento.id,
+                Documento.fecha_creacion,
+                Documento.cliente_id,
+                Documento.cliente_nombre,
+                Documento.tipo_transaccion
+            ).join(
+                documentos_fts, documentos_fts.c.rowid == Documento.id
+            ).filter(
+                text("documentos_fts MATCH :consulta")
+            ).order_by(ORDEN_RELEVANCIA).limit(limite).params(consulta=consulta).all()
+    
+    def asegurar_indice_texto(self) -> int:
+        """
+        Crea el índice FTS5 y sus triggers si la base es anterior a ellos, e indexa
+        los documentos que falten.
+        
+        Returns:
+            int: Número de documentos agregados al índice
+        """
+        with self._get_db() as db:
+            for sentencia in SENTENCIAS_BUSQUEDA:
+                db.execute(text(sentencia))
+            resultado = db.execute(text(
+                f"INSERT INTO documentos_fts(rowid, {', '.join(COLUMNAS_BUSQUEDA)}) "
+                f"SELECT {valores_busqueda('d')} FROM documentos d "
+                "WHERE d.id NOT IN (SELECT rowid FROM documentos_fts)"
+            ))
+            db.commit()
+            return resultado.rowcount
+    
+    def reescribir_contenidos(self, convertir: Callable[[Any], Tuple[Any, int]], lote: int = 200,
+                              conexion: Optional[Connection] = None) -> int:
+        """
+        Aplica una conversión al contenido JSON de todos los documentos y guarda
+        los que cambian. Recorre por lotes de ID para no cargar toda la tabla.
+        
+        Args:
+            convertir: Recibe el contenido decodificado y devuelve (contenido, cantidad de cambios)
+            lote: Documentos por lote
+            conexion: Conexión a usar (p. ej. la de una migración de Alembic); por
+                defecto una sesión propia que se confirma al terminar
+            
+        Returns:
+            int: Número de documentos modificados
+        """
+        if conexion is None:
+            with self._get_db() as db:
+                modificados = self.reescribir_contenidos(convertir, lote, db.connection())
+                db.commit()
+                return modificados
+        
+        documentos = Documento.__table__
+        actualizar = update(documentos).where(
+            documentos.c.id == bindparam("id_documento")
+        ).values(contenido_json=bindparam("contenido"))
+        modificados, ultimo_id = 0, 0
+        while True:
+            filas = conexion.execute(
+                select(documentos.c.id, documentos.c.contenido_json).where(
+                    documentos.c.id > ultimo_id, documentos.c.contenido_json.isnot(None)
+                ).order_by(documentos.c.id).limit(lote)
             ).all()
+            if not filas:
+                return modificados
+            ultimo_id = filas[-1].id
+            
+            cambios = []
+            for fila in filas:
+                try:
+                    contenido = json.loads(fila.contenido_json)
+                except ValueError:
+                    continue  # JSON inválido: se deja como está
+                contenido, cantidad = convertir(contenido)
+                if cantidad:
+                    cambios.append({"id_documento": fila.id, "contenido": json.dumps(contenido)})
+            if cambios:
+                conexion.execute(actualizar, cambios)
+                modificados += len(cambios)
+    
+    def get_referencias_blob(self) -> Set[str]:
+        """
+        Obtiene los hashes de todas las imágenes del almacén que referencian los documentos.
+        
+        Returns:
+            Set[str]: Hashes SHA-256 (hex) referenciados
+        """
+        referencias = set()
+        for fila in self.iter_filtered(Documento.contenido_json.like("%blob:%"), batch_size=200,
+                                       columnas=[Documento.id, Documento.contenido_json]):
+            referencias.update(PATRON_REFERENCIA_BLOB.findall(fila.contenido_json))
+        return referencias
+    
+    def get_resumen(self, documento_id: int) -> Optional[Documento]:
+        """
+        Obtiene un documento sin su contenido JSON (a diferencia de get_by_id),
+        para mostrar sus datos generales.
+        
+        Args:
+            documento_id: ID del documento
+        
+        Returns:
+            Optional[Documento]: Documento con contenido_json sin cargar, o None si no existe
+        """
+        with self._get_db() as db:
+            return db.query(Documento).filter(Documento.id == documento_id).first()
+    
+    def get_secciones(self, documento_id: int, secciones: Iterable[str]) -> Dict[str, Any]:
+        """
+        Lee solo algunas claves de primer nivel de contenido_json. SQLite las
+        extrae con json_extract, así que el resto del JSON (textos largos,
+        referencias a imágenes) no llega a Python.
+        
+        Args:
+            documento_id: ID del documento
+            secciones: Claves de contenido_json a leer
+        
+        Returns:
+            Dict[str, Any]: Valor decodificado de cada sección presente (un
+                documento inexistente o con JSON inválido devuelve {})
+        """
+        secciones = list(secciones)
+        if not secciones:
+            return {}
+        columnas = []
+        for seccion in secciones:
+            ruta = literal("$." + json.dumps(seccion, ensure_ascii=False))
+            columnas += [func.json_type(Documento.contenido_json, ruta),
+                         func.json_extract(Documento.contenido_json, ruta)]
+        with self._get_db() as db:
+            fila = db.execute(select(*columnas).where(
+                Documento.id == documento_id, func.json_valid(Documento.contenido_json)
+            )).first()
+        if fila is None:
+            return {}
+        
+        valores = {}
+        for numero, seccion in enumerate(secciones):
+            tipo, valor = fila[2 * numero], fila[2 * numero + 1]
+            if tipo is None:
+                continue  # La sección no está en el documento
+            if tipo in ("object", "array"):
+                valor = json.loads(valor)
+            elif tipo in ("true", "false"):
+                valor = tipo == "true"
+            valores[seccion] = valor
+        return valores
+    
+    def get_ids_filtrados(self, fecha_inicio: Optional[datetime.datetime] = None,
+                          fecha_fin: Optional[datetime.datetime] = None, ingeniero: Optional[str] = None,
+                          tipo_transaccion: Optional[str] = None) -> List[int]:
+        """
+        Obtiene los IDs de los documentos que cumplen todos los filtros indicados
+        (los que son None no filtran), p. ej. para exportarlos en lote.
+        
+        Args:
+            fecha_inicio: Fecha de creación mínima (incluida)
+            fecha_fin: Fecha de creación máxima (incluida)
+            ingeniero: Nombre del ingeniero, con el mismo criterio que get_by_ingeniero
+            tipo_transaccion: UPGRADE, DOWNGRADE...
+        
+        Returns:
+            List[int]: IDs por fecha de creación y luego por ID
+        """
+        consulta = select(Documento.id)
+        if fecha_inicio is not None:
+            consulta = consulta.where(Documento.fecha_creacion >= fecha_inicio)
+        if fecha_fin is not None:
+            consulta = consulta.where(Documento.fecha_creacion <= fecha_fin)
+        if tipo_transaccion is not None:
+            consulta = consulta.where(Documento.tipo_transaccion == tipo_transaccion)
+        if ingeniero is not None:
+            prefijos = consulta_por_prefijos(ingeniero)
+            if not prefijos:
+                return []
+            consulta = consulta.join(documentos_fts, documentos_fts.c.rowid == Documento.id).where(
+                text("documentos_fts MATCH :consulta").bindparams(consulta=f"ingeniero : ({prefijos})")
+            )
+        with self._get_db() as db:
+            return list(db.execute(consulta.order_by(Documento.fecha_creacion, Documento.id)).scalars())
     
     def get_recent_documents(self, limit: int = 10) -> List[Documento]:
         """
@@ -123,10 +376,7 @@ class DocumentoRepository(SQLAlchemyRepository[Documento]):
         Returns:
             List[Documento]: Lista de documentos más recientes
         """
-        with self._get_db() as db:
-            return db.query(Documento).order_by(
-                Documento.fecha_creacion.desc()
-            ).limit(limit).all()
+        return self.get_page(limite=limit, orden="fecha_creacion", descendente=True).elementos
     
     def get_documents_by_date_range(self, fecha_inicio, fecha_fin) -> List[Documento]:
         """
@@ -158,7 +408,7 @@ class DocumentoRepository(SQLAlchemyRepository[Documento]):
             # Hacer una consulta agrupada para contar por tipo
             results = db.query(
                 Documento.tipo_transaccion,
-                db.func.count(Documento.id).label('count')
+                func.count(Documento.id).label('count')
             ).group_by(
                 Documento.tipo_transaccion
             ).all()
@@ -0,0 +1,78 @@
+# src/infrastructure/repositories/estado_sondeo_repository.py
+"""
+Repositorio para el modelo EstadoSondeo.
+"""
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, delete
+from domain.models.estado_sondeo import EstadoSondeo
+from infrastructure.network.sondeador import ResultadoSondeo
+from infrastructure.repositories.sqlalchemy_repository import SQLAlchemyRepository
+
+class EstadoSondeoRepository(SQLAlchemyRepository[EstadoSondeo]):
+    """Repositorio para guardar y consultar el último estado de sondeo de los equipos."""
+    
+    def __init__(self):
+        """Constructor del repositorio."""
+        super().__init__(EstadoSondeo)
+    
+    def guardar_resultados(self, tipo: str, resultados: Dict[int, ResultadoSondeo],
+                           fecha: Optional[datetime.datetime] = None) -> None:
+        """
+        Guarda el resultado de un barrido reemplazando el estado anterior, en una sola transacción.
+        
+        Args:
+            tipo: Tipo de equipo ("ipran" o "gpon")
+            resultados: Diccionario {id_equipo: ResultadoSondeo}
+            fecha: Momento del barrido (por defecto, ahora)
+        """
+        if not resultados:
+            return
+        
+        fecha = fecha or datetime.datetime.now()
+        filas = [
+            {
+                "tipo": tipo,
+                "equipo_id": equipo_id,
+                "ip": resultado.ip,
+                "disponible": resultado.disponible,
+                "rtt_ms": resultado.rtt_ms,
+                "perdida": resultado.perdida,
+                "error": None if resultado.disponible else resultado.error,
+                "fecha_sondeo": fecha
+            }
+            for equipo_id, resultado in resultados.items()
+        ]
+        
+        with self._get_db() as db:
+            db.execute(insert(EstadoSondeo).prefix_with("OR REPLACE"), filas)
+            db.commit()
+    
+    def get_por_tipo(self, tipo: str) -> Dict[int, EstadoSondeo]:
+        """
+        Obtiene el último estado de todos los equipos de un tipo.
+        
+        Args:
+            tipo: Tipo de equipo
+        
+        Returns:
+            Dict[int, EstadoSondeo]: Diccionario {id_equipo: estado}
+        """
+        with self._get_db() as db:
+            estados: List[EstadoSondeo] = db.query(EstadoSondeo).filter(EstadoSondeo.tipo == tipo).all()
+            return {estado.equipo_id: estado for estado in estados}
+    
+    def eliminar_equipo(self, tipo: str, equipo_id: int) -> None:
+        """
+        Elimina el estado de un equipo (por ejemplo, al eliminar el equipo).
+        
+        Args:
+            tipo: Tipo de equipo
+            equipo_id: ID del equipo
+        """
+        with self._get_db() as db:
+            db.execute(delete(EstadoSondeo).where(
+                EstadoSondeo.tipo == tipo, EstadoSondeo.equipo_id == equipo_id
+            ))
+            db.commit()
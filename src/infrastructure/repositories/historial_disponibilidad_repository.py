@@ -0,0 +1,209 @@
+# src/infrastructure/repositories/historial_disponibilidad_repository.py
+"""
+Repositorio para el historial de disponibilidad de MikroTiks.
+Este repositorio maneja la serie temporal de sondeos y sus consolidaciones.
+"""
+from typing import List, Optional, Dict, Any
+from sqlalchemy import func, insert, delete
+from domain.models.historial_disponibilidad import SondeoMikroTik, ResumenDisponibilidad
+from infrastructure.repositories.sqlalchemy_repository import SQLAlchemyRepository
+
+class HistorialDisponibilidadRepository(SQLAlchemyRepository[SondeoMikroTik]):
+    """Repositorio para guardar y consultar sondeos y resúmenes de disponibilidad."""
+    
+    def __init__(self):
+        """Constructor del repositorio."""
+        super().__init__(SondeoMikroTik)
+    
+    # === ESCRITURA ===
+    
+    def registrar_sondeos(self, sondeos: List[Dict[str, Any]]) -> None:
+        """
+        Inserta muchos sondeos en una sola transacción.
+        
+        Args:
+            sondeos: Lista de diccionarios con mikrotik_id, ts, rtt_ms y perdida
+        """
+        if not sondeos:
+            return
+        
+        with self._get_db() as db:
+            # OR REPLACE: un segundo sondeo del mismo equipo en el mismo segundo reemplaza al primero
+            db.execute(insert(SondeoMikroTik).prefix_with("OR REPLACE"), sondeos)
+            db.commit()
+    
+    def guardar_resumenes(self, resumenes: List[Dict[str, Any]]) -> None:
+        """
+        Inserta (o reemplaza) muchos resúmenes en una sola transacción.
+        
+        Args:
+            resumenes: Lista de diccionarios con las columnas de ResumenDisponibilidad
+        """
+        if not resumenes:
+            return
+        
+        with self._get_db() as db:
+            db.execute(insert(ResumenDisponibilidad).prefix_with("OR REPLACE"), resumenes)
+            db.commit()
+    
+    def eliminar_sondeos_anteriores(self, ts: int) -> int:
+        """
+        Elimina los sondeos anteriores a un momento dado.
+        
+        Args:
+            ts: Límite (epoch en segundos); se borra todo lo anterior
+        
+        Returns:
+            int: Número de filas eliminadas
+        """
+        with self._get_db() as db:
+            resultado = db.execute(delete(SondeoMikroTik).where(SondeoMikroTik.ts < ts))
+            db.commit()
+            return resultado.rowcount
+    
+    def eliminar_resumenes_anteriores(self, resolucion: int, ts: int) -> int:
+        """
+        Elimina los resúmenes de una resolución anteriores a un momento dado.
+        
+        Args:
+            resolucion: Resolución en segundos (300 o 3600)
+            ts: Límite (epoch en segundos); se borra todo lo anterior
+        
+        Returns:
+            int: Número de filas eliminadas
+        """
+        with self._get_db() as db:
+            resultado = db.execute(delete(ResumenDisponibilidad).where(
+                ResumenDisponibilidad.resolucion == resolucion,
+                ResumenDisponibilidad.ts < ts
+            ))
+            db.commit()
+            return resultado.rowcount
+    
+    def eliminar_por_mikrotik(self, mikrotik_id: int) -> None:
+        """
+        Elimina todo el historial de un MikroTik.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        """
+        with self._get_db() as db:
+            db.execute(delete(SondeoMikroTik).where(SondeoMikroTik.mikrotik_id == mikrotik_id))
+            db.execute(delete(ResumenDisponibilidad).where(ResumenDisponibilidad.mikrotik_id == mikrotik_id))
+            db.commit()
+    
+    # === CONSULTAS PARA CONSOLIDAR ===
+    
+    def primer_sondeo_desde(self, ts: int) -> Optional[int]:
+        """
+        Obtiene el momento del primer sondeo (de cualquier equipo) a partir de ts.
+        
+        Args:
+            ts: Momento inicial (epoch en segundos)
+        
+        Returns:
+            Optional[int]: Momento del primer sondeo o None si no hay
+        """
+        with self._get_db() as db:
+            return db.query(func.min(SondeoMikroTik.ts)).filter(SondeoMikroTik.ts >= ts).scalar()
+    
+    def primer_resumen_desde(self, resolucion: int, ts: int) -> Optional[int]:
+        """
+        Obtiene el inicio del primer resumen de una resolución a partir de ts.
+        
+        Args:
+            resolucion: Resolución en segundos
+            ts: Momento inicial (epoch en segundos)
+        
+        Returns:
+            Optional[int]: Inicio del primer resumen o None si no hay
+        """
+        with self._get_db() as db:
+            return db.query(func.min(ResumenDisponibilidad.ts)).filter(
+                ResumenDisponibilidad.resolucion == resolucion,
+                ResumenDisponibilidad.ts >= ts
+            ).scalar()
+    
+    def ultimo_resumen(self, resolucion: int) -> Optional[int]:
+        """
+        Obtiene el inicio del último intervalo consolidado de una resolución.
+        
+        Args:
+            resolucion: Resolución en segundos
+        
+        Returns:
+            Optional[int]: Inicio del último intervalo o None si no hay resúmenes
+        """
+        with self._get_db() as db:
+            return db.query(func.max(ResumenDisponibilidad.ts)).filter(
+                ResumenDisponibilidad.resolucion == resolucion
+            ).scalar()
+    
+    def get_sondeos_rango(self, desde: int, hasta: int) -> List[Any]:
+        """
+        Obtiene los sondeos de todos los equipos en un rango [desde, hasta).
+        
+        Returns:
+            List: Filas (mikrotik_id, ts, rtt_ms, perdida)
+        """
+        with self._get_db() as db:
+            return db.query(
+                SondeoMikroTik.mikrotik_id, SondeoMikroTik.ts,
+                SondeoMikroTik.rtt_ms, SondeoMikroTik.perdida
+            ).filter(
+                SondeoMikroTik.ts >= desde,
+                SondeoMikroTik.ts < hasta
+            ).all()
+    
+    def get_resumenes_rango(self, resolucion: int, desde: int, hasta: int) -> List[ResumenDisponibilidad]:
+        """
+        Obtiene los resúmenes de todos los equipos en un rango [desde, hasta).
+        
+        Returns:
+            List[ResumenDisponibilidad]: Resúmenes encontrados
+        """
+        with self._get_db() as db:
+            return db.query(ResumenDisponibilidad).filter(
+                ResumenDisponibilidad.resolucion == resolucion,
+                ResumenDisponibilidad.ts >= desde,
+                ResumenDisponibilidad.ts < hasta
+            ).all()
+    
+    # === CONSULTAS POR EQUIPO ===
+    
+    def get_sondeos_equipo(self, mikrotik_id: int, desde: int, hasta: int) -> List[Any]:
+        """
+        Obtiene los sondeos de un equipo en un rango [desde, hasta).
+        Recorre solo el tramo de la clave primaria (mikrotik_id, ts) del equipo.
+        
+        Returns:
+            List: Filas (ts, rtt_ms, perdida)
+        """
+        with self._get_db() as db:
+            return db.query(
+                SondeoMikroTik.ts, SondeoMikroTik.rtt_ms, SondeoMikroTik.perdida
+            ).filter(
+                SondeoMikroTik.mikrotik_id == mikrotik_id,
+                SondeoMikroTik.ts >= desde,
+                SondeoMikroTik.ts < hasta
+            ).all()
+    
+    def get_resumenes_equipo(self, resolucion: int, mikrotik_id: int,
+                             desde: int, hasta: int) -> List[Any]:
+        """
+        Obtiene los resúmenes de un equipo en un rango [desde, hasta).
+        
+        Returns:
+            List: Filas (muestras, exitosas, perdida_suma, rtt_min, rtt_max, histograma)
+        """
+        with self._get_db() as db:
+            return db.query(
+                ResumenDisponibilidad.muestras, ResumenDisponibilidad.exitosas,
+                ResumenDisponibilidad.perdida_suma, ResumenDisponibilidad.rtt_min,
+                ResumenDisponibilidad.rtt_max, ResumenDisponibilidad.histograma
+            ).filter(
+                ResumenDisponibilidad.resolucion == resolucion,
+                ResumenDisponibilidad.mikrotik_id == mikrotik_id,
+                ResumenDisponibilidad.ts >= desde,
+                ResumenDisponibilidad.ts < hasta
+            ).all()
@@ -3,10 +3,22 @@
 Repositorio para el modelo MikroTik.
 Este repositorio maneja todas las operaciones de base de datos para equipos MikroTik.
 """
-from typing import List, Optional
-from sqlalchemy import func, or_, and_  # ← ARREGLO: Importar func, or_, and_ directamente
-from domain.models.mikrotik import MikroTik
-from infrastructure.repositories.sqlalchemy_repository import SQLAlchemyRepository
+from typing import List, Optional, Dict
+from sqlalchemy import func, or_, and_, update, case  # ← ARREGLO: Importar func, or_, and_ directamente
+from sqlalchemy.engine import Row
+from domain.models.mikrotik import MikroTik, ESTADOS_BARRIDO
+from infrastructure.repositories.sqlalchemy_repository import SQLAlchemyRepository, Pagina
+
+# Columnas que muestran las listas de MikroTiks de la interfaz
+COLUMNAS_LISTADO = (
+    MikroTik.id,
+    MikroTik.nombre,
+    MikroTik.ip_mikrotik,
+    MikroTik.estado,
+    MikroTik.disponible,
+    MikroTik.modelo,
+    MikroTik.ubicacion
+)
 
 class MikroTikRepository(SQLAlchemyRepository[MikroTik]):
     """Repositorio para manejar operaciones CRUD de equipos MikroTik."""
@@ -18,6 +30,90 @@ class MikroTikRepository(SQLAlchemyRepository[MikroTik]):
     
     # === MÉTODOS DE BÚSQUEDA ESPECÍFICOS ===
     
+    def get_listado(self) -> List[Row]:
+        """
+        Obtiene solo las columnas que muestran las listas de la interfaz, sin
+        construir objetos MikroTik (ni cargar credenciales, notas o exports).
+        
+        Returns:
+            List[Row]: Filas con id, nombre, ip_mikrotik, estado, disponible, modelo y ubicacion
+        """
+        with self._get_db() as db:
+            return db.query(*COLUMNAS_LISTADO).order_by(MikroTik.id).all()
+    
+    def get_listado_pagina(self, cursor: Optional[tuple] = None, limite: int = 200,
+                           texto: Optional[str] = None, hacia_atras: bool = False,
+                           contar_total: bool = False) -> Pagina:
+        """
+        Obtiene una página del listado de MikroTiks (mismas columnas que get_listado),
+        ordenado por ID y opcionalmente filtrado por texto.
+        
+        Args:
+            cursor: Cursor de una página anterior (None = primera página)
+            limite: Tamaño de página
+            texto: Texto a buscar en nombre, IP, estado, modelo o ubicación
+            hacia_atras: Obtener la página anterior al cursor
+            contar_total: Calcular también el total de equipos que cumplen el filtro
+            
+        Returns:
+            Pagina: Filas del listado y cursores para seguir
+        """
+        filtros = []
+        if texto:
+            # Escapar los comodines de LIKE: "_", "%" y "\\" se buscan como texto literal
+            literal = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            patron = f"%{literal}%"
+            filtros.append(or_(
+                MikroTik.nombre.ilike(patron, escape="\\"),
+                MikroTik.ip_mikrotik.ilike(patron, escape="\\"),
+                MikroTik.estado.ilike(patron, escape="\\"),
+                MikroTik.modelo.ilike(patron, escape="\\"),
+                MikroTik.ubicacion.ilike(patron, escape="\\")
+            ))
+        return self.get_page(cursor=cursor, limite=limite, hacia_atras=hacia_atras,
+                             contar_total=contar_total, filtros=filtros, columnas=list(COLUMNAS_LISTADO))
+    
+    def get_lote_barrido(self, despues_de: int, limite: int) -> List[Row]:
+        """
+        Obtiene el siguiente lote de un barrido de conectividad: id, nombre e IP
+        de los MikroTiks activos o en error con ID mayor que 'despues_de'.
+        
+        Se avanza por ID y no por estado porque el barrido cambia el estado de
+        los equipos (activo <-> error): con el estado en la clave, un equipo que
+        cae a mitad del barrido volvería a aparecer en un lote posterior. likely()
+        le indica a SQLite que casi toda la flota cumple el filtro, así que recorre
+        la clave primaria desde el cursor en lugar de buscar por estado y ordenar
+        todas las filas que cumplen antes de devolver la primera.
+        
+        Args:
+            despues_de: ID del último equipo del lote anterior (0 = desde el principio)
+            limite: Tamaño del lote
+            
+        Returns:
+            List[Row]: Filas con id, nombre e ip_mikrotik, en orden de ID
+        """
+        with self._get_db() as db:
+            return db.query(MikroTik.id, MikroTik.nombre, MikroTik.ip_mikrotik).filter(
+                MikroTik.id > despues_de,
+                func.likely(MikroTik.estado.in_(ESTADOS_BARRIDO))
+            ).order_by(MikroTik.id).limit(limite).all()
+    
+    def get_credenciales(self, mikrotik_id: int) -> Optional[Row]:
+        """
+        Obtiene lo necesario para conectar a la API de un MikroTik, sin construir
+        el objeto ni cargar sus columnas pesadas (notas, exports).
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            
+        Returns:
+            Optional[Row]: Fila con id, ip_mikrotik, usuario_acceso y contrasena_acceso, o None
+        """
+        with self._get_db() as db:
+            return db.query(
+                MikroTik.id, MikroTik.ip_mikrotik, MikroTik.usuario_acceso, MikroTik.contrasena_acceso
+            ).filter(MikroTik.id == mikrotik_id).first()
+    
     def get_by_nombre(self, nombre: str) -> Optional[MikroTik]:
         """
         Obtiene un MikroTik por su nombre/alias.
@@ -180,6 +276,55 @@ class MikroTikRepository(SQLAlchemyRepository[MikroTik]):
     
     # === MÉTODOS DE ESTADÍSTICAS ===
     
+    def get_estadisticas(self) -> dict:
+        """
+        Calcula todas las estadísticas de la flota con una sola consulta agregada
+        (agrupada por estado y modelo, con sumas condicionales de disponibilidad y
+        credenciales) en lugar de una consulta o un get_all() por contador.
+        
+        Returns:
+            dict: total, por_estado, por_modelo, disponibilidad, con_credenciales y sin_credenciales
+        """
+        con_credenciales = and_(
+            MikroTik.usuario_acceso.isnot(None),
+            MikroTik.usuario_acceso != "",
+            MikroTik.contrasena_acceso.isnot(None),
+            MikroTik.contrasena_acceso != ""
+        )
+        with self._get_db() as db:
+            grupos = db.query(
+                MikroTik.estado,
+                MikroTik.modelo,
+                func.count(MikroTik.id).label('total'),
+                func.sum(case((MikroTik.disponible == True, 1), else_=0)).label('disponibles'),
+                func.sum(case((con_credenciales, 1), else_=0)).label('con_credenciales')
+            ).group_by(MikroTik.estado, MikroTik.modelo).all()
+        
+        # Repartir los grupos (estado, modelo) en los contadores de siempre
+        por_estado, por_modelo = {}, {}
+        total = disponibles = con_credenciales_total = 0
+        for grupo in grupos:
+            total += grupo.total
+            disponibles += grupo.disponibles or 0
+            con_credenciales_total += grupo.con_credenciales or 0
+            por_estado[grupo.estado] = por_estado.get(grupo.estado, 0) + grupo.total
+            if grupo.modelo is not None:  # Solo los que tienen modelo definido, como count_by_modelo
+                por_modelo[grupo.modelo] = por_modelo.get(grupo.modelo, 0) + grupo.total
+        
+        return {
+            "total": total,
+            "por_estado": por_estado,
+            "por_modelo": por_modelo,
+            "disponibilidad": {
+                "total": total,
+                "disponibles": disponibles,
+                "no_disponibles": total - disponibles,
+                "porcentaje_disponibilidad": round((disponibles / total * 100) if total > 0 else 0, 2)
+            },
+            "con_credenciales": con_credenciales_total,
+            "sin_credenciales": total - con_credenciales_total
+        }
+    
     def count_by_estado(self) -> dict:
         """
         Cuenta los MikroTiks por estado.
@@ -237,24 +382,83 @@ class MikroTikRepository(SQLAlchemyRepository[MikroTik]):
     
     # === MÉTODOS DE ACTUALIZACIÓN MASIVA ===
     
-    def actualizar_disponibilidad_masiva(self, ip_disponibles: List[str]):
+    def actualizar_disponibilidad_por_id(self, disponibilidad: Dict[int, bool]) -> Dict[int, str]:
         """
-        Actualiza la disponibilidad de múltiples MikroTiks basado en una lista de IPs.
+        Guarda el resultado de un barrido en una sola transacción.
+        
+        Aplica las transiciones de estado de MikroTik.actualizar_disponibilidad
+        y escribe solo las filas que cambian, con un UPDATE masivo por ID.
         
         Args:
-            ip_disponibles: Lista de IPs que están disponibles (responden ping)
+            disponibilidad: Diccionario {id_mikrotik: disponible}
+            
+        Returns:
+            Dict[int, str]: Estado final de cada MikroTik encontrado
         """
+        if not disponibilidad:
+            return {}
+        
+        ids = list(disponibilidad)
+        estados_finales = {}
+        cambios = []
+        
         with self._get_db() as db:
-            # Marcar todos como no disponibles primero
-            db.query(MikroTik).update({MikroTik.disponible: False})
+            # Leer el estado actual por bloques (SQLite limita los parámetros por consulta)
+            for inicio in range(0, len(ids), 500):
+                filas = db.query(MikroTik.id, MikroTik.estado, MikroTik.disponible).filter(
+                    MikroTik.id.in_(ids[inicio:inicio + 500])
+                ).all()
+                
+                for fila in filas:
+                    disponible = bool(disponibilidad[fila.id])
+                    nuevo_estado = MikroTik.calcular_estado(fila.estado, disponible)
+                    estados_finales[fila.id] = nuevo_estado
+                    
+                    # Solo escribir las filas cuyo estado o disponibilidad cambia
+                    if nuevo_estado != fila.estado or disponible != bool(fila.disponible):
+                        cambios.append({
+                            "id": fila.id,
+                            "disponible": disponible,
+                            "estado": nuevo_estado
+                        })
             
-            # Marcar como disponibles solo los que están en la lista
-            if ip_disponibles:
-                db.query(MikroTik).filter(
-                    MikroTik.ip_mikrotik.in_(ip_disponibles)
-                ).update({MikroTik.disponible: True}, synchronize_session=False)
+            if cambios:
+                # UPDATE masivo por clave primaria (executemany)
+                db.execute(update(MikroTik), cambios)
             
             db.commit()
+        
+        return estados_finales
+    
+    # === EXPORTS ANTIGUOS (ANTES DE LOS RESPALDOS VERSIONADOS) ===
+    
+    def get_exports_antiguos(self) -> List[tuple]:
+        """
+        Obtiene los exports guardados en la columna ultimo_export (formato anterior).
+        
+        Returns:
+            List[tuple]: Filas (id, ultimo_export, updated_at)
+        """
+        with self._get_db() as db:
+            return db.query(MikroTik.id, MikroTik.ultimo_export, MikroTik.updated_at).filter(
+                MikroTik.ultimo_export.isnot(None)
+            ).all()
+    
+    def limpiar_exports_antiguos(self, ids: List[int]) -> None:
+        """
+        Vacía la columna ultimo_export de los MikroTiks indicados.
+        
+        Args:
+            ids: IDs de los MikroTiks ya migrados
+        """
+        if not ids:
+            return
+        
+        with self._get_db() as db:
+            db.query(MikroTik).filter(MikroTik.id.in_(ids)).update(
+                {MikroTik.ultimo_export: None}, synchronize_session=False
+            )
+            db.commit()
     
     # === MÉTODOS DE VALIDACIÓN ===
     
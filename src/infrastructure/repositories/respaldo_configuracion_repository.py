@@ -0,0 +1,329 @@
+# src/infrastructure/repositories/respaldo_configuracion_repository.py
+"""
+Repositorio para los respaldos de configuración de MikroTiks.
+Este repositorio maneja los contenidos comprimidos (por hash) y las versiones de cada equipo.
+"""
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import func, insert, delete, select, text
+from domain.models.respaldo_configuracion import ContenidoRespaldo, VersionRespaldo, IndiceRespaldo, LineaRespaldo
+from infrastructure.repositories.sqlalchemy_repository import SQLAlchemyRepository
+
+class RespaldoConfiguracionRepository(SQLAlchemyRepository[VersionRespaldo]):
+    """Repositorio para guardar y consultar versiones de configuración."""
+    
+    def __init__(self):
+        """Constructor del repositorio."""
+        super().__init__(VersionRespaldo)
+    
+    # === ESCRITURA ===
+    
+    def existe_contenido(self, hash_contenido: str) -> bool:
+        """
+        Verifica si un contenido ya está guardado (para no volver a comprimirlo).
+        
+        Args:
+            hash_contenido: Hash del export
+        
+        Returns:
+            bool: True si ya existe
+        """
+        with self._get_db() as db:
+            return db.get(ContenidoRespaldo, hash_contenido) is not None
+    
+    def registrar_version(self, mikrotik_id: int, hash_contenido: str, fecha: int,
+                          contenido: Optional[Dict[str, Any]] = None,
+                          cambios: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Registra un respaldo en una sola transacción: guarda el contenido si es
+        nuevo y agrega una versión solo si difiere de la última del equipo (si
+        no, actualiza la fecha de verificación de la última).
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            hash_contenido: Hash del export
+            fecha: Momento del respaldo (epoch en segundos)
+            contenido: Columnas de ContenidoRespaldo, o None si ya existe
+            cambios: Resumen respecto de la versión anterior (lineas_agregadas,
+                lineas_eliminadas y secciones)
+        
+        Returns:
+            Optional[int]: Fecha con la que se guardó la versión nueva, o None si
+            el contenido es igual al de la última versión
+        """
+        with self._get_db() as db:
+            if contenido is not None:
+                # OR IGNORE: otro hilo pudo guardar el mismo contenido entre medio
+                db.execute(insert(ContenidoRespaldo).prefix_with("OR IGNORE"), [contenido])
+            
+            ultima = db.query(VersionRespaldo).filter(
+                VersionRespaldo.mikrotik_id == mikrotik_id
+            ).order_by(VersionRespaldo.fecha.desc()).first()
+            
+            if ultima is not None and ultima.hash == hash_contenido:
+                ultima.ultima_verificacion = max(ultima.ultima_verificacion, fecha)
+                db.commit()
+                return None
+            
+            # Dos respaldos distintos en el mismo segundo: la fecha se corre para no pisar la anterior
+            if ultima is not None and fecha <= ultima.fecha:
+                fecha = ultima.fecha + 1
+            
+            db.execute(insert(VersionRespaldo), [{
+                "mikrotik_id": mikrotik_id,
+                "fecha": fecha,
+                "hash": hash_contenido,
+                "ultima_verificacion": fecha,
+                "hash_anterior": ultima.hash if ultima is not None else None,
+                **(cambios or {})
+            }])
+            db.commit()
+            return fecha
+    
+    def podar_versiones(self, mikrotik_id: int, conservar: int) -> int:
+        """
+        Elimina las versiones más antiguas de un equipo, conservando las últimas N.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            conservar: Versiones a conservar
+        
+        Returns:
+            int: Número de versiones eliminadas
+        """
+        with self._get_db() as db:
+            recientes = select(VersionRespaldo.fecha).where(
+                VersionRespaldo.mikrotik_id == mikrotik_id
+            ).order_by(VersionRespaldo.fecha.desc()).limit(conservar)
+            resultado = db.execute(delete(VersionRespaldo).where(
+                VersionRespaldo.mikrotik_id == mikrotik_id,
+                VersionRespaldo.fecha.not_in(recientes.scalar_subquery())
+            ))
+            db.commit()
+            return resultado.rowcount
+    
+    def eliminar_contenidos_huerfanos(self) -> int:
+        """
+        Elimina los contenidos a los que ya no apunta ninguna versión, salvo los
+        que todavía son la base de un delta en uso.
+        
+        Returns:
+            int: Número de contenidos eliminados
+        """
+        with self._get_db() as db:
+            bases_en_uso = select(ContenidoRespaldo.base_hash).join(
+                VersionRespaldo, VersionRespaldo.hash == ContenidoRespaldo.hash
+            ).where(ContenidoRespaldo.base_hash.is_not(None))
+            resultado = db.execute(delete(ContenidoRespaldo).where(
+                ContenidoRespaldo.hash.not_in(select(VersionRespaldo.hash)),
+                ContenidoRespaldo.hash.not_in(bases_en_uso)
+            ))
+            db.commit()
+            return resultado.rowcount
+    
+    def eliminar_por_mikrotik(self, mikrotik_id: int) -> None:
+        """
+        Elimina todas las versiones de un MikroTik (los contenidos quedan huérfanos).
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        """
+        with self._get_db() as db:
+            db.execute(delete(VersionRespaldo).where(VersionRespaldo.mikrotik_id == mikrotik_id))
+            db.commit()
+    
+    # === ÍNDICE DE BÚSQUEDA ===
+    
+    def indexar_version(self, mikrotik_id: int, fecha: int, hash_contenido: str,
+                        lineas: List[Tuple[int, str, str]]) -> None:
+        """
+        Reemplaza en el índice de búsqueda las líneas de un equipo por las de una versión.
+        Los triggers de respaldo_lineas actualizan el índice FTS5 en la misma transacción.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            fecha: Fecha de la versión
+            hash_contenido: Hash del export
+            lineas: (numero, seccion, linea) de cada línea del export
+        """
+        with self._get_db() as db:
+            db.execute(delete(LineaRespaldo).where(LineaRespaldo.mikrotik_id == mikrotik_id))
+            if lineas:
+                db.execute(insert(LineaRespaldo), [
+                    {"mikrotik_id": mikrotik_id, "numero": numero, "seccion": seccion, "linea": linea}
+                    for numero, seccion, linea in lineas
+                ])
+            db.execute(insert(IndiceRespaldo).prefix_with("OR REPLACE"), [
+                {"mikrotik_id": mikrotik_id, "fecha": fecha, "hash": hash_contenido}
+            ])
+            db.commit()
+    
+    def quitar_del_indice(self, mikrotik_id: int) -> None:
+        """
+        Quita las líneas de un equipo del índice de búsqueda.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        """
+        with self._get_db() as db:
+            db.execute(delete(LineaRespaldo).where(LineaRespaldo.mikrotik_id == mikrotik_id))
+            db.execute(delete(IndiceRespaldo).where(IndiceRespaldo.mikrotik_id == mikrotik_id))
+            db.commit()
+    
+    def get_versiones_sin_indexar(self) -> List[Any]:
+        """
+        Obtiene la última versión de los equipos cuyo índice falta o quedó desactualizado.
+        
+        Returns:
+            List: Filas (mikrotik_id, fecha, hash)
+        """
+        with self._get_db() as db:
+            ultimas = select(
+                VersionRespaldo.mikrotik_id, func.max(VersionRespaldo.fecha).label("fecha")
+            ).group_by(VersionRespaldo.mikrotik_id).subquery()
+            return db.query(
+                VersionRespaldo.mikrotik_id, VersionRespaldo.fecha, VersionRespaldo.hash
+            ).join(
+                ultimas, (ultimas.c.mikrotik_id == VersionRespaldo.mikrotik_id)
+                & (ultimas.c.fecha == VersionRespaldo.fecha)
+            ).outerjoin(
+                IndiceRespaldo, IndiceRespaldo.mikrotik_id == VersionRespaldo.mikrotik_id
+            ).filter(
+                (IndiceRespaldo.hash.is_(None)) | (IndiceRespaldo.hash != VersionRespaldo.hash)
+            ).all()
+    
+    def buscar_lineas(self, consulta: str, limite: int = 200,
+                      seccion: Optional[str] = None) -> List[Any]:
+        """
+        Busca líneas en el índice FTS5 de los exports.
+        
+        Args:
+            consulta: Consulta en sintaxis de FTS5 (MATCH)
+            limite: Máximo de líneas a devolver
+            seccion: Ruta de la sección a la que limitar la búsqueda
+        
+        Returns:
+            List: Filas (mikrotik_id, nombre, fecha, hash, seccion, numero, linea).
+            Sin ORDER BY: FTS5 entrega las coincidencias por rowid y el LIMIT corta
+            la búsqueda en cuanto junta suficientes, sin ordenar todas las coincidencias
+        """
+        sql = (
+            "SELECT l.mikrotik_id, m.nombre, i.fecha, i.hash, l.seccion, l.numero, l.linea "
+            "FROM respaldo_lineas_fts f "
+            "JOIN respaldo_lineas l ON l.id = f.rowid "
+            "JOIN respaldo_indice i ON i.mikrotik_id = l.mikrotik_id "
+            "LEFT JOIN mikrotiks m ON m.id = l.mikrotik_id "
+            "WHERE respaldo_lineas_fts MATCH :consulta"
+            + (" AND l.seccion = :seccion" if seccion is not None else "")
+            + " LIMIT :limite"
+        )
+        with self._get_db() as db:
+            return db.execute(text(sql), {"consulta": consulta, "seccion": seccion, "limite": limite}).all()
+    
+    # === CONSULTAS ===
+    
+    def get_versiones(self, mikrotik_id: int) -> List[Any]:
+        """
+        Obtiene las versiones de un equipo con los tamaños de su contenido, de la más reciente a la más antigua.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+        
+        Returns:
+            List: Filas (fecha, ultima_verificacion, hash, tamano, tamano_comprimido)
+        """
+        with self._get_db() as db:
+            return db.query(
+                VersionRespaldo.fecha, VersionRespaldo.ultima_verificacion, VersionRespaldo.hash,
+                ContenidoRespaldo.tamano, ContenidoRespaldo.tamano_comprimido
+            ).join(
+                ContenidoRespaldo, ContenidoRespaldo.hash == VersionRespaldo.hash
+            ).filter(
+                VersionRespaldo.mikrotik_id == mikrotik_id
+            ).order_by(VersionRespaldo.fecha.desc()).all()
+    
+    def get_version(self, mikrotik_id: int, fecha: Optional[int] = None) -> Optional[VersionRespaldo]:
+        """
+        Obtiene una versión de un equipo: la de esa fecha o, si no se indica, la última.
+        
+        Args:
+            mikrotik_id: ID del MikroTik
+            fecha: Fecha de la versión (epoch en segundos)
+        
+        Returns:
+            Optional[VersionRespaldo]: La versión o None si no existe
+        """
+        with self._get_db() as db:
+            consulta = db.query(VersionRespaldo).filter(VersionRespaldo.mikrotik_id == mikrotik_id)
+            if fecha is not None:
+                consulta = consulta.filter(VersionRespaldo.fecha == fecha)
+            return consulta.order_by(VersionRespaldo.fecha.desc()).first()
+    
+    def get_contenido(self, hash_contenido: str) -> Optional[ContenidoRespaldo]:
+        """
+        Obtiene un contenido por su hash.
+        
+        Args:
+            hash_contenido: Hash del export
+        
+        Returns:
+            Optional[ContenidoRespaldo]: El contenido o None si no existe
+        """
+        with self._get_db() as db:
+            return db.get(ContenidoRespaldo, hash_contenido)
+    
+    def get_equipos_con_cambios(self, desde: int) -> List[Any]:
+        """
+        Obtiene los equipos cuya configuración cambió desde una fecha, en una sola
+        consulta sobre el resumen guardado en cada versión (usa ix_respaldo_versiones_fecha).
+        La primera versión de un equipo no cuenta como cambio.
+        
+        Args:
+            desde: Fecha desde la que se buscan cambios (epoch en segundos)
+        
+        Returns:
+            List: Filas (mikrotik_id, cambios, primer_cambio, ultimo_cambio,
+            lineas_agregadas, lineas_eliminadas, secciones), con las secciones
+            de todos los cambios separadas por "\n"
+        """
+        with self._get_db() as db:
+            return db.query(
+                VersionRespaldo.mikrotik_id,
+                func.count(),
+                func.min(VersionRespaldo.fecha),
+                func.max(VersionRespaldo.fecha),
+                func.sum(VersionRespaldo.lineas_agregadas),
+                func.sum(VersionRespaldo.lineas_eliminadas),
+                func.group_concat(VersionRespaldo.secciones, "\n")
+            ).filter(
+                VersionRespaldo.fecha >= desde,
+                VersionRespaldo.hash_anterior.is_not(None)
+            ).group_by(VersionRespaldo.mikrotik_id).order_by(func.max(VersionRespaldo.fecha).desc()).all()
+    
+    def get_estadisticas(self) -> Dict[str, int]:
+        """
+        Obtiene los totales del almacenamiento de respaldos.
+        
+        Returns:
+            Dict[str, int]: equipos, versiones, contenidos, deltas (contenidos guardados como delta), bytes_originales
+            (lo que ocuparían todas las versiones sin comprimir ni deduplicar) y bytes_almacenados
+        """
+        with self._get_db() as db:
+            equipos, versiones, bytes_originales = db.query(
+                func.count(func.distinct(VersionRespaldo.mikrotik_id)),
+                func.count(),
+                func.coalesce(func.sum(ContenidoRespaldo.tamano), 0)
+            ).select_from(VersionRespaldo).join(
+                ContenidoRespaldo, ContenidoRespaldo.hash == VersionRespaldo.hash
+            ).one()
+            contenidos, deltas, bytes_almacenados = db.query(
+                func.count(), func.count(ContenidoRespaldo.base_hash),
+                func.coalesce(func.sum(ContenidoRespaldo.tamano_comprimido), 0)
+            ).select_from(ContenidoRespaldo).one()
+            return {
+                "equipos": equipos,
+                "versiones": versiones,
+                "contenidos": contenidos,
+                "deltas": deltas,
+                "bytes_originales": bytes_originales,
+                "bytes_almacenados": bytes_almacenados
+            }
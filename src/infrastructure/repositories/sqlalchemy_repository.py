@@ -3,15 +3,29 @@
 Implementación base de repositorio usando SQLAlchemy.
 Esta clase implementa los métodos básicos de repositorio utilizando SQLAlchemy.
 """
-from typing import Generic, TypeVar, List, Optional, Type, Dict, Any
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from typing import Generic, TypeVar, List, Optional, Type, Dict, Any, Iterable, Iterator, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, undefer_group
 
 from domain.repositories.base_repository import BaseRepository
+from domain.models.base_model import GRUPO_PESADO
 from infrastructure.database.config import SessionLocal
+from infrastructure.database.unidad_trabajo import SesionCompartida, sesion_actual
 
 # Tipo genérico para los modelos
 T = TypeVar('T')
 
+
+@dataclass
+class Pagina:
+    """Una página de resultados de SQLAlchemyRepository.get_page."""
+    
+    elementos: List[Any]
+    cursor_siguiente: Optional[Tuple] = None  # Cursor de la página siguiente (None = no hay más)
+    cursor_anterior: Optional[Tuple] = None  # Cursor de la anterior, con hacia_atras=True (None = es la primera)
+    total: Optional[int] = None  # Total de filas que cumplen los filtros, solo si se pidió contar_total
+
 class SQLAlchemyRepository(BaseRepository[T], Generic[T]):
     """Implementación base de repositorio con SQLAlchemy."""
     
@@ -26,16 +40,36 @@ class SQLAlchemyRepository(BaseRepository[T], Generic[T]):
     
     def _get_db(self) -> Session:
         """
-        Obtiene una sesión de base de datos.
+        Obtiene una sesión de base de datos: una nueva por llamada o, dentro de una
+        unidad de trabajo (infrastructure.database.unidad_trabajo), la compartida
+        del hilo, cuyo commit() solo hace flush.
         
         Returns:
             Session: Sesión de SQLAlchemy
         """
+        session = sesion_actual()
+        if session is not None:
+            return SesionCompartida(session)
         return SessionLocal()
     
+    def _recargar(self, db: Session, entity: T) -> T:
+        """
+        Vuelve a leer una entidad de la sesión incluyendo sus columnas pesadas
+        (refresh() por sí solo deja sin cargar las columnas diferidas).
+        
+        Args:
+            db: Sesión en la que está la entidad
+            entity: Entidad a recargar
+            
+        Returns:
+            T: La misma entidad con todos sus datos actualizados
+        """
+        return db.get(self.model_class, entity.id, options=[undefer_group(GRUPO_PESADO)],
+                      populate_existing=True)
+    
     def get_by_id(self, entity_id: int) -> Optional[T]:
         """
-        Obtiene una entidad por su ID.
+        Obtiene una entidad por su ID, con sus columnas pesadas (GRUPO_PESADO) cargadas.
         
         Args:
             entity_id: ID de la entidad a buscar
@@ -44,7 +78,9 @@ class SQLAlchemyRepository(BaseRepository[T], Generic[T]):
             Optional[T]: La entidad encontrada o None si no existe
         """
         with self._get_db() as db:
-            return db.query(self.model_class).filter(self.model_class.id == entity_id).first()
+            return db.query(self.model_class).options(
+                undefer_group(GRUPO_PESADO)
+            ).filter(self.model_class.id == entity_id).first()
     
     def get_all(self) -> List[T]:
         """
@@ -56,6 +92,106 @@ class SQLAlchemyRepository(BaseRepository[T], Generic[T]):
         with self._get_db() as db:
             return db.query(self.model_class).all()
     
+    def iter_all(self, batch_size: int = 1000, columnas: Optional[List[Any]] = None) -> Iterator[Any]:
+        """
+        Recorre todas las entidades sin cargarlas todas en memoria.
+        
+        Args:
+            batch_size: Filas que se traen de la base en cada bloque
+            columnas: Columnas a proyectar en lugar de entidades completas
+            
+        Returns:
+            Iterator[Any]: Entidades (o filas) en orden de ID
+        """
+        return self.iter_filtered(batch_size=batch_size, columnas=columnas)
+    
+    def iter_filtered(self, *filtros: Any, batch_size: int = 1000,
+                      columnas: Optional[List[Any]] = None, **criterios: Any) -> Iterator[Any]:
+        """
+        Recorre las entidades que cumplen los filtros trayéndolas por bloques
+        (yield_per): en memoria solo está el bloque actual y lo que retenga quien
+        itera, a diferencia de get_all() o find_by().
+        
+        La consulta queda abierta mientras dure el recorrido; sin WAL, no escribir
+        desde otra sesión hasta terminarlo.
+        
+        Args:
+            *filtros: Condiciones de SQLAlchemy
+            batch_size: Filas que se traen de la base en cada bloque
+            columnas: Columnas a proyectar en lugar de entidades completas
+            **criterios: Igualdades atributo=valor, como en find_by()
+            
+        Returns:
+            Iterator[Any]: Entidades (o filas) en orden de ID
+        """
+        with self._get_db() as db:
+            query = db.query(*columnas) if columnas else db.query(self.model_class)
+            for filtro in filtros:
+                query = query.filter(filtro)
+            for key, value in criterios.items():
+                if hasattr(self.model_class, key):
+                    query = query.filter(getattr(self.model_class, key) == value)
+            yield from query.order_by(self.model_class.id).yield_per(batch_size)
+    
+    def get_page(self, cursor: Optional[Tuple] = None, limite: int = 50, orden: str = "id",
+                 descendente: bool = False, hacia_atras: bool = False, contar_total: bool = False,
+                 filtros: Optional[Iterable[Any]] = None, columnas: Optional[List[Any]] = None) -> Pagina:
+        """
+        Obtiene una página de entidades por keyset (cursor): en lugar de OFFSET se
+        filtra por la clave de la última fila vista, así que cualquier página cuesta
+        lo mismo que la primera y no se salta ni repite filas si la tabla cambia.
+        
+        La clave es (orden, id), o solo id si se ordena por id; la columna de orden
+        no debe ser nula.
+        
+        Args:
+            cursor: cursor_siguiente o cursor_anterior de una página previa (None = desde el extremo)
+            limite: Tamaño de página
+            orden: Nombre de la columna por la que se ordena (p. ej. "id" o "fecha_creacion")
+            descendente: Orden descendente
+            hacia_atras: Recorrer hacia el principio desde el cursor (página anterior)
+            contar_total: Calcular también el total de filas que cumplen los filtros
+            filtros: Condiciones de SQLAlchemy adicionales
+            columnas: Columnas a proyectar en lugar de entidades completas (deben incluir id y orden)
+            
+        Returns:
+            Pagina: Elementos en el orden pedido y los cursores para seguir
+        """
+        columna_orden = getattr(self.model_class, orden)
+        claves = [columna_orden] if orden == "id" else [columna_orden, self.model_class.id]
+        # Avanzar en orden ascendente o retroceder en descendente recorre las claves crecientes
+        crecientes = descendente == hacia_atras
+        
+        with self._get_db() as db:
+            query = db.query(*columnas) if columnas else db.query(self.model_class)
+            for filtro in filtros or []:
+                query = query.filter(filtro)
+            total = query.count() if contar_total else None
+            
+            if cursor is not None:
+                clave, valor = (tuple_(*claves), tuple_(*cursor)) if len(claves) > 1 else (claves[0], cursor[0])
+                query = query.filter(clave > valor if crecientes else clave < valor)
+            filas = query.order_by(
+                *[columna.asc() if crecientes else columna.desc() for columna in claves]
+            ).limit(limite + 1).all()
+        
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+        if hacia_atras:
+            filas.reverse()
+        
+        def clave_de(fila) -> Tuple:
+            return tuple(getattr(fila, columna.key) for columna in claves)
+        
+        pagina = Pagina(elementos=filas, total=total)
+        if filas:
+            # Del lado por el que se avanzó, hay más si sobró una fila; del otro, si se partió de un cursor
+            mas_adelante = hay_mas if not hacia_atras else cursor is not None
+            mas_atras = cursor is not None if not hacia_atras else hay_mas
+            pagina.cursor_siguiente = clave_de(filas[-1]) if mas_adelante else None
+            pagina.cursor_anterior = clave_de(filas[0]) if mas_atras else None
+        return pagina
+    
     def create(self, entity: T) -> T:
         """
         Crea una nueva entidad.
@@ -69,8 +205,7 @@ class SQLAlchemyRepository(BaseRepository[T], Generic[T]):
         with self._get_db() as db:
             db.add(entity)
             db.commit()
-            db.refresh(entity)
-            return entity
+            return self._recargar(db, entity)
     
     def update(self, entity: T) -> T:
         """
@@ -83,10 +218,10 @@ class SQLAlchemyRepository(BaseRepository[T], Generic[T]):
             T: La entidad actualizada
         """
         with self._get_db() as db:
-            db.merge(entity)
+            # merge() devuelve la copia asociada a esta sesión; es la que se recarga
+            entidad_actualizada = db.merge(entity)
             db.commit()
-            db.refresh(entity)
-            return entity
+            return self._recargar(db, entidad_actualizada)
     
     def delete(self, entity_id: int) -> bool:
         """
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Punto de entrada del monitoreo de conectividad en segundo plano.
+Corre sin interfaz gráfica: barre MikroTiks, nodos IPRAN y nodos GPON y respalda
+la configuración de los MikroTiks según MONITOREO_CONFIG (config/app_config.py),
+y guarda los resultados en la base de datos para que la aplicación solo tenga
+que leerlos.
+
+Uso:
+    python src/monitor.py              # Corre hasta Ctrl+C o SIGTERM
+    python src/monitor.py --una-vez    # Un barrido de cada inventario y termina
+"""
+import os
+import signal
+import sys
+
+def main():
+    """
+    Función principal del monitoreo.
+    Inicializa la base de datos y arranca el bucle de barridos.
+    """
+    # Configurar rutas de importación (igual que main.py)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(current_dir)
+    sys.path.insert(0, project_root)
+    sys.path.insert(0, current_dir)
+    
+    from config.app_config import MONITOREO_CONFIG
+    from infrastructure.database.init_db import init_db
+    from application.services.monitoreo_service import MonitoreoService
+    
+    init_db()
+    service = MonitoreoService(MONITOREO_CONFIG)
+    
+    if "--una-vez" in sys.argv:
+        for nombre in service.tareas:
+            service.ejecutar_tarea(nombre)
+        return
+    
+    # Terminar limpiamente con Ctrl+C o con SIGTERM (servicio del sistema)
+    signal.signal(signal.SIGTERM, lambda *_: service.detener())
+    
+    print("🚀 Monitoreo de conectividad iniciado (Ctrl+C para detener)")
+    try:
+        service.ejecutar()
+    except KeyboardInterrupt:
+        service.detener()
+    print("🛑 Monitoreo detenido")
+
+# Esta línea hace que main() se ejecute solo si ejecutamos este archivo directamente
+if __name__ == "__main__":
+    main()
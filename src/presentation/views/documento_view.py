@@ -6,7 +6,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
 import io
-import json
 from PIL import Image, ImageTk
 from datetime import datetime
 import pyperclip  # Para copiar texto al portapapeles
@@ -211,8 +210,8 @@ class DocumentoView(ttk.Frame):
         for item in self.lista.get_children():
             self.lista.delete(item)
         
-        # Obtener todos los documentos
-        documentos = self.documento_service.obtener_todos()
+        # Obtener solo las columnas de la lista (sin el contenido JSON)
+        documentos = self.documento_service.obtener_listado()
         
         # Insertar en la lista
         for doc in documentos:
@@ -233,24 +232,27 @@ class DocumentoView(ttk.Frame):
         for item in self.lista.get_children():
             self.lista.delete(item)
         
-        # Obtener todos los documentos
-        documentos = self.documento_service.obtener_todos()
+        # Buscar con el índice de texto (cada palabra como prefijo, por relevancia)
+        if filtro.strip():
+            documentos = self.documento_service.buscar(filtro)
+            
+            # Un número también puede ser el ID del documento (el índice no incluye el ID)
+            if filtro.strip().isdigit():
+                por_id = self.documento_service.obtener_por_id(int(filtro))
+                if por_id is not None:
+                    documentos = [por_id] + [doc for doc in documentos if doc.id != por_id.id]
+        else:
+            documentos = self.documento_service.obtener_listado()
         
-        # Filtrar e insertar en la lista
+        # Insertar en la lista
         for doc in documentos:
-            # Comprobar si el filtro coincide con algún campo
-            if (filtro in str(doc.id).lower() or 
-                filtro in doc.cliente_nombre.lower() or 
-                filtro in doc.cliente_id.lower() or 
-                filtro in doc.tipo_transaccion.lower()):
-                
-                fecha_str = doc.fecha_creacion.strftime("%d/%m/%Y")
-                self.lista.insert("", tk.END, values=(
-                    doc.id,
-                    fecha_str,
-                    doc.cliente_nombre,
-                    doc.tipo_transaccion
-                ))
+            fecha_str = doc.fecha_creacion.strftime("%d/%m/%Y")
+            self.lista.insert("", tk.END, values=(
+                doc.id,
+                fecha_str,
+                doc.cliente_nombre,
+                doc.tipo_transaccion
+            ))
     
     def seleccionar_documento(self, event):
         """Evento al seleccionar un documento de la lista."""
@@ -276,8 +278,8 @@ class DocumentoView(ttk.Frame):
         Args:
             doc_id: ID del documento a cargar
         """
-        # Obtener el documento
-        documento = self.documento_service.obtener_por_id(doc_id)
+        # Obtener el documento (solo sus datos generales, sin decodificar el contenido)
+        documento = self.documento_service.obtener_resumen(doc_id)
         if not documento:
             messagebox.showerror("Error", f"No se encontró el documento con ID {doc_id}")
             return
@@ -979,8 +981,9 @@ class DocumentoView(ttk.Frame):
         imagen_frame = ttk.Frame(grafica_frame)
         imagen_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Variable para almacenar la imagen
-        imagen_var = {"imagen": None, "mostrada": None}
+        # Imagen ingerida (en el almacén), ingesta en curso y miniatura mostrada
+        imagen_var = {"ingerida": None, "pendiente": None, "mostrada": None, "limpiada": False}
+        imagenes = self.documento_service.imagenes
         
         # Etiqueta para mostrar la imagen
         imagen_lbl = ttk.Label(imagen_frame)
@@ -1002,38 +1005,48 @@ class DocumentoView(ttk.Frame):
             command=lambda: limpiar_imagen()
         ).pack(side=tk.LEFT, padx=5)
         
+        # La imagen se recomprime y se le genera la miniatura en segundo plano;
+        # aquí solo se revisa cada 50 ms si terminó, sin bloquear la interfaz
+        def procesar_imagen(imagen):
+            futuro = imagenes.ingerir_en_segundo_plano(imagen)
+            imagen_var["ingerida"] = None
+            imagen_var["limpiada"] = False
+            imagen_var["pendiente"] = futuro
+            imagen_lbl.config(image="", text="Procesando imagen...")
+            mostrar_al_terminar(futuro)
+        
+        def mostrar_al_terminar(futuro):
+            # Se pegó otra imagen, se limpió o se cambió de paso
+            if imagen_var["pendiente"] is not futuro or not imagen_lbl.winfo_exists():
+                return
+            if not futuro.done():
+                self.after(50, lambda: mostrar_al_terminar(futuro))
+                return
+            
+            imagen_var["pendiente"] = None
+            try:
+                ingerida = futuro.result()
+                miniatura = imagenes.obtener_miniatura(ingerida.referencia)
+                tk_imagen = ImageTk.PhotoImage(Image.open(io.BytesIO(miniatura)))
+            except Exception as e:
+                imagen_lbl.config(text="")
+                messagebox.showerror("Error", f"No se pudo procesar la imagen: {str(e)}")
+                return
+            
+            imagen_var["ingerida"] = ingerida
+            # Guardar referencia para evitar que el recolector de basura la elimine
+            imagen_var["mostrada"] = tk_imagen
+            
+            # Mostrar en la etiqueta
+            imagen_lbl.config(image=tk_imagen, text="")
+        
         # Función para pegar imagen desde el portapapeles
         def pegar_imagen():
             try:
                 # Intentar obtener imagen del portapapeles
                 imagen = self.obtener_imagen_portapapeles()
                 if imagen:
-                    # Guardar la imagen
-                    imagen_var["imagen"] = imagen
-                    
-                    # Mostrar la imagen (redimensionada)
-                    ancho_max = 400
-                    alto_max = 300
-                    
-                    ancho, alto = imagen.size
-                    if ancho > ancho_max:
-                        ratio = ancho_max / ancho
-                        ancho = ancho_max
-                        alto = int(alto * ratio)
-                    
-                    if alto > alto_max:
-                        ratio = alto_max / alto
-                        alto = alto_max
-                        ancho = int(ancho * ratio)
-                    
-                    imagen_redimensionada = imagen.resize((ancho, alto), Image.LANCZOS)
-                    tk_imagen = ImageTk.PhotoImage(imagen_redimensionada)
-                    
-                    # Guardar referencia para evitar que el recolector de basura la elimine
-                    imagen_var["mostrada"] = tk_imagen
-                    
-                    # Mostrar en la etiqueta
-                    imagen_lbl.config(image=tk_imagen)
+                    procesar_imagen(imagen)
                 else:
                     messagebox.showwarning("Advertencia", "No hay una imagen en el portapapeles.")
             except Exception as e:
@@ -1041,63 +1054,38 @@ class DocumentoView(ttk.Frame):
         
         # Función para limpiar la imagen
         def limpiar_imagen():
-            imagen_var["imagen"] = None
+            imagen_var["ingerida"] = None
+            imagen_var["pendiente"] = None
             imagen_var["mostrada"] = None
-            imagen_lbl.config(image="")
+            imagen_var["limpiada"] = True
+            imagen_lbl.config(image="", text="")
         
-        # Mostrar imagen existente si hay
-        if "grafica_consumo" in self.documento_actual["contenido"]:
-            try:
-                bytes_imagen = self.documento_actual["contenido"]["grafica_consumo"]
-                if bytes_imagen:
-                    from io import BytesIO
-                    stream = BytesIO(bytes_imagen)
-                    imagen = Image.open(stream)
-                    
-                    # Guardar la imagen
-                    imagen_var["imagen"] = imagen
-                    
-                    # Mostrar la imagen (redimensionada)
-                    ancho_max = 400
-                    alto_max = 300
-                    
-                    ancho, alto = imagen.size
-                    if ancho > ancho_max:
-                        ratio = ancho_max / ancho
-                        ancho = ancho_max
-                        alto = int(alto * ratio)
-                    
-                    if alto > alto_max:
-                        ratio = alto_max / alto
-                        alto = alto_max
-                        ancho = int(ancho * ratio)
-                    
-                    imagen_redimensionada = imagen.resize((ancho, alto), Image.LANCZOS)
-                    tk_imagen = ImageTk.PhotoImage(imagen_redimensionada)
-                    
-                    # Guardar referencia para evitar que el recolector de basura la elimine
-                    imagen_var["mostrada"] = tk_imagen
-                    
-                    # Mostrar en la etiqueta
-                    imagen_lbl.config(image=tk_imagen)
-            except:
-                pass
+        # Mostrar imagen existente si hay (si ya fue ingerida, solo se lee su miniatura)
+        bytes_imagen = self.documento_actual["contenido"].get("grafica_consumo")
+        if isinstance(bytes_imagen, bytes) and bytes_imagen:
+            procesar_imagen(bytes_imagen)
         
         # Función para guardar los datos de este paso
         def guardar_paso():
             # Guardar link
             self.documento_actual["contenido"]["link_solarwinds"] = link_entry.get().strip()
             
-            # Guardar imagen si existe
-            if imagen_var["imagen"]:
-                # Convertir imagen a bytes
-                from io import BytesIO
-                buffer = BytesIO()
-                imagen_var["imagen"].save(buffer, format="PNG")
-                bytes_imagen = buffer.getvalue()
-                
-                # Guardar en el documento
-                self.documento_actual["contenido"]["grafica_consumo"] = bytes_imagen
+            # Esperar la ingesta si todavía está en curso (normalmente ya terminó)
+            futuro = imagen_var["pendiente"]
+            if futuro is not None:
+                imagen_var["pendiente"] = None
+                try:
+                    imagen_var["ingerida"] = futuro.result()
+                except Exception as e:
+                    messagebox.showerror("Error", f"No se pudo procesar la imagen: {str(e)}")
+                    return False
+            
+            # Guardar en el documento la imagen ya normalizada, o quitarla si se limpió
+            if imagen_var["ingerida"]:
+                self.documento_actual["contenido"]["grafica_consumo"] = \
+                    imagenes.almacen.leer(imagen_var["ingerida"].hash)
+            elif imagen_var["limpiada"]:
+                self.documento_actual["contenido"].pop("grafica_consumo", None)
             
             return True
         
@@ -1550,11 +1538,8 @@ class DocumentoView(ttk.Frame):
         # Obtener el texto del correo
         correo = None
         try:
-            # Si hay datos de correo guardados, usar esos
-            if documento.contenido_json:
-                contenido = json.loads(documento.contenido_json)
-                if "correo" in contenido:
-                    correo = contenido["correo"]
+            # Si hay datos de correo guardados, usar esos (se lee solo esa sección)
+            correo = self.documento_service.obtener_secciones(documento.id, "correo").get("correo")
             
             # Si no hay datos guardados, generar el correo
             if not correo:
@@ -1618,29 +1603,26 @@ class DocumentoView(ttk.Frame):
             messagebox.showwarning("Advertencia", "Debe ingresar una IP válida")
             return
         
-        # Ejecutar el comando ping
-        import platform
-        import subprocess
+        from infrastructure.network.sondeador import (
+            ERROR_DIRECCION_INVALIDA, ERROR_INALCANZABLE, Sondeador
+        )
         
         try:
-            # Crear comando según el sistema operativo
-            if platform.system() == "Windows":
-                comando = ["ping", "-n", "4", ip]
-            else:  # Linux/Mac
-                comando = ["ping", "-c", "4", ip]
-            
-            # Ejecutar el comando
-            resultado = subprocess.run(comando, capture_output=True, text=True)
+            # Enviar 4 sondas sin lanzar el binario 'ping' del sistema
+            resultado = Sondeador(timeout=2).sondear(ip, intentos=4)
+            resumen = (f"Enviados: {resultado.enviados}, recibidos: {resultado.recibidos} "
+                       f"({resultado.perdida:.0%} perdidos)")
             
             # Analizar el resultado
-            if "Tiempo de espera agotado" in resultado.stdout or "Request timed out" in resultado.stdout:
-                messagebox.showerror("Error", f"No se puede hacer ping a {ip}\n\n{resultado.stdout}")
-            elif "Destino inaccesible" in resultado.stdout or "Destination Host Unreachable" in resultado.stdout:
-                messagebox.showerror("Error", f"Destino inaccesible: {ip}\n\n{resultado.stdout}")
-            elif "0 recibidos" in resultado.stdout or "0 received" in resultado.stdout:
-                messagebox.showerror("Error", f"No se recibió respuesta de {ip}\n\n{resultado.stdout}")
+            if resultado.disponible:
+                messagebox.showinfo("Éxito", f"Ping exitoso a {ip}\n\n{resumen}\n"
+                                             f"RTT promedio: {resultado.rtt_ms:.1f} ms")
+            elif resultado.error == ERROR_INALCANZABLE:
+                messagebox.showerror("Error", f"Destino inaccesible: {ip}\n\n{resumen}")
+            elif resultado.error == ERROR_DIRECCION_INVALIDA:
+                messagebox.showerror("Error", f"La IP '{ip}' no tiene un formato válido")
             else:
-                messagebox.showinfo("Éxito", f"Ping exitoso a {ip}\n\n{resultado.stdout}")
+                messagebox.showerror("Error", f"No se recibió respuesta de {ip}\n\n{resumen}")
         except Exception as e:
             messagebox.showerror("Error", f"Error al ejecutar ping: {str(e)}")
     
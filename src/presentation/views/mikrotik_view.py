@@ -4,9 +4,10 @@ Vista para la gestión de equipos MikroTik.
 Esta vista permite conectar, gestionar colas y obtener exports de MikroTiks.
 """
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, simpledialog
 import threading
 import queue
+import time
 
 from application.services.mikrotik_service import MikroTikService
 
@@ -30,6 +31,12 @@ class MikroTikView(ttk.Frame):
         self.conexion_activa = False  # Si hay conexión activa al MikroTik
         self.editing_id = None  # ID del MikroTik que se está editando
         
+        # Lista paginada: se cargan tamano_pagina equipos y el resto al llegar al final del scroll
+        self.tamano_pagina = 200
+        self.cursor_lista = None  # Cursor de la siguiente página (None = no quedan más)
+        self.texto_lista = None  # Filtro de búsqueda aplicado a la lista
+        self.cargando_pagina = False
+        
         # Cola para comunicación entre hilos (para operaciones de red)
         self.message_queue = queue.Queue()
         
@@ -230,6 +237,13 @@ class MikroTikView(ttk.Frame):
             width=10
         ).pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(
+            export_buttons_frame,
+            text="🔎 Buscar en respaldos",
+            command=self.buscar_en_respaldos,
+            width=20
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Área de texto para el export
         self.export_text = scrolledtext.ScrolledText(
             export_frame,
@@ -310,7 +324,7 @@ class MikroTikView(ttk.Frame):
             list_frame,
             columns=("id", "nombre", "ip", "estado", "disponible"),
             show="headings",
-            yscrollcommand=scrollbar.set
+            yscrollcommand=lambda primero, ultimo: self.on_tree_scroll(scrollbar, primero, ultimo)
         )
         
         # Configurar columnas
@@ -352,20 +366,53 @@ class MikroTikView(ttk.Frame):
             command=self.verificar_conectividad_masiva,
             width=15
         ).pack(pady=5)
+        
+        # Botón para cambios de ancho de banda en muchas colas a la vez
+        ttk.Button(
+            stats_frame,
+            text="📦 Cambio Masivo",
+            command=self.abrir_cambio_masivo,
+            width=15
+        ).pack(pady=(0, 5))
     
     # === MÉTODOS DE DATOS ===
     
     def load_data(self):
         """Carga los datos de MikroTiks en la lista."""
-        # Limpiar el tree
+        # Primera página de la lista, respetando el filtro de búsqueda actual
+        self.texto_lista = self.search_var.get().strip() or None
+        self.reload_tree()
+        
+        # Actualizar estadísticas
+        self.update_statistics()
+        
+        # Actualizar dropdown de MikroTiks
+        self.refresh_mikrotik_list()
+    
+    def reload_tree(self):
+        """Vacía la lista y carga la primera página con el filtro actual."""
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self.cursor_lista = None
+        self.load_next_page(primera=True)
+    
+    def load_next_page(self, primera: bool = False):
+        """
+        Agrega a la lista la siguiente página de MikroTiks.
         
-        # Obtener todos los MikroTiks
-        mikrotiks = self.service.obtener_todos()
+        Args:
+            primera: Cargar la primera página en lugar de seguir desde cursor_lista
+        """
+        if not primera and self.cursor_lista is None:
+            return
+        pagina = self.service.obtener_listado_pagina(
+            cursor=None if primera else self.cursor_lista,
+            limite=self.tamano_pagina,
+            texto=self.texto_lista
+        )
+        self.cursor_lista = pagina.cursor_siguiente
         
-        # Insertar en el tree
-        for mtk in mikrotiks:
+        for mtk in pagina.elementos:
             estado_icon = {
                 "activo": "🟢",
                 "inactivo": "🔴",
@@ -382,16 +429,30 @@ class MikroTikView(ttk.Frame):
                 f"{estado_icon} {mtk.estado.title()}",
                 ping_icon
             ))
-        
-        # Actualizar estadísticas
-        self.update_statistics()
-        
-        # Actualizar dropdown de MikroTiks
-        self.refresh_mikrotik_list()
     
-    def refresh_mikrotik_list(self):
-        """Refresca la lista de MikroTiks en el dropdown."""
-        mikrotiks = self.service.obtener_todos()
+    def on_tree_scroll(self, scrollbar, primero, ultimo):
+        """Mueve la barra de scroll y, al llegar al final, pide la siguiente página."""
+        scrollbar.set(primero, ultimo)
+        if float(ultimo) >= 1.0 and self.cursor_lista is not None and not self.cargando_pagina:
+            self.cargando_pagina = True
+            self.after_idle(self._cargar_pagina_pendiente)
+    
+    def _cargar_pagina_pendiente(self):
+        """Carga la página pedida desde el scroll."""
+        try:
+            self.load_next_page()
+        finally:
+            self.cargando_pagina = False
+    
+    def refresh_mikrotik_list(self, mikrotiks=None):
+        """
+        Refresca la lista de MikroTiks en el dropdown.
+        
+        Args:
+            mikrotiks: Listado ya consultado (obtener_listado); si no se pasa, se consulta
+        """
+        if mikrotiks is None:
+            mikrotiks = self.service.obtener_listado()
         
         # Crear lista de opciones: "ID - Nombre (IP)"
         opciones = []
@@ -409,39 +470,9 @@ class MikroTikView(ttk.Frame):
         
     def filter_mikrotiks(self, *args):
         """Filtra la lista de MikroTiks según el texto de búsqueda."""
-        search_text = self.search_var.get().lower()
-        
-        # Limpiar tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Obtener todos los MikroTiks
-        mikrotiks = self.service.obtener_todos()
-        
-        # Filtrar e insertar
-        for mtk in mikrotiks:
-            if (search_text in mtk.nombre.lower() or
-                search_text in mtk.ip_mikrotik.lower() or
-                search_text in mtk.estado.lower() or
-                search_text in (mtk.modelo or "").lower() or
-                search_text in (mtk.ubicacion or "").lower()):
-                
-                estado_icon = {
-                    "activo": "🟢",
-                    "inactivo": "🔴", 
-                    "mantenimiento": "🟡",
-                    "error": "❌"
-                }.get(mtk.estado, "⚪")
-                
-                ping_icon = "✅" if mtk.disponible else "❌"
-                
-                self.tree.insert("", tk.END, values=(
-                    mtk.id,
-                    mtk.nombre,
-                    mtk.ip_mikrotik,
-                    f"{estado_icon} {mtk.estado.title()}",
-                    ping_icon
-                ))
+        # El filtro se aplica en la consulta (nombre, IP, estado, modelo o ubicación) y se pagina igual
+        self.texto_lista = self.search_var.get().strip() or None
+        self.reload_tree()
     
     def update_statistics(self):
         """Actualiza las estadísticas mostradas."""
@@ -581,15 +612,8 @@ class MikroTikView(ttk.Frame):
         # Conectar en hilo separado
         def connect_thread():
             try:
-                exito, mensaje, conexion = self.service.conectar_mikrotik(self.mikrotik_actual.id)
-                
-                # Cerrar conexión inmediatamente (solo era para probar)
-                if conexion:
-                    try:
-                        conexion.close()
-                    except:
-                        pass
-                
+                # La sesión queda abierta en el pool para las operaciones siguientes
+                exito, mensaje = self.service.probar_conexion(self.mikrotik_actual.id)
                 self.message_queue.put(("connect_result", exito, mensaje))
             except Exception as e:
                 self.message_queue.put(("connect_error", str(e)))
@@ -708,6 +732,30 @@ class MikroTikView(ttk.Frame):
         self.export_text.insert(tk.END, "# Área de export limpiada\n")
         self.export_text.insert(tk.END, "# Presiona 'Obtener Export' para ver la configuración\n")
     
+    def buscar_en_respaldos(self):
+        """Busca un texto en los exports respaldados de todos los MikroTiks."""
+        texto = simpledialog.askstring(
+            "Buscar en respaldos",
+            "Texto a buscar en la configuración de todos los equipos\n"
+            "(lista de direcciones, regla de firewall, VLAN...):",
+            parent=self
+        )
+        if not texto or not texto.strip():
+            return
+        
+        self.export_text.delete(1.0, tk.END)
+        self.export_text.insert(tk.END, f"🔄 Buscando '{texto}' en los respaldos...\n")
+        
+        # Buscar en hilo separado
+        def search_thread():
+            try:
+                resultados = self.service.respaldos.buscar(texto)
+                self.message_queue.put(("search_result", texto, resultados))
+            except Exception as e:
+                self.message_queue.put(("search_error", str(e)))
+        
+        threading.Thread(target=search_thread, daemon=True).start()
+    
     def verificar_conectividad_masiva(self):
         """Verifica la conectividad de todos los MikroTiks."""
         if not messagebox.askyesno(
@@ -941,6 +989,124 @@ class MikroTikView(ttk.Frame):
     
     # === PROCESAMIENTO DE MENSAJES DE HILOS ===
     
+    def abrir_cambio_masivo(self):
+        """Abre el diálogo para aplicar cambios de ancho de banda a muchas colas."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Cambio Masivo de Colas")
+        dialog.geometry("760x560")
+        dialog.transient(self)
+        
+        main_frame = ttk.Frame(dialog, padding=15)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(
+            main_frame,
+            text="Una fila por cola: MikroTik (nombre, IP o ID); cola; Mbps bajada[; Mbps subida]",
+            font=("Arial", 9)
+        ).pack(anchor=tk.W)
+        
+        filas_text = scrolledtext.ScrolledText(main_frame, height=8, font=("Consolas", 9))
+        filas_text.pack(fill=tk.X, pady=(5, 10))
+        filas_text.insert(tk.END, "MTK-CLIENTE-001; cliente-juan; 20\n")
+        
+        # Progreso
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.pack(fill=tk.X)
+        
+        barra = ttk.Progressbar(progress_frame, mode="determinate")
+        barra.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        estado_label = ttk.Label(progress_frame, text="Listo", width=25)
+        estado_label.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Resultados por fila
+        resultados_tree = ttk.Treeview(
+            main_frame,
+            columns=("mikrotik", "cola", "anterior", "nuevo", "resultado"),
+            show="headings",
+            height=10
+        )
+        for columna, titulo, ancho in [("mikrotik", "MikroTik", 120), ("cola", "Cola", 120),
+                                       ("anterior", "Anterior", 110), ("nuevo", "Nuevo", 110),
+                                       ("resultado", "Resultado", 260)]:
+            resultados_tree.column(columna, width=ancho)
+            resultados_tree.heading(columna, text=titulo)
+        resultados_tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X)
+        
+        def aplicar():
+            cambios = []
+            nombres = {}
+            lineas = filas_text.get(1.0, tk.END).splitlines()
+            
+            # Resolver todas las filas con una sola consulta: nombre, luego IP, luego ID
+            equipos = {}
+            if any(linea.strip() for linea in lineas):
+                listado = self.service.obtener_listado()
+                for clave in ("id", "ip_mikrotik", "nombre"):  # Las claves posteriores tienen prioridad
+                    equipos.update({str(getattr(fila, clave)): fila for fila in reversed(listado)})
+            
+            for numero, linea in enumerate(lineas, start=1):
+                if not linea.strip():
+                    continue
+                partes = [parte.strip() for parte in linea.replace(",", ";").split(";")]
+                try:
+                    if len(partes) not in (3, 4):
+                        raise ValueError("se esperan 3 o 4 campos")
+                    mikrotik = equipos.get(partes[0])
+                    if not mikrotik:
+                        raise ValueError(f"MikroTik '{partes[0]}' no encontrado")
+                    mbps = [float(valor) for valor in partes[2:]]
+                    if any(valor <= 0 for valor in mbps):
+                        raise ValueError("el ancho debe ser mayor a 0")
+                except ValueError as e:
+                    messagebox.showerror("Error", f"Fila {numero}: {str(e)}", parent=dialog)
+                    return
+                nombres[mikrotik.id] = mikrotik.nombre
+                cambios.append((mikrotik.id, partes[1], *mbps))
+            
+            if not cambios:
+                messagebox.showwarning("Advertencia", "Ingrese al menos una fila", parent=dialog)
+                return
+            
+            if not messagebox.askyesno(
+                "Confirmar Cambios",
+                f"¿Aplicar {len(cambios)} cambios en {len(nombres)} MikroTiks?\n\n"
+                f"⚠️ Esto modificará la configuración de los equipos.",
+                parent=dialog
+            ):
+                return
+            
+            for item in resultados_tree.get_children():
+                resultados_tree.delete(item)
+            barra.config(maximum=len(cambios), value=0)
+            estado_label.config(text=f"0 / {len(cambios)}")
+            aplicar_button.config(state=tk.DISABLED)
+            
+            # Los avisos de progreso llegan desde hilos de trabajo: pasarlos por la cola de
+            # mensajes junto con los widgets de este diálogo (puede haber varios abiertos)
+            ui = (dialog, barra, estado_label, resultados_tree, aplicar_button, nombres)
+            
+            def bulk_thread():
+                try:
+                    resultados = self.service.aplicar_cambios_masivos(
+                        cambios,
+                        progreso=lambda hechas, total, resultado: self.message_queue.put(
+                            ("bulk_progress", ui, hechas, total, resultado))
+                    )
+                    self.message_queue.put(("bulk_result", ui, resultados))
+                except Exception as e:
+                    self.message_queue.put(("bulk_error", ui, str(e)))
+            
+            threading.Thread(target=bulk_thread, daemon=True).start()
+        
+        aplicar_button = ttk.Button(button_frame, text="✅ Aplicar", style="Primary.TButton", command=aplicar)
+        aplicar_button.pack(side=tk.LEFT)
+        
+        ttk.Button(button_frame, text="❌ Cerrar", command=dialog.destroy).pack(side=tk.RIGHT)
+    
     def check_queue(self):
         """Verifica mensajes de hilos en segundo plano."""
         try:
@@ -1059,6 +1225,31 @@ class MikroTikView(ttk.Frame):
                 self.export_text.insert(tk.END, f"# Error inesperado al obtener export:\n# {error_msg}")
                 messagebox.showerror("Error", f"Error al obtener export:\n{error_msg}")
             
+            elif message_type == "search_result":
+                texto, resultados = args
+                
+                self.export_text.delete(1.0, tk.END)
+                if not resultados:
+                    self.export_text.insert(tk.END, f"# Ningún respaldo contiene '{texto}'\n")
+                else:
+                    equipos = len({resultado["mikrotik_id"] for resultado in resultados})
+                    self.export_text.insert(tk.END, f"# '{texto}': {len(resultados)} líneas en {equipos} equipos\n")
+                    equipo_actual = None
+                    for resultado in resultados:
+                        if resultado["mikrotik_id"] != equipo_actual:
+                            equipo_actual = resultado["mikrotik_id"]
+                            fecha = time.strftime("%Y-%m-%d %H:%M", time.localtime(resultado["fecha"]))
+                            nombre = resultado["nombre"] or f"ID {equipo_actual}"
+                            self.export_text.insert(tk.END, f"\n# {nombre} (respaldo del {fecha})\n")
+                        self.export_text.insert(
+                            tk.END, f"{resultado['seccion']} [{resultado['numero']}] {resultado['linea']}\n"
+                        )
+            
+            elif message_type == "search_error":
+                error_msg = args[0]
+                self.export_text.delete(1.0, tk.END)
+                self.export_text.insert(tk.END, f"# Error al buscar en los respaldos:\n# {error_msg}")
+            
             elif message_type == "verify_all_result":
                 resultados = args[0]
                 
@@ -1081,6 +1272,33 @@ class MikroTikView(ttk.Frame):
                 error_msg = args[0]
                 messagebox.showerror("Error", f"Error en verificación masiva:\n{error_msg}")
             
+            elif message_type in ("bulk_progress", "bulk_result", "bulk_error"):
+                (dialog, barra, estado_label, resultados_tree, aplicar_button, nombres), *args = args
+                if not dialog.winfo_exists():
+                    return  # El diálogo se cerró: el trabajo sigue, pero no hay nada que actualizar
+                
+                if message_type == "bulk_progress":
+                    hechas, total, resultado = args
+                    barra.config(value=hechas)
+                    estado_label.config(text=f"{hechas} / {total}")
+                    icono = "✅" if resultado["verificado"] else ("⚠️" if resultado["exito"] else "❌")
+                    resultados_tree.insert("", tk.END, values=(
+                        nombres.get(resultado["mikrotik_id"], resultado["mikrotik_id"]),
+                        resultado["cola"],
+                        resultado["limite_anterior"] or "-",
+                        resultado["limite_nuevo"],
+                        f"{icono} {resultado['mensaje']}"
+                    ))
+                elif message_type == "bulk_result":
+                    resultados = args[0]
+                    verificados = sum(1 for resultado in resultados if resultado["verificado"])
+                    aplicar_button.config(state=tk.NORMAL)
+                    estado_label.config(text=f"✅ {verificados} de {len(resultados)} verificados")
+                else:
+                    aplicar_button.config(state=tk.NORMAL)
+                    estado_label.config(text="❌ Error")
+                    messagebox.showerror("Error", f"Error en cambio masivo:\n{args[0]}", parent=dialog)
+            
         except Exception as e:
             print(f"Error al procesar mensaje {message_type}: {str(e)}")
             messagebox.showerror("Error", f"Error al procesar operación:\n{str(e)}")
\ No newline at end of file
@@ -150,7 +150,7 @@ class NodosGPONView(ttk.Frame):
         # Tabla principal (Treeview = widget de tabla de tkinter)
         self.tree = ttk.Treeview(
             self.tree_frame,
-            columns=("id", "alias", "nombre", "ip"),  # Columnas de datos
+            columns=("id", "alias", "nombre", "ip", "estado"),  # Columnas de datos
             show="headings",  # Solo mostrar encabezados, no el árbol
             yscrollcommand=self.scrollbar.set  # Conectar con scrollbar
         )
@@ -160,12 +160,14 @@ class NodosGPONView(ttk.Frame):
         self.tree.column("alias", width=100)                   # Alias, 100px
         self.tree.column("nombre", width=250)                  # Nombre, 250px
         self.tree.column("ip", width=120)                      # IP, 120px
+        self.tree.column("estado", width=130)                  # Último sondeo del monitoreo
         
         # Configurar los títulos de los encabezados
         self.tree.heading("id", text="ID")
         self.tree.heading("alias", text="Alias")
         self.tree.heading("nombre", text="Nombre")
         self.tree.heading("ip", text="IP")
+        self.tree.heading("estado", text="Estado")
         
         # Mostrar la tabla en el frame
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -193,6 +195,7 @@ class NodosGPONView(ttk.Frame):
         
         # Obtener todos los nodos GPON desde el servicio
         nodos = self.service.obtener_todos()
+        estados = self.service.obtener_estados_conectividad()
         
         # Insertar cada nodo en la tabla
         for nodo in nodos:
@@ -200,9 +203,18 @@ class NodosGPONView(ttk.Frame):
                 nodo.id,           # ID del nodo
                 nodo.alias_olt,    # Alias de la OLT
                 nodo.nombre_olt,   # Nombre de la OLT
-                nodo.ip_olt        # IP de la OLT
+                nodo.ip_olt,       # IP de la OLT
+                self._texto_estado(estados.get(nodo.id))  # Último estado de conectividad
             ))
     
+    def _texto_estado(self, estado):
+        """Devuelve el texto de la columna Estado a partir del último sondeo."""
+        if estado is None:
+            return "Sin sondear"
+        if estado.disponible:
+            return f"🟢 {estado.rtt_ms:.1f} ms"
+        return f"🔴 {estado.error or 'sin respuesta'}"
+    
     def filter_table(self, *args):
         """
         Filtra la tabla según el texto de búsqueda ingresado.
@@ -217,6 +229,7 @@ class NodosGPONView(ttk.Frame):
         
         # Obtener todos los nodos desde la base de datos
         nodos = self.service.obtener_todos()
+        estados = self.service.obtener_estados_conectividad()
         
         # Filtrar e insertar solo los nodos que coinciden con la búsqueda
         for nodo in nodos:
@@ -231,7 +244,8 @@ class NodosGPONView(ttk.Frame):
                     nodo.id,
                     nodo.alias_olt,
                     nodo.nombre_olt,
-                    nodo.ip_olt
+                    nodo.ip_olt,
+                    self._texto_estado(estados.get(nodo.id))
                 ))
     
     def on_item_select(self, event):
@@ -146,7 +146,7 @@ class NodosIPRANView(ttk.Frame):
         # Tabla (Treeview)
         self.tree = ttk.Treeview(
             self.tree_frame,
-            columns=("id", "alias", "nombre", "ip"),
+            columns=("id", "alias", "nombre", "ip", "estado"),
             show="headings",
             yscrollcommand=self.scrollbar.set
         )
@@ -156,12 +156,14 @@ class NodosIPRANView(ttk.Frame):
         self.tree.column("alias", width=100)
         self.tree.column("nombre", width=250)
         self.tree.column("ip", width=120)
+        self.tree.column("estado", width=130)
         
         # Configurar los encabezados
         self.tree.heading("id", text="ID")
         self.tree.heading("alias", text="Alias")
         self.tree.heading("nombre", text="Nombre")
         self.tree.heading("ip", text="IP")
+        self.tree.heading("estado", text="Estado")
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -187,6 +189,7 @@ class NodosIPRANView(ttk.Frame):
         
         # Obtener todos los nodos
         nodos = self.service.obtener_todos()
+        estados = self.service.obtener_estados_conectividad()
         
         # Insertar los nodos en la tabla
         for nodo in nodos:
@@ -194,9 +197,18 @@ class NodosIPRANView(ttk.Frame):
                 nodo.id,
                 nodo.alias_nodo,
                 nodo.nombre_nodo,
-                nodo.ip_nodo
+                nodo.ip_nodo,
+                self._texto_estado(estados.get(nodo.id))
             ))
     
+    def _texto_estado(self, estado):
+        """Devuelve el texto de la columna Estado a partir del último sondeo."""
+        if estado is None:
+            return "Sin sondear"
+        if estado.disponible:
+            return f"🟢 {estado.rtt_ms:.1f} ms"
+        return f"🔴 {estado.error or 'sin respuesta'}"
+    
     def filter_table(self, *args):
         """Filtra la tabla según el texto de búsqueda."""
         search_text = self.search_var.get().lower()
@@ -207,6 +219,7 @@ class NodosIPRANView(ttk.Frame):
         
         # Obtener todos los nodos
         nodos = self.service.obtener_todos()
+        estados = self.service.obtener_estados_conectividad()
         
         # Filtrar e insertar los nodos en la tabla
         for nodo in nodos:
@@ -220,7 +233,8 @@ class NodosIPRANView(ttk.Frame):
                     nodo.id,
                     nodo.alias_nodo,
                     nodo.nombre_nodo,
-                    nodo.ip_nodo
+                    nodo.ip_nodo,
+                    self._texto_estado(estados.get(nodo.id))
                 ))
     
     def on_item_select(self, event):
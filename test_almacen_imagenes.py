@@ -0,0 +1,159 @@
+# test_almacen_imagenes.py
+"""
+Script para probar el almacén de imágenes de los documentos (blobs por hash)
+"""
+import base64
+import json
+import os
+import random
+import sys
+from io import BytesIO
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from alembic import command
+from alembic.config import Config
+from PIL import Image
+from sqlalchemy import text
+
+from infrastructure.almacenamiento import AlmacenBlobs, CacheArchivos, es_referencia
+from application.services.documento_service import DocumentoService
+from application.services.imagen_documento_service import ImagenDocumentoService
+from application.services.documento_export_service import DocumentoExportService
+
+
+def imagen_png(semilla: int) -> bytes:
+    """Imagen PNG de ruido (no se comprime casi nada), siempre la misma para cada semilla."""
+    buffer = BytesIO()
+    Image.frombytes("RGB", (64, 48), random.Random(semilla).randbytes(64 * 48 * 3)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def normalizada(service: DocumentoService, datos: bytes) -> bytes:
+    """Bytes que guarda la ingesta para una imagen (se recomprime al guardarla)."""
+    return service.almacen_imagenes.leer(service.imagenes.ingerir(datos).hash)
+
+
+def servicio_con_almacen(directorio) -> DocumentoService:
+    """DocumentoService con el almacén de imágenes y la caché de exportaciones dentro de 'directorio'."""
+    service = DocumentoService()
+    service.almacen_imagenes = AlmacenBlobs(str(directorio / "blobs"))
+    service.imagenes = ImagenDocumentoService(service.almacen_imagenes)
+    service.cache_exportaciones = CacheArchivos(str(directorio / "cache"),
+                                                tamano_maximo=10 * 1024 * 1024, extension=".docx")
+    return service
+
+
+def crear(service: DocumentoService, cliente_id: str, contenido: dict):
+    """Crea un documento con valores por defecto para los campos obligatorios."""
+    return service.crear(titulo=f"Upgrade {cliente_id}", cliente_id=cliente_id, cliente_nombre="Juan Pérez",
+                         cliente_direccion="Calle 1", ancho_banda="100 Mbps", tipo_transaccion="UPGRADE",
+                         tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez", contenido_json=contenido)
+
+
+def test_almacen_deduplica(tmp_path):
+    """Los mismos bytes se guardan una sola vez, en un subdirectorio por hash."""
+    almacen = AlmacenBlobs(str(tmp_path))
+    imagen = imagen_png(1)
+    hash_imagen = almacen.guardar(imagen)
+    assert almacen.guardar(imagen) == hash_imagen
+    assert almacen.ruta(hash_imagen).endswith(os.path.join(hash_imagen[:2], hash_imagen[2:4], hash_imagen))
+    assert almacen.leer(hash_imagen) == imagen and almacen.leer("0" * 64) is None
+    assert list(almacen.hashes()) == [hash_imagen]
+    
+    otra = almacen.guardar(imagen_png(2))
+    assert almacen.purgar({otra}) == 0  # Recién escrita: todavía protegida
+    assert almacen.purgar({otra}, antiguedad_minima=0) == 1
+    assert list(almacen.hashes()) == [otra]
+    print("✅ Almacén con deduplicación y purga")
+
+
+def test_documentos_guardan_referencias(base_datos, tmp_path):
+    """contenido_json solo lleva referencias; la misma captura en dos documentos ocupa un archivo."""
+    service = servicio_con_almacen(tmp_path)
+    grafica = imagen_png(1)
+    primero = crear(service, "CLI-1", {"grafica_consumo": grafica, "correo": "Upgrade aplicado",
+                                       "imagenes": {"Topología": imagen_png(2)}})
+    segundo = crear(service, "CLI-2", {"grafica_consumo": grafica})
+    
+    documento = service.obtener_por_id(primero.id)
+    guardado = json.loads(documento.contenido_json)
+    assert es_referencia(guardado["grafica_consumo"]) and es_referencia(guardado["imagenes"]["Topología"])
+    assert len(documento.contenido_json) < 300
+    assert len(list(service.almacen_imagenes.hashes())) == 2
+    
+    contenido = service.obtener_contenido(documento)
+    assert contenido["grafica_consumo"] == normalizada(service, grafica) and contenido["correo"] == "Upgrade aplicado"
+    assert contenido["imagenes"]["Topología"] == normalizada(service, imagen_png(2))
+    # Las referencias no se indexan para la búsqueda
+    assert service.buscar(guardado["grafica_consumo"][5:15]) == []
+    
+    # La exportación recibe las imágenes como bytes
+    exportador = DocumentoExportService()
+    exportador.documento_service = service
+    exportador.docs_dir = str(tmp_path)
+    assert os.path.getsize(exportador.exportar_a_word(segundo.id)) > len(grafica)
+    
+    # Al eliminar el primero, su imagen de topología queda huérfana; la gráfica sigue en uso
+    service.eliminar(primero.id)
+    assert service.purgar_imagenes_huerfanas(antiguedad_minima=0) == 1
+    assert service.obtener_contenido(service.obtener_por_id(segundo.id))["grafica_consumo"] == normalizada(service, grafica)
+    print("✅ Documentos con referencias al almacén")
+
+
+def test_migracion_documentos_existentes(base_datos, tmp_path):
+    """La migración 0002 pasa las imágenes en base64 al almacén y se puede revertir."""
+    grafica = base64.b64encode(imagen_png(3)).decode()
+    contenidos = [
+        {"grafica_consumo": grafica, "correo": "Upgrade aplicado"},
+        {"detalle": {"topologia_imagen": grafica}, "observaciones": ["sin imagen", "x" * 300]},
+        {"correo": "Documento sin imágenes"},
+    ]
+    with base_datos.begin() as conexion:
+        for numero, contenido in enumerate(contenidos):
+            conexion.execute(text(
+                "INSERT INTO documentos (titulo, cliente_id, cliente_nombre, ancho_banda, tipo_transaccion, "
+                "tipo_topologia, ingeniero, contenido_json) VALUES ('Doc', :cliente, 'Cliente', '10 Mbps', "
+                "'UPGRADE', 'GPON', 'Ing', :contenido)"
+            ), {"cliente": f"CLI-{numero}", "contenido": json.dumps(contenido)})
+        conexion.execute(text("INSERT INTO documentos (titulo, cliente_id, cliente_nombre, ancho_banda, "
+                              "tipo_transaccion, tipo_topologia, ingeniero, contenido_json) "
+                              "VALUES ('Roto', 'CLI-9', 'Cliente', '10 Mbps', 'UPGRADE', 'GPON', 'Ing', '{roto')"))
+    
+    directorio = str(tmp_path / "blobs")
+    configuracion = Config("alembic.ini")
+    configuracion.attributes["directorio_imagenes"] = directorio
+    with base_datos.begin() as conexion:
+        configuracion.attributes["connection"] = conexion
+        command.upgrade(configuracion, "head")
+    
+    with base_datos.connect() as conexion:
+        guardados = [json.loads(fila[0]) if fila[0] != "{roto" else fila[0] for fila in
+                     conexion.execute(text("SELECT contenido_json FROM documentos ORDER BY id"))]
+    referencia = guardados[0]["grafica_consumo"]
+    assert es_referencia(referencia) and guardados[1]["detalle"]["topologia_imagen"] == referencia
+    assert guardados[1]["observaciones"] == ["sin imagen", "x" * 300]  # No es base64 de una imagen
+    assert guardados[2] == contenidos[2] and guardados[3] == "{roto"
+    assert len(list(AlmacenBlobs(directorio).hashes())) == 1
+    
+    service = DocumentoService()
+    service.almacen_imagenes = AlmacenBlobs(directorio)
+    assert service.buscar(referencia[5:15]) == [] and len(service.buscar("upgrade aplicado")) == 1
+    assert service.obtener_contenido(service.obtener_por_id(1))["grafica_consumo"] == imagen_png(3)
+    
+    with base_datos.begin() as conexion:
+        configuracion.attributes["connection"] = conexion
+        command.downgrade(configuracion, "0001")
+    with base_datos.connect() as conexion:
+        restaurado = json.loads(conexion.execute(text("SELECT contenido_json FROM documentos WHERE id = 2")).scalar())
+    assert restaurado == contenidos[1]
+    print("✅ Migración de documentos existentes")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del almacén de imágenes de documentos")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,126 @@
+# test_busqueda_colas.py
+"""
+Script para probar la búsqueda de colas filtrada en el equipo y la caché de .id
+"""
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.network.simulador_routeros import SimuladorRouterOS
+from application.services.mikrotik_service import MikroTikService
+
+
+@contextmanager
+def equipo_simulado(colas):
+    """Levanta un simulador y devuelve (simulador, servicio, id del MikroTik que lo apunta) en la base actual."""
+    with SimuladorRouterOS(colas=colas) as simulador:
+        with SessionLocal() as db:
+            mikrotik = MikroTik(nombre="CCR-CORE", ip_mikrotik=simulador.host,
+                                usuario_acceso="admin", contrasena_acceso="x")
+            db.add(mikrotik)
+            db.commit()
+            mikrotik_id = mikrotik.id
+        
+        service = MikroTikService()
+        service.puerto_api = simulador.puerto
+        try:
+            yield simulador, service, mikrotik_id
+        finally:
+            service.pool_api.cerrar_todo()
+
+
+def test_filtro_en_el_equipo(base_datos):
+    """La cola se busca con ?name= en el equipo: solo viaja esa cola, no las 2000."""
+    with equipo_simulado(2000) as (simulador, service, mikrotik_id):
+        service.probar_conexion(mikrotik_id)
+        simulador.reiniciar_contadores()
+        
+        exito, mensaje = service.modificar_cola(mikrotik_id, "cliente-01500", 20)
+        
+        print(f"✅ Cambio con filtro: {simulador.bytes_enviados} bytes recibidos del equipo")
+        assert exito, mensaje
+        assert simulador.obtener_cola("cliente-01500")["max-limit"] == "20480k/20480k"
+        assert simulador.bytes_enviados < 200
+        
+        exito, mensaje = service.modificar_cola(mikrotik_id, "no-existe", 5)
+        assert not exito and "No se encontró" in mensaje
+
+
+def test_cambio_masivo_sin_listados_completos(base_datos):
+    """El cambio masivo pide al equipo solo las colas a cambiar (por nombre) y las verifica por .id."""
+    with equipo_simulado(2000) as (simulador, service, mikrotik_id):
+        service.probar_conexion(mikrotik_id)
+        simulador.reiniciar_contadores()
+        
+        cambios = [(mikrotik_id, f"cliente-{numero:05d}", 20) for numero in range(1, 2001, 20)]
+        cambios.append((mikrotik_id, "no-existe", 5))
+        resultados = service.aplicar_cambios_masivos(cambios)
+        
+        print(f"✅ Cambio masivo filtrado: {dict(simulador.comandos)}, {simulador.bytes_enviados} bytes")
+        assert all(resultado["verificado"] for resultado in resultados[:-1])
+        assert resultados[0]["limite_anterior"] == "10240k/10240k"
+        assert "No se encontró" in resultados[-1]["mensaje"]
+        assert simulador.obtener_cola("cliente-01981")["max-limit"] == "20480k/20480k"
+        
+        assert simulador.listados_completos == 0
+        # 101 nombres y 100 .id, de a colas_por_consulta (50) por consulta
+        assert simulador.comandos["/queue/simple/print"] == 3 + 2
+        assert simulador.comandos["/queue/simple/set"] == 100
+        assert len(service._ids_colas[mikrotik_id]) == 100
+
+
+def test_cache_evita_busquedas(base_datos):
+    """Cambiar la misma cola otra vez no vuelve a buscarla en el equipo."""
+    with equipo_simulado(100) as (simulador, service, mikrotik_id):
+        for mbps in (10, 20, 30):
+            assert service.modificar_cola(mikrotik_id, "cliente-00042", mbps)[0]
+        
+        print(f"✅ Caché de .id: {dict(simulador.comandos)}")
+        assert simulador.comandos["/queue/simple/print"] == 1
+        assert simulador.comandos["/queue/simple/set"] == 3
+        assert simulador.obtener_cola("cliente-00042")["max-limit"] == "30720k/30720k"
+
+
+def test_id_obsoleto_se_vuelve_a_buscar(base_datos):
+    """Si la cola se borró y se volvió a crear, el .id guardado se descarta y se busca de nuevo."""
+    with equipo_simulado(10) as (simulador, service, mikrotik_id):
+        assert service.modificar_cola(mikrotik_id, "cliente-00003", 10)[0]
+        
+        simulador.eliminar_cola("cliente-00003")
+        simulador.agregar_cola("cliente-00003")
+        assert service.modificar_cola(mikrotik_id, "cliente-00003", 15)[0]
+        assert simulador.obtener_cola("cliente-00003")["max-limit"] == "15360k/15360k"
+        
+        # Si ya no existe, se informa sin dejar la caché sucia
+        simulador.eliminar_cola("cliente-00003")
+        exito, mensaje = service.modificar_cola(mikrotik_id, "cliente-00003", 20)
+        print(f"✅ .id obsoleto: {mensaje}")
+        assert not exito and "No se encontró" in mensaje
+        assert "cliente-00003" not in service._ids_colas.get(mikrotik_id, {})
+
+
+def test_cache_se_invalida_al_reconectar(base_datos):
+    """Una sesión nueva (equipo reiniciado, credenciales cambiadas) empieza sin caché."""
+    with equipo_simulado(10) as (simulador, service, mikrotik_id):
+        service.obtener_colas(mikrotik_id)
+        assert len(service._ids_colas[mikrotik_id]) == 10
+        
+        service.pool_api.cerrar_todo()
+        assert service.modificar_cola(mikrotik_id, "cliente-00001", 10)[0]
+        assert service._ids_colas[mikrotik_id] == {"cliente-00001": "*1"}
+        
+        service.actualizar(mikrotik_id, contrasena="nueva")
+        print("✅ Caché invalidada al reconectar y al actualizar el equipo")
+        assert mikrotik_id not in service._ids_colas
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la búsqueda de colas")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,112 @@
+# test_busqueda_documentos.py
+"""
+Script para probar la búsqueda de documentos con el índice FTS5
+"""
+import base64
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import text
+
+from infrastructure.database.config import SessionLocal
+from application.services.documento_service import DocumentoService
+
+
+def crear(service: DocumentoService, cliente_id: str, cliente_nombre: str, contenido=None, **campos):
+    """Crea un documento con valores por defecto para los campos obligatorios."""
+    datos = dict(titulo=f"Upgrade {cliente_nombre}", cliente_id=cliente_id, cliente_nombre=cliente_nombre,
+                 cliente_direccion="Av. Siempre Viva 742", ancho_banda="100 Mbps", tipo_transaccion="UPGRADE",
+                 tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez", contenido_json=contenido)
+    datos.update(campos)
+    return service.crear(**datos)
+
+
+def ids(filas) -> list:
+    """IDs de una lista de documentos o filas."""
+    return [fila.id for fila in filas]
+
+
+def test_busqueda_por_prefijo_y_relevancia(base_datos):
+    """Las palabras se buscan como prefijos, sin acentos, y el ID de cliente pesa más que el contenido."""
+    service = DocumentoService()
+    imagen = base64.b64encode(bytes(range(256)) * 8).decode()
+    juan = crear(service, "CLI-100", "Juan Pérez",
+                 contenido={"correo": "Se amplía el enlace de Telecomunicaciones Norte",
+                            "detalle": {"observaciones": "vlan 300 hacia nodo Colón"},
+                            "topologia_imagen": imagen})
+    norte = crear(service, "NORTE-7", "Telecomunicaciones Norte SA", ingeniero="Luis Díaz")
+    crear(service, "CLI-200", "María López", tipo_transaccion="DOWNGRADE")
+    
+    assert ids(service.buscar("juan per")) == [juan.id]
+    assert ids(service.buscar("PEREZ")) == [juan.id]
+    assert ids(service.buscar("colon")) == [juan.id]  # Texto anidado en contenido_json
+    assert ids(service.buscar("downgr")) == [3]
+    # Los dos mencionan "norte"; el que lo tiene en el cliente va primero
+    assert ids(service.buscar("norte")) == [norte.id, juan.id]
+    # Las imágenes en base64 no se indexan
+    assert service.buscar(imagen[:40]) == []
+    
+    fila = service.buscar("juan")[0]
+    assert fila.cliente_nombre == "Juan Pérez" and fila.fecha_creacion.year >= 2024
+    assert ids(service.buscar("cliente_id:cli* NOT lopez", consulta_fts=True)) == [juan.id]
+    assert ids(service.repository.search_by_text("telecom")) == [norte.id, juan.id]
+    print("✅ Búsqueda por prefijo, sin acentos y por relevancia")
+
+
+def test_triggers_mantienen_el_indice(base_datos):
+    """Actualizar o eliminar un documento actualiza el índice; un JSON inválido no rompe nada."""
+    service = DocumentoService()
+    documento = crear(service, "CLI-1", "Pedro Ruiz", contenido={"correo": "enlace original"})
+    
+    service.actualizar(documento.id, cliente_nombre="Pedro Sánchez", contenido_json={"correo": "enlace nuevo"})
+    assert service.buscar("original") == []
+    assert service.buscar("cliente_nombre:ruiz", consulta_fts=True) == []
+    assert ids(service.buscar("sanchez nuevo")) == [documento.id]
+    
+    service.eliminar(documento.id)
+    assert service.buscar("sanchez") == []
+    
+    with SessionLocal() as db:
+        db.execute(text("UPDATE documentos SET contenido_json = 'no es json'"))
+        db.commit()
+    otro = crear(service, "CLI-2", "Rosa Vera")
+    with SessionLocal() as db:
+        db.execute(text("UPDATE documentos SET contenido_json = '{roto' WHERE id = :id"), {"id": otro.id})
+        db.commit()
+    assert ids(service.buscar("rosa")) == [otro.id]
+    
+    try:
+        service.buscar('"sin cerrar', consulta_fts=True)
+        assert False, "Debió rechazar la consulta"
+    except ValueError:
+        pass
+    print("✅ Índice sincronizado por triggers")
+
+
+def test_indice_en_base_existente(base_datos):
+    """En una base anterior al índice, asegurar_indice_texto lo crea e indexa lo que había."""
+    service = DocumentoService()
+    crear(service, "CLI-1", "Carla Núñez")
+    crear(service, "CLI-2", "Diego Paz")
+    with SessionLocal() as db:
+        for nombre in ("documentos_fts_ai", "documentos_fts_au", "documentos_fts_ad"):
+            db.execute(text(f"DROP TRIGGER {nombre}"))
+        db.execute(text("DROP TABLE documentos_fts"))
+        db.commit()
+    
+    assert service.repository.asegurar_indice_texto() == 2
+    assert service.repository.asegurar_indice_texto() == 0
+    assert len(service.buscar("nunez")) == 1
+    crear(service, "CLI-3", "Elena Paz")
+    assert len(service.buscar("paz")) == 2
+    print("✅ Índice creado en una base existente")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la búsqueda de documentos")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
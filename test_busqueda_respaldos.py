@@ -0,0 +1,105 @@
+# test_busqueda_respaldos.py
+"""
+Script para probar la búsqueda de texto en los respaldos de toda la flota
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
+
+
+def export_cpe(numero, bloqueados=("10.66.0.1",), vlan=100):
+    """Arma el export de un CPE con una lista de direcciones y una VLAN."""
+    lineas = [
+        "# software id = ABCD-1234",
+        "/interface vlan",
+        f"add interface=ether1 name=vlan{vlan} vlan-id={vlan}",
+        "/ip firewall address-list",
+    ]
+    lineas += [f"add address={ip} list=bloqueados" for ip in bloqueados]
+    lineas += [
+        "/ip firewall filter",
+        "add action=drop chain=forward \\",
+        "    src-address-list=bloqueados",
+        "/system identity",
+        f"set name=CPE-{numero:04d}",
+    ]
+    return "\n".join(lineas)
+
+
+def test_busqueda_en_la_flota(base_datos):
+    """La búsqueda devuelve equipo, versión y líneas coincidentes de la última versión de cada equipo."""
+    with SessionLocal() as db:
+        for numero in range(1, 4):
+            db.add(MikroTik(id=numero, nombre=f"CPE-{numero:04d}", ip_mikrotik=f"10.0.0.{numero}"))
+        db.commit()
+    
+    service = RespaldoConfiguracionService()
+    service.guardar_export(1, export_cpe(1), fecha=1000)
+    service.guardar_export(2, export_cpe(2, bloqueados=("10.66.0.1", "10.66.0.2"), vlan=200), fecha=1000)
+    service.guardar_export(3, export_cpe(3, bloqueados=()), fecha=1000)
+    
+    resultados = service.buscar("10.66.0.1")
+    print(f"✅ Búsqueda: {resultados[0]}")
+    assert [(r["mikrotik_id"], r["nombre"], r["fecha"]) for r in resultados] == [
+        (1, "CPE-0001", 1000), (2, "CPE-0002", 1000)]
+    assert resultados[0]["seccion"] == "/ip firewall address-list"
+    assert resultados[0]["linea"] == "add address=10.66.0.1 list=bloqueados"
+    
+    # Las líneas partidas con '\\' se indexan como una sola
+    reglas = service.buscar("src-address-list=bloqueados")
+    assert {r["mikrotik_id"] for r in reglas} == {1, 2, 3}
+    assert reglas[0]["linea"] == "add action=drop chain=forward src-address-list=bloqueados"
+    
+    assert [r["mikrotik_id"] for r in service.buscar("vlan-id=200")] == [2]
+    assert len(service.buscar("bloqueados", seccion="/ip firewall address-list")) == 3
+    assert [r["mikrotik_id"] for r in service.buscar('vlan200 OR "vlan-id"', consulta_fts=True, limite=10)] == [1, 2, 3]
+    assert service.buscar("no-existe") == [] and service.buscar("   ") == []
+    
+    try:
+        service.buscar('"sin cerrar', consulta_fts=True)
+        assert False, "La consulta inválida debería fallar"
+    except ValueError:
+        pass
+
+
+def test_indexacion_incremental(base_datos):
+    """Cada versión nueva reemplaza las líneas indexadas del equipo; las repetidas no tocan el índice."""
+    service = RespaldoConfiguracionService()
+    service.guardar_export(1, export_cpe(1), fecha=1000)
+    service.guardar_export(1, export_cpe(1), fecha=2000)  # Sin cambios
+    assert [r["fecha"] for r in service.buscar("10.66.0.1")] == [1000]
+    
+    service.guardar_export(1, export_cpe(1, bloqueados=("10.77.0.1",)), fecha=3000)
+    assert service.buscar("10.66.0.1") == []
+    assert [r["fecha"] for r in service.buscar("10.77.0.1")] == [3000]
+    
+    service.eliminar_respaldos(1)
+    assert service.buscar("bloqueados") == []
+    print("✅ Indexación incremental")
+
+
+def test_indexar_respaldos_existentes(base_datos):
+    """Los respaldos guardados sin índice se indexan una sola vez."""
+    service = RespaldoConfiguracionService()
+    service.indexar_busqueda = False
+    service.guardar_export(1, export_cpe(1), fecha=1000)
+    service.guardar_export(2, export_cpe(2), fecha=1000)
+    assert service.buscar("10.66.0.1") == []
+    
+    assert service.indexar_pendientes() == 2
+    assert service.indexar_pendientes() == 0
+    assert len(service.buscar("10.66.0.1")) == 2
+    print("✅ Respaldos existentes indexados")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la búsqueda en respaldos")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
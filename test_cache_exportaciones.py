@@ -0,0 +1,129 @@
+# test_cache_exportaciones.py
+"""
+Script para probar la caché de exportaciones a Word
+"""
+import os
+import sys
+import time
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from docx import Document as DocxDocument
+
+from infrastructure.almacenamiento import AlmacenBlobs, CacheArchivos
+from application.services import documento_export_service
+from application.services.documento_export_service import DocumentoExportService
+from application.services.imagen_documento_service import ImagenDocumentoService
+
+
+def exportador_contando(directorio) -> DocumentoExportService:
+    """Servicio de exportación con sus directorios dentro de 'directorio', que cuenta los Word que arma."""
+    exportador = DocumentoExportService()
+    service = exportador.documento_service
+    service.almacen_imagenes = AlmacenBlobs(str(directorio / "blobs"))
+    service.imagenes = ImagenDocumentoService(service.almacen_imagenes)
+    service.cache_exportaciones = CacheArchivos(str(directorio / "cache"),
+                                                tamano_maximo=10 * 1024 * 1024, extension=".docx")
+    exportador.docs_dir = str(directorio)
+    
+    exportador.armados = 0
+    construir = exportador._construir_documento
+    
+    def construir_contando(documento, nodo):
+        exportador.armados += 1
+        return construir(documento, nodo)
+    exportador._construir_documento = construir_contando
+    return exportador
+
+
+def crear(exportador: DocumentoExportService, cliente_id: str):
+    """Crea un documento con contenido."""
+    return exportador.documento_service.crear(
+        titulo=f"Upgrade {cliente_id}", cliente_id=cliente_id, cliente_nombre="Juan Pérez",
+        cliente_direccion="Calle 1", ancho_banda="100 Mbps", tipo_transaccion="UPGRADE",
+        tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez",
+        contenido_json={"correo": "Upgrade aplicado", "observaciones": ["Cliente conforme"]})
+
+
+def test_cache_lru_con_tamano_maximo(tmp_path):
+    """Al superar el tamaño máximo se eliminan las entradas usadas hace más tiempo."""
+    cache = CacheArchivos(str(tmp_path), tamano_maximo=250, extension=".docx")
+    for numero, grupo in enumerate(["1", "2", "12"]):
+        cache.guardar(grupo, "a" * 64, bytes([numero]) * 100)
+        # Fechas distintas aunque el sistema de archivos tenga poca resolución
+        os.utime(cache.ruta(grupo, "a" * 64), (time.time() - 100 + numero, time.time() - 100 + numero))
+    assert len(cache.entradas()) == 2 and cache.leer("1", "a" * 64) is None  # 300 > 250: se fue la más vieja
+    
+    assert cache.leer("2", "a" * 64) == bytes([1]) * 100  # Ahora "2" es la más reciente
+    cache.guardar("3", "b" * 64, b"x" * 100)
+    assert cache.leer("12", "a" * 64) is None and cache.leer("2", "a" * 64) is not None
+    
+    cache.guardar("4", "c" * 64, b"x" * 300)  # Más grande que toda la caché: no se guarda
+    assert cache.leer("4", "c" * 64) is None
+    assert cache.invalidar("2") == 1 and cache.invalidar("2") == 0
+    assert [os.path.basename(ruta) for ruta, _, _ in cache.entradas()] == [f"3_{'b' * 64}.docx"]
+    print("✅ Caché LRU con tamaño máximo")
+
+
+def test_reexportar_sin_cambios_usa_la_cache(base_datos, tmp_path):
+    """Un documento sin cambios no se vuelve a armar; al actualizarlo sí."""
+    exportador = exportador_contando(tmp_path)
+    documento = crear(exportador, "CLI-1")
+    otro = crear(exportador, "CLI-2")
+    
+    primera = exportador.exportar_a_word(documento.id)
+    with open(primera, "rb") as archivo:
+        contenido_primera = archivo.read()
+    os.remove(primera)
+    segunda = exportador.exportar_a_word(documento.id)
+    with open(segunda, "rb") as archivo:
+        assert archivo.read() == contenido_primera
+    exportador.exportar_a_word(otro.id)
+    assert exportador.armados == 2 and len(exportador.documento_service.cache_exportaciones.entradas()) == 2
+    
+    # Al actualizar se descarta su exportación y la siguiente refleja el cambio
+    exportador.documento_service.actualizar(documento.id, contenido_json={"correo": "Correo corregido"})
+    assert len(exportador.documento_service.cache_exportaciones.entradas()) == 1
+    textos = [parrafo.text for parrafo in DocxDocument(exportador.exportar_a_word(documento.id)).paragraphs]
+    assert "Correo corregido" in textos and exportador.armados == 3
+    
+    # Cambiar la versión de la plantilla invalida todas las exportaciones
+    version = documento_export_service.VERSION_PLANTILLA_WORD
+    documento_export_service.VERSION_PLANTILLA_WORD = version + 1
+    try:
+        exportador.exportar_a_word(otro.id)
+    finally:
+        documento_export_service.VERSION_PLANTILLA_WORD = version
+    assert exportador.armados == 4
+    
+    # Al eliminar el documento se eliminan sus exportaciones
+    exportador.documento_service.eliminar(documento.id)
+    assert not [ruta for ruta, _, _ in exportador.documento_service.cache_exportaciones.entradas()
+                if os.path.basename(ruta).startswith(f"{documento.id}_")]
+    print("✅ Reexportación desde la caché")
+
+
+def test_lote_comparte_la_cache(base_datos, tmp_path):
+    """La exportación en lote usa la misma caché, también desde los procesos del pool."""
+    exportador = exportador_contando(tmp_path)
+    ids = [crear(exportador, f"CLI-{numero}").id for numero in range(3)]
+    exportador.exportar_a_word(ids[0])
+    cache = exportador.documento_service.cache_exportaciones
+    
+    destino = str(tmp_path / "lote.zip")
+    resultado = exportador.exportar_lote(destino, procesos=2)
+    assert resultado.exportados == 3 and len(cache.entradas()) == 3
+    assert exportador.armados == 1  # Los otros dos se armaron en los procesos del pool
+    
+    exportador.exportar_lote(destino, procesos=0)
+    assert exportador.armados == 1  # Ya estaban todos en la caché
+    print("✅ Exportación en lote con caché")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la caché de exportaciones a Word")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,149 @@
+# test_cambios_masivos.py
+"""
+Script para probar el cambio masivo de ancho de banda en colas de MikroTik
+"""
+import sys
+import threading
+from itertools import chain
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.network.simulador_routeros import SimuladorRouterOS
+from application.services.mikrotik_service import MikroTikService
+
+
+class ConsultaFalsa:
+    """Imita el resultado de select(...).where(...) de librouteros."""
+    
+    def __init__(self, equipo, campos):
+        self.equipo = equipo
+        self.campos = campos
+        self.consulta = []
+    
+    def where(self, *condiciones):
+        # Palabras ?... de la API, evaluadas como las evalúa el simulador
+        self.consulta = [palabra[1:] for palabra in chain.from_iterable(condiciones)]
+        return self
+    
+    def __iter__(self):
+        for cola in self.equipo.colas.values():
+            if not self.consulta or SimuladorRouterOS._cumple(cola, self.consulta):
+                yield {campo: cola[campo] for campo in self.campos}
+
+
+class RutaColasFalsa:
+    """Imita conexion.path('/queue/simple') de librouteros sobre un diccionario."""
+    
+    def __init__(self, equipo):
+        self.equipo = equipo
+    
+    def select(self, *campos):
+        return ConsultaFalsa(self.equipo, campos)
+    
+    def update(self, **valores):
+        cola = next(cola for cola in self.equipo.colas.values() if cola[".id"] == valores[".id"])
+        # RouterOS devuelve el límite en bps; este equipo además recorta a su máximo
+        subida, bajada = MikroTikService._limite_a_bps(valores["max-limit"])
+        cola["max-limit"] = f"{min(subida, self.equipo.maximo)}/{min(bajada, self.equipo.maximo)}"
+
+
+class EquipoFalso:
+    """Estado de un MikroTik simulado: sus colas y cuántas veces se autenticó."""
+    
+    def __init__(self, colas, maximo=10 ** 12):
+        self.colas = {nombre: {".id": f"*{i}", "name": nombre, "max-limit": "1024000/1024000"}
+                      for i, nombre in enumerate(colas, start=1)}
+        self.maximo = maximo
+        self.logins = 0
+
+
+class ConexionFalsa:
+    def __init__(self, equipo):
+        equipo.logins += 1
+        self.equipo = equipo
+    
+    def path(self, ruta):
+        assert ruta == "/queue/simple"
+        return RutaColasFalsa(self.equipo)
+    
+    def close(self):
+        pass
+
+
+class MikroTikServiceFalso(MikroTikService):
+    """Servicio cuyas conexiones a la API van a equipos simulados."""
+    
+    def __init__(self, equipos):
+        super().__init__()
+        self.equipos = equipos
+    
+    def _crear_conexion(self, mikrotik):
+        return ConexionFalsa(self.equipos[mikrotik.ip_mikrotik])
+
+
+def crear_mikrotiks(ips):
+    """Crea MikroTiks con credenciales y devuelve sus IDs por IP."""
+    with SessionLocal() as db:
+        mikrotiks = [MikroTik(nombre=f"MTK-{i}", ip_mikrotik=ip, usuario_acceso="admin",
+                              contrasena_acceso="x") for i, ip in enumerate(ips)]
+        db.add_all(mikrotiks)
+        db.commit()
+        return {mikrotik.ip_mikrotik: mikrotik.id for mikrotik in mikrotiks}
+
+
+def test_cambio_masivo_con_verificacion(base_datos):
+    """Cada fila recibe su resultado, en orden, y se verifica leyendo el equipo."""
+    equipos = {
+        "10.0.0.1": EquipoFalso([f"cliente-{i}" for i in range(50)]),
+        "10.0.0.2": EquipoFalso(["cliente-a", "cliente-b"], maximo=50_000_000),
+    }
+    ids = crear_mikrotiks(list(equipos))
+    service = MikroTikServiceFalso(equipos)
+    
+    cambios = [(ids["10.0.0.1"], f"cliente-{i}", 20) for i in range(50)]
+    cambios += [
+        (ids["10.0.0.2"], "cliente-a", 30, 10),
+        (ids["10.0.0.2"], "cliente-b", 100),         # El equipo lo recorta a 50 Mbps
+        (ids["10.0.0.2"], "no-existe", 5),
+        (9999, "cliente-x", 5),                      # MikroTik inexistente
+    ]
+    
+    avisos = []
+    candado = threading.Lock()
+    
+    def progreso(hechas, total, resultado):
+        with candado:
+            avisos.append((hechas, total))
+    
+    resultados = service.aplicar_cambios_masivos(cambios, max_concurrencia=4, progreso=progreso)
+    
+    print(f"✅ Cambio masivo: {sum(r['verificado'] for r in resultados)} de {len(resultados)} verificados")
+    assert [(r["mikrotik_id"], r["cola"]) for r in resultados] == [c[:2] for c in cambios]
+    assert all(r["verificado"] for r in resultados[:51])
+    assert resultados[0]["limite_anterior"] == "1024000/1024000"
+    assert equipos["10.0.0.2"].colas["cliente-a"]["max-limit"] == "10240000/30720000"
+    assert resultados[51]["exito"] and not resultados[51]["verificado"]
+    assert not resultados[52]["exito"] and "No se encontró" in resultados[52]["mensaje"]
+    assert resultados[53]["mensaje"] == "MikroTik no encontrado"
+    
+    # Un aviso por fila y una sola sesión por equipo
+    assert sorted(avisos) == [(i, len(cambios)) for i in range(1, len(cambios) + 1)]
+    assert [equipo.logins for equipo in equipos.values()] == [1, 1]
+
+
+def test_limite_a_bps():
+    """Límites equivalentes en distinta notación se consideran iguales."""
+    assert MikroTikService._limite_a_bps("10240k/20480k") == MikroTikService._limite_a_bps("10240000/20480000")
+    assert MikroTikService._limite_a_bps("1M/2G") == (1_000_000, 2_000_000_000)
+    assert MikroTikService._limite_a_bps("basura") is None
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del cambio masivo de colas")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
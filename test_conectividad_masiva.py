@@ -0,0 +1,162 @@
+# test_conectividad_masiva.py
+"""
+Script para probar el barrido de conectividad masiva de MikroTiks
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import event
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.network.sondeador import ResultadoSondeo
+from application.services.mikrotik_service import MikroTikService
+
+
+class MikroTikServiceFalso(MikroTikService):
+    """Servicio cuyas sondas devuelven un resultado fijo por IP (sin red)."""
+    
+    def __init__(self, ips_caidas):
+        super().__init__()
+        self.ips_caidas = set(ips_caidas)
+        self.lotes = []  # Tamaño de cada llamada a sondear_masivo
+        self.sondeadas = []  # IPs sondeadas, en orden
+        self.en_error_al_sondear = []  # Equipos en 'error' en la base al empezar cada lote
+    
+    def sondear_masivo(self, ips, max_concurrencia=None):
+        self.lotes.append(len(ips))
+        self.sondeadas.extend(ips)
+        with SessionLocal() as db:
+            self.en_error_al_sondear.append(db.query(MikroTik).filter(MikroTik.estado == "error").count())
+        resultados = {}
+        for ip in ips:
+            resultado = ResultadoSondeo(ip=ip, enviados=1, metodo="icmp")
+            if ip not in self.ips_caidas:
+                resultado.recibidos = 1
+                resultado.rtts_ms.append(1.0)
+            resultados[ip] = resultado
+        return resultados
+
+
+def crear_flota(cantidad: int, desde: int = 0):
+    """Crea 'cantidad' MikroTiks activos (numerados a partir de 'desde') y devuelve sus IPs."""
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(desde, desde + cantidad)]
+    with SessionLocal() as db:
+        for i, ip in enumerate(ips):
+            db.add(MikroTik(nombre=f"MTK-{i:04d}", ip_mikrotik=ip, estado="activo"))
+        db.commit()
+    return ips
+
+
+def contar_commits_barrido(engine, cantidad: int, desde: int = 0, lote: int = 5000) -> int:
+    """Ejecuta un barrido sobre una flota nueva (reemplaza la anterior) y cuenta los COMMIT emitidos."""
+    with SessionLocal() as db:
+        db.query(MikroTik).delete()
+        db.commit()
+    ips = crear_flota(cantidad, desde)
+    service = MikroTikServiceFalso(ips_caidas=ips[::3])
+    service.lote_barrido = lote
+    
+    commits = []
+    
+    def contar_commit(conexion):
+        commits.append(1)
+    event.listen(engine, "commit", contar_commit)
+    try:
+        resultados = service.verificar_conectividad_masiva()
+    finally:
+        event.remove(engine, "commit", contar_commit)
+    
+    assert resultados["total_verificados"] == cantidad
+    assert resultados["no_disponibles"] == len(ips[::3])
+    return len(commits)
+
+
+def test_commits_constantes_por_lote(base_datos):
+    """El número de commits de un barrido depende de los lotes, no del tamaño de la flota."""
+    commits_pequena = contar_commits_barrido(base_datos, 10)
+    commits_grande = contar_commits_barrido(base_datos, 600, desde=10)
+    commits_en_lotes = contar_commits_barrido(base_datos, 600, desde=610, lote=200)
+    
+    print(f"✅ Commits por barrido: {commits_pequena} (10 equipos), {commits_grande} (600 equipos), "
+          f"{commits_en_lotes} (600 equipos en 3 lotes)")
+    # Por lote: estados en una transacción y, en el historial, sondeos y retención
+    assert commits_pequena == commits_grande <= 3
+    assert commits_en_lotes == 3 * commits_grande
+
+
+def test_transiciones_de_estado(base_datos):
+    """Los caídos pasan a 'error' y los que vuelven pasan de 'error' a 'activo'."""
+    ips = crear_flota(4)
+    service = MikroTikServiceFalso(ips_caidas=[ips[0]])
+    service.verificar_conectividad_masiva()
+    
+    with SessionLocal() as db:
+        estados = {m.ip_mikrotik: (m.estado, m.disponible) for m in db.query(MikroTik)}
+    assert estados[ips[0]] == ("error", False)
+    assert estados[ips[1]] == ("activo", True)
+    
+    # Cuando el equipo vuelve a responder, recupera el estado activo
+    caido = service.obtener_por_ip(ips[0])
+    service.ips_caidas.clear()
+    service.repository.actualizar_disponibilidad_por_id({caido.id: True})
+    recuperado = service.obtener_por_id(caido.id)
+    print(f"✅ Transición de estado: error → {recuperado.estado}")
+    assert (recuperado.estado, recuperado.disponible) == ("activo", True)
+
+
+def test_recuperacion_en_el_siguiente_barrido(base_datos):
+    """Un equipo en 'error' se sigue sondeando y vuelve a 'activo' en el barrido en que responde."""
+    ips = crear_flota(3)
+    service = MikroTikServiceFalso(ips_caidas=[ips[0]])
+    service.verificar_conectividad_masiva()
+    caido = service.obtener_por_ip(ips[0])
+    assert (caido.estado, caido.disponible) == ("error", False)
+    
+    # Sigue caído: entra en el barrido y se queda en error
+    resultados = service.verificar_conectividad_masiva()
+    assert resultados["total_verificados"] == 3 and resultados["no_disponibles"] == 1
+    assert service.obtener_por_id(caido.id).estado == "error"
+    
+    # Vuelve a responder: el siguiente barrido lo devuelve a activo
+    service.ips_caidas.clear()
+    resultados = service.verificar_conectividad_masiva()
+    recuperado = service.obtener_por_id(caido.id)
+    print(f"✅ Recuperación en el barrido: error → {recuperado.estado}")
+    assert resultados["total_verificados"] == 3 and resultados["disponibles"] == 3
+    assert (recuperado.estado, recuperado.disponible) == ("activo", True)
+
+
+def test_barrido_por_lotes(base_datos):
+    """Con flotas mayores que lote_barrido se sondea por lotes y se guarda todo igual."""
+    ips = crear_flota(25)
+    with SessionLocal() as db:
+        db.query(MikroTik).filter(MikroTik.ip_mikrotik == ips[5]).update({"estado": "mantenimiento"})
+        db.commit()
+    service = MikroTikServiceFalso(ips_caidas=ips[:2])
+    service.lote_barrido = 10
+    
+    resultados = service.verificar_conectividad_masiva()
+    print(f"✅ Barrido en lotes de {service.lotes}")
+    assert service.lotes == [10, 10, 4]
+    assert resultados["total_verificados"] == 24 and resultados["no_disponibles"] == 2
+    assert ips[5] not in [detalle["ip"] for detalle in resultados["detalles"]]
+    
+    # Cada lote se guarda antes de sondear el siguiente, y los que caen no se vuelven a sondear
+    assert service.en_error_al_sondear == [0, 2, 2]
+    assert sorted(service.sondeadas) == sorted(ip for ip in ips if ip != ips[5])
+    assert "detalles" not in service.verificar_conectividad_masiva(detalles=False)
+    
+    with SessionLocal() as db:
+        disponibles = db.query(MikroTik).filter(MikroTik.disponible == True).count()
+    assert disponibles == 22
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del barrido de conectividad masiva")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,87 @@
+# test_contenido_secciones.py
+"""
+Script para probar la lectura por secciones del contenido de los documentos
+"""
+import sys
+from io import BytesIO
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from PIL import Image
+from sqlalchemy import inspect, text
+
+from infrastructure.almacenamiento import AlmacenBlobs
+from application.services.documento_service import DocumentoService
+from application.services.imagen_documento_service import ImagenDocumentoService
+
+
+def imagen_png(ancho: int, alto: int) -> bytes:
+    """Imagen PNG de un solo color."""
+    buffer = BytesIO()
+    Image.new("RGB", (ancho, alto), (30, 90, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def crear_documento(service: DocumentoService, directorio):
+    """Crea un documento con secciones de todos los tipos (las imágenes en un almacén dentro de 'directorio')."""
+    service.almacen_imagenes = AlmacenBlobs(str(directorio / "blobs"))
+    service.imagenes = ImagenDocumentoService(service.almacen_imagenes)
+    return service.crear(
+        titulo="Upgrade CLI-1", cliente_id="CLI-1", cliente_nombre="Juan Pérez", cliente_direccion="Calle 1",
+        ancho_banda="100 Mbps", tipo_transaccion="UPGRADE", tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez",
+        contenido_json={
+            "correo": "Asunto: Upgrade\n\nSe aplicó el upgrade",
+            "mikrotik_export": "/interface bridge\nadd name=lan\n" * 500,
+            "observaciones": ["Cliente conforme", "Sin cortes"],
+            "vlan": 120,
+            "monitoreado": True,
+            "notas": None,
+            "grafica_consumo": imagen_png(600, 300),
+            "imagenes": {"Topología": imagen_png(200, 100)},
+        })
+
+
+def test_resumen_sin_contenido(sentencias, tmp_path):
+    """El resumen de un documento no lee contenido_json."""
+    service = DocumentoService()
+    documento = crear_documento(service, tmp_path)
+    sentencias.clear()
+    resumen = service.obtener_resumen(documento.id)
+    assert resumen.cliente_nombre == "Juan Pérez"
+    assert "contenido_json" in inspect(resumen).unloaded
+    assert not any("contenido_json" in sentencia for sentencia in sentencias)
+    assert service.obtener_resumen(9999) is None
+    print("✅ Resumen sin leer el contenido")
+
+
+def test_secciones_pedidas(base_datos, tmp_path):
+    """Solo se decodifican las secciones pedidas, con cada tipo JSON conservado."""
+    service = DocumentoService()
+    documento = crear_documento(service, tmp_path)
+    
+    secciones = service.obtener_secciones(documento.id, "correo", "vlan", "monitoreado", "notas",
+                                          "observaciones", "no_existe")
+    assert secciones == {"correo": "Asunto: Upgrade\n\nSe aplicó el upgrade", "vlan": 120,
+                         "monitoreado": True, "notas": None,
+                         "observaciones": ["Cliente conforme", "Sin cortes"]}
+    
+    # Las imágenes de la sección pedida vuelven como bytes del almacén
+    imagenes = service.obtener_secciones(documento.id, "imagenes")["imagenes"]
+    assert imagenes["Topología"].startswith(b"\x89PNG")
+    
+    # Documento inexistente o con JSON inválido
+    assert service.obtener_secciones(9999, "correo") == {}
+    with base_datos.begin() as conexion:
+        conexion.execute(text("UPDATE documentos SET contenido_json = '{roto' WHERE id = :id"),
+                         {"id": documento.id})
+    assert service.obtener_secciones(documento.id, "correo") == {}
+    print("✅ Secciones pedidas decodificadas")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la lectura por secciones del contenido de los documentos")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
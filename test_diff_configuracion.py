@@ -0,0 +1,142 @@
+# test_diff_configuracion.py
+"""
+Script para probar la comparación de exports y el almacenamiento como deltas
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from application.services.diff_export import (
+    dividir_secciones, comparar_exports, formatear_diferencias, crear_delta, aplicar_delta
+)
+from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
+
+EXPORT_BASE = """# software id = ABCD-1234
+/interface bridge
+add name=bridge-lan
+/ip firewall filter
+add action=accept chain=input \\
+    comment="permitir gestion" src-address=10.0.0.0/8
+add action=drop chain=input
+/queue simple
+add max-limit=10M/10M name=cliente-1 target=10.0.0.1/32
+add max-limit=10M/10M name=cliente-2 target=10.0.0.2/32
+/interface bridge
+add name=bridge-wan"""
+
+
+def export_de_flota(colas, limite="10M/10M", extra=""):
+    """Arma un export con una cola por cliente."""
+    lineas = ["/queue simple"]
+    lineas += [f"add max-limit={limite if i % 100 == 0 else '10M/10M'} name=cliente-{i:05d} "
+               f"target=10.0.{i // 256}.{i % 256}/32" for i in range(colas)]
+    lineas += ["/system identity", f"set name=MTK{extra}"]
+    return "\n".join(lineas)
+
+
+def test_secciones_y_diferencias():
+    """Las diferencias se agrupan por ruta y las líneas partidas con '\\' se comparan como una sola."""
+    secciones = dividir_secciones(EXPORT_BASE)
+    assert list(secciones) == ["#", "/interface bridge", "/ip firewall filter", "/queue simple"]
+    assert secciones["/interface bridge"] == ["add name=bridge-lan", "add name=bridge-wan"]
+    assert secciones["/ip firewall filter"][0].endswith('comment="permitir gestion" src-address=10.0.0.0/8')
+    
+    nuevo = (EXPORT_BASE
+             .replace('comment="permitir gestion"', 'comment="gestion"')
+             .replace("add max-limit=10M/10M name=cliente-2 target=10.0.0.2/32\n", "")
+             + "\n/ip dns\nset servers=1.1.1.1")
+    diferencias = comparar_exports(EXPORT_BASE, nuevo)
+    print(formatear_diferencias(diferencias))
+    
+    por_seccion = {d["seccion"]: d for d in diferencias}
+    assert list(por_seccion) == ["/ip firewall filter", "/queue simple", "/ip dns"]
+    assert len(por_seccion["/ip firewall filter"]["eliminadas"]) == 1
+    assert 'comment="gestion"' in por_seccion["/ip firewall filter"]["agregadas"][0]
+    assert por_seccion["/queue simple"] == {
+        "seccion": "/queue simple", "agregadas": [],
+        "eliminadas": ["add max-limit=10M/10M name=cliente-2 target=10.0.0.2/32"]
+    }
+    assert por_seccion["/ip dns"]["agregadas"] == ["set servers=1.1.1.1"]
+    assert comparar_exports(EXPORT_BASE, EXPORT_BASE) == []
+    print("✅ Diferencias por sección")
+
+
+def test_delta_reconstruye_el_texto():
+    """Un delta aplicado sobre su base devuelve exactamente el texto nuevo."""
+    nuevo = EXPORT_BASE.replace("cliente-1", "cliente-uno") + "\n/ip dns\nset servers=1.1.1.1"
+    delta = crear_delta(EXPORT_BASE, nuevo)
+    assert aplicar_delta(EXPORT_BASE, delta) == nuevo
+    assert aplicar_delta(EXPORT_BASE, crear_delta(EXPORT_BASE, "")) == ""
+    try:
+        aplicar_delta("otra base", delta)
+        assert False, "El delta no debería aplicarse sobre otra base"
+    except ValueError:
+        pass
+    print("✅ Deltas reversibles")
+
+
+def test_versiones_guardadas_como_delta(base_datos):
+    """Las versiones siguientes se guardan como delta y la base sobrevive a la retención."""
+    service = RespaldoConfiguracionService()
+    service.versiones_por_equipo = 3
+    
+    exports = [export_de_flota(3000, limite=f"{5 + version}M/{5 + version}M") for version in range(5)]
+    resultados = [service.guardar_export(1, export, fecha=1000 + version)
+                  for version, export in enumerate(exports)]
+    
+    assert not resultados[0]["delta"]
+    assert all(resultado["delta"] for resultado in resultados[1:])
+    assert max(r["tamano_comprimido"] for r in resultados[1:]) * 5 < resultados[0]["tamano_comprimido"]
+    
+    # La primera versión se podó, pero su contenido es la base de los deltas conservados
+    estadisticas = service.obtener_estadisticas()
+    print(f"✅ Deltas: {estadisticas}")
+    assert (estadisticas["versiones"], estadisticas["contenidos"], estadisticas["deltas"]) == (3, 4, 3)
+    for version in (2, 3, 4):
+        assert service.obtener_export(1, fecha=1000 + version) == exports[version]
+    
+    # Una versión igual a una anterior se reutiliza sin guardar nada
+    repetida = service.guardar_export(1, exports[2], fecha=2000)
+    assert repetida["nueva_version"] and not repetida["nuevo_contenido"]
+    
+    service.eliminar_respaldos(1)
+    assert service.obtener_estadisticas()["contenidos"] == 0
+
+
+def test_equipos_con_cambios(sentencias):
+    """El reporte de la flota sale de una sola consulta sobre el resumen de cada versión."""
+    service = RespaldoConfiguracionService()
+    for mikrotik_id in range(1, 51):
+        service.guardar_export(mikrotik_id, export_de_flota(200), fecha=1000)
+    service.guardar_export(7, export_de_flota(200, extra="-7"), fecha=5000)
+    service.guardar_export(7, export_de_flota(201, extra="-7"), fecha=6000)
+    service.guardar_export(9, export_de_flota(200, limite="20M/20M"), fecha=2000)
+    service.guardar_export(60, export_de_flota(200), fecha=5000)  # Primer respaldo: no es un cambio
+    
+    sentencias.clear()
+    cambios = service.equipos_con_cambios(desde=3000)
+    
+    print(f"✅ Equipos con cambios: {cambios}")
+    assert len(sentencias) == 1
+    assert cambios == [{
+        "mikrotik_id": 7, "cambios": 2, "primer_cambio": 5000, "ultimo_cambio": 6000,
+        "lineas_agregadas": 2, "lineas_eliminadas": 1,
+        "secciones": ["/system identity", "/queue simple"]
+    }]
+    assert [c["mikrotik_id"] for c in service.equipos_con_cambios(desde=0)] == [7, 9]
+    
+    diferencias = service.comparar_versiones(7)
+    assert diferencias == [{"seccion": "/queue simple",
+                            "agregadas": ["add max-limit=10M/10M name=cliente-00200 target=10.0.0.200/32"],
+                            "eliminadas": []}]
+    assert [d["seccion"] for d in service.comparar_versiones(7, fecha_anterior=1000)] == [
+        "/queue simple", "/system identity"]
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la comparación de exports")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
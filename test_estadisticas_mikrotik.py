@@ -0,0 +1,94 @@
+# test_estadisticas_mikrotik.py
+"""
+Script para probar las estadísticas de MikroTiks en una sola consulta y su caché
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from domain.models.mikrotik import MikroTik
+from application.services.mikrotik_service import MikroTikService
+
+
+def consultas(sentencias) -> int:
+    """Cuenta las sentencias SELECT registradas."""
+    return sum(sentencia.lstrip().upper().startswith("SELECT") for sentencia in sentencias)
+
+
+def poblar(service: MikroTikService) -> None:
+    """Crea una flota variada: estados, modelos, disponibilidad y credenciales."""
+    equipos = [
+        MikroTik(nombre="MTK-1", ip_mikrotik="10.0.0.1", modelo="hEX", contrasena_acceso="clave", disponible=True),
+        MikroTik(nombre="MTK-2", ip_mikrotik="10.0.0.2", modelo="hEX", contrasena_acceso="", disponible=False),
+        MikroTik(nombre="MTK-3", ip_mikrotik="10.0.0.3", modelo="CCR", contrasena_acceso="clave",
+                 estado="mantenimiento", disponible=True),
+        MikroTik(nombre="MTK-4", ip_mikrotik="10.0.0.4", contrasena_acceso=None, estado="inactivo"),
+        MikroTik(nombre="MTK-5", ip_mikrotik="10.0.0.5", usuario_acceso="", contrasena_acceso="clave",
+                 estado="error", disponible=True),
+    ]
+    for equipo in equipos:
+        service.repository.create(equipo)
+
+
+def test_misma_informacion_en_una_consulta(sentencias):
+    """El resultado coincide con los contadores individuales, pero con una sola consulta."""
+    service = MikroTikService()
+    service.ttl_estadisticas = 0
+    poblar(service)
+    repository = service.repository
+    
+    esperado = {
+        "total": len(repository.get_all()),
+        "por_estado": repository.count_by_estado(),
+        "por_modelo": repository.count_by_modelo(),
+        "disponibilidad": repository.get_disponibilidad_stats(),
+        "con_credenciales": len(repository.get_con_credenciales()),
+        "sin_credenciales": len(repository.get_sin_credenciales())
+    }
+    sentencias.clear()
+    estadisticas = service.obtener_estadisticas()
+    print(f"✅ Estadísticas: {estadisticas}")
+    assert estadisticas == esperado
+    assert estadisticas["con_credenciales"] == 2 and estadisticas["disponibilidad"]["disponibles"] == 3
+    assert consultas(sentencias) == 1
+    
+    # Sin caché, cada llamada vuelve a consultar
+    service.obtener_estadisticas()
+    assert consultas(sentencias) == 2
+
+
+def test_cache_e_invalidacion(sentencias):
+    """Dentro del TTL no se consulta; una escritura del servicio invalida la caché."""
+    service = MikroTikService()
+    service.ttl_estadisticas = 60
+    poblar(service)
+    
+    sentencias.clear()
+    primera = service.obtener_estadisticas()
+    primera["total"] = -1  # Modificar lo devuelto no altera la caché
+    assert service.obtener_estadisticas()["total"] == 5
+    assert consultas(sentencias) == 1
+    
+    service.actualizar(1, estado="inactivo")
+    sentencias.clear()
+    estadisticas = service.obtener_estadisticas()
+    assert consultas(sentencias) == 1
+    assert estadisticas["por_estado"]["inactivo"] == 2
+    print("✅ Caché reutilizada e invalidada al escribir")
+
+
+def test_base_vacia(base_datos):
+    """Sin equipos todo vale cero."""
+    estadisticas = MikroTikService().obtener_estadisticas()
+    assert estadisticas["total"] == 0 and estadisticas["por_estado"] == {}
+    assert estadisticas["disponibilidad"]["porcentaje_disponibilidad"] == 0
+    print("✅ Estadísticas de una base vacía")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de las estadísticas de MikroTiks")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
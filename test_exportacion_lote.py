@@ -0,0 +1,139 @@
+# test_exportacion_lote.py
+"""
+Script para probar la exportación de documentos a Word en lote (pool de procesos, ZIP y manifiesto)
+"""
+import datetime
+import json
+import os
+import sys
+import zipfile
+from io import BytesIO
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from docx import Document as DocxDocument
+from PIL import Image
+from sqlalchemy import text, update
+
+from domain.models.documento import Documento
+from infrastructure.almacenamiento import AlmacenBlobs, CacheArchivos
+from application.services.documento_service import DocumentoService
+from application.services.documento_export_service import DocumentoExportService, NOMBRE_MANIFIESTO
+from application.services.imagen_documento_service import ImagenDocumentoService
+
+INICIO_MES = datetime.datetime(2026, 9, 1)
+
+
+def exportador_temporal(directorio) -> DocumentoExportService:
+    """Servicio de exportación con el almacén de imágenes, la caché y la salida dentro de 'directorio'."""
+    exportador = DocumentoExportService()
+    service = exportador.documento_service
+    service.almacen_imagenes = AlmacenBlobs(str(directorio / "blobs"))
+    service.imagenes = ImagenDocumentoService(service.almacen_imagenes)
+    service.cache_exportaciones = CacheArchivos(str(directorio / "cache"),
+                                                tamano_maximo=10 * 1024 * 1024, extension=".docx")
+    exportador.docs_dir = str(directorio / "docx")
+    os.makedirs(exportador.docs_dir)
+    return exportador
+
+
+def crear_documentos(engine, service: DocumentoService) -> list:
+    """
+    Crea seis documentos del mes (uno con el contenido dañado) y uno del mes anterior.
+    
+    Returns:
+        list: IDs de los documentos, en orden de creación
+    """
+    buffer = BytesIO()
+    Image.new("RGB", (900, 300), (30, 90, 200)).save(buffer, format="PNG")
+    ids = []
+    for numero in range(7):
+        documento = service.crear(
+            titulo=f"Documento {numero}", cliente_id="CLI-1", cliente_nombre="Juan Pérez", cliente_direccion="Calle 1",
+            ancho_banda="100 Mbps", tipo_transaccion="UPGRADE" if numero % 3 else "DOWNGRADE",
+            tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez" if numero % 2 else "Luis Díaz",
+            contenido_json={"correo": f"Correo {numero}", "grafica_consumo": buffer.getvalue()})
+        ids.append(documento.id)
+    
+    with engine.begin() as conexion:
+        for numero, documento_id in enumerate(ids):
+            fecha = INICIO_MES + datetime.timedelta(days=numero) if numero < 6 else INICIO_MES - datetime.timedelta(days=3)
+            conexion.execute(update(Documento.__table__).where(Documento.__table__.c.id == documento_id)
+                             .values(fecha_creacion=fecha))
+        conexion.execute(text("UPDATE documentos SET contenido_json = '{roto' WHERE id = :id"), {"id": ids[4]})
+    return ids
+
+
+def test_filtro_de_documentos(base_datos, tmp_path):
+    """El filtro combina rango de fechas, ingeniero y tipo de transacción."""
+    exportador = exportador_temporal(tmp_path)
+    ids = crear_documentos(base_datos, exportador.documento_service)
+    repository = exportador.documento_service.repository
+    fin_mes = datetime.datetime(2026, 9, 30, 23, 59, 59)
+    
+    assert repository.get_ids_filtrados(INICIO_MES, fin_mes) == ids[:6]
+    assert repository.get_ids_filtrados() == [ids[6]] + ids[:6]
+    assert repository.get_ids_filtrados(INICIO_MES, fin_mes, ingeniero="ana gom") == [ids[1], ids[3], ids[5]]
+    assert repository.get_ids_filtrados(INICIO_MES, fin_mes, ingeniero="ana",
+                                        tipo_transaccion="DOWNGRADE") == [ids[3]]
+    assert repository.get_ids_filtrados(fecha_fin=INICIO_MES - datetime.timedelta(days=1)) == [ids[6]]
+    assert repository.get_ids_filtrados(ingeniero="  ") == []
+    print("✅ Filtro de documentos para exportar")
+
+
+def test_exportacion_zip_con_pool(base_datos, tmp_path):
+    """El lote se genera en procesos y queda en un ZIP con el manifiesto y los errores."""
+    exportador = exportador_temporal(tmp_path)
+    exportador.documentos_en_vuelo_por_proceso = 1
+    ids = crear_documentos(base_datos, exportador.documento_service)
+    os.makedirs(tmp_path / "lote")
+    destino = str(tmp_path / "lote" / "auditoria_septiembre.zip")
+    
+    resultado = exportador.exportar_lote(destino, fecha_inicio=INICIO_MES,
+                                         fecha_fin=datetime.datetime(2026, 9, 30, 23, 59), procesos=2)
+    assert (resultado.total, resultado.exportados) == (6, 5)
+    assert [entrada["id"] for entrada in resultado.errores] == [ids[4]]
+    assert "JSONDecodeError" in resultado.errores[0]["error"]
+    
+    with zipfile.ZipFile(destino) as archivo_zip:
+        manifiesto = json.loads(archivo_zip.read(NOMBRE_MANIFIESTO))
+        assert [entrada["id"] for entrada in manifiesto["documentos"]] == ids[:6]
+        assert manifiesto["filtro"]["fecha_inicio"] == "2026-09-01T00:00:00" and manifiesto["errores"] == 1
+        
+        nombres = [entrada["archivo"] for entrada in manifiesto["documentos"] if "archivo" in entrada]
+        assert len(set(nombres)) == 5 and nombres[0] == f"20260901_DOWNGRADE_CLI-1_{ids[0]}.docx"
+        assert sorted(archivo_zip.namelist()) == sorted(nombres + [NOMBRE_MANIFIESTO])
+        word = DocxDocument(BytesIO(archivo_zip.read(nombres[1])))
+        assert len(word.inline_shapes) == 1
+    assert not [nombre for nombre in os.listdir(os.path.dirname(destino)) if nombre.startswith(".tmp_")]
+    print("✅ Exportación en lote a ZIP")
+
+
+def test_exportacion_a_directorio(base_datos, tmp_path):
+    """Sin pool (procesos=0) y a un directorio, con el avance informado documento a documento."""
+    exportador = exportador_temporal(tmp_path)
+    ids = crear_documentos(base_datos, exportador.documento_service)
+    destino = str(tmp_path / "lote")
+    avance = []
+    
+    resultado = exportador.exportar_lote(destino, ingeniero="luis", como_zip=False, procesos=0,
+                                         progreso=lambda terminados, total: avance.append((terminados, total)))
+    assert resultado.total == 4 and resultado.exportados == 3  # ids[4] tiene el contenido dañado
+    assert avance == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    with open(os.path.join(destino, NOMBRE_MANIFIESTO), encoding="utf-8") as archivo:
+        manifiesto = json.load(archivo)
+    assert [entrada["id"] for entrada in manifiesto["documentos"]] == [ids[6], ids[0], ids[2], ids[4]]
+    assert len([nombre for nombre in os.listdir(destino) if nombre.endswith(".docx")]) == 3
+    
+    # La exportación individual sigue escribiendo en docs_dir
+    assert os.path.dirname(exportador.exportar_a_word(ids[0])) == exportador.docs_dir
+    print("✅ Exportación en lote a un directorio")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la exportación de documentos en lote")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
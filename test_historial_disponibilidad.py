@@ -0,0 +1,130 @@
+# test_historial_disponibilidad.py
+"""
+Script para probar el historial de disponibilidad (sondeos, consolidación y retención)
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.historial_disponibilidad import (
+    SondeoMikroTik, ResumenDisponibilidad, RESOLUCION_5_MIN, RESOLUCION_1_HORA
+)
+from infrastructure.network.sondeador import ResultadoSondeo
+from application.services.historial_disponibilidad_service import HistorialDisponibilidadService
+
+# Inicio arbitrario alineado a la hora
+INICIO = 1_700_000_000 - 1_700_000_000 % RESOLUCION_1_HORA
+
+
+def resultado(rtt_ms=None):
+    """Crea un ResultadoSondeo con una sonda; sin RTT significa que no respondió."""
+    sondeo = ResultadoSondeo(ip="10.0.0.1", enviados=1, metodo="icmp")
+    if rtt_ms is not None:
+        sondeo.recibidos = 1
+        sondeo.rtts_ms.append(rtt_ms)
+    return sondeo
+
+
+def simular_barridos(service, horas, intervalo=60):
+    """Registra un barrido por minuto: el equipo 1 cae en 1 de cada 10 sondeos."""
+    rtts = []
+    for i in range(horas * 3600 // intervalo):
+        rtt = None if i % 10 == 9 else 1.0 + (i % 7)
+        if rtt is not None:
+            rtts.append(rtt)
+        service.registrar_barrido({1: resultado(rtt), 2: resultado(5.0)}, INICIO + i * intervalo)
+    return rtts
+
+
+def test_consolidacion_y_consultas(base_datos):
+    """Los resúmenes conservan muestras y uptime, y las consultas combinan niveles."""
+    service = HistorialDisponibilidadService()
+    rtts = simular_barridos(service, horas=3)
+    fin = INICIO + 3 * 3600
+    
+    with SessionLocal() as db:
+        horas = db.query(ResumenDisponibilidad).filter_by(
+            resolucion=RESOLUCION_1_HORA, mikrotik_id=1).count()
+        intervalos = db.query(ResumenDisponibilidad).filter_by(
+            resolucion=RESOLUCION_5_MIN, mikrotik_id=1).count()
+    # La última hora y el último intervalo de 5 min aún no están cerrados
+    assert horas == 2
+    assert intervalos == 35
+    
+    resumen = service.obtener_resumen(1, INICIO, fin)
+    print(f"✅ Resumen de 3 horas: {resumen}")
+    assert resumen["muestras"] == 180
+    assert resumen["uptime_pct"] == 90.0
+    assert resumen["rtt_min"] == 1.0 and resumen["rtt_max"] == 7.0
+    assert not resumen["percentiles_exactos"]
+    
+    # El percentil estimado por histograma tiene un error relativo acotado
+    exacto = sorted(rtts)[len(rtts) // 2]
+    assert abs(resumen["rtt_p50"] - exacto) / exacto < 0.25
+    
+    # Ventana reciente: solo datos crudos, percentiles exactos
+    reciente = service.obtener_resumen(1, fin - 60, fin)
+    assert reciente["muestras"] == 1 and reciente["percentiles_exactos"]
+    
+    assert service.porcentaje_disponibilidad(2, INICIO, fin) == 100.0
+    assert service.percentiles_rtt(2, INICIO, fin)["p95"] is not None
+
+
+def test_sondeos_tardios(base_datos):
+    """Un barrido que llega tarde a intervalos ya consolidados se suma a sus resúmenes."""
+    service = HistorialDisponibilidadService()
+    simular_barridos(service, horas=2)
+    
+    # La primera hora y sus intervalos de 5 minutos ya están consolidados
+    service.registrar_barrido({1: resultado(50.0), 3: resultado()}, INICIO + 30)
+    
+    with SessionLocal() as db:
+        intervalo = db.query(ResumenDisponibilidad).filter_by(
+            resolucion=RESOLUCION_5_MIN, mikrotik_id=1, ts=INICIO).one()
+        hora = db.query(ResumenDisponibilidad).filter_by(
+            resolucion=RESOLUCION_1_HORA, mikrotik_id=1, ts=INICIO).one()
+        nuevo = db.query(ResumenDisponibilidad).filter_by(
+            resolucion=RESOLUCION_1_HORA, mikrotik_id=3, ts=INICIO).one()
+    assert (intervalo.muestras, intervalo.rtt_max) == (6, 50.0)
+    assert (hora.muestras, hora.rtt_max) == (61, 50.0)
+    assert (nuevo.muestras, nuevo.exitosas) == (1, 0)
+    
+    resumen = service.obtener_resumen(1, INICIO, INICIO + 2 * 3600)
+    print(f"✅ Barrido tardío consolidado: {resumen['muestras']} muestras")
+    assert resumen["muestras"] == 121
+    
+    # Si los sondeos crudos de ese intervalo ya se purgaron, el barrido se descarta
+    service.retencion_crudo = 600
+    service.consolidar(INICIO + 2 * 3600)
+    service.registrar_barrido({1: resultado(80.0)}, INICIO + 90)
+    assert service.obtener_resumen(1, INICIO, INICIO + 3600)["rtt_max"] == 50.0
+
+
+def test_retencion(base_datos):
+    """La retención borra datos crudos viejos pero nunca lo que no se consolidó."""
+    service = HistorialDisponibilidadService()
+    service.retencion_crudo = 3600
+    service.retencion_5min = 2 * 3600
+    simular_barridos(service, horas=4, intervalo=300)
+    
+    with SessionLocal() as db:
+        primer_crudo = db.query(SondeoMikroTik.ts).order_by(SondeoMikroTik.ts).first()[0]
+    assert primer_crudo >= INICIO + 4 * 3600 - 300 - 3600
+    
+    # Las horas antiguas siguen disponibles a través de los resúmenes
+    resumen = service.obtener_resumen(1, INICIO, INICIO + 3600)
+    print(f"✅ Retención aplicada, primera hora: {resumen['muestras']} muestras")
+    assert resumen["muestras"] == 12
+    
+    service.eliminar_historial(1)
+    assert service.obtener_resumen(1, INICIO, INICIO + 4 * 3600)["muestras"] == 0
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del historial de disponibilidad")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,129 @@
+# test_indices.py
+"""
+Script para probar los índices de filtros frecuentes, su migración y el asesor de índices
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+
+from infrastructure.database.config import SessionLocal
+from infrastructure.database.asesor_indices import analizar, catalogo_repositorios, escaneos_completos
+from application.services.documento_service import DocumentoService
+
+# Índices que agrega la migración 0001
+INDICES_MIGRACION = {
+    "mikrotiks": {"ix_mikrotiks_estado_nombre", "ix_mikrotiks_disponible_nombre",
+                  "ix_mikrotiks_cliente_id_nombre", "ix_mikrotiks_modelo"},
+    "documentos": {"ix_documentos_fecha_creacion", "ix_documentos_cliente_id_fecha",
+                   "ix_documentos_tipo_transaccion_fecha", "ix_documentos_nodo_id_fecha"},
+}
+
+
+def indices(engine, tabla: str) -> set:
+    """Nombres de los índices de una tabla."""
+    return {indice["name"] for indice in inspect(engine).get_indexes(tabla)}
+
+
+def migrar(engine, directorio_imagenes: str, revision: str, bajar: bool = False) -> None:
+    """Aplica (o revierte) las migraciones de Alembic sobre el engine."""
+    configuracion = Config("alembic.ini")
+    configuracion.attributes["directorio_imagenes"] = directorio_imagenes
+    with engine.begin() as conexion:
+        configuracion.attributes["connection"] = conexion
+        if bajar:
+            command.downgrade(configuracion, revision)
+        else:
+            command.upgrade(configuracion, revision)
+
+
+def test_catalogo_sin_escaneos():
+    """Ninguna consulta del catálogo recorre una tabla completa sin motivo."""
+    resultados = analizar()
+    problemas = [resultado.nombre for resultado in resultados if resultado.problema]
+    assert problemas == [], problemas
+    
+    planes = {resultado.nombre: " | ".join(sum(resultado.planes, [])) for resultado in resultados}
+    assert "ix_mikrotiks_estado_nombre (estado=?)" in planes["MikroTik.get_by_estado"]
+    # El barrido avanza por la clave primaria: sin ordenar todas las filas que cumplen el filtro
+    barrido = next(resultado for resultado in resultados if resultado.nombre == "MikroTik.get_lote_barrido")
+    assert "USING INTEGER PRIMARY KEY (rowid>?)" in planes[barrido.nombre] and barrido.ordenamientos == 0
+    assert "ix_documentos_fecha_creacion (fecha_creacion>? AND fecha_creacion<?)" in \
+        planes["Documento.get_documents_by_date_range"]
+    assert "COVERING INDEX ix_documentos_tipo_transaccion_fecha" in planes["Documento.count_by_tipo_transaccion"]
+    print(f"✅ {len(resultados)} consultas revisadas sin escaneos completos no permitidos")
+
+
+def test_detecta_escaneo_completo(base_datos):
+    """Sin el índice, el asesor señala la consulta que pasa a recorrer la tabla."""
+    assert escaneos_completos(["SCAN mikrotiks", "SCAN TABLE documentos AS d", "SCAN m USING INDEX ix_x",
+                               "SCAN m USING COVERING INDEX ix_y", "SCAN documentos_fts VIRTUAL TABLE INDEX 0:M8",
+                               "SCAN CONSTANT ROW", "SEARCH m USING INDEX ix_z (estado=?)"]) == \
+        ["mikrotiks", "documentos", "m"]
+    
+    with base_datos.begin() as conexion:
+        conexion.execute(text("DROP INDEX ix_mikrotiks_estado_nombre"))
+        conexion.execute(text("DROP INDEX ix_documentos_tipo_transaccion_fecha"))
+    resultados = analizar(catalogo_repositorios(), base_datos)
+    assert SessionLocal.kw["bind"] is base_datos  # Vuelve a la base a la que apuntaba
+    
+    problemas = sorted(resultado.nombre for resultado in resultados if resultado.problema)
+    print(f"✅ Escaneos detectados: {problemas}")
+    assert "MikroTik.get_by_estado" in problemas and "Documento.get_by_tipo_transaccion" in problemas
+    assert "MikroTik.get_by_cliente" not in problemas
+
+
+def test_migracion_en_base_existente(base_datos, tmp_path):
+    """La migración crea los índices en una base sin ellos, no falla si ya están y se revierte."""
+    # Base como las creadas antes de los índices
+    with base_datos.begin() as conexion:
+        for nombres in INDICES_MIGRACION.values():
+            for nombre in nombres:
+                conexion.execute(text(f"DROP INDEX {nombre}"))
+    assert not INDICES_MIGRACION["mikrotiks"] & indices(base_datos, "mikrotiks")
+    
+    migrar(base_datos, str(tmp_path / "blobs"), "head")
+    for tabla, nombres in INDICES_MIGRACION.items():
+        assert nombres <= indices(base_datos, tabla)
+    with base_datos.connect() as conexion:
+        assert conexion.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0002"
+    
+    migrar(base_datos, str(tmp_path / "blobs"), "base", bajar=True)
+    assert not INDICES_MIGRACION["documentos"] & indices(base_datos, "documentos")
+    print("✅ Migración aplicada y revertida")
+
+
+def test_migracion_en_base_nueva(base_datos, tmp_path):
+    """En una base nueva create_all ya creó los índices: la migración solo registra la versión."""
+    migrar(base_datos, str(tmp_path / "blobs"), "head")
+    assert INDICES_MIGRACION["documentos"] <= indices(base_datos, "documentos")
+    print("✅ Migración en una base nueva")
+
+
+def test_consultas_de_documentos(base_datos):
+    """Las consultas que usan los índices nuevos devuelven lo esperado."""
+    service = DocumentoService()
+    datos = dict(titulo="Upgrade", cliente_id="CLI-1", cliente_nombre="Juan Pérez", cliente_direccion="Calle 1",
+                 ancho_banda="100 Mbps", tipo_transaccion="UPGRADE", tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez")
+    primero = service.crear(**datos)
+    service.crear(**{**datos, "tipo_transaccion": "DOWNGRADE", "ingeniero": "Luis Díaz"})
+    tercero = service.crear(**{**datos, "cliente_id": "CLI-2"})
+    repository = service.repository
+    
+    assert repository.count_by_tipo_transaccion() == {"UPGRADE": 2, "DOWNGRADE": 1}
+    assert sorted(documento.id for documento in repository.get_by_ingeniero("ana gom")) == [primero.id, tercero.id]
+    assert repository.get_by_ingeniero("juan") == []  # Solo busca en la columna ingeniero
+    assert [documento.id for documento in repository.get_by_cliente_id("CLI-2")] == [tercero.id]
+    print("✅ Consultas de documentos")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de los índices y el asesor de índices")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,164 @@
+# test_ingesta_imagenes.py
+"""
+Script para probar la ingesta de imágenes de los documentos (recompresión, metadatos y miniaturas)
+"""
+import base64
+import json
+import os
+import random
+import sys
+import threading
+from io import BytesIO
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from PIL import Image, ImageDraw
+
+from infrastructure.almacenamiento import AlmacenBlobs, CacheArchivos
+from application.services.documento_export_service import DocumentoExportService
+from application.services.imagen_documento_service import (
+    ImagenDocumentoService, ADJUNTO_METADATOS, ADJUNTO_MINIATURA
+)
+
+
+def servicio(directorio) -> ImagenDocumentoService:
+    """Servicio de ingesta con el almacén en 'directorio'."""
+    return ImagenDocumentoService(AlmacenBlobs(str(directorio)))
+
+
+def captura(ancho: int, alto: int) -> Image.Image:
+    """Imagen con pocos colores, como una captura de una gráfica."""
+    imagen = Image.new("RGB", (ancho, alto), "white")
+    dibujo = ImageDraw.Draw(imagen)
+    for x in range(0, ancho, 40):
+        dibujo.line([(x, alto), (x + 20, alto // 3)], fill=(30, 90, 200), width=3)
+    return imagen
+
+
+def foto(ancho: int, alto: int) -> Image.Image:
+    """Imagen con muchos colores y degradados, como una foto."""
+    generador = random.Random(7)
+    pequena = Image.frombytes("RGB", (ancho // 8, alto // 8), generador.randbytes(ancho // 8 * alto // 8 * 3))
+    return pequena.resize((ancho, alto), Image.BICUBIC)
+
+
+def como_png(imagen: Image.Image) -> bytes:
+    """Bytes PNG (sin optimizar) de una imagen."""
+    buffer = BytesIO()
+    imagen.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_limita_resolucion_y_elige_formato(tmp_path):
+    """Las capturas quedan en PNG, las fotos en JPEG, y ninguna supera el ancho de impresión."""
+    imagenes = servicio(tmp_path)
+    ancho_maximo = imagenes.ancho_maximo_pulgadas * imagenes.dpi_impresion
+    
+    grafica = imagenes.ingerir(captura(4000, 1000))
+    assert (grafica.formato, grafica.ancho, grafica.alto) == ("PNG", ancho_maximo, 450)
+    with Image.open(BytesIO(imagenes.almacen.leer(grafica.hash))) as guardada:
+        assert guardada.format == "PNG" and guardada.size == (ancho_maximo, 450)
+    
+    original = como_png(foto(1200, 800))
+    fotografia = imagenes.ingerir(original)
+    assert fotografia.formato == "JPEG" and (fotografia.ancho, fotografia.alto) == (1200, 800)
+    assert fotografia.tamano < len(original) / 2
+    
+    # Con transparencia siempre PNG (JPEG no la admite)
+    transparente = imagenes.ingerir(foto(400, 200).convert("RGBA"))
+    assert transparente.formato == "PNG"
+    print("✅ Resolución limitada y formato elegido según el contenido")
+
+
+def test_metadatos_y_miniatura_una_sola_vez(tmp_path):
+    """La imagen se procesa al ingresar; volver a guardarla solo lee sus metadatos."""
+    imagenes = servicio(tmp_path)
+    ingerida = imagenes.ingerir(captura(1000, 800))
+    assert imagenes.almacen.leer_adjunto(ingerida.hash, ADJUNTO_METADATOS) is not None
+    with Image.open(BytesIO(imagenes.obtener_miniatura(ingerida.referencia))) as miniatura:
+        assert miniatura.size == (375, 300)
+    
+    # Los bytes guardados ya están ingeridos: no se vuelven a codificar
+    def no_codificar(imagen):
+        raise AssertionError("La imagen se volvió a procesar")
+    imagenes._codificar = no_codificar
+    datos = imagenes.almacen.leer(ingerida.hash)
+    assert imagenes.ingerir(datos) == ingerida
+    assert imagenes.dimensiones(datos) == (1000, 800)
+    
+    # Imagen guardada antes de la ingesta: los metadatos y la miniatura se generan al pedirlos
+    anterior = como_png(captura(200, 100))
+    hash_anterior = imagenes.almacen.guardar(anterior)
+    assert imagenes.dimensiones(anterior) == (200, 100)
+    assert imagenes.obtener_metadatos(f"blob:{hash_anterior}").tamano == len(anterior)
+    assert imagenes.obtener_miniatura(f"blob:{hash_anterior}") is not None
+    assert imagenes.almacen.leer_adjunto(hash_anterior, ADJUNTO_MINIATURA) is not None
+    assert imagenes.almacen.leer_adjunto(hash_anterior, ADJUNTO_METADATOS) is None  # Sigue sin ingerir
+    assert imagenes.obtener_metadatos("blob:" + "0" * 64) is None
+    
+    # Al purgar la imagen se eliminan también sus adjuntos
+    assert imagenes.almacen.purgar({hash_anterior}, antiguedad_minima=0) == 1
+    assert imagenes.almacen.leer_adjunto(ingerida.hash, ADJUNTO_METADATOS) is None
+    assert not os.path.exists(imagenes.almacen.ruta_adjunto(ingerida.hash, ADJUNTO_MINIATURA))
+    print("✅ Metadatos y miniatura generados una sola vez")
+
+
+def test_imagen_anterior_se_normaliza_tras_exportar(base_datos, tmp_path):
+    """Exportar una imagen anterior a la ingesta no la marca como ingerida: al volver a guardar se normaliza."""
+    exportador = DocumentoExportService()
+    service = exportador.documento_service
+    service.almacen_imagenes = AlmacenBlobs(str(tmp_path / "blobs"))
+    service.imagenes = ImagenDocumentoService(service.almacen_imagenes)
+    service.cache_exportaciones = CacheArchivos(str(tmp_path / "cache"),
+                                                tamano_maximo=10 * 1024 * 1024, extension=".docx")
+    exportador.docs_dir = str(tmp_path)
+    
+    # En base64, como los documentos anteriores al almacén: se guarda tal cual, sin ingerir
+    anterior = como_png(captura(4000, 1000))
+    documento = service.crear(
+        titulo="Upgrade CLI-1", cliente_id="CLI-1", cliente_nombre="Juan Pérez", cliente_direccion="Calle 1",
+        ancho_banda="100 Mbps", tipo_transaccion="UPGRADE", tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ana Gómez",
+        contenido_json={"grafica_consumo": base64.b64encode(anterior).decode()})
+    hash_anterior = service.almacen_imagenes.guardar(anterior)
+    assert json.loads(service.obtener_por_id(documento.id).contenido_json)["grafica_consumo"] == \
+        f"blob:{hash_anterior}"
+    
+    exportador.exportar_a_word(documento.id)
+    assert service.almacen_imagenes.leer_adjunto(hash_anterior, ADJUNTO_METADATOS) is None
+    
+    service.actualizar(documento.id, contenido_json=service.obtener_contenido(service.obtener_por_id(documento.id)))
+    referencia = json.loads(service.obtener_por_id(documento.id).contenido_json)["grafica_consumo"]
+    metadatos = service.imagenes.obtener_metadatos(referencia)
+    ancho_maximo = service.imagenes.ancho_maximo_pulgadas * service.imagenes.dpi_impresion
+    assert referencia != f"blob:{hash_anterior}" and (metadatos.ancho, metadatos.alto) == (ancho_maximo, 450)
+    assert service.almacen_imagenes.leer_adjunto(metadatos.hash, ADJUNTO_METADATOS) is not None
+    assert service.almacen_imagenes.leer_adjunto(metadatos.hash, ADJUNTO_MINIATURA) is not None
+    print("✅ Imagen anterior normalizada después de exportarla")
+
+
+def test_ingesta_en_segundo_plano(tmp_path):
+    """La ingesta en segundo plano corre en el hilo del servicio, no en el que la pide."""
+    imagenes = servicio(tmp_path)
+    hilos = []
+    ingerir = imagenes.ingerir
+    
+    def ingerir_registrando(imagen):
+        hilos.append(threading.current_thread().name)
+        return ingerir(imagen)
+    imagenes.ingerir = ingerir_registrando
+    
+    futuros = [imagenes.ingerir_en_segundo_plano(captura(300 + numero, 200)) for numero in range(3)]
+    resultados = [futuro.result(timeout=30) for futuro in futuros]
+    assert [resultado.ancho for resultado in resultados] == [300, 301, 302]
+    assert all(nombre.startswith("ingesta_imagenes") for nombre in hilos)
+    assert threading.current_thread().name not in hilos
+    print("✅ Ingesta en segundo plano")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la ingesta de imágenes de documentos")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,75 @@
+# test_iteracion_por_bloques.py
+"""
+Script para probar el recorrido por bloques (iter_all / iter_filtered) de los repositorios
+"""
+import sys
+import tracemalloc
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.repositories.mikrotik_repository import MikroTikRepository
+
+
+def poblar(cantidad: int) -> None:
+    """Inserta MikroTiks; uno de cada cuatro en mantenimiento."""
+    with SessionLocal() as db:
+        db.add_all(MikroTik(nombre=f"MTK-{i:05d}", ip_mikrotik=f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                            estado="mantenimiento" if i % 4 == 0 else "activo",
+                            ubicacion="Sitio " * 20)
+                   for i in range(cantidad))
+        db.commit()
+
+
+def pico_de_memoria(funcion) -> int:
+    """Devuelve el pico de memoria (bytes) asignada mientras corre la función."""
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_recorrido_completo_y_filtrado(base_datos):
+    """Recorre todas las filas en orden de ID, con filtros, criterios y proyección."""
+    poblar(50)
+    repository = MikroTikRepository()
+    
+    assert [mtk.id for mtk in repository.iter_all(batch_size=7)] == list(range(1, 51))
+    
+    mantenimiento = list(repository.iter_filtered(estado="mantenimiento", batch_size=5))
+    assert [mtk.nombre for mtk in mantenimiento] == [f"MTK-{i:05d}" for i in range(0, 50, 4)]
+    
+    filas = list(repository.iter_filtered(MikroTik.id > 45, estado="activo",
+                                          columnas=[MikroTik.id, MikroTik.ip_mikrotik]))
+    assert [(fila.id, fila.ip_mikrotik) for fila in filas] == [(46, "10.0.0.45"), (47, "10.0.0.46"),
+                                                              (48, "10.0.0.47"), (50, "10.0.0.49")]
+    print(f"✅ Recorridos: {len(mantenimiento)} en mantenimiento, {len(filas)} proyectados")
+
+
+def test_memoria_acotada(base_datos):
+    """Recorrer por bloques no acumula todas las entidades como get_all()."""
+    poblar(20_000)
+    repository = MikroTikRepository()
+    
+    def contar_todos():
+        assert len(repository.get_all()) == 20_000
+    
+    def contar_por_bloques():
+        assert sum(1 for _ in repository.iter_all(batch_size=500)) == 20_000
+    
+    pico_todos = pico_de_memoria(contar_todos)
+    pico_bloques = pico_de_memoria(contar_por_bloques)
+    print(f"✅ Pico de memoria: get_all {pico_todos / 1e6:.1f} MB, iter_all {pico_bloques / 1e6:.1f} MB")
+    assert pico_bloques * 4 < pico_todos
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del recorrido por bloques")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,114 @@
+# test_listados.py
+"""
+Script para probar los listados por proyección y las columnas pesadas diferidas
+"""
+import json
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from domain.models.documento import Documento
+from domain.models.mikrotik import MikroTik
+from application.services.documento_service import DocumentoService
+from application.services.mikrotik_service import MikroTikService
+
+
+def crear_documento(service: DocumentoService, cliente: str) -> Documento:
+    """Crea un documento con un contenido JSON grande."""
+    return service.crear(
+        titulo=f"Upgrade {cliente}", cliente_id=cliente, cliente_nombre=f"Cliente {cliente}",
+        cliente_direccion="Calle 1", ancho_banda="100 Mbps", tipo_transaccion="UPGRADE",
+        tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ing. Pruebas",
+        contenido_json={"correo": "Estimado cliente...", "imagen": "x" * 50_000}
+    )
+
+
+def test_listado_documentos_sin_contenido(sentencias):
+    """El listado de documentos no lee contenido_json; obtener_por_id sí."""
+    service = DocumentoService()
+    creados = [crear_documento(service, f"C{i}") for i in range(3)]
+    
+    sentencias.clear()
+    listado = service.obtener_listado()
+    assert [doc.id for doc in listado] == [doc.id for doc in creados]
+    assert listado[0].cliente_nombre == "Cliente C0" and listado[0].tipo_transaccion == "UPGRADE"
+    assert len(sentencias) == 1 and "contenido_json" not in sentencias[0]
+    
+    # get_all tampoco carga la columna pesada...
+    assert all("contenido_json" not in doc.__dict__ for doc in service.obtener_todos())
+    # ...pero obtener_por_id la trae para editar o exportar
+    documento = service.obtener_por_id(creados[0].id)
+    assert json.loads(documento.contenido_json)["correo"] == "Estimado cliente..."
+    print(f"✅ Listado de {len(listado)} documentos sin contenido JSON")
+
+
+def test_actualizar_conserva_contenido(base_datos):
+    """Actualizar un documento sin tocar el contenido no lo pierde."""
+    service = DocumentoService()
+    documento = crear_documento(service, "C1")
+    assert "contenido_json" in documento.__dict__
+    
+    actualizado = service.actualizar(documento.id, cliente_nombre="Otro nombre")
+    assert actualizado.cliente_nombre == "Otro nombre"
+    assert json.loads(actualizado.contenido_json)["imagen"] == "x" * 50_000
+    
+    # Un objeto del listado completo (sin la columna pesada) tampoco la borra al guardarse
+    completo = service.obtener_todos()[0]
+    completo.ingeniero = "Otro ingeniero"
+    service.repository.update(completo)
+    assert json.loads(service.obtener_por_id(documento.id).contenido_json)["imagen"] == "x" * 50_000
+    print("✅ El contenido se conserva al actualizar")
+
+
+def test_listado_mikrotiks(sentencias):
+    """El listado de MikroTiks trae solo lo que muestra la vista."""
+    service = MikroTikService()
+    for i in range(3):
+        service.repository.create(MikroTik(nombre=f"MTK-{i}", ip_mikrotik=f"10.0.0.{i}",
+                                           modelo="hEX", notas="n" * 10_000))
+    
+    sentencias.clear()
+    listado = service.obtener_listado()
+    assert [(mtk.nombre, mtk.ip_mikrotik, mtk.estado, mtk.disponible, mtk.modelo) for mtk in listado] == [
+        (f"MTK-{i}", f"10.0.0.{i}", "activo", False, "hEX") for i in range(3)
+    ]
+    assert len(sentencias) == 1
+    for columna in ("notas", "contrasena_acceso", "ultimo_export"):
+        assert columna not in sentencias[0]
+    
+    assert "notas" not in service.obtener_todos()[0].__dict__
+    assert service.obtener_por_id(listado[0].id).notas == "n" * 10_000
+    print(f"✅ Listado de {len(listado)} MikroTiks por proyección")
+
+
+def test_conexion_sin_columnas_pesadas(sentencias):
+    """Preparar una conexión a la API lee solo las credenciales del MikroTik."""
+    service = MikroTikService()
+    mikrotik = service.repository.create(MikroTik(nombre="MTK-API", ip_mikrotik="10.0.0.9",
+                                                  usuario_acceso="admin", contrasena_acceso="x",
+                                                  notas="n" * 10_000, ultimo_export="e" * 10_000))
+    
+    sentencias.clear()
+    credenciales = service.repository.get_credenciales(mikrotik.id)
+    assert (credenciales.ip_mikrotik, credenciales.usuario_acceso, credenciales.contrasena_acceso) == (
+        "10.0.0.9", "admin", "x"
+    )
+    assert len(sentencias) == 1
+    for columna in ("notas", "ultimo_export"):
+        assert columna not in sentencias[0]
+    
+    assert service.repository.get_credenciales(mikrotik.id + 1) is None
+    
+    sentencias.clear()
+    service._preparar_conexion(mikrotik.id)
+    assert all("notas" not in sentencia for sentencia in sentencias)
+    print("✅ Credenciales por proyección")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de los listados por proyección")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,167 @@
+# test_monitoreo.py
+"""
+Script para probar el monitoreo de conectividad en segundo plano
+"""
+import sys
+import threading
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from domain.models.nodo_ipran import NodoIPRAN
+from domain.models.estado_sondeo import TIPO_IPRAN
+from domain.models.historial_disponibilidad import SondeoMikroTik
+from infrastructure.network.sondeador import ResultadoSondeo, Sondeador
+from application.services.monitoreo_service import MonitoreoService, TAREA_GPON, TAREA_MIKROTIK
+
+
+def test_tandas_por_subred():
+    """Ninguna tanda lleva más de max_por_subred IPs de la misma /24."""
+    ips = [f"10.0.1.{i}" for i in range(1, 6)] + ["10.0.2.1", "10.0.3.1"]
+    tandas = Sondeador._tandas_por_subred(ips, 2)
+    print(f"✅ Tandas por subred: {tandas}")
+    assert tandas == [
+        ["10.0.1.1", "10.0.1.2", "10.0.2.1", "10.0.3.1"],
+        ["10.0.1.3", "10.0.1.4"],
+        ["10.0.1.5"],
+    ]
+    assert Sondeador._tandas_por_subred(ips, None) == [ips]
+
+
+def test_barrido_nodos_guarda_estado(base_datos):
+    """El barrido de nodos IPRAN guarda el último estado de cada nodo."""
+    with SessionLocal() as db:
+        # Direcciones de loopback: el puerto cerrado responde con RST (equipo vivo)
+        for i in range(1, 4):
+            db.add(NodoIPRAN(alias_nodo=f"N{i}", nombre_nodo=f"Nodo {i}", ip_nodo=f"127.0.0.{i}"))
+        db.add(NodoIPRAN(alias_nodo="MAL", nombre_nodo="IP inválida", ip_nodo="no-es-ip"))
+        db.commit()
+    
+    service = MonitoreoService({"modo_sondeo": "tcp", "timeout_ping": 1, "max_por_subred": 2})
+    assert service.ejecutar_tarea(TIPO_IPRAN)
+    
+    estadisticas = service.obtener_estadisticas()[TIPO_IPRAN]
+    print(f"✅ Barrido IPRAN: {estadisticas['ultimo_resultado']}")
+    assert estadisticas["ultimo_resultado"] == {
+        "total_verificados": 4, "disponibles": 3, "no_disponibles": 1
+    }
+    
+    estados = service.obtener_estados(TIPO_IPRAN)
+    assert sum(estado.disponible for estado in estados.values()) == 3
+    assert [estado.error for estado in estados.values() if not estado.disponible] == ["direccion_invalida"]
+
+
+def test_barrido_mikrotiks_respeta_intentos(base_datos, monkeypatch):
+    """El barrido de MikroTiks envía las sondas por equipo configuradas, como el de nodos."""
+    with SessionLocal() as db:
+        for i in range(1, 4):
+            db.add(MikroTik(nombre=f"MTK-{i}", ip_mikrotik=f"127.0.0.{i}", estado="activo"))
+        db.commit()
+    
+    enviados = {}
+    sondear_multiples = Sondeador.sondear_multiples
+    
+    def contar_envios(sondeador, ips, *args, **kwargs):
+        resultados = sondear_multiples(sondeador, ips, *args, **kwargs)
+        enviados.update({ip: resultado.enviados for ip, resultado in resultados.items()})
+        return resultados
+    monkeypatch.setattr(Sondeador, "sondear_multiples", contar_envios)
+    
+    service = MonitoreoService({"modo_sondeo": "tcp", "timeout_ping": 1, "intentos": 3})
+    assert service.ejecutar_tarea(TAREA_MIKROTIK)
+    
+    print(f"✅ Sondas por MikroTik: {enviados}")
+    assert enviados == {f"127.0.0.{i}": 3 for i in range(1, 4)}
+    assert service.obtener_estadisticas()[TAREA_MIKROTIK]["ultimo_resultado"]["disponibles"] == 3
+
+
+def test_mikrotik_caido_se_recupera(base_datos):
+    """Tras un ciclo caído, el MikroTik sigue en los barridos: vuelve a activo y su historial continúa."""
+    with SessionLocal() as db:
+        for i in range(1, 3):
+            db.add(MikroTik(nombre=f"MTK-{i}", ip_mikrotik=f"10.0.0.{i}", estado="activo"))
+        db.commit()
+    
+    service = MonitoreoService()
+    caidas = {"10.0.0.1"}
+    
+    def sondear_masivo(ips, max_concurrencia=None):
+        resultados = {}
+        for ip in ips:
+            resultados[ip] = ResultadoSondeo(ip=ip, enviados=1, metodo="icmp")
+            if ip not in caidas:
+                resultados[ip].recibidos = 1
+                resultados[ip].rtts_ms.append(2.0)
+        return resultados
+    service.mikrotik_service.sondear_masivo = sondear_masivo
+    
+    # Un ciclo cada 5 minutos (el historial guarda un sondeo por equipo y segundo)
+    historial = service.mikrotik_service.historial
+    registrar_barrido = historial.registrar_barrido
+    momentos = iter([1_700_000_000, 1_700_000_300])
+    historial.registrar_barrido = lambda resultados: registrar_barrido(resultados, next(momentos))
+    
+    assert service.ejecutar_tarea(TAREA_MIKROTIK)
+    assert service.obtener_estadisticas()[TAREA_MIKROTIK]["ultimo_resultado"]["no_disponibles"] == 1
+    caido = service.mikrotik_service.obtener_por_ip("10.0.0.1")
+    assert (caido.estado, caido.disponible) == ("error", False)
+    
+    caidas.clear()
+    assert service.ejecutar_tarea(TAREA_MIKROTIK)
+    assert service.obtener_estadisticas()[TAREA_MIKROTIK]["ultimo_resultado"] == {
+        "total_verificados": 2, "disponibles": 2, "no_disponibles": 0
+    }
+    recuperado = service.mikrotik_service.obtener_por_id(caido.id)
+    assert (recuperado.estado, recuperado.disponible) == ("activo", True)
+    
+    with SessionLocal() as db:
+        sondeos = [(sondeo.ts, sondeo.rtt_ms, sondeo.perdida) for sondeo in
+                   db.query(SondeoMikroTik).filter_by(mikrotik_id=caido.id).order_by(SondeoMikroTik.ts)]
+    print(f"✅ MikroTik recuperado en el segundo ciclo, historial: {sondeos}")
+    assert sondeos == [(1_700_000_000, None, 1.0), (1_700_000_300, 2.0, 0.0)]
+
+
+def test_sin_solapamiento():
+    """Un barrido no empieza mientras el anterior de la misma tarea sigue en curso."""
+    service = MonitoreoService()
+    liberar = threading.Event()
+    service.tareas[TAREA_GPON].funcion = lambda: liberar.wait(5) and {}
+    
+    hilo = threading.Thread(target=service.ejecutar_tarea, args=(TAREA_GPON,))
+    hilo.start()
+    while not service.tareas[TAREA_GPON].candado.locked():
+        pass
+    
+    assert not service.ejecutar_tarea(TAREA_GPON)
+    liberar.set()
+    hilo.join()
+    
+    estadisticas = service.obtener_estadisticas()[TAREA_GPON]
+    print(f"✅ Solapamiento evitado: {estadisticas['omitidas']} barrido omitido")
+    assert (estadisticas["ejecuciones"], estadisticas["omitidas"]) == (1, 1)
+
+
+def test_planificacion_por_intervalos():
+    """Cada tarea se ejecuta según su propio intervalo."""
+    service = MonitoreoService({"intervalo_mikrotik": 0.1, "intervalo_ipran": 0.25,
+                                "intervalo_gpon": 10, "jitter": 0})
+    for tarea in service.tareas.values():
+        tarea.funcion = dict
+    
+    service.ejecutar(duracion=0.6)
+    
+    ejecuciones = {nombre: datos["ejecuciones"] for nombre, datos in service.obtener_estadisticas().items()}
+    print(f"✅ Ejecuciones en 0.6 s: {ejecuciones}")
+    assert 5 <= ejecuciones["mikrotik"] <= 7
+    assert 2 <= ejecuciones["ipran"] <= 3
+    assert ejecuciones["gpon"] == 1
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del monitoreo de conectividad")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,122 @@
+# test_paginacion.py
+"""
+Script para probar la paginación por keyset de los repositorios
+"""
+import datetime
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.documento import Documento
+from domain.models.mikrotik import MikroTik
+from infrastructure.repositories.documento_repository import DocumentoRepository
+from infrastructure.repositories.mikrotik_repository import MikroTikRepository
+
+
+def poblar_mikrotiks(cantidad: int) -> None:
+    """Inserta MikroTiks numerados; los pares son modelo hEX."""
+    with SessionLocal() as db:
+        db.add_all(MikroTik(nombre=f"MTK-{i:03d}", ip_mikrotik=f"10.0.{i // 256}.{i % 256}",
+                            modelo="hEX" if i % 2 == 0 else "CCR")
+                   for i in range(cantidad))
+        db.commit()
+
+
+def poblar_documentos(cantidad: int) -> None:
+    """Inserta documentos con fechas repetidas de a tres (para probar el desempate por id)."""
+    inicio = datetime.datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        db.add_all(Documento(titulo=f"Doc {i}", cliente_id=f"C{i}", cliente_nombre=f"Cliente {i}",
+                             ancho_banda="100 Mbps", tipo_transaccion="UPGRADE",
+                             tipo_topologia="IPRAN+MIKROTIK", ingeniero="Ing",
+                             fecha_creacion=inicio + datetime.timedelta(days=i // 3))
+                   for i in range(cantidad))
+        db.commit()
+
+
+def recorrer(repository, **kwargs) -> list:
+    """Recorre todas las páginas hacia adelante y devuelve las páginas obtenidas."""
+    paginas = [repository.get_page(**kwargs)]
+    while paginas[-1].cursor_siguiente is not None:
+        paginas.append(repository.get_page(cursor=paginas[-1].cursor_siguiente, **kwargs))
+    return paginas
+
+
+def test_recorrido_por_id(base_datos):
+    """Las páginas cubren la tabla sin saltos ni repeticiones, en ambos sentidos."""
+    poblar_mikrotiks(25)
+    repository = MikroTikRepository()
+    
+    paginas = recorrer(repository, limite=10)
+    assert [len(pagina.elementos) for pagina in paginas] == [10, 10, 5]
+    ids = [mtk.id for pagina in paginas for mtk in pagina.elementos]
+    assert ids == list(range(1, 26))
+    assert paginas[0].cursor_anterior is None and paginas[0].total is None
+    
+    # Volver hacia atrás desde la última página
+    anterior = repository.get_page(cursor=paginas[2].cursor_anterior, limite=10, hacia_atras=True)
+    assert [mtk.id for mtk in anterior.elementos] == list(range(11, 21))
+    primera = repository.get_page(cursor=anterior.cursor_anterior, limite=10, hacia_atras=True)
+    assert [mtk.id for mtk in primera.elementos] == list(range(1, 11))
+    assert primera.cursor_anterior is None and primera.cursor_siguiente == (10,)
+    print(f"✅ {len(ids)} MikroTiks en {len(paginas)} páginas, ida y vuelta")
+
+
+def test_orden_por_fecha_con_empates(base_datos):
+    """Ordenando por fecha descendente, el id desempata y no se pierden filas con la misma fecha."""
+    poblar_documentos(20)
+    repository = DocumentoRepository()
+    
+    paginas = recorrer(repository, limite=4, orden="fecha_creacion", descendente=True, contar_total=True)
+    documentos = [doc for pagina in paginas for doc in pagina.elementos]
+    assert [doc.id for doc in documentos] == sorted(range(1, 21), key=lambda i: ((i - 1) // 3, i), reverse=True)
+    assert all(pagina.total == 20 for pagina in paginas)
+    
+    # get_recent_documents usa la misma consulta
+    recientes = repository.get_recent_documents(5)
+    assert [doc.id for doc in recientes] == [doc.id for doc in documentos[:5]]
+    print(f"✅ {len(documentos)} documentos por fecha descendente")
+
+
+def test_listado_paginado_con_filtro(base_datos):
+    """El listado de MikroTiks se pagina como proyección y con filtro de texto."""
+    poblar_mikrotiks(30)
+    repository = MikroTikRepository()
+    
+    pagina = repository.get_listado_pagina(limite=4, texto="hex", contar_total=True)
+    assert pagina.total == 15
+    assert [fila.nombre for fila in pagina.elementos] == ["MTK-000", "MTK-002", "MTK-004", "MTK-006"]
+    assert not isinstance(pagina.elementos[0], MikroTik)
+    
+    siguiente = repository.get_listado_pagina(cursor=pagina.cursor_siguiente, limite=4, texto="hex")
+    assert [fila.nombre for fila in siguiente.elementos] == ["MTK-008", "MTK-010", "MTK-012", "MTK-014"]
+    assert repository.get_listado_pagina(texto="no-existe").elementos == []
+    print("✅ Listado paginado y filtrado")
+
+
+def test_filtro_sin_comodines(base_datos):
+    """'_', '%' y '\\' del texto buscado se comparan literalmente, no como comodines de LIKE."""
+    poblar_mikrotiks(5)
+    repository = MikroTikRepository()
+    repository.create(MikroTik(nombre="MTK_BORDE", ip_mikrotik="10.1.0.1", ubicacion="Nodo 100% fibra"))
+    repository.create(MikroTik(nombre="MTK-RAIZ", ip_mikrotik="10.1.0.2", ubicacion="C:\\rack"))
+    
+    def buscar(texto):
+        return [fila.nombre for fila in repository.get_listado_pagina(texto=texto).elementos]
+    
+    assert buscar("_") == ["MTK_BORDE"]
+    assert buscar("%") == ["MTK_BORDE"]
+    assert buscar("\\") == ["MTK-RAIZ"]
+    assert buscar("mtk_b") == ["MTK_BORDE"]
+    assert buscar("0%") == ["MTK_BORDE"]
+    print("✅ Filtro sin comodines")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la paginación por keyset")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
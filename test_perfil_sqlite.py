@@ -0,0 +1,91 @@
+# test_perfil_sqlite.py
+"""
+Script para probar el perfil de PRAGMAs que se aplica a las conexiones SQLite
+"""
+import sys
+import threading
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import create_engine, text
+
+from config.app_config import DATABASE_CONFIG
+from infrastructure.database.config import PRAGMAS_SQLITE, aplicar_perfil_sqlite
+
+
+def crear_engine_temporal(directorio):
+    """Crea un engine sobre un archivo SQLite dentro de 'directorio'."""
+    return create_engine(f"sqlite:///{directorio / 'test.db'}",
+                         connect_args={"check_same_thread": False})
+
+
+def leer_pragmas(engine, nombres):
+    """Lee el valor actual de varios PRAGMAs."""
+    with engine.connect() as conexion:
+        return {nombre: conexion.exec_driver_sql(f"PRAGMA {nombre}").scalar() for nombre in nombres}
+
+
+def test_perfil_por_defecto(tmp_path):
+    """Cada conexión nueva queda con WAL, synchronous=NORMAL y el resto del perfil."""
+    assert PRAGMAS_SQLITE is DATABASE_CONFIG["sqlite_pragmas"]  # Los valores solo están en app_config.py
+    engine = aplicar_perfil_sqlite(crear_engine_temporal(tmp_path))
+    valores = leer_pragmas(engine, PRAGMAS_SQLITE)
+    print(f"✅ Perfil aplicado: {valores}")
+    assert valores == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "mmap_size": PRAGMAS_SQLITE["mmap_size"],
+        "cache_size": PRAGMAS_SQLITE["cache_size"],
+        "temp_store": 2,  # MEMORY
+        "busy_timeout": PRAGMAS_SQLITE["busy_timeout"],
+        "foreign_keys": 1
+    }
+    engine.dispose()
+
+
+def test_perfil_personalizado(tmp_path):
+    """Los PRAGMAs en None no se tocan y los demás toman el valor indicado."""
+    engine = aplicar_perfil_sqlite(crear_engine_temporal(tmp_path), {"journal_mode": None, "cache_size": -2048})
+    valores = leer_pragmas(engine, ["journal_mode", "cache_size", "foreign_keys"])
+    assert valores == {"journal_mode": "delete", "cache_size": -2048, "foreign_keys": 0}
+    engine.dispose()
+    print("✅ Perfil personalizado")
+
+
+def test_lectores_no_esperan_al_escritor(tmp_path):
+    """Con WAL se puede leer mientras otra conexión tiene una escritura sin confirmar."""
+    engine = aplicar_perfil_sqlite(crear_engine_temporal(tmp_path))
+    with engine.begin() as conexion:
+        conexion.execute(text("CREATE TABLE t (x INTEGER)"))
+        conexion.execute(text("INSERT INTO t VALUES (1)"))
+    
+    escribiendo = threading.Event()
+    terminar = threading.Event()
+    
+    def escritor():
+        with engine.begin() as conexion:
+            conexion.execute(text("INSERT INTO t VALUES (2)"))
+            escribiendo.set()
+            terminar.wait(5)
+    
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    escribiendo.wait(5)
+    try:
+        with engine.connect() as conexion:
+            # Ve la última versión confirmada, sin la fila pendiente del escritor
+            assert conexion.execute(text("SELECT count(*) FROM t")).scalar() == 1
+    finally:
+        terminar.set()
+        hilo.join()
+    engine.dispose()
+    print("✅ Lectura concurrente con una escritura en curso")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del perfil de SQLite")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
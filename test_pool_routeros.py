@@ -0,0 +1,217 @@
+# test_pool_routeros.py
+"""
+Script para probar el pool de conexiones a la API de RouterOS
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.network.pool_routeros import PoolConexionesRouterOS
+
+
+class ConexionFalsa:
+    """Conexión que registra si se cerró y puede simular que el equipo la cortó."""
+    
+    creadas = 0
+    
+    def __init__(self):
+        ConexionFalsa.creadas += 1
+        self.numero = ConexionFalsa.creadas
+        self.cerrada = False
+        self.rota = False
+    
+    def comando(self):
+        if self.rota or self.cerrada:
+            raise ConnectionResetError("conexión cerrada por el equipo")
+        return self.numero
+    
+    def close(self):
+        self.cerrada = True
+
+
+def test_reutiliza_por_equipo():
+    """Operaciones seguidas sobre el mismo equipo usan una sola conexión."""
+    pool = PoolConexionesRouterOS()
+    creadas = []
+    crear = lambda: creadas.append(ConexionFalsa()) or creadas[-1]
+    
+    numeros = [pool.ejecutar("10.0.0.1", crear, ConexionFalsa.comando) for _ in range(5)]
+    pool.ejecutar("10.0.0.2", crear, ConexionFalsa.comando)
+    
+    estadisticas = pool.estadisticas()
+    print(f"✅ Reutilización: {estadisticas}")
+    assert len(set(numeros)) == 1
+    assert len(creadas) == 2
+    assert (estadisticas["aciertos"], estadisticas["fallos"]) == (4, 2)
+
+
+def test_reconexion_automatica():
+    """Si la conexión guardada está rota, la operación se repite con una nueva."""
+    pool = PoolConexionesRouterOS()
+    creadas = []
+    crear = lambda: creadas.append(ConexionFalsa()) or creadas[-1]
+    
+    pool.ejecutar("equipo", crear, ConexionFalsa.comando)
+    creadas[0].rota = True  # El equipo se reinició
+    
+    numero = pool.ejecutar("equipo", crear, ConexionFalsa.comando)
+    print(f"✅ Reconexión: {pool.estadisticas()}")
+    assert numero == creadas[1].numero
+    assert creadas[0].cerrada
+    assert pool.estadisticas()["reconexiones"] == 1
+
+
+def test_error_de_comando_conserva_conexion():
+    """Un error del comando (no de transporte) no descarta la conexión."""
+    pool = PoolConexionesRouterOS()
+    conexion = ConexionFalsa()
+    
+    def falla(_):
+        raise ValueError("no such item")
+    
+    try:
+        pool.ejecutar("equipo", lambda: conexion, falla)
+        assert False, "Se esperaba ValueError"
+    except ValueError:
+        pass
+    
+    assert not conexion.cerrada
+    assert pool.ejecutar("equipo", ConexionFalsa, ConexionFalsa.comando) == conexion.numero
+
+
+def test_inactividad_verificacion_y_tamano():
+    """Las conexiones inactivas se cierran, las dudosas se verifican y el pool tiene tope."""
+    verificadas = []
+    pool = PoolConexionesRouterOS(max_por_equipo=1, tiempo_inactividad=0.2, verificar_tras=0.05,
+                                  verificar=lambda conexion: verificadas.append(conexion.comando()))
+    
+    # Tope de conexiones libres en total: de dos equipos solo se conserva la última devuelta
+    pool.max_total = 1
+    primera, segunda = ConexionFalsa(), ConexionFalsa()
+    pool.ejecutar("otro", lambda: primera,
+                  lambda _: pool.ejecutar("equipo", lambda: segunda, ConexionFalsa.comando))
+    assert segunda.cerrada is False and primera.cerrada is True
+    
+    # Pasado 'verificar_tras' se verifica antes de reutilizarla
+    time.sleep(0.1)
+    pool.ejecutar("equipo", ConexionFalsa, ConexionFalsa.comando)
+    assert verificadas == [segunda.numero]
+    
+    # Pasado 'tiempo_inactividad' se cierra
+    time.sleep(0.25)
+    assert pool.limpiar_inactivas() == 1
+    assert segunda.cerrada
+    print(f"✅ Inactividad y verificación: {pool.estadisticas()}")
+
+
+
+def test_tope_de_conexiones_en_uso():
+    """Un equipo no tiene más de max_por_equipo conexiones en uso: las demás esperan su turno."""
+    pool = PoolConexionesRouterOS(max_por_equipo=2, espera_maxima=5)
+    en_uso, pico, candado = [0], [0], threading.Lock()
+    
+    def operacion(conexion):
+        with candado:
+            en_uso[0] += 1
+            pico[0] = max(pico[0], en_uso[0])
+        time.sleep(0.02)
+        with candado:
+            en_uso[0] -= 1
+        return conexion.numero
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        numeros = list(executor.map(lambda _: pool.ejecutar("equipo", ConexionFalsa, operacion), range(16)))
+    assert pico[0] == 2 and len(set(numeros)) == 2  # Nunca más de dos conexiones al equipo
+    
+    # Si ninguna se libera a tiempo, se informa en lugar de abrir otra
+    pool.espera_maxima = 0.05
+    liberar = threading.Event()
+    ocupadas = [threading.Thread(target=pool.ejecutar, args=("equipo", ConexionFalsa, lambda _: liberar.wait()))
+                for _ in range(2)]
+    for hilo in ocupadas:
+        hilo.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.ejecutar("equipo", ConexionFalsa, ConexionFalsa.comando)
+        assert pool.ejecutar("otro", ConexionFalsa, ConexionFalsa.comando)  # Otros equipos no esperan
+    finally:
+        liberar.set()
+        for hilo in ocupadas:
+            hilo.join()
+    assert pool.ejecutar("equipo", ConexionFalsa, ConexionFalsa.comando) in numeros
+    assert pool.estadisticas()["esperas_agotadas"] == 1
+    print(f"✅ Tope por equipo: {pool.estadisticas()}")
+
+
+def test_limpieza_sin_nuevas_peticiones():
+    """Las conexiones inactivas se cierran aunque no se vuelvan a pedir conexiones."""
+    pool = PoolConexionesRouterOS(tiempo_inactividad=0.05, intervalo_limpieza=0.02)
+    conexion = ConexionFalsa()
+    pool.ejecutar("equipo", lambda: conexion, ConexionFalsa.comando)
+    
+    limite = time.monotonic() + 2
+    while not conexion.cerrada and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert conexion.cerrada and pool.estadisticas()["libres"] == 0
+    
+    # Sin conexiones libres la limpieza termina y se vuelve a lanzar al guardar otra
+    time.sleep(0.05)
+    assert pool._hilo_limpieza is None
+    otra = ConexionFalsa()
+    pool.ejecutar("equipo", lambda: otra, ConexionFalsa.comando)
+    assert pool._hilo_limpieza is not None
+    print(f"✅ Limpieza periódica: {pool.estadisticas()}")
+
+
+def test_olvida_equipos_inactivos():
+    """Los cupos de equipos sin conexiones libres ni en uso no se acumulan."""
+    pool = PoolConexionesRouterOS(tiempo_inactividad=0.05, intervalo_limpieza=60)
+    # Cada cambio de credenciales genera una clave nueva para el mismo equipo
+    for i in range(5):
+        pool.ejecutar(("10.0.0.1", "admin", f"hash{i}"), ConexionFalsa, ConexionFalsa.comando)
+    assert len(pool._cupos) == 5
+    
+    pool.cerrar_equipo(("10.0.0.1", "admin", "hash0"))
+    assert len(pool._cupos) == 4
+    
+    # Un equipo con una operación en curso conserva su cupo
+    en_curso = threading.Event()
+    continuar = threading.Event()
+    
+    def operacion_lenta(conexion):
+        en_curso.set()
+        continuar.wait(2)
+        return conexion.comando()
+    
+    hilo = threading.Thread(target=pool.ejecutar, args=("ocupado", ConexionFalsa, operacion_lenta))
+    hilo.start()
+    en_curso.wait(2)
+    time.sleep(0.06)
+    assert pool.limpiar_inactivas() == 4
+    assert list(pool._cupos) == ["ocupado"]
+    
+    continuar.set()
+    hilo.join()
+    pool.cerrar_todo()
+    assert not pool._cupos and not pool._usuarios
+    print("✅ Cupos de equipos inactivos liberados")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del pool de conexiones RouterOS")
+    print("=" * 50)
+    test_reutiliza_por_equipo()
+    test_reconexion_automatica()
+    test_error_de_comando_conserva_conexion()
+    test_inactividad_verificacion_y_tamano()
+    test_tope_de_conexiones_en_uso()
+    test_limpieza_sin_nuevas_peticiones()
+    test_olvida_equipos_inactivos()
+    print("✅ ¡Pool funcionando correctamente!")
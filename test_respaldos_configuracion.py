@@ -0,0 +1,126 @@
+# test_respaldos_configuracion.py
+"""
+Script para probar los respaldos de configuración comprimidos y deduplicados
+"""
+import sys
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.network.simulador_routeros import SimuladorRouterOS
+from application.services.mikrotik_service import MikroTikService
+from application.services.respaldo_configuracion_service import RespaldoConfiguracionService
+
+
+def export_de_prueba(colas, fecha="jan/02/2026 10:00:00"):
+    """Arma un export con la cabecera de fecha que agrega RouterOS."""
+    lineas = [f"# {fecha} by RouterOS 7.15.3", "/queue simple"]
+    lineas += [f"add max-limit=10M/10M name=cliente-{i:05d} target=10.0.{i // 256}.{i % 256}/32"
+               for i in range(colas)]
+    return "\r\n".join(lineas)
+
+
+def test_deduplicacion_y_compresion(base_datos):
+    """Un export sin cambios no ocupa espacio nuevo, aunque cambie su fecha de generación."""
+    service = RespaldoConfiguracionService()
+    export = export_de_prueba(3000)
+    
+    primero = service.guardar_export(1, export, fecha=1000)
+    segundo = service.guardar_export(1, export_de_prueba(3000, "jan/03/2026 10:00:00"), fecha=2000)
+    otro_equipo = service.guardar_export(2, export, fecha=2000)
+    
+    estadisticas = service.obtener_estadisticas()
+    print(f"✅ Deduplicación: {estadisticas}")
+    assert primero["nueva_version"] and primero["nuevo_contenido"]
+    assert not segundo["nueva_version"] and not segundo["nuevo_contenido"]
+    assert otro_equipo["nueva_version"] and not otro_equipo["nuevo_contenido"]
+    assert (estadisticas["versiones"], estadisticas["contenidos"]) == (2, 1)
+    assert estadisticas["relacion"] > 10
+    
+    versiones = service.listar_versiones(1)
+    assert [(v["fecha"], v["ultima_verificacion"]) for v in versiones] == [(1000, 2000)]
+    assert service.obtener_export(1) == export.replace("\r\n", "\n").split("\n", 1)[1]
+
+
+def test_retencion_de_versiones(base_datos):
+    """Se conservan las últimas N versiones y los contenidos sin uso se borran."""
+    service = RespaldoConfiguracionService()
+    service.versiones_por_equipo = 3
+    
+    for version in range(5):
+        service.guardar_export(1, export_de_prueba(10 + version), fecha=1000 + version)
+    
+    versiones = service.listar_versiones(1)
+    print(f"✅ Retención: {len(versiones)} versiones conservadas de 5")
+    assert [version["fecha"] for version in versiones] == [1004, 1003, 1002]
+    assert service.obtener_estadisticas()["contenidos"] == 3
+    assert service.obtener_export(1, fecha=1002).count("\n") == 12
+    assert service.obtener_export(1, fecha=1000) is None
+    
+    service.eliminar_respaldos(1)
+    assert service.obtener_estadisticas()["contenidos"] == 0
+
+
+def test_recolector_paralelo(base_datos):
+    """La flota se respalda en paralelo y los equipos sin cambios no generan versiones."""
+    with SimuladorRouterOS(colas=500, latencia=0.2) as primero:
+        simuladores = [primero] + [
+            SimuladorRouterOS(colas=500, latencia=0.2, host=f"127.0.0.{i}", puerto=primero.puerto)
+            for i in (2, 3)
+        ]
+        for simulador in simuladores[1:]:
+            simulador.iniciar()
+        try:
+            with SessionLocal() as db:
+                for ip in ["127.0.0.1", "127.0.0.2", "127.0.0.3", "127.0.0.9"]:  # El último no responde
+                    db.add(MikroTik(nombre=f"MTK-{ip}", ip_mikrotik=ip, usuario_acceso="admin",
+                                    contrasena_acceso="x"))
+                db.commit()
+            
+            service = MikroTikService()
+            service.puerto_api = primero.puerto
+            
+            resumen = service.respaldar_configuraciones()
+            print(f"✅ Respaldo paralelo: {resumen['respaldados']} equipos en {resumen['duracion']}s")
+            # Cada equipo necesita 2 respuestas (login y export) de 0.2 s: en serie serían 1.2 s
+            assert (resumen["versiones_nuevas"], resumen["fallidos"]) == (3, 1)
+            assert resumen["duracion"] < 0.9
+            
+            simuladores[1].agregar_cola("cliente-nuevo", max_limit="5M/5M")
+            resumen = service.respaldar_configuraciones()
+            assert (resumen["versiones_nuevas"], resumen["sin_cambios"]) == (1, 2)
+            
+            mikrotik_id = service.obtener_por_ip("127.0.0.2").id
+            assert len(service.respaldos.listar_versiones(mikrotik_id)) == 2
+            assert "name=cliente-nuevo" in service.respaldos.obtener_export(mikrotik_id)
+        finally:
+            for simulador in simuladores[1:]:
+                simulador.detener()
+
+
+def test_migracion_de_exports_antiguos(base_datos):
+    """Los exports guardados en mikrotiks.ultimo_export pasan a los respaldos y la fila queda liviana."""
+    with SessionLocal() as db:
+        db.add(MikroTik(nombre="MTK-VIEJO", ip_mikrotik="10.0.0.1", ultimo_export=export_de_prueba(5)))
+        db.add(MikroTik(nombre="MTK-SIN-EXPORT", ip_mikrotik="10.0.0.2"))
+        db.commit()
+    
+    service = MikroTikService()
+    assert service.respaldos.importar_exports_antiguos() == 1
+    assert service.respaldos.importar_exports_antiguos() == 0
+    
+    mikrotik = service.obtener_por_nombre("MTK-VIEJO")
+    print("✅ Migración de ultimo_export a respaldos versionados")
+    assert "name=cliente-00004" in service.respaldos.obtener_export(mikrotik.id)
+    # La columna es diferida: listar MikroTiks no la carga
+    assert all("ultimo_export" not in m.__dict__ for m in service.obtener_todos())
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de los respaldos de configuración")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,138 @@
+# test_simulador_routeros.py
+"""
+Script para probar el servicio MikroTik contra el simulador de la API de RouterOS
+"""
+import sys
+import time
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from librouteros import connect
+
+from infrastructure.database.config import SessionLocal
+from domain.models.mikrotik import MikroTik
+from infrastructure.network.simulador_routeros import SimuladorRouterOS
+from application.services.mikrotik_service import MikroTikService
+
+
+def crear_mikrotik(ip, contrasena="secreta"):
+    """Registra un MikroTik apuntando al simulador y devuelve su ID."""
+    with SessionLocal() as db:
+        mikrotik = MikroTik(nombre=f"MTK-{ip}", ip_mikrotik=ip, usuario_acceso="admin",
+                            contrasena_acceso=contrasena)
+        db.add(mikrotik)
+        db.commit()
+        return mikrotik.id
+
+
+def servicio_para(simulador):
+    """Servicio que se conecta al puerto del simulador."""
+    service = MikroTikService()
+    service.puerto_api = simulador.puerto
+    return service
+
+
+def test_login_con_credenciales(base_datos):
+    """Las credenciales incorrectas se rechazan igual que en un equipo real."""
+    with SimuladorRouterOS(usuario="admin", contrasena="secreta") as simulador:
+        service = servicio_para(simulador)
+        mal = crear_mikrotik("127.0.0.1", contrasena="otra")
+        
+        exito, mensaje, _ = service.conectar_mikrotik(mal)
+        print(f"✅ Login rechazado: {mensaje}")
+        assert not exito and "invalid user name or password" in mensaje
+        
+        service.actualizar(mal, contrasena="secreta")
+        exito, mensaje, conexion = service.conectar_mikrotik(mal)
+        assert exito, mensaje
+        assert list(conexion.path('/system/identity'))[0]["name"] == "MikroTik"
+        conexion.close()
+        assert simulador.logins_fallidos == 1
+
+
+def test_colas_y_export_con_miles_de_colas(base_datos):
+    """obtener_colas, modificar_cola y obtener_export_completo funcionan sin equipo real."""
+    with SimuladorRouterOS(colas=3000) as simulador:
+        service = servicio_para(simulador)
+        mikrotik_id = crear_mikrotik("127.0.0.1")
+        
+        exito, mensaje, colas = service.obtener_colas(mikrotik_id)
+        assert exito, mensaje
+        assert len(colas) == 3000 and colas[0]["name"] == "cliente-00001"
+        
+        assert service.modificar_cola(mikrotik_id, "cliente-02999", 50, 10)[0]
+        
+        exito, mensaje, export = service.obtener_export_completo(mikrotik_id)
+        print(f"✅ Export de {len(export.splitlines())} líneas con {len(colas)} colas")
+        assert exito, mensaje
+        assert "add max-limit=10240k/51200k name=cliente-02999 target=10.0.11.183/32" in export
+        assert export.endswith("/system identity\nset name=MikroTik")
+        assert service.respaldos.obtener_export(mikrotik_id) in export
+        
+        # Todo por una sola sesión del pool
+        assert simulador.conexiones == 1
+
+
+def test_pool_reconecta_tras_reinicio(base_datos):
+    """Si el equipo corta las sesiones, el pool reconecta y la operación se completa."""
+    with SimuladorRouterOS(colas=10) as simulador:
+        service = servicio_para(simulador)
+        mikrotik_id = crear_mikrotik("127.0.0.1")
+        
+        assert service.probar_conexion(mikrotik_id)[0]
+        assert simulador.cortar_sesiones() == 1
+        
+        exito, mensaje = service.modificar_cola(mikrotik_id, "cliente-00005", 20)
+        print(f"✅ Reconexión tras reinicio: {service.obtener_estadisticas_pool()}")
+        assert exito, mensaje
+        assert service.obtener_estadisticas_pool()["reconexiones"] == 1
+        assert simulador.conexiones == 2
+
+
+def test_latencia_y_perdida_deterministas():
+    """La misma semilla produce las mismas retransmisiones y la latencia se suma a cada respuesta."""
+    retransmisiones = []
+    for _ in range(2):
+        with SimuladorRouterOS(latencia=0.01, perdida=0.3, retransmision=0.05, semilla=7) as simulador:
+            conexion = connect(host=simulador.host, port=simulador.puerto, username="admin", password="")
+            inicio = time.perf_counter()
+            for _ in range(10):
+                list(conexion.path('/system/identity'))
+            duracion = time.perf_counter() - inicio
+            conexion.close()
+            retransmisiones.append(simulador.retransmisiones)
+    
+    print(f"✅ Latencia y pérdida: {retransmisiones[0]} retransmisiones en 11 respuestas")
+    assert retransmisiones[0] == retransmisiones[1] > 0
+    assert duracion >= 10 * 0.01
+
+
+def test_barrido_y_cambio_masivo_en_varios_equipos(base_datos):
+    """Varios equipos simulados en distintas IPs de loopback: barrido TCP y cambio masivo."""
+    with SimuladorRouterOS(colas=200) as primero, \
+            SimuladorRouterOS(colas=50, host="127.0.0.2", puerto=primero.puerto) as segundo:
+        service = servicio_para(primero)
+        service.modo_sondeo = "tcp"
+        ids = [crear_mikrotik(simulador.host) for simulador in (primero, segundo)]
+        
+        resumen = service.verificar_conectividad_masiva()
+        assert (resumen["disponibles"], resumen["no_disponibles"]) == (2, 0)
+        
+        cambios = [(ids[0], f"cliente-{i:05d}", 25) for i in range(1, 101)]
+        cambios += [(ids[1], f"cliente-{i:05d}", 5) for i in range(1, 51)]
+        resultados = service.aplicar_cambios_masivos(cambios)
+        
+        print(f"✅ Cambio masivo: {sum(r['verificado'] for r in resultados)} de {len(cambios)} verificados")
+        assert all(resultado["verificado"] for resultado in resultados)
+        assert segundo.obtener_cola("cliente-00050")["max-limit"] == "5120k/5120k"
+        # Una conexión de la sonda TCP y una sola sesión de la API por equipo
+        assert (primero.conexiones, segundo.conexiones) == (2, 2)
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del servicio MikroTik contra el simulador de RouterOS")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,219 @@
+# test_sondeador.py
+"""
+Script para probar el sondeador de conectividad en proceso
+"""
+import errno
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from infrastructure.network.sondeador import Sondeador, MARGEN_DESCRIPTORES
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _servidor_local():
+    """Abre un servidor TCP en loopback que acepta conexiones en segundo plano."""
+    servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    servidor.bind(("127.0.0.1", 0))
+    servidor.listen(512)
+    
+    def aceptar():
+        while True:
+            try:
+                conexion, _ = servidor.accept()
+                conexion.close()
+            except OSError:
+                return
+    
+    threading.Thread(target=aceptar, daemon=True).start()
+    return servidor
+
+
+def test_sondeo_tcp_multiple():
+    """Sondea muchas IPs de loopback a la vez por TCP y obtiene RTT por cada una."""
+    servidor = _servidor_local()
+    try:
+        sondeador = Sondeador(timeout=2, modo="tcp", puerto_tcp=servidor.getsockname()[1])
+        ips = [f"127.0.0.{i}" for i in range(1, 201)]
+        
+        resultados = sondeador.sondear_multiples(ips, max_pendientes=50)
+        
+        print(f"✅ {sum(r.disponible for r in resultados.values())}/{len(ips)} IPs responden")
+        assert set(resultados) == set(ips)
+        for resultado in resultados.values():
+            assert resultado.disponible
+            assert resultado.metodo == "tcp"
+            assert resultado.perdida == 0.0
+            assert resultado.rtt_ms is not None
+    finally:
+        servidor.close()
+
+
+def test_sondeo_icmp_loopback():
+    """Sondea por ICMP varias IPs de loopback con una ventana menor que la lista."""
+    sondeador = Sondeador(timeout=2, modo="icmp")
+    sock_icmp = sondeador._abrir_socket_icmp()
+    if sock_icmp is None:
+        pytest.skip("El sistema no permite abrir sockets ICMP")
+    sock_icmp[0].close()
+    
+    ips = [f"127.0.0.{i}" for i in range(1, 41)]
+    resultados = sondeador.sondear_multiples(ips, intentos=2, max_pendientes=8)
+    
+    print(f"✅ ICMP: {resultados['127.0.0.1'].como_dict()}")
+    assert set(resultados) == set(ips)
+    for resultado in resultados.values():
+        assert resultado.disponible
+        assert resultado.metodo == "icmp"
+        assert resultado.enviados == 2 and resultado.recibidos == 2
+        assert resultado.rtt_ms is not None
+
+
+@pytest.mark.skipif(resource is None, reason="El sistema no expone RLIMIT_NOFILE")
+def test_sondeo_tcp_con_pocos_descriptores():
+    """Con pocos descriptores libres el barrido TCP achica su ventana en vez de abortar."""
+    servidor = _servidor_local()
+    limite_original = resource.getrlimit(resource.RLIMIT_NOFILE)
+    abiertos = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else 64
+    ocupados = []
+    try:
+        # Apenas por encima del margen: la ventana de 1024 pedida queda en unas pocas conexiones
+        resource.setrlimit(resource.RLIMIT_NOFILE, (abiertos + MARGEN_DESCRIPTORES + 16, limite_original[1]))
+        sondeador = Sondeador(timeout=2, modo="tcp", puerto_tcp=servidor.getsockname()[1])
+        ips = [f"127.0.{i // 250}.{i % 250 + 1}" for i in range(600)]
+        
+        resultados = sondeador.sondear_multiples(ips, max_pendientes=1024)
+        print(f"✅ {sum(r.disponible for r in resultados.values())}/{len(ips)} IPs con pocos descriptores")
+        assert all(resultado.disponible for resultado in resultados.values())
+        
+        # Sin ningún descriptor libre cada IP queda con su error, sin perder las demás
+        while True:
+            try:
+                ocupados.append(socket.socket())
+            except OSError:
+                break
+        resultados = sondeador.sondear_multiples(ips[:50])
+        assert set(resultados) == set(ips[:50])
+        assert all(resultado.error == "error" and not resultado.disponible for resultado in resultados.values())
+    finally:
+        for sock in ocupados:
+            sock.close()
+        resource.setrlimit(resource.RLIMIT_NOFILE, limite_original)
+        servidor.close()
+
+
+def test_ventana_achicada_al_agotar_descriptores(monkeypatch):
+    """Si socket() falla con EMFILE habiendo conexiones en vuelo, la IP se reintenta después."""
+    servidor = _servidor_local()
+    sockets_reales = socket.socket
+    creados = []
+    
+    def socket_limitado(*args, **kwargs):
+        # Como si el proceso solo pudiera tener 5 conexiones abiertas a la vez
+        if sum(sock.fileno() != -1 for sock in creados) >= 5:
+            raise OSError(errno.EMFILE, "Too many open files")
+        sock = sockets_reales(*args, **kwargs)
+        creados.append(sock)
+        return sock
+    
+    try:
+        monkeypatch.setattr(socket, "socket", socket_limitado)
+        sondeador = Sondeador(timeout=2, modo="tcp", puerto_tcp=servidor.getsockname()[1])
+        ips = [f"127.0.0.{i}" for i in range(1, 101)]
+        
+        resultados = sondeador.sondear_multiples(ips, max_pendientes=50)
+        
+        assert all(resultado.disponible for resultado in resultados.values())
+        print("✅ Ventana achicada sin perder IPs")
+    finally:
+        monkeypatch.undo()
+        servidor.close()
+
+
+def test_buffer_icmp_lleno_sin_sondas_en_vuelo():
+    """Con el buffer de envío lleno y nada en vuelo se espera antes de reintentar."""
+    lectura, escritura = socket.socketpair()
+    
+    class SocketLleno:
+        """Socket ICMP cuyo buffer de envío sigue lleno durante 50 ms."""
+        def __init__(self):
+            self.envios = 0
+            self.primer_envio = None
+        
+        def fileno(self):
+            return lectura.fileno()
+        
+        def sendto(self, paquete, destino):
+            self.envios += 1
+            ahora = time.perf_counter()
+            if self.primer_envio is None:
+                self.primer_envio = ahora
+            if ahora - self.primer_envio < 0.05:
+                raise BlockingIOError(errno.EAGAIN, "Resource temporarily unavailable")
+            raise OSError(errno.ENETUNREACH, "Network is unreachable")
+    
+    try:
+        sock = SocketLleno()
+        respuestas = Sondeador(timeout=1, modo="icmp")._ronda_icmp((sock, False), ["10.0.0.1"], 10)
+        
+        assert respuestas == {"10.0.0.1": "inalcanzable"}
+        assert sock.envios < 20
+        print(f"✅ Buffer lleno: {sock.envios} intentos de envío")
+    finally:
+        lectura.close()
+        escritura.close()
+
+
+def test_puerto_cerrado_cuenta_como_respuesta():
+    """Un RST (puerto cerrado) demuestra que el equipo está vivo."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    puerto_libre = sock.getsockname()[1]
+    sock.close()
+    
+    resultado = Sondeador(timeout=1, modo="tcp", puerto_tcp=puerto_libre).sondear("127.0.0.1", intentos=3)
+    
+    print(f"✅ Puerto cerrado: {resultado.como_dict()}")
+    assert resultado.disponible
+    assert resultado.enviados == 3 and resultado.recibidos == 3
+
+
+def test_direccion_invalida():
+    """Las direcciones mal formadas no generan tráfico y se clasifican."""
+    resultado = Sondeador(timeout=1).sondear("no-es-ip")
+    
+    print(f"✅ Dirección inválida: {resultado.como_dict()}")
+    assert not resultado.disponible
+    assert resultado.enviados == 0
+    assert resultado.error == "direccion_invalida"
+    assert resultado.como_dict()["perdida"] == 1.0
+
+
+def test_checksum_icmp():
+    """El checksum de un eco construido debe verificar a cero."""
+    paquete = Sondeador._construir_eco(0x1234, 7)
+    assert Sondeador._checksum(paquete) == 0
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba del Sondeador")
+    print("=" * 50)
+    test_checksum_icmp()
+    test_direccion_invalida()
+    test_sondeo_icmp_loopback()
+    test_puerto_cerrado_cuenta_como_respuesta()
+    test_sondeo_tcp_multiple()
+    if resource is not None:
+        test_sondeo_tcp_con_pocos_descriptores()
+    print("✅ ¡Sondeador funcionando correctamente!")
@@ -0,0 +1,130 @@
+# test_unidad_trabajo.py
+"""
+Script para probar la unidad de trabajo compartida entre repositorios
+"""
+import sys
+import threading
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, "src")
+
+from sqlalchemy import event
+
+from infrastructure.database.config import SessionLocal
+from infrastructure.database.unidad_trabajo import unidad_de_trabajo, sesion_actual
+from domain.models.mikrotik import MikroTik
+from infrastructure.repositories.mikrotik_repository import MikroTikRepository
+from application.services.mikrotik_service import MikroTikService
+
+
+@pytest.fixture
+def base_datos(base_datos):
+    """La base temporal, contando los commits."""
+    base_datos.commits = 0
+    
+    def contar_commit(conexion):
+        base_datos.commits += 1
+    event.listen(base_datos, "commit", contar_commit)
+    return base_datos
+
+
+def contar_mikrotiks():
+    """Cuenta los MikroTiks visibles desde una sesión independiente."""
+    with SessionLocal() as db:
+        return db.query(MikroTik).count()
+
+
+def test_una_transaccion_por_unidad(base_datos):
+    """Varias operaciones de repositorio dentro de la unidad se confirman con un solo commit."""
+    repository = MikroTikRepository()
+    
+    # Sin unidad de trabajo: un commit por llamada, como siempre
+    repository.create(MikroTik(nombre="MTK-0", ip_mikrotik="10.0.0.100"))
+    assert base_datos.commits == 1
+    
+    base_datos.commits = 0
+    with unidad_de_trabajo():
+        creados = [repository.create(MikroTik(nombre=f"MTK-{i}", ip_mikrotik=f"10.0.0.{i}"))
+                   for i in range(1, 4)]
+        creados[0].notas = "editado"
+        repository.update(creados[0])
+        repository.actualizar_disponibilidad_por_id({creado.id: True for creado in creados})
+        # Lo hecho dentro de la unidad se ve dentro de ella, pero todavía no desde otra sesión
+        assert len(repository.get_all()) == 4
+        assert contar_mikrotiks() == 1
+        assert base_datos.commits == 0
+    
+    print(f"✅ Una unidad de trabajo, {base_datos.commits} commit")
+    assert base_datos.commits == 1
+    assert contar_mikrotiks() == 4
+    # Los objetos devueltos siguen siendo legibles fuera de la unidad
+    assert [creado.nombre for creado in creados] == ["MTK-1", "MTK-2", "MTK-3"]
+    assert repository.get_by_id(creados[0].id).notas == "editado"
+    assert sesion_actual() is None
+
+
+def test_rollback_y_anidamiento(base_datos):
+    """Una excepción deshace toda la unidad; una unidad anidada se suma a la externa."""
+    repository = MikroTikRepository()
+    try:
+        with unidad_de_trabajo():
+            repository.create(MikroTik(nombre="MTK-1", ip_mikrotik="10.0.0.1"))
+            with unidad_de_trabajo() as interna:
+                assert interna is sesion_actual()
+                repository.create(MikroTik(nombre="MTK-2", ip_mikrotik="10.0.0.2"))
+            raise RuntimeError("falla a mitad de la operación")
+    except RuntimeError:
+        pass
+    assert contar_mikrotiks() == 0
+    
+    base_datos.commits = 0
+    with unidad_de_trabajo():
+        repository.create(MikroTik(nombre="MTK-1", ip_mikrotik="10.0.0.1"))
+        with unidad_de_trabajo():
+            repository.create(MikroTik(nombre="MTK-2", ip_mikrotik="10.0.0.2"))
+        assert base_datos.commits == 0
+    assert base_datos.commits == 1 and contar_mikrotiks() == 2
+    print("✅ Rollback completo y unidades anidadas")
+
+
+def test_aislamiento_entre_hilos(base_datos):
+    """La sesión compartida es del hilo que abrió la unidad: otros hilos siguen con su sesión por llamada."""
+    repository = MikroTikRepository()
+    vista_desde_otro_hilo = {}
+    
+    def otro_hilo():
+        vista_desde_otro_hilo["sesion"] = sesion_actual()
+        repository.create(MikroTik(nombre="MTK-HILO", ip_mikrotik="10.0.0.9"))
+    
+    with unidad_de_trabajo():
+        repository.create(MikroTik(nombre="MTK-1", ip_mikrotik="10.0.0.1"))
+        repository.update(repository.get_by_nombre("MTK-1"))
+        hilo = threading.Thread(target=otro_hilo)
+        # La escritura del otro hilo espera a que esta unidad confirme
+        hilo.start()
+    
+    hilo.join(timeout=10)
+    assert vista_desde_otro_hilo["sesion"] is None
+    assert contar_mikrotiks() == 2
+    print("✅ Sesiones aisladas por hilo")
+
+
+def test_servicio_elimina_en_una_transaccion(base_datos):
+    """Eliminar un MikroTik borra el equipo, su historial y sus respaldos en un solo commit."""
+    service = MikroTikService()
+    mikrotik = service.repository.create(MikroTik(nombre="MTK-1", ip_mikrotik="10.0.0.1"))
+    service.respaldos.guardar_export(mikrotik.id, "/system identity\nset name=MTK-1")
+    
+    base_datos.commits = 0
+    assert service.eliminar(mikrotik.id)
+    assert base_datos.commits == 1
+    assert service.respaldos.obtener_estadisticas()["contenidos"] == 0
+    print("✅ Eliminación en una sola transacción")
+
+
+if __name__ == "__main__":
+    print("🚀 Prueba de la unidad de trabajo")
+    print("=" * 50)
+    sys.exit(pytest.main([__file__, "-q", "-s"]))